@@ -122,9 +122,12 @@ from agents import (
     get_run_context,
     # NEW: RunStore functions for Redis-backed persistence
     get_run_from_store,
+    get_shared_run_store,
     list_runs_from_store,
     cancel_run
 )
+from agents.event_stream import WS_EVENT_BATCH_MAX, RunEventStream, replay_run_events
+from core.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -330,7 +333,7 @@ async def list_runs(
                 "url": r.get('meta', {}).get('url'),
                 "status": r.get('status', 'unknown'),
                 "created_at": r.get('meta', {}).get('created_at'),
-                "has_result": r.get('result') is not None
+                "has_result": r.get('has_result', r.get('result') is not None)
             }
             for r in runs
         ]
@@ -482,6 +485,20 @@ def verify_ws_token(token: str) -> Optional[dict]:
         return None
 
 
+async def _replay_run(websocket: WebSocket, run_id: str, last_event_id: str):
+    """Resume: replay a run's events to websocket and follow it to the end"""
+    # No store: replayed events already carry their event_id
+    event_stream = RunEventStream(websocket.send_text, run_id=run_id).start()
+    try:
+        await replay_run_events(event_stream, get_shared_run_store(), run_id, last_event_id=last_event_id)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"[WS] Replay of run {run_id} failed: {e}")
+    finally:
+        await event_stream.aclose()
+
+
 @router.websocket("/ws")
 async def websocket_agent_analysis(
     websocket: WebSocket,
@@ -494,11 +511,16 @@ async def websocket_agent_analysis(
     
     Protokolla:
     1. Client lähettää: {"action": "start", "url": "...", "competitor_urls": [...], "language": "fi"}
+       (optional "batch": false disables batch frames)
     2. Server streamaa:
        - {"type": "agent_status", "data": {...}}
        - {"type": "agent_insight", "data": {...}}
-       - {"type": "agent_progress", "data": {...}}
+       - {"type": "agent_progress", "data": {...}}   (latest per agent only)
        - {"type": "analysis_complete", "data": {...}}
+       - {"type": "batch", "events": [...]}          (several of the above in one frame)
+       Every event carries "event_id" (RunStore stream id).
+    3. Reconnect: {"action": "resume", "run_id": "...", "last_event_id": "..."}
+       replays everything after last_event_id and follows the run to the end.
     """
     # Validate token
     user = verify_ws_token(token)
@@ -511,6 +533,8 @@ async def websocket_agent_analysis(
 
     # Track current run_id for this connection
     current_run_id = None
+    # Resume replay; runs beside the receive loop so ping/cancel stay responsive
+    replay_task: Optional[asyncio.Task] = None
 
     await manager.connect(websocket)
 
@@ -549,30 +573,19 @@ async def websocket_agent_analysis(
                 # Luo orchestrator
                 orchestrator = get_orchestrator()
                 
-                # Queue for real-time message sending
-                message_queue = asyncio.Queue()
-                send_task_running = True
-                
-                # Background task to send messages in real-time
-                async def message_sender():
-                    while send_task_running or not message_queue.empty():
-                        try:
-                            msg = await asyncio.wait_for(message_queue.get(), timeout=0.1)
-                            await manager.send_json(websocket, msg)
-                            await asyncio.sleep(0.02)  # Small delay between messages
-                        except asyncio.TimeoutError:
-                            continue
-                        except Exception as e:
-                            logger.error(f"[WS] Failed to send message: {e}")
-                
-                # Start the sender task
-                sender_task = asyncio.create_task(message_sender())
+                # Coalescing, batching sender; events are persisted for resume
+                event_stream = RunEventStream(
+                    websocket.send_text,
+                    run_id=current_run_id,
+                    store=run_context.run_store,
+                    max_batch=WS_EVENT_BATCH_MAX if data.get("batch", True) else 1,
+                ).start()
                 
-                # List to also collect messages for final processing
+                # Insight messages, saved to unified context at the end
                 pending_messages = []
                 
                 # Send run_started message immediately
-                await manager.send_json(websocket, {
+                event_stream.put({
                     "type": "run_started",
                     "run_id": current_run_id,
                     "data": {"url": url, "status": "started"},
@@ -597,8 +610,7 @@ async def websocket_agent_analysis(
                             },
                             "timestamp": datetime.now().isoformat()
                         }
-                        # Send immediately via queue
-                        message_queue.put_nowait(msg)
+                        event_stream.put(msg)
                         pending_messages.append(msg)
                         logger.debug(f"[WS] Queued insight: {insight.agent_name} - {insight.message[:50]}...")
                     except Exception as e:
@@ -620,9 +632,7 @@ async def websocket_agent_analysis(
                             },
                             "timestamp": datetime.now().isoformat()
                         }
-                        # Send immediately via queue
-                        message_queue.put_nowait(msg)
-                        pending_messages.append(msg)
+                        event_stream.put(msg)
                         logger.debug(f"[WS] ✅ Progress queued for {progress.agent_id}: {progress.progress}%")
                     except Exception as e:
                         logger.error(f"[WS] Failed to queue progress: {e}")
@@ -641,9 +651,7 @@ async def websocket_agent_analysis(
                             },
                             "timestamp": datetime.now().isoformat()
                         }
-                        # Send immediately via queue
-                        message_queue.put_nowait(msg)
-                        pending_messages.append(msg)
+                        event_stream.put(msg)
                     except Exception as e:
                         logger.error(f"[WS] Failed to queue status: {e}")
                 
@@ -660,8 +668,7 @@ async def websocket_agent_analysis(
                             },
                             "timestamp": datetime.now().isoformat()
                         }
-                        message_queue.put_nowait(msg)
-                        pending_messages.append(msg)
+                        event_stream.put(msg)
                         logger.debug(f"[WS] Agent {agent_name} started - status sent")
                     except Exception as e:
                         logger.error(f"[WS] Failed to queue start status: {e}")
@@ -682,18 +689,19 @@ async def websocket_agent_analysis(
                             },
                             "timestamp": datetime.now().isoformat()
                         }
-                        message_queue.put_nowait(msg)
-                        pending_messages.append(msg)
+                        event_stream.put(msg)
                         logger.debug(f"[WS] 🐝 Swarm event: {event.from_agent} -> {event.to_agent or 'blackboard'}: {event.subject}")
                     except Exception as e:
                         logger.error(f"[WS] Failed to queue swarm event: {e}")
 
-                orchestrator.set_callbacks(
+                # Per-run subscription: concurrent runs on this worker share the
+                # orchestrator singleton but never each other's callbacks
+                unsubscribe = run_context.subscribe(
                     on_insight=sync_insight,
                     on_progress=sync_progress,
                     on_agent_complete=sync_complete,
                     on_agent_start=sync_start,
-                    on_swarm_event=sync_swarm_event  # NEW: Agent communication events
+                    on_swarm_event=sync_swarm_event
                 )
                 
                 # Suorita analyysi
@@ -718,16 +726,7 @@ async def websocket_agent_analysis(
                         run_context=run_context  # NEW: Pass RunContext for isolation
                     )
                     
-                    # Stop the sender task and wait for remaining messages
-                    send_task_running = False
-                    await asyncio.sleep(0.3)  # Give time for final messages
-                    sender_task.cancel()
-                    try:
-                        await sender_task
-                    except asyncio.CancelledError:
-                        pass
-                    
-                    logger.debug(f"[WS] Analysis complete. Sent {len(pending_messages)} messages in real-time.")
+                    logger.debug(f"[WS] Analysis complete. Stream so far: {event_stream.stats}")
                     
                     # Extract data from agent results for frontend
                     agent_results = result.agent_results or {}
@@ -992,7 +991,7 @@ async def websocket_agent_analysis(
                         logger.debug(f"[WS] ai_search_visibility score: {ai_analysis_data.get('ai_search_visibility', {}).get('overall_ai_search_score', 'N/A')}")
                     
                     # Lähetä lopputulos with all mapped data
-                    await manager.send_json(websocket, {
+                    event_stream.put({
                         "type": WSMessageType.ANALYSIS_COMPLETE.value,
                         "run_id": current_run_id,  # NEW: Include run_id
                         "data": {
@@ -1067,10 +1066,12 @@ async def websocket_agent_analysis(
                     
                     # Save to unified context (async, don't block response)
                     try:
+                        from database import run_in_db_thread
                         from unified_context import save_analysis, save_agent_insight
                         
-                        # Save analysis
-                        analysis_id = save_analysis(
+                        # Save analysis (on a db thread: the websocket loop keeps running)
+                        analysis_id = await run_in_db_thread(
+                            save_analysis,
                             user_id=user_id,
                             url=url,
                             score=your_score,
@@ -1097,7 +1098,8 @@ async def websocket_agent_analysis(
                             for msg in pending_messages:
                                 if msg.get('type') == WSMessageType.AGENT_INSIGHT.value:
                                     insight_data = msg.get('data', {})
-                                    save_agent_insight(
+                                    await run_in_db_thread(
+                                        save_agent_insight,
                                         user_id=user_id,
                                         agent_id=insight_data.get('agent_id'),
                                         message=insight_data.get('message', ''),
@@ -1136,11 +1138,34 @@ async def websocket_agent_analysis(
 
                 except Exception as e:
                     logger.error(f"[WS] Analysis error: {e}", exc_info=True)
-                    await manager.send_json(websocket, {
+                    event_stream.put({
                         "type": WSMessageType.ERROR.value,
+                        "run_id": current_run_id,
                         "data": {"error": str(e)},
                         "timestamp": datetime.now().isoformat()
                     })
+                finally:
+                    unsubscribe()
+                    await event_stream.aclose()
+            
+            elif action == "resume":
+                # Reconnect: replay the run's event stream after last_event_id
+                run_id = data.get("run_id")
+                run = await get_run_from_store(run_id) if run_id else None
+                if not run or run.get('meta', {}).get('user_id') != user.get('sub'):
+                    await manager.send_json(websocket, {
+                        "type": WSMessageType.ERROR.value,
+                        "data": {"error": "Unknown run_id"}
+                    })
+                    continue
+
+                current_run_id = run_id
+                await manager.register_run(current_run_id, websocket)
+                if replay_task is not None:
+                    replay_task.cancel()
+                replay_task = asyncio.create_task(
+                    _replay_run(websocket, run_id, str(data.get("last_event_id") or "0"))
+                )
             
             elif action == "ping":
                 await manager.send_json(websocket, {
@@ -1162,6 +1187,10 @@ async def websocket_agent_analysis(
         logger.error(f"[WS] Error: {e}", exc_info=True)
         await manager.disconnect(websocket, current_run_id)
 
+    finally:
+        if replay_task is not None:
+            replay_task.cancel()
+
 
 # ============================================================================
 # CHAT ENDPOINT - Agent chat for follow-up questions
@@ -1332,7 +1361,9 @@ Analyysin tulokset / Analysis results:
             })
         
         # Call OpenAI
-        response = await openai_client.chat.completions.create(
+        response = await get_llm_gateway().chat(
+            openai_client,
+            label="agent_chat",
             model="gpt-4o-mini",
             messages=openai_messages,
             max_tokens=500,
@@ -28,10 +28,12 @@ from .run_context import (
     RunLimits,
     RunStatus,
     RunTrace,
+    RunSubscriber,
     create_run_context,
     create_run_context_sync,
     get_run_context,
     get_run_from_store,
+    get_shared_run_store,
     list_runs_from_store,
     cancel_run
 )
@@ -111,9 +113,9 @@ __all__ = [
     'WSMessageType', 'WSMessage',
 
     # RunContext (NEW in 2.2.0)
-    'RunContext', 'RunLimits', 'RunStatus', 'RunTrace',
+    'RunContext', 'RunLimits', 'RunStatus', 'RunTrace', 'RunSubscriber',
     'create_run_context', 'create_run_context_sync', 'get_run_context',
-    'get_run_from_store', 'list_runs_from_store', 'cancel_run',
+    'get_run_from_store', 'get_shared_run_store', 'list_runs_from_store', 'cancel_run',
 
     # RunStore (NEW in 2.2.1)
     'RunStore', 'RunMeta', 'RunEvent',
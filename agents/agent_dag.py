@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Growth Engine 2.0 - Agent dependency graph scheduler
+
+Replaces the fixed EXECUTION_PLAN levels of GrowthEngineOrchestrator.
+With levels, every agent in a phase waited for the slowest member of the
+previous phase. Here each agent starts the moment the agents listed in its
+own `dependencies` have finished.
+
+- Dependencies come from BaseAgent.dependencies (unknown ids are ignored)
+- Agents with `optional = True` are skipped when any of their inputs
+  failed or was skipped; required agents still run with partial inputs
+- Every agent reports its queueing delay (inputs ready → started) and
+  run time, and the schedule report names the critical path: the chain
+  of agents that determined the total duration
+
+Usage:
+    dag = AgentDAG.from_agents(run_agents)
+    report = await dag.run(run_one, should_stop=run_context.check_cancelled)
+    report.critical_path   # ['scout', 'analyst', 'prospector', 'strategist', 'planner']
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Set
+
+from .agent_types import AgentResult, AgentStatus
+
+logger = logging.getLogger(__name__)
+
+
+class AgentGraphError(ValueError):
+    """Agent dependencies do not form a DAG."""
+
+
+@dataclass
+class AgentNodeTiming:
+    """Schedule of one agent, in ms relative to the start of the run."""
+    agent_id: str
+    status: str = "pending"   # pending | complete | failed | skipped | cancelled
+    ready_ms: Optional[float] = None
+    start_ms: Optional[float] = None
+    end_ms: Optional[float] = None
+    reason: Optional[str] = None
+
+    @property
+    def queue_delay_ms(self) -> Optional[float]:
+        if self.ready_ms is None or self.start_ms is None:
+            return None
+        return round(self.start_ms - self.ready_ms, 1)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.start_ms is None or self.end_ms is None:
+            return None
+        return round(self.end_ms - self.start_ms, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "ready_ms": self.ready_ms,
+            "start_ms": self.start_ms,
+            "end_ms": self.end_ms,
+            "queue_delay_ms": self.queue_delay_ms,
+            "duration_ms": self.duration_ms,
+            "reason": self.reason,
+        }
+
+
+@dataclass
+class ScheduleReport:
+    """Outcome of AgentDAG.run()."""
+    results: Dict[str, AgentResult] = field(default_factory=dict)
+    timings: Dict[str, AgentNodeTiming] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    makespan_ms: float = 0.0
+    cancelled: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "makespan_ms": self.makespan_ms,
+            "critical_path": self.critical_path,
+            "cancelled": self.cancelled,
+            "agents": {agent_id: t.to_dict() for agent_id, t in self.timings.items()},
+        }
+
+
+RunOne = Callable[[str], Awaitable[Optional[AgentResult]]]
+
+
+class AgentDAG:
+    """Start each agent as soon as its declared dependencies complete."""
+
+    def __init__(self, dependencies: Mapping[str, Sequence[str]], optional: Optional[Set[str]] = None):
+        self.dependencies: Dict[str, List[str]] = {}
+        for agent_id, deps in dependencies.items():
+            unknown = [d for d in deps if d not in dependencies]
+            if unknown:
+                logger.warning(f"[AgentDAG] {agent_id}: ignoring unknown dependencies {unknown}")
+            self.dependencies[agent_id] = [d for d in deps if d in dependencies]
+        self.optional: Set[str] = set(optional or ())
+        self._order = self._topological_order()
+
+    @classmethod
+    def from_agents(cls, agents: Mapping[str, Any]) -> "AgentDAG":
+        return cls(
+            {agent_id: list(getattr(agent, "dependencies", []) or []) for agent_id, agent in agents.items()},
+            optional={agent_id for agent_id, agent in agents.items() if getattr(agent, "optional", False)},
+        )
+
+    def levels(self) -> List[List[str]]:
+        """Longest-path layering, for display (e.g. get_execution_plan)."""
+        depth: Dict[str, int] = {}
+        for agent_id in self._order:
+            deps = self.dependencies[agent_id]
+            depth[agent_id] = 1 + max((depth[d] for d in deps), default=-1)
+        layers: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for agent_id in self._order:
+            layers[depth[agent_id]].append(agent_id)
+        return layers
+
+    async def run(
+        self,
+        run_one: RunOne,
+        should_stop: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> ScheduleReport:
+        """
+        Run every agent via run_one(agent_id), honouring dependencies.
+
+        run_one should not raise; an exception or an ERROR result marks the
+        agent failed. should_stop is checked before each agent starts.
+        """
+        report = ScheduleReport(timings={a: AgentNodeTiming(agent_id=a) for a in self._order})
+        origin = time.perf_counter()
+        done: Dict[str, asyncio.Event] = {a: asyncio.Event() for a in self._order}
+
+        def now_ms() -> float:
+            return round((time.perf_counter() - origin) * 1000, 1)
+
+        async def run_node(agent_id: str) -> None:
+            timing = report.timings[agent_id]
+            try:
+                for dep in self.dependencies[agent_id]:
+                    await done[dep].wait()
+                timing.ready_ms = now_ms()
+
+                bad_inputs = [
+                    d for d in self.dependencies[agent_id]
+                    if report.timings[d].status != "complete"
+                ]
+                if report.cancelled or (should_stop is not None and await should_stop()):
+                    report.cancelled = True
+                    timing.status = "cancelled"
+                    timing.reason = "run cancelled"
+                    return
+                if bad_inputs and agent_id in self.optional:
+                    timing.status = "skipped"
+                    timing.reason = f"inputs not available: {', '.join(bad_inputs)}"
+                    logger.info(f"[AgentDAG] ⏭️ {agent_id} skipped ({timing.reason})")
+                    return
+
+                timing.start_ms = now_ms()
+                try:
+                    result = await run_one(agent_id)
+                except Exception as e:
+                    logger.error(f"[AgentDAG] ❌ {agent_id}: {e}")
+                    result = AgentResult(
+                        agent_id=agent_id, agent_name=agent_id,
+                        status=AgentStatus.ERROR, execution_time_ms=0, error=str(e)
+                    )
+                timing.end_ms = now_ms()
+                if result is not None:
+                    report.results[agent_id] = result
+                timing.status = "complete" if result is not None and result.status != AgentStatus.ERROR else "failed"
+            finally:
+                done[agent_id].set()
+
+        await asyncio.gather(*(run_node(a) for a in self._order))
+
+        report.makespan_ms = now_ms()
+        report.critical_path = self._critical_path(report.timings)
+        return report
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(agent_id: str, path: List[str]) -> None:
+            if state.get(agent_id) == 2:
+                return
+            if state.get(agent_id) == 1:
+                raise AgentGraphError(f"Dependency cycle: {' -> '.join(path + [agent_id])}")
+            state[agent_id] = 1
+            for dep in self.dependencies[agent_id]:
+                visit(dep, path + [agent_id])
+            state[agent_id] = 2
+            order.append(agent_id)
+
+        for agent_id in self.dependencies:
+            visit(agent_id, [])
+        return order
+
+    def _critical_path(self, timings: Dict[str, AgentNodeTiming]) -> List[str]:
+        """Walk back from the last agent to finish through the dependency that gated it."""
+        position = {agent_id: i for i, agent_id in enumerate(self._order)}
+
+        def finish(t: AgentNodeTiming):
+            # Ties (sub-0.1 ms agents) go to the agent later in topological order
+            return (t.end_ms, position[t.agent_id])
+
+        finished = [t for t in timings.values() if t.end_ms is not None]
+        if not finished:
+            return []
+        current = max(finished, key=finish).agent_id
+        path = [current]
+        while True:
+            deps = [timings[d] for d in self.dependencies[current] if timings[d].end_ms is not None]
+            if not deps:
+                break
+            current = max(deps, key=finish).agent_id
+            path.append(current)
+        return list(reversed(path))
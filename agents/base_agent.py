@@ -116,6 +116,8 @@ class BaseAgent(ABC):
         
         # Dependencies
         self.dependencies: List[str] = []
+        # Optional agents are skipped when a dependency failed (see agent_dag.py)
+        self.optional: bool = False
         
         # Callbacks
         self._on_insight: Optional[Callable[[AgentInsight], None]] = None
@@ -973,16 +975,18 @@ class BaseAgent(ABC):
         pass
     
     # ========================================================================
-    # LLM CALL HELPER — semaphore-enforced
+    # LLM CALL HELPER — through the LLM gateway
     # ========================================================================
 
-    async def _call_llm(self, openai_client, **kwargs) -> Any:
+    async def _call_llm(self, openai_client, cache_label: Optional[str] = None, **kwargs) -> Any:
         """
-        Call OpenAI chat completions with the run-scoped LLM semaphore enforced.
+        Call OpenAI chat completions through the process-wide LLM gateway.
 
         All agents should use this instead of calling openai_client directly.
-        This ensures RunContext.limits.llm_concurrency (default: 5) is respected
-        across all concurrent agent LLM calls.
+        The gateway (core/llm_gateway.py) sets concurrency adaptively, keeps
+        scheduled runs behind interactive ones and retries 429s. Identical
+        requests are answered from the LLM cache (label: cache_label, default
+        the agent id) without a gateway slot.
 
         Usage:
             response = await self._call_llm(
@@ -992,16 +996,16 @@ class BaseAgent(ABC):
                 max_tokens=500,
             )
         """
-        semaphore = None
-        if self._run_context is not None:
-            semaphore = self._run_context.limits.llm_semaphore
+        # Imported here: app.config imports the agents package
+        from core.llm_cache import get_llm_cache
+        from core.llm_gateway import get_llm_gateway
 
-        if semaphore is not None:
-            async with semaphore:
-                return await openai_client.chat.completions.create(**kwargs)
-        else:
-            # No RunContext (e.g. tests with global singleton fallback) — call directly
-            return await openai_client.chat.completions.create(**kwargs)
+        label = cache_label or self.id
+
+        async def create():
+            return await get_llm_gateway().chat(openai_client, label=label, **kwargs)
+
+        return await get_llm_cache().completion(label, kwargs, create)
 
     # ========================================================================
     # UTILITY METHODS
@@ -275,6 +275,7 @@ async def _generate_executive_summary(
         max_tokens=300,
         temperature=0.4,
         label=f"exec_summary_{bc.get('competitor_name', 'unknown')[:20]}",
+        cache_label='battlecard_exec_summary',
     )
     return text.strip() if text else None
 
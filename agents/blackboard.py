@@ -11,12 +11,21 @@ The Blackboard is where agents:
 
 This enables TRUE collective intelligence where each agent's
 discoveries immediately benefit all other agents.
+
+Indexing: dotted keys live in a segment trie (forward and reversed), so a
+query like "scout.*" or "*.threat" only visits keys under that prefix or
+suffix. Category, agent and tag indexes narrow the candidates further, and
+TTL expiry is handled by a heap that is drained lazily, not per scanned key.
+Query cost scales with the number of matches, not the blackboard size
+(see scripts/bench_blackboard.py).
 """
 
 import asyncio
+import heapq
 import logging
 import re
-from typing import Dict, Any, List, Optional, Callable, Set, Pattern, Union
+import time
+from typing import Dict, Any, Iterable, List, Optional, Callable, Set, Pattern, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from collections import defaultdict
@@ -94,6 +103,113 @@ class BlackboardEntry:
         return self.value != new_value
 
 
+class _TrieNode:
+    __slots__ = ("children", "key", "size")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.key: Optional[str] = None  # set when a key ends at this node
+        self.size = 0                   # keys in this subtree
+
+
+class KeyIndex:
+    """
+    Segment trie over dotted keys, plus the same trie over reversed segments.
+
+    candidates(pattern) returns a superset of the keys matching a glob
+    pattern, taken from the literal prefix (forward trie) or literal suffix
+    (reversed trie), whichever subtree is smaller. Only patterns with a
+    wildcard at both ends ("*x*") fall back to every key.
+    """
+
+    def __init__(self):
+        self._forward = _TrieNode()
+        self._reverse = _TrieNode()
+
+    def __len__(self) -> int:
+        return self._forward.size
+
+    def add(self, key: str):
+        segments = key.split('.')
+        self._insert(self._forward, segments, key)
+        self._insert(self._reverse, segments[::-1], key)
+
+    def discard(self, key: str):
+        segments = key.split('.')
+        self._remove(self._forward, segments)
+        self._remove(self._reverse, segments[::-1])
+
+    def clear(self):
+        self._forward = _TrieNode()
+        self._reverse = _TrieNode()
+
+    def candidates(self, pattern: str) -> Tuple[int, Iterable[str]]:
+        """(upper bound on count, keys) of possible matches for a glob pattern."""
+        first, last = pattern.find('*'), pattern.rfind('*')
+        if first < 0:
+            return 1, [pattern]
+
+        prefix_parts = pattern[:first].split('.')
+        suffix_parts = pattern[last + 1:].split('.')[::-1]
+        forward = self._nodes(self._forward, prefix_parts, str.startswith)
+        reverse = self._nodes(self._reverse, suffix_parts, str.endswith)
+
+        forward_size = sum(n.size for n in forward)
+        reverse_size = sum(n.size for n in reverse)
+        nodes = forward if forward_size <= reverse_size else reverse
+        return min(forward_size, reverse_size), self._keys(nodes)
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _insert(node: _TrieNode, segments: List[str], key: str):
+        node.size += 1
+        for segment in segments:
+            node = node.children.setdefault(segment, _TrieNode())
+            node.size += 1
+        node.key = key
+
+    @staticmethod
+    def _remove(node: _TrieNode, segments: List[str]):
+        path = [node]
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                return
+            path.append(node)
+        if node.key is None:
+            return
+        node.key = None
+        for depth, current in enumerate(path):
+            current.size -= 1
+            if depth and current.size == 0:
+                # Whole subtree is now empty: prune it from its parent
+                del path[depth - 1].children[segments[depth - 1]]
+                break
+
+    @staticmethod
+    def _nodes(root: _TrieNode, parts: List[str], partial_match) -> List[_TrieNode]:
+        """Nodes whose subtrees hold every key starting with the literal parts."""
+        node = root
+        for segment in parts[:-1]:
+            node = node.children.get(segment)
+            if node is None:
+                return []
+        partial = parts[-1]
+        if not partial:
+            return [node]
+        return [child for name, child in node.children.items() if partial_match(name, partial)]
+
+    @staticmethod
+    def _keys(nodes: List[_TrieNode]) -> Iterable[str]:
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if node.key is not None:
+                yield node.key
+            stack.extend(node.children.values())
+
+
 @dataclass
 class Subscription:
     """Blackboard subscription"""
@@ -127,11 +243,20 @@ class Blackboard:
         # Compiled regex patterns
         self._compiled_patterns: Dict[str, Pattern] = {}
         
-        # Index by category for fast lookup
-        self._by_category: Dict[DataCategory, Set[str]] = defaultdict(set)
+        # Key trie for pattern queries
+        self._key_index = KeyIndex()
+        # Insertion sequence per key (query results keep publish order)
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        
+        # Secondary indexes: dicts used as insertion-ordered sets of keys
+        self._by_category: Dict[DataCategory, Dict[str, None]] = defaultdict(dict)
+        self._by_agent: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._by_tag: Dict[str, Dict[str, None]] = defaultdict(dict)
         
-        # Index by agent
-        self._by_agent: Dict[str, Set[str]] = defaultdict(set)
+        # TTL heap: (expires_at epoch, seq, key, entry); stale items are skipped
+        self._expiry_heap: List[Tuple[float, int, str, BlackboardEntry]] = []
+        self._heap_seq = 0
         
         # Event callbacks for monitoring
         self._on_publish: Optional[Callable] = None
@@ -144,7 +269,8 @@ class Blackboard:
             'total_notifications': 0,
             'total_subscriptions': 0,
             'by_agent': defaultdict(lambda: {'writes': 0, 'reads': 0}),
-            'by_category': defaultdict(int)
+            'by_category': defaultdict(int),
+            'query_candidates': 0
         }
         
         # Lock for thread safety
@@ -187,6 +313,8 @@ class Blackboard:
             The created BlackboardEntry
         """
         async with self._lock:
+            self._evict_expired()
+
             # Check for existing entry (versioning)
             existing = self._data.get(key)
             version = 1
@@ -215,17 +343,19 @@ class Blackboard:
             )
             
             # Store entry
+            if existing:
+                self._unindex(existing)
+            else:
+                self._key_index.add(key)
+                self._seq[key] = self._next_seq
+                self._next_seq += 1
             self._data[key] = entry
+            self._index(entry)
             self._history.append(entry)
             # Trim oldest entries if over limit
             if len(self._history) > self._max_history:
                 self._history = self._history[-self._max_history:]
             
-            # Update indexes
-            if category:
-                self._by_category[category].add(key)
-            self._by_agent[agent_id].add(key)
-            
             # Update stats
             self._stats['total_writes'] += 1
             self._stats['by_agent'][agent_id]['writes'] += 1
@@ -303,11 +433,9 @@ class Blackboard:
         if entry is None:
             return default
         
-        # Check expiration
+        # Check expiration (O(1); the TTL heap catches the rest lazily)
         if entry.is_expired():
-            # dict.pop() is GIL-atomic in CPython — safe for best-effort expiry cleanup
-            # in a sync method. The async write path holds self._lock for consistency.
-            self._data.pop(key, None)
+            self._remove(key)
             return default
         
         # Update stats
@@ -322,7 +450,7 @@ class Blackboard:
         entry = self._data.get(key)
         
         if entry and entry.is_expired():
-            self._data.pop(key, None)
+            self._remove(key)
             return None
         
         return entry
@@ -358,37 +486,35 @@ class Blackboard:
             category: Filter by category
             limit: Max results
         """
-        # Get or compile pattern
-        if pattern not in self._compiled_patterns:
-            regex_pattern = pattern.replace('.', r'\.').replace('*', '.*')
-            self._compiled_patterns[pattern] = re.compile(f'^{regex_pattern}$')
-        
-        regex = self._compiled_patterns[pattern]
-        results = []
-        
-        # Start with category index if available
-        if category:
-            keys_to_check = self._by_category.get(category, set())
-        else:
-            keys_to_check = self._data.keys()
-        
-        for key in keys_to_check:
-            if len(results) >= limit:
-                break
-            
+        self._evict_expired()
+        regex = self._compile(pattern)
+        
+        # Walk the smallest candidate set: key trie, category or tag index
+        size, keys = self._key_index.candidates(pattern)
+        if category is not None:
+            by_category = self._by_category.get(category, {})
+            if len(by_category) < size:
+                size, keys = len(by_category), by_category
+        for tag in tags or ():
+            by_tag = self._by_tag.get(tag, {})
+            if len(by_tag) < size:
+                size, keys = len(by_tag), by_tag
+        
+        matches = []
+        for key in keys:
+            self._stats['query_candidates'] += 1
             entry = self._data.get(key)
-            if not entry or entry.is_expired():
+            if entry is None or not regex.match(key):
                 continue
-            
-            # Pattern match
-            if not regex.match(key):
+            if category is not None and entry.category != category:
                 continue
-            
-            # Tag filter
             if tags and not tags.issubset(entry.tags):
                 continue
-            
-            results.append(entry)
+            matches.append(entry)
+        
+        # Same order as a scan over the data would give (publish order)
+        matches.sort(key=lambda e: self._seq[e.key])
+        results = matches[:limit]
         
         # Update stats
         if agent_id:
@@ -405,13 +531,8 @@ class Blackboard:
         limit: int = 100
     ) -> List[BlackboardEntry]:
         """Query by category (fast indexed lookup)"""
-        keys = list(self._by_category.get(category, set()))[:limit]
-        entries = []
-        
-        for key in keys:
-            entry = self._data.get(key)
-            if entry and not entry.is_expired():
-                entries.append(entry)
+        self._evict_expired()
+        entries = self._entries_for(self._by_category.get(category, {}), limit)
         
         if agent_id:
             self._stats['by_agent'][agent_id]['reads'] += len(entries)
@@ -425,13 +546,8 @@ class Blackboard:
         limit: int = 100
     ) -> List[BlackboardEntry]:
         """Get all entries published by specific agent"""
-        keys = list(self._by_agent.get(from_agent, set()))[:limit]
-        entries = []
-        
-        for key in keys:
-            entry = self._data.get(key)
-            if entry and not entry.is_expired():
-                entries.append(entry)
+        self._evict_expired()
+        entries = self._entries_for(self._by_agent.get(from_agent, {}), limit)
         
         if requester_id:
             self._stats['by_agent'][requester_id]['reads'] += len(entries)
@@ -463,10 +579,7 @@ class Blackboard:
         
         self._subscriptions[pattern].append(subscription)
         
-        # Compile pattern if needed
-        if pattern not in self._compiled_patterns:
-            regex_pattern = pattern.replace('.', r'\.').replace('*', '.*')
-            self._compiled_patterns[pattern] = re.compile(f'^{regex_pattern}$')
+        self._compile(pattern)
         
         self._stats['total_subscriptions'] += 1
         
@@ -544,27 +657,25 @@ class Blackboard:
     
     def delete(self, key: str):
         """Delete entry"""
-        if key in self._data:
-            entry = self._data[key]
-            
-            # Remove from indexes
-            if entry.category:
-                self._by_category[entry.category].discard(key)
-            self._by_agent[entry.agent_id].discard(key)
-            
-            del self._data[key]
+        if self._remove(key):
             logger.debug(f"[Blackboard] 🗑️ Deleted '{key}'")
     
     def clear(self, pattern: Optional[str] = None):
         """Clear entries matching pattern (or all)"""
         if pattern is None:
             self._data.clear()
+            self._key_index.clear()
+            self._seq.clear()
             self._by_category.clear()
             self._by_agent.clear()
+            self._by_tag.clear()
+            self._expiry_heap.clear()
             logger.info("[Blackboard] 🗑️ Cleared all entries")
         else:
+            # Prefix match, as before: the pattern need not cover the whole key
             regex = re.compile(pattern.replace('.', r'\.').replace('*', '.*'))
-            keys_to_delete = [k for k in self._data if regex.match(k)]
+            _, keys = self._key_index.candidates(pattern + '*')
+            keys_to_delete = [k for k in keys if regex.match(k)]
             
             for key in keys_to_delete:
                 self.delete(key)
@@ -573,18 +684,93 @@ class Blackboard:
     
     def cleanup_expired(self) -> int:
         """Remove expired entries"""
-        expired = [k for k, e in self._data.items() if e.is_expired()]
-        
-        for key in expired:
-            self.delete(key)
+        count = self._evict_expired()
         
-        if expired:
-            logger.info(f"[Blackboard] 🧹 Cleaned {len(expired)} expired entries")
+        if count:
+            logger.info(f"[Blackboard] 🧹 Cleaned {count} expired entries")
         
-        return len(expired)
+        return count
+    
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+    
+    def _compile(self, pattern: str) -> Pattern:
+        regex = self._compiled_patterns.get(pattern)
+        if regex is None:
+            regex_pattern = pattern.replace('.', r'\.').replace('*', '.*')
+            regex = self._compiled_patterns[pattern] = re.compile(f'^{regex_pattern}$')
+        return regex
+    
+    def _index(self, entry: BlackboardEntry):
+        key = entry.key
+        if entry.category:
+            self._by_category[entry.category][key] = None
+        self._by_agent[entry.agent_id][key] = None
+        for tag in entry.tags:
+            self._by_tag[tag][key] = None
+        if entry.ttl is not None:
+            expires_at = entry.timestamp.timestamp() + entry.ttl
+            self._heap_seq += 1
+            heapq.heappush(self._expiry_heap, (expires_at, self._heap_seq, key, entry))
+            # Republished keys leave stale heap items behind; rebuild when they dominate
+            if len(self._expiry_heap) > 2 * len(self._data) + 64:
+                self._expiry_heap = [item for item in self._expiry_heap if self._data.get(item[2]) is item[3]]
+                heapq.heapify(self._expiry_heap)
+    
+    def _unindex(self, entry: BlackboardEntry):
+        key = entry.key
+        for index, name in ((self._by_category, entry.category), (self._by_agent, entry.agent_id)):
+            if name is not None and key in index.get(name, ()):
+                del index[name][key]
+                if not index[name]:
+                    del index[name]
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self._by_tag[tag]
+    
+    def _remove(self, key: str) -> bool:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        self._unindex(entry)
+        self._key_index.discard(key)
+        self._seq.pop(key, None)
+        return True
+    
+    def _evict_expired(self) -> int:
+        """Pop due items off the TTL heap; O(expired log n), not a full scan."""
+        heap = self._expiry_heap
+        now = time.time()
+        evicted = 0
+        while heap and heap[0][0] < now:
+            item = heapq.heappop(heap)
+            _, _, key, entry = item
+            if self._data.get(key) is not entry:
+                continue  # replaced or deleted since it was scheduled
+            if not entry.is_expired():
+                heapq.heappush(heap, item)  # clock skew at the boundary: retry later
+                break
+            self._remove(key)
+            evicted += 1
+        return evicted
+    
+    def _entries_for(self, keys: Dict[str, None], limit: int) -> List[BlackboardEntry]:
+        entries = []
+        for key in keys:
+            if len(entries) >= limit:
+                break
+            entry = self._data.get(key)
+            if entry is not None:
+                entries.append(entry)
+        return entries
     
     def get_all_keys(self) -> List[str]:
         """Get all current keys"""
+        self._evict_expired()
         return list(self._data.keys())
     
     def get_stats(self) -> Dict[str, Any]:
@@ -599,7 +785,9 @@ class Blackboard:
             'by_category': dict(self._stats['by_category']),
             'active_subscriptions': sum(len(s) for s in self._subscriptions.values()),
             'subscription_patterns': list(self._subscriptions.keys()),
-            'history_size': len(self._history)
+            'history_size': len(self._history),
+            'query_candidates': self._stats['query_candidates'],
+            'pending_expiries': len(self._expiry_heap)
         }
     
     def get_history(
@@ -625,11 +813,8 @@ class Blackboard:
     
     def get_snapshot(self) -> Dict[str, Any]:
         """Get complete snapshot of current state"""
-        return {
-            key: entry.to_dict()
-            for key, entry in self._data.items()
-            if not entry.is_expired()
-        }
+        self._evict_expired()
+        return {key: entry.to_dict() for key, entry in self._data.items()}
     
     def reset(self):
         """Full reset"""
@@ -637,15 +822,20 @@ class Blackboard:
         self._history.clear()
         self._subscriptions.clear()
         self._compiled_patterns.clear()
+        self._key_index.clear()
+        self._seq.clear()
         self._by_category.clear()
         self._by_agent.clear()
+        self._by_tag.clear()
+        self._expiry_heap.clear()
         self._stats = {
             'total_writes': 0,
             'total_reads': 0,
             'total_notifications': 0,
             'total_subscriptions': 0,
             'by_agent': defaultdict(lambda: {'writes': 0, 'reads': 0}),
-            'by_category': defaultdict(int)
+            'by_category': defaultdict(int),
+            'query_candidates': 0
         }
         logger.info("[Blackboard] 🔄 Blackboard reset")
 
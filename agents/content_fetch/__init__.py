@@ -1,5 +1,6 @@
 """agents.content_fetch — website content fetching providers."""
 
 from .orchestrator import get_website_content  # noqa: F401
+from .parsed_page import ParsedPage  # noqa: F401
 
-__all__ = ["get_website_content"]
+__all__ = ["get_website_content", "ParsedPage"]
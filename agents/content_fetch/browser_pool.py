@@ -0,0 +1,301 @@
+"""
+Long-lived Playwright browser pool for SPA rendering.
+
+Launching Chromium costs seconds, and competitor discovery fans out to many
+SPAs. The pool keeps one browser alive for the lifetime of the app and hands
+every render a fresh, isolated BrowserContext (own cookies, storage, cache).
+
+- max_pages bounds concurrently open pages (semaphore)
+- the browser is recycled after recycle_after renders, when the host runs
+  low on memory (at most once per memory_recycle_interval, so sustained
+  pressure does not relaunch it on every render), or when it has
+  crashed/disconnected; in-flight renders keep the retiring browser until
+  their context closes
+- the pool only starts when both PLAYWRIGHT_ENABLED and
+  BROWSER_POOL_ENABLED are set
+- block_resources aborts image/font/media requests at the network layer
+
+Usage:
+  # At app startup:
+  await get_browser_pool().start()
+
+  # Per render:
+  async with get_browser_pool().page(user_agent=UA) as page:
+      await page.goto(url)
+
+  # At app shutdown:
+  await get_browser_pool().stop()
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import (
+    BROWSER_POOL_ENABLED,
+    BROWSER_POOL_MAX_PAGES,
+    BROWSER_POOL_MEMORY_RECYCLE_INTERVAL,
+    BROWSER_POOL_MIN_FREE_MB,
+    BROWSER_POOL_RECYCLE_AFTER,
+    PLAYWRIGHT_ENABLED,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+    async_playwright = None  # type: ignore
+
+LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+]
+
+HEAVY_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+
+async def block_heavy_resources(route) -> None:
+    """Route handler: abort image/font/media requests, let everything else through."""
+    try:
+        if route.request.resource_type in HEAVY_RESOURCE_TYPES:
+            await route.abort()
+            return
+        await route.continue_()
+    except Exception:
+        try:
+            await route.continue_()
+        except Exception:
+            pass
+
+
+def _available_memory_mb() -> Optional[int]:
+    """MemAvailable from /proc/meminfo, or None where it can't be read."""
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class BrowserPool:
+    """One shared Chromium, a fresh BrowserContext per render."""
+
+    def __init__(
+        self,
+        max_pages: int = BROWSER_POOL_MAX_PAGES,
+        recycle_after: int = BROWSER_POOL_RECYCLE_AFTER,
+        min_free_mb: int = BROWSER_POOL_MIN_FREE_MB,
+        launch_args: Optional[List[str]] = None,
+        memory_recycle_interval: float = BROWSER_POOL_MEMORY_RECYCLE_INTERVAL,
+    ):
+        self.max_pages = max(1, max_pages)
+        self.recycle_after = recycle_after
+        self.min_free_mb = min_free_mb
+        self.memory_recycle_interval = memory_recycle_interval
+        self.launch_args = launch_args if launch_args is not None else list(LAUNCH_ARGS)
+
+        self._playwright = None
+        self._browser = None
+        self._browser_renders = 0
+        self._launched_at = 0.0
+        # browser → number of open contexts; retiring browsers close at zero
+        self._leases: Dict[Any, int] = {}
+        self._retiring: set = set()
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._lock = asyncio.Lock()
+        self._stats = {
+            "launches": 0,
+            "recycles": 0,
+            "renders": 0,
+            "render_errors": 0,
+        }
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> bool:
+        """Start Playwright and launch the browser. Returns False if unavailable."""
+        if self.started:
+            return True
+        if not (PLAYWRIGHT_ENABLED and BROWSER_POOL_ENABLED):
+            return False
+        if not PLAYWRIGHT_AVAILABLE or async_playwright is None:
+            return False
+        try:
+            self._playwright = await async_playwright().start()
+            async with self._lock:
+                await self._launch()
+            return True
+        except Exception as e:
+            logger.warning("[browser_pool] start failed, falling back to per-call launch: %s", e)
+            await self.stop()
+            return False
+
+    async def stop(self) -> None:
+        """Close every browser and stop Playwright."""
+        browsers = set(self._leases) | self._retiring
+        if self._browser is not None:
+            browsers.add(self._browser)
+        for browser in browsers:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self._browser = None
+        self._leases.clear()
+        self._retiring.clear()
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def page(
+        self,
+        *,
+        user_agent: Optional[str] = None,
+        viewport: Optional[Dict[str, int]] = None,
+        locale: Optional[str] = None,
+        block_resources: bool = False,
+    ) -> AsyncIterator[Any]:
+        """Yield a page in a fresh BrowserContext; the context is closed on exit."""
+        if not self.started:
+            raise RuntimeError("BrowserPool is not started")
+
+        context_kwargs: Dict[str, Any] = {}
+        if user_agent:
+            context_kwargs["user_agent"] = user_agent
+        if viewport:
+            context_kwargs["viewport"] = viewport
+        if locale:
+            context_kwargs["locale"] = locale
+
+        async with self._semaphore:
+            browser = await self._lease()
+            context = None
+            try:
+                context = await browser.new_context(**context_kwargs)
+                page = await context.new_page()
+                if block_resources:
+                    await page.route("**/*", block_heavy_resources)
+                yield page
+            except Exception:
+                self._stats["render_errors"] += 1
+                raise
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                await self._release(browser)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "started": self.started,
+            "max_pages": self.max_pages,
+            "open_pages": sum(self._leases.values()),
+            "browser_renders": self._browser_renders,
+            "retiring_browsers": len(self._retiring),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _launch(self) -> None:
+        self._browser = await self._playwright.chromium.launch(
+            headless=True, args=self.launch_args
+        )
+        self._leases[self._browser] = 0
+        self._browser_renders = 0
+        self._launched_at = time.monotonic()
+        self._stats["launches"] += 1
+        logger.info("[browser_pool] launched chromium (max_pages=%d)", self.max_pages)
+
+    def _recycle_reason(self) -> Optional[str]:
+        if self._browser is None:
+            return "missing"
+        try:
+            if not self._browser.is_connected():
+                return "disconnected"
+        except Exception:
+            return "disconnected"
+        if self.recycle_after and self._browser_renders >= self.recycle_after:
+            return "render_limit"
+        if self.min_free_mb and time.monotonic() - self._launched_at >= self.memory_recycle_interval:
+            free_mb = _available_memory_mb()
+            if free_mb is not None and free_mb < self.min_free_mb:
+                return "memory_pressure"
+        return None
+
+    async def _lease(self):
+        async with self._lock:
+            reason = self._recycle_reason()
+            if reason:
+                if self._browser is not None:
+                    logger.info("[browser_pool] recycling browser (%s)", reason)
+                    self._stats["recycles"] += 1
+                    await self._retire(self._browser)
+                await self._launch()
+            browser = self._browser
+            self._leases[browser] = self._leases.get(browser, 0) + 1
+            self._browser_renders += 1
+            self._stats["renders"] += 1
+            return browser
+
+    async def _release(self, browser) -> None:
+        async with self._lock:
+            self._leases[browser] = max(0, self._leases.get(browser, 1) - 1)
+            if browser in self._retiring and self._leases[browser] == 0:
+                await self._close_retired(browser)
+
+    async def _retire(self, browser) -> None:
+        self._browser = None
+        if self._leases.get(browser, 0) == 0:
+            await self._close_retired(browser)
+        else:
+            self._retiring.add(browser)
+
+    async def _close_retired(self, browser) -> None:
+        self._retiring.discard(browser)
+        self._leases.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
@@ -0,0 +1,490 @@
+"""
+App-wide pooled httpx client for outbound fetches.
+
+Every analysis used to open short-lived AsyncClients (one per retry, one for
+sitemap checks, one for the AI-accessibility probes), so no connection was
+ever reused and each request paid DNS, TCP and TLS setup again. One client is
+now created in the app lifespan and shared:
+
+- HTTP/2 when the h2 package is installed, HTTP/1.1 otherwise
+- keep-alive pool sized by HTTP_CLIENT_MAX_CONNECTIONS / _MAX_KEEPALIVE
+- at most HTTP_CLIENT_MAX_PER_HOST concurrent requests per host
+- DNS answers cached for DNS_CACHE_TTL seconds (failures for
+  DNS_NEGATIVE_CACHE_TTL); the SSRF guard resolves through the same cache,
+  so the fetch connects to the exact addresses that were checked
+- connect targets are re-checked against the SSRF block list, which also
+  covers redirects to internal hosts and DNS rebinding
+
+Usage:
+  # At app startup / shutdown:
+  await start_http_client()
+  await close_http_client()
+
+  # Per request (falls back to a one-off client when not started):
+  async with outbound_client() as client:
+      res = await client.get(url, timeout=10)
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+import httpcore
+import httpx
+
+from agents.content_fetch.ssrf_guard import is_blocked_address
+from app.config import (
+    DNS_CACHE_TTL,
+    DNS_NEGATIVE_CACHE_TTL,
+    HTTP_CLIENT_HTTP2,
+    HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    HTTP_CLIENT_MAX_CONNECTIONS,
+    HTTP_CLIENT_MAX_KEEPALIVE,
+    HTTP_CLIENT_MAX_PER_HOST,
+    REQUEST_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+
+# ============================================================================
+# DNS CACHE
+# ============================================================================
+
+class DNSCache:
+    """
+    host → resolved IP strings, expiring after ttl seconds.
+
+    Lookup failures are cached for negative_ttl so an unresolvable host
+    fails fast, and concurrent lookups of the same host share one query.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DNS_CACHE_TTL,
+        negative_ttl: float = DNS_NEGATIVE_CACHE_TTL,
+        max_entries: int = 4096,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # host → (expires_at, ips or the cached gaierror)
+        self._entries: Dict[str, Tuple[float, Union[List[str], socket.gaierror]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {"hits": 0, "misses": 0, "negative_hits": 0, "lookups": 0}
+
+    def get(self, host: str) -> Optional[List[str]]:
+        """Fresh cached addresses, or None (also for cached failures)."""
+        value = self._lookup(host.lower())
+        return list(value) if isinstance(value, list) else None
+
+    def put(self, host: str, ips: List[str]) -> None:
+        if not ips or self.ttl <= 0:
+            return
+        self._store(host.lower(), list(dict.fromkeys(ips)), self.ttl)
+
+    async def resolve(self, host: str, port: int = 443) -> List[str]:
+        """Cached lookup, falling back to the event loop's resolver (thread pool)."""
+        key = host.lower()
+        value = self._lookup(key)
+        if isinstance(value, list):
+            return list(value)
+        if isinstance(value, socket.gaierror):
+            raise socket.gaierror(*value.args)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return list(await asyncio.shield(inflight))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self._stats["lookups"] += 1
+            infos = await asyncio.get_running_loop().getaddrinfo(key, port, type=socket.SOCK_STREAM)
+            ips = list(dict.fromkeys(info[4][0] for info in infos))
+            self.put(key, ips)
+            future.set_result(ips)
+            return list(ips)
+        except socket.gaierror as e:
+            if self.negative_ttl > 0:
+                self._store(key, e, self.negative_ttl)
+            future.set_exception(e)
+            raise
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if future.done() and not future.cancelled():
+                # Mark retrieved so an unshared failure isn't logged by asyncio
+                future.exception()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "entries": len(self._entries)}
+
+    def _lookup(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            self._stats["misses"] += 1
+            return None
+        if isinstance(value, socket.gaierror):
+            self._stats["negative_hits"] += 1
+        else:
+            self._stats["hits"] += 1
+        return value
+
+    def _store(self, key: str, value, ttl: float) -> None:
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            self._evict_expired()
+            if len(self._entries) >= self.max_entries:
+                # Still full: drop the entry closest to expiry
+                oldest = min(self._entries, key=lambda h: self._entries[h][0])
+                self._entries.pop(oldest, None)
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for host in [h for h, (exp, _) in self._entries.items() if exp < now]:
+            self._entries.pop(host, None)
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+class CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore backend that connects to DNS-cached addresses.
+
+    Only the TCP connect target changes; TLS SNI and the Host header still
+    use the original hostname, so certificates validate as usual.
+    """
+
+    def __init__(
+        self,
+        dns_cache: DNSCache,
+        backend: Optional[httpcore.AsyncNetworkBackend] = None,
+        address_filter: Optional[Callable[[str], bool]] = is_blocked_address,
+    ):
+        self.dns_cache = dns_cache
+        self._backend = backend or httpcore.AnyIOBackend()
+        # Returns True for addresses that must never be connected to
+        self._address_filter = address_filter
+
+    async def connect_tcp(self, host: str, port: int, timeout=None, local_address=None, socket_options=None):
+        if _is_ip_literal(host):
+            addresses = [host.strip("[]")]
+        else:
+            try:
+                addresses = await self.dns_cache.resolve(host, port)
+            except OSError as e:
+                raise httpcore.ConnectError(str(e)) from e
+
+        if self._address_filter is not None:
+            allowed = [a for a in addresses if not self._address_filter(a)]
+            if not allowed:
+                raise httpcore.ConnectError(f"Connection to {host} blocked (internal address)")
+            addresses = allowed
+
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout,
+                    local_address=local_address, socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        raise last_error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+# ============================================================================
+# POOLED TRANSPORT
+# ============================================================================
+
+# httpcore errors → the httpx errors callers catch (most specific first)
+_HTTPCORE_ERRORS: Tuple[Tuple[type, type], ...] = (
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+)
+_HTTPCORE_EXCEPTIONS = tuple(core_type for core_type, _ in _HTTPCORE_ERRORS)
+
+
+def _httpx_error(error: Exception, request: Optional[httpx.Request]) -> Exception:
+    mapped = None
+    for core_type, httpx_type in _HTTPCORE_ERRORS:
+        if isinstance(error, core_type):
+            mapped = httpx_type  # later (narrower) matches win
+    if mapped is None:
+        return error
+    return mapped(str(error), request=request)
+
+
+class _PoolByteStream(httpx.AsyncByteStream):
+    """httpcore response body as an httpx stream, with errors mapped."""
+
+    def __init__(self, stream, request: httpx.Request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except _HTTPCORE_EXCEPTIONS as e:
+            raise _httpx_error(e, self._request) from e
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over an httpcore connection pool built with our network
+    backend (httpx.AsyncHTTPTransport has no public way to pass one).
+    """
+
+    def __init__(
+        self,
+        network_backend: httpcore.AsyncNetworkBackend,
+        limits: httpx.Limits,
+        http2: bool = False,
+        verify: bool = True,
+    ):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify, http2=http2),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=network_backend,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        try:
+            response = await self._pool.handle_async_request(core_request)
+        except _HTTPCORE_EXCEPTIONS as e:
+            raise _httpx_error(e, request) from e
+
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_PoolByteStream(response.stream, request),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+# ============================================================================
+# PER-HOST CAP
+# ============================================================================
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body wrapper that frees the host slot when the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Caps in-flight requests per host; a slot is held until the body closes.
+
+    A host's semaphore is dropped once nobody holds or waits on it, so the
+    map only covers hosts with requests in flight.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int = HTTP_CLIENT_MAX_PER_HOST):
+        self._transport = transport
+        self.max_per_host = max(1, max_per_host)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._users: Dict[str, int] = {}  # holders + waiters per host
+
+    def _leave(self, host: str, semaphore: asyncio.Semaphore, acquired: bool) -> None:
+        if acquired:
+            semaphore.release()
+        self._users[host] -= 1
+        if self._users[host] == 0:
+            del self._users[host]
+            del self._semaphores[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        self._users[host] = self._users.get(host, 0) + 1
+
+        try:
+            await semaphore.acquire()
+        except BaseException:
+            self._leave(host, semaphore, acquired=False)
+            raise
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._leave(host, semaphore, acquired=True)
+            raise
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self._leave(host, semaphore, acquired=True)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+# ============================================================================
+# CLIENT FACTORY + SINGLETON
+# ============================================================================
+
+_dns_cache: Optional[DNSCache] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_dns_cache() -> DNSCache:
+    global _dns_cache
+    if _dns_cache is None:
+        _dns_cache = DNSCache()
+    return _dns_cache
+
+
+def create_http_client(dns_cache: Optional[DNSCache] = None, allow_private: bool = False) -> httpx.AsyncClient:
+    """
+    Build a pooled client; callers own its lifetime (use start_http_client for the shared one).
+
+    allow_private=True disables the connect-time SSRF check (local test servers only).
+    """
+    http2 = HTTP_CLIENT_HTTP2 and H2_AVAILABLE
+    limits = httpx.Limits(
+        max_connections=HTTP_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_CLIENT_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    )
+    backend = CachingNetworkBackend(
+        dns_cache or get_dns_cache(),
+        address_filter=None if allow_private else is_blocked_address,
+    )
+    transport = PooledTransport(backend, limits, http2=http2, verify=True)
+    return httpx.AsyncClient(
+        transport=HostLimitedTransport(transport),
+        timeout=REQUEST_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+        logger.info(
+            "[http_client] pooled client ready (http2=%s, max_connections=%d, per_host=%d)",
+            HTTP_CLIENT_HTTP2 and H2_AVAILABLE, HTTP_CLIENT_MAX_CONNECTIONS, HTTP_CLIENT_MAX_PER_HOST,
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    """The shared client, or None outside the app lifespan."""
+    if _http_client is None or _http_client.is_closed:
+        return None
+    return _http_client
+
+
+@asynccontextmanager
+async def outbound_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the shared client, or a one-off pooled client when it isn't running."""
+    shared = get_http_client()
+    if shared is not None:
+        yield shared
+        return
+    async with create_http_client() as client:
+        yield client
@@ -6,6 +6,7 @@ from typing import Optional
 import httpx
 
 from app.config import USER_AGENT, REQUEST_TIMEOUT
+from agents.content_fetch.http_client import outbound_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,15 +17,11 @@ async def fetch_http(url: str, timeout: int = REQUEST_TIMEOUT) -> Optional[httpx
     status codes for 301/302/404) or None on network errors and 5xx responses.
     """
     try:
-        async with httpx.AsyncClient(
-            timeout=timeout,
-            follow_redirects=True,
-            verify=True,
-            limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
-        ) as client:
+        async with outbound_client() as client:
             res = await client.get(
                 url,
                 headers={"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"},
+                timeout=timeout,
             )
             if res.status_code == 200 or res.status_code in (301, 302, 303, 307, 308, 404):
                 return res
@@ -0,0 +1,127 @@
+"""
+Parse-once page model shared by the HTML analyzers.
+
+A comprehensive analysis used to hand the raw HTML string to every analyzer,
+and each one built its own BeautifulSoup tree. ParsedPage is built once per
+fetch; the soup and every derived view (lowercased HTML, clean text, script
+and style bodies, links, meta tags) are computed on first access and then
+memoized on the instance.
+
+Analyzers must treat the shared soup as read-only — nothing may decompose()
+or otherwise mutate it, because the next analyzer sees the same tree.
+When analyzers run in parallel threads, call warm() first.
+"""
+
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Union
+
+from bs4 import BeautifulSoup, CData, NavigableString
+
+# Tags whose text never counts as visible page content
+# (mirrors extract_clean_text in main.py, which decomposes these).
+_NON_CONTENT_TAGS = frozenset({"script", "style", "noscript"})
+
+# get_text() only yields plain strings and CDATA; Comment, Script,
+# Stylesheet etc. are NavigableString subclasses and are skipped.
+_TEXT_STRING_TYPES = (NavigableString, CData)
+
+
+class ParsedPage:
+    """
+    A fetched HTML document parsed exactly once.
+
+    Usage:
+        page = ParsedPage(html, url=url)
+        page.soup            # BeautifulSoup tree (html.parser)
+        page.html_lower      # html.lower()
+        page.text            # visible text, same output as extract_clean_text()
+        page.script_content  # concatenated <script> bodies
+        page.style_content   # <style> bodies + inline style="" attributes
+        page.links           # <a href> tags
+        page.meta            # {name|property (lowercased): content}
+    """
+
+    def __init__(self, html: str, url: str = ""):
+        self.html = html or ""
+        self.url = url
+        self._memo: Dict[str, Any] = {}
+
+    @classmethod
+    def ensure(cls, page_or_html: Union["ParsedPage", str, None], url: str = "") -> "ParsedPage":
+        """Return the given ParsedPage, or wrap a raw HTML string in one."""
+        if isinstance(page_or_html, ParsedPage):
+            return page_or_html
+        return cls(page_or_html or "", url=url)
+
+    def warm(self) -> "ParsedPage":
+        """
+        Compute the shared views up front.
+
+        Call this before handing the page to analyzers running in parallel
+        threads, so they only ever read the finished views.
+        """
+        self.soup, self.html_lower, self.text, self.words  # noqa: B018
+        self.script_content, self.style_content, self.links, self.meta  # noqa: B018
+        return self
+
+    def memo(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Memoize an arbitrary derived value (e.g. framework detection) on this page."""
+        if key not in self._memo:
+            self._memo[key] = factory()
+        return self._memo[key]
+
+    # ------------------------------------------------------------------
+    # Lazy views
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        return BeautifulSoup(self.html, "html.parser")
+
+    @cached_property
+    def html_lower(self) -> str:
+        return self.html.lower()
+
+    @cached_property
+    def text(self) -> str:
+        """Visible text with whitespace collapsed, without mutating the soup."""
+        parts: List[str] = []
+        for node in self.soup.descendants:
+            if type(node) not in _TEXT_STRING_TYPES:
+                continue
+            if any(parent.name in _NON_CONTENT_TAGS for parent in node.parents):
+                continue
+            parts.append(str(node))
+        raw = "".join(parts)
+        lines = (line.strip() for line in raw.splitlines())
+        chunks = (p.strip() for line in lines for p in line.split("  "))
+        return " ".join(chunk for chunk in chunks if chunk)
+
+    @cached_property
+    def words(self) -> List[str]:
+        return self.text.split()
+
+    @cached_property
+    def script_content(self) -> str:
+        scripts = self.soup.find_all("script")
+        return " ".join(s.get_text() for s in scripts if s.get_text())
+
+    @cached_property
+    def style_content(self) -> str:
+        styles = [tag.get_text() for tag in self.soup.find_all("style")]
+        styles.extend(tag.get("style", "") for tag in self.soup.find_all(style=True))
+        return " ".join(styles)
+
+    @cached_property
+    def links(self) -> list:
+        return self.soup.find_all("a", href=True)
+
+    @cached_property
+    def meta(self) -> Dict[str, str]:
+        """First content value per meta name/property, keyed lowercase."""
+        result: Dict[str, str] = {}
+        for tag in self.soup.find_all("meta"):
+            key = (tag.get("name") or tag.get("property") or "").strip().lower()
+            if key and key not in result:
+                result[key] = tag.get("content") or ""
+        return result
@@ -17,8 +17,12 @@ from app.config import (
     COOKIE_SELECTORS,
 )
 
+from agents.content_fetch.browser_pool import block_heavy_resources, get_browser_pool
+
 logger = logging.getLogger(__name__)
 
+_VIEWPORT = {"width": 1440, "height": 900}
+
 try:
     from playwright.async_api import async_playwright
     PLAYWRIGHT_AVAILABLE = True
@@ -31,124 +35,131 @@ async def render_spa(url: str, timeout: int = PLAYWRIGHT_TIMEOUT) -> Optional[st
     """
     Render a URL using Playwright (headless Chromium). Returns rendered HTML
     (including JSON-LD and captured XHR blobs) or None on any failure.
+
+    Uses the shared BrowserPool when it has been started in the app lifespan;
+    otherwise launches a one-off browser for this call (scripts, tests).
     """
     if not PLAYWRIGHT_AVAILABLE or async_playwright is None:
         logger.warning("[playwright] not available; skipping SPA render for %s", url)
         return None
 
     try:
-        import json as _json
+        pool = get_browser_pool()
+        if pool.started:
+            async with pool.page(
+                user_agent=USER_AGENT,
+                viewport=_VIEWPORT,
+                locale="en-US",
+                block_resources=BLOCK_HEAVY_RESOURCES,
+            ) as page:
+                return await _render_page(page, url, timeout)
 
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
             context = await browser.new_context(
                 user_agent=USER_AGENT,
-                viewport={"width": 1440, "height": 900},
+                viewport=_VIEWPORT,
                 locale="en-US",
             )
             page = await context.new_page()
-            xhr_store = []
+            if BLOCK_HEAVY_RESOURCES:
+                await page.route("**/*", block_heavy_resources)
 
-            async def route_handler(route):
-                try:
-                    req = route.request
-                    if BLOCK_HEAVY_RESOURCES and req.resource_type in {"image", "media", "font"}:
-                        await route.abort()
-                        return
-                    await route.continue_()
-                except Exception:
-                    try:
-                        await route.continue_()
-                    except Exception:
-                        pass
+            html = await _render_page(page, url, timeout)
+            await context.close()
+            await browser.close()
+            return html
 
-            async def response_listener(response):
-                try:
-                    req = response.request
-                    ct = (response.headers.get("content-type") or "").lower()
-                    if CAPTURE_XHR and (
-                        req.resource_type in {"xhr", "fetch"}
-                        or "application/json" in ct
-                    ):
-                        body = await response.body()
-                        if body and len(body) <= MAX_XHR_BYTES:
-                            try:
-                                text = body.decode("utf-8", errors="ignore")
-                            except Exception:
-                                text = ""
-                            if text.strip():
-                                xhr_store.append({
-                                    "url": req.url,
-                                    "status": response.status,
-                                    "content_type": ct,
-                                    "length": len(body),
-                                    "body": text,
-                                })
-                except Exception:
-                    pass
+    except Exception as e:
+        logger.warning("[playwright] render failed for %s: %s", url, e)
+        return None
 
-            await page.route("**/*", route_handler)
-            page.on("response", response_listener)
 
-            # Cookie banner auto-dismiss (best-effort)
-            if COOKIE_AUTO_DISMISS:
-                try:
-                    for selector in COOKIE_SELECTORS.split(","):
-                        try:
-                            await page.click(selector.strip(), timeout=1500)
-                            break
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
+async def _render_page(page, url: str, timeout: int) -> str:
+    """Navigate, scroll, and harvest rendered HTML + JSON-LD + XHR blobs."""
+    import json as _json
 
-            await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
-            try:
-                await page.wait_for_load_state("networkidle", timeout=SPA_EXTRA_WAIT_MS)
-            except Exception:
-                pass
+    xhr_store = []
 
-            # Auto-scroll to trigger lazy loading
-            for _ in range(SPA_MAX_SCROLL_STEPS):
+    async def response_listener(response):
+        try:
+            req = response.request
+            ct = (response.headers.get("content-type") or "").lower()
+            if CAPTURE_XHR and (
+                req.resource_type in {"xhr", "fetch"}
+                or "application/json" in ct
+            ):
+                body = await response.body()
+                if body and len(body) <= MAX_XHR_BYTES:
+                    try:
+                        text = body.decode("utf-8", errors="ignore")
+                    except Exception:
+                        text = ""
+                    if text.strip():
+                        xhr_store.append({
+                            "url": req.url,
+                            "status": response.status,
+                            "content_type": ct,
+                            "length": len(body),
+                            "body": text,
+                        })
+        except Exception:
+            pass
+
+    page.on("response", response_listener)
+
+    # Cookie banner auto-dismiss (best-effort)
+    if COOKIE_AUTO_DISMISS:
+        try:
+            for selector in COOKIE_SELECTORS.split(","):
                 try:
-                    await page.evaluate("window.scrollBy(0, window.innerHeight)")
-                    await page.wait_for_timeout(SPA_SCROLL_PAUSE_MS)
-                except Exception:
+                    await page.click(selector.strip(), timeout=1500)
                     break
-
-            if SPA_WAIT_FOR_SELECTOR:
-                try:
-                    await page.wait_for_selector(SPA_WAIT_FOR_SELECTOR, timeout=3000)
                 except Exception:
                     pass
+        except Exception:
+            pass
 
-            # Harvest JSON-LD
-            try:
-                jsonld_list = await page.evaluate("""() => {
-                    const nodes = Array.from(
-                        document.querySelectorAll('script[type="application/ld+json"]')
-                    );
-                    return nodes.map(n => n.textContent || '').filter(Boolean);
-                }""")
-                jsonld_blob = (
-                    "\n<!--JSONLD-->" + "\n".join(jsonld_list) + "\n<!--/JSONLD-->"
-                    if jsonld_list else ""
-                )
-            except Exception:
-                jsonld_blob = ""
-
-            # XHR blob
-            xhr_blob = (
-                "\n<!--XHR-->" + _json.dumps(xhr_store) + "\n<!--/XHR-->"
-                if xhr_store else ""
-            )
-
-            html = await page.content()
-            await context.close()
-            await browser.close()
-
-            return html + jsonld_blob + xhr_blob
-
-    except Exception as e:
-        logger.warning("[playwright] render failed for %s: %s", url, e)
-        return None
+    await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    try:
+        await page.wait_for_load_state("networkidle", timeout=SPA_EXTRA_WAIT_MS)
+    except Exception:
+        pass
+
+    # Auto-scroll to trigger lazy loading
+    for _ in range(SPA_MAX_SCROLL_STEPS):
+        try:
+            await page.evaluate("window.scrollBy(0, window.innerHeight)")
+            await page.wait_for_timeout(SPA_SCROLL_PAUSE_MS)
+        except Exception:
+            break
+
+    if SPA_WAIT_FOR_SELECTOR:
+        try:
+            await page.wait_for_selector(SPA_WAIT_FOR_SELECTOR, timeout=3000)
+        except Exception:
+            pass
+
+    # Harvest JSON-LD
+    try:
+        jsonld_list = await page.evaluate("""() => {
+            const nodes = Array.from(
+                document.querySelectorAll('script[type="application/ld+json"]')
+            );
+            return nodes.map(n => n.textContent || '').filter(Boolean);
+        }""")
+        jsonld_blob = (
+            "\n<!--JSONLD-->" + "\n".join(jsonld_list) + "\n<!--/JSONLD-->"
+            if jsonld_list else ""
+        )
+    except Exception:
+        jsonld_blob = ""
+
+    # XHR blob
+    xhr_blob = (
+        "\n<!--XHR-->" + _json.dumps(xhr_store) + "\n<!--/XHR-->"
+        if xhr_store else ""
+    )
+
+    html = await page.content()
+    return html + jsonld_blob + xhr_blob
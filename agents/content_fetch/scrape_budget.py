@@ -0,0 +1,164 @@
+"""
+Bounded, domain-polite fan-out for competitor analyses.
+
+Discovery and competitive radar analyze many sites per request. Running them
+one by one makes a 10-competitor discovery take 10× a single analysis, but
+running them all at once would let a single user saturate the worker.
+
+- ScrapeBudget is process-wide: a global semaphore shared by every request,
+  plus one lock per domain so the same host is never scraped twice at once
+- run_bounded() fans a list out under a per-run concurrency cap and yields
+  each outcome as soon as it finishes, so callers can stream progress and
+  refund failures individually
+
+Usage:
+  async for outcome in run_bounded(
+      competitors, analyze, domain_of=lambda c: c["domain"], concurrency=4,
+  ):
+      if outcome.error is None:
+          ...  # outcome.result
+      else:
+          ...  # refund outcome.item
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+from urllib.parse import urlparse
+
+from app.config import COMPETITOR_ANALYSIS_CONCURRENCY, SCRAPE_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def domain_key(url: str) -> str:
+    """Politeness key for a URL: lowercased host without a leading www."""
+    netloc = urlparse(url if "://" in url else f"//{url}").netloc or url
+    netloc = netloc.lower().split("@")[-1].split(":")[0]
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class ScrapeBudget:
+    """Process-wide scrape concurrency with at most one job per domain."""
+
+    def __init__(self, max_concurrent: int = SCRAPE_MAX_CONCURRENCY):
+        self.max_concurrent = max(1, max_concurrent)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._domain_locks: Dict[str, asyncio.Lock] = {}
+        # domain → holders + waiters; the lock is dropped when it reaches zero
+        self._domain_refs: Dict[str, int] = {}
+        self._active = 0
+        self._stats = {"acquired": 0, "domain_waits": 0}
+
+    @asynccontextmanager
+    async def slot(self, domain: str) -> AsyncIterator[None]:
+        """
+        Hold one unit of the global budget and the domain's lock.
+
+        The domain lock is taken first so a job queued behind another job
+        on the same host does not sit on a global slot while it waits.
+        """
+        key = domain.lower()
+        lock = self._domain_locks.setdefault(key, asyncio.Lock())
+        self._domain_refs[key] = self._domain_refs.get(key, 0) + 1
+        if lock.locked():
+            self._stats["domain_waits"] += 1
+        try:
+            async with lock:
+                async with self._semaphore:
+                    self._active += 1
+                    self._stats["acquired"] += 1
+                    try:
+                        yield
+                    finally:
+                        self._active -= 1
+        finally:
+            self._domain_refs[key] -= 1
+            if self._domain_refs[key] == 0:
+                del self._domain_refs[key]
+                self._domain_locks.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "domains": len(self._domain_locks),
+        }
+
+
+@dataclass
+class FanOutResult(Generic[T]):
+    """Outcome of one fanned-out job; exactly one of result/error is set."""
+
+    index: int
+    item: T
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+async def run_bounded(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[Any]],
+    *,
+    domain_of: Callable[[T], str],
+    concurrency: int = COMPETITOR_ANALYSIS_CONCURRENCY,
+    budget: Optional["ScrapeBudget"] = None,
+) -> AsyncIterator[FanOutResult[T]]:
+    """
+    Run worker(item) for every item and yield results in completion order.
+
+    Exceptions raised by worker are captured on the result, never raised.
+    If the consumer stops iterating early, unfinished jobs are cancelled.
+    """
+    budget = budget or get_scrape_budget()
+    run_semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _run(index: int, item: T) -> FanOutResult[T]:
+        async with run_semaphore:
+            async with budget.slot(domain_of(item)):
+                try:
+                    return FanOutResult(index, item, result=await worker(item))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    return FanOutResult(index, item, error=e)
+
+    tasks = [asyncio.create_task(_run(i, item)) for i, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        pending = [t for t in tasks if not t.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_scrape_budget: Optional[ScrapeBudget] = None
+
+
+def get_scrape_budget() -> ScrapeBudget:
+    global _scrape_budget
+    if _scrape_budget is None:
+        _scrape_budget = ScrapeBudget()
+    return _scrape_budget
@@ -0,0 +1,83 @@
+"""
+Non-blocking SSRF guard for user-supplied URLs.
+
+The old guard in main.py called the blocking socket.getaddrinfo twice per URL
+inside request handlers and rebuilt its list of private networks for every
+resolved address. This module resolves through DNSCache (the event loop's
+resolver, which runs getaddrinfo in the default thread pool), caches both
+answers and failures, and checks against a network set built once at import.
+
+Addresses that pass are written back to the shared DNSCache. The pooled HTTP
+client connects only to cached addresses and re-checks every connect target
+with is_blocked_address(), so a rebinding DNS answer (public at check time,
+private at fetch time) or a redirect to an internal host is refused.
+
+Usage:
+  ips = await check_url(url, get_dns_cache())   # raises SSRFError
+"""
+
+import ipaddress
+import socket
+from typing import List, Union
+from urllib.parse import urlparse
+
+BLOCKED_NETWORKS = tuple(
+    ipaddress.ip_network(net)
+    for net in (
+        "0.0.0.0/8",
+        "10.0.0.0/8",
+        "127.0.0.0/8",
+        "169.254.0.0/16",  # link-local incl. cloud metadata (169.254.169.254)
+        "172.16.0.0/12",
+        "192.168.0.0/16",
+        "::/128",
+        "::1/128",
+        "fc00::/7",
+        "fe80::/10",
+    )
+)
+
+_BLOCKED_HOSTNAMES = frozenset({"localhost"})
+
+
+class SSRFError(ValueError):
+    """URL points at a host the server must not fetch."""
+
+
+def is_blocked_address(ip: Union[str, ipaddress.IPv4Address, ipaddress.IPv6Address]) -> bool:
+    """True for loopback/private/link-local addresses (incl. IPv4-mapped IPv6)."""
+    try:
+        addr = ipaddress.ip_address(ip.split("%", 1)[0] if isinstance(ip, str) else ip)
+    except ValueError:
+        return True
+    if isinstance(addr, ipaddress.IPv6Address) and addr.ipv4_mapped is not None:
+        addr = addr.ipv4_mapped
+    return any(addr in net for net in BLOCKED_NETWORKS if net.version == addr.version)
+
+
+async def check_url(url: str, dns_cache) -> List[str]:
+    """
+    Resolve url's host and reject it if any address is internal.
+
+    Returns the validated addresses (now pinned in dns_cache). A host that
+    does not resolve is not rejected here; the fetch fails on its own, and
+    the failure is negatively cached so it fails fast.
+    """
+    host = (urlparse(url).hostname or "").lower()
+    if not host:
+        raise SSRFError("Invalid URL")
+    if host in _BLOCKED_HOSTNAMES or host.endswith(".local"):
+        raise SSRFError("URL not allowed")
+
+    try:
+        ipaddress.ip_address(host)
+        ips = [host]
+    except ValueError:
+        try:
+            ips = await dns_cache.resolve(host)
+        except socket.gaierror:
+            return []
+
+    if any(is_blocked_address(ip) for ip in ips):
+        raise SSRFError("URL not allowed")
+    return ips
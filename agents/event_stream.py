@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Growth Engine 2.0 - Run event stream
+Outbound event queue for one agent websocket (/api/v1/agents/ws).
+
+Replaces the unbounded asyncio.Queue + 20 ms sleep per message, which
+capped a client at ~50 messages/s and let memory grow behind a slow
+client:
+
+- agent_progress updates are coalesced per agent: only the latest
+  pending update for an agent is sent
+- whatever queued up while the previous frame was being written goes out
+  as one {"type": "batch", "run_id": ..., "events": [...]} frame; a single
+  pending event is sent unwrapped, exactly as before
+- the queue is bounded (WS_EVENT_QUEUE_MAX): when full, the oldest
+  low-priority event (swarm chatter) is dropped. Status, insight,
+  completion and error events are never dropped
+- with a RunStore, every event is appended to the run's event stream
+  before it is sent and carries the stream id as "event_id", so a client
+  that reconnects can resume with
+  {"action": "resume", "run_id": ..., "last_event_id": ...}
+  (see replay_run_events). Events keep being persisted after the client
+  has gone away.
+
+Usage:
+    stream = RunEventStream(websocket.send_text, run_id=run_id, store=run_store)
+    stream.start()
+    stream.put({"type": "agent_progress", "run_id": run_id, "data": {...}})
+    ...
+    await stream.aclose()   # flushes what is pending
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from .run_store import RunEvent, RunStore
+
+logger = logging.getLogger(__name__)
+
+
+WS_EVENT_QUEUE_MAX = int(os.getenv("WS_EVENT_QUEUE_MAX", "500"))
+WS_EVENT_BATCH_MAX = int(os.getenv("WS_EVENT_BATCH_MAX", "50"))
+
+# Event types that may be dropped under backpressure
+LOW_PRIORITY_TYPES = frozenset({"swarm_event", "agent_message", "collaboration_update"})
+# Event types where a newer event for the same agent supersedes a pending one
+COALESCED_TYPES = frozenset({"agent_progress"})
+# Event types after which a replay has nothing more to wait for
+FINAL_TYPES = frozenset({"analysis_complete", "error"})
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled", "timeout"})
+
+
+def _json_default(obj: Any) -> str:
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+class RunEventStream:
+    """Coalescing, batching, bounded sender for one websocket."""
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        run_id: Optional[str] = None,
+        store: Optional[RunStore] = None,
+        max_queue: int = WS_EVENT_QUEUE_MAX,
+        max_batch: int = WS_EVENT_BATCH_MAX,
+    ):
+        self._send = send
+        self.run_id = run_id
+        self._store = store
+        self.max_queue = max(1, max_queue)
+        self.max_batch = max(1, max_batch)
+
+        self._pending: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._low_priority: Deque[Hashable] = deque()
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._send_failed = False
+
+        self.stats = {
+            'queued': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'sent': 0,
+            'frames': 0,
+            'persisted': 0,
+        }
+
+    def start(self) -> "RunEventStream":
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def put(self, message: Dict[str, Any]) -> None:
+        """Queue an event; never blocks (safe from sync agent callbacks)."""
+        if self._closed:
+            return
+
+        event_type = message.get('type')
+        self.stats['queued'] += 1
+
+        agent_id = (message.get('data') or {}).get('agent_id')
+        if event_type in COALESCED_TYPES and agent_id:
+            key: Hashable = ('latest', event_type, agent_id)
+            if self._pending.pop(key, None) is not None:
+                self.stats['coalesced'] += 1
+        else:
+            key = ('event', next(self._seq))
+
+        low_priority = event_type in LOW_PRIORITY_TYPES
+        if len(self._pending) >= self.max_queue and not self._drop_oldest_low_priority():
+            if low_priority:
+                self.stats['dropped'] += 1
+                return
+            # Only high-priority events are pending; those are bounded by the run itself
+
+        self._pending[key] = message
+        if low_priority:
+            self._low_priority.append(key)
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def join(self) -> None:
+        """Wait until everything queued so far has been flushed."""
+        if self._task is None:
+            raise RuntimeError("RunEventStream.start() was not called")
+        await self._idle.wait()
+
+    async def aclose(self, timeout: float = 10.0) -> None:
+        """Flush pending events and stop the sender task."""
+        self._closed = True
+        self._wakeup.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[EventStream] Run {self.run_id}: flush timed out, {len(self._pending)} events unsent")
+            self._task.cancel()
+        logger.debug(f"[EventStream] Run {self.run_id} closed: {self.stats}")
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _drop_oldest_low_priority(self) -> bool:
+        while self._low_priority:
+            key = self._low_priority.popleft()
+            if self._pending.pop(key, None) is not None:
+                self.stats['dropped'] += 1
+                return True
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                batch = [self._pending.popitem(last=False)[1] for _ in range(min(self.max_batch, len(self._pending)))]
+                await self._flush(batch)
+            self._idle.set()
+            if self._closed and not self._pending:
+                return
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        if self._store is not None and self.run_id:
+            await self._persist(batch)
+
+        if self._send_failed:
+            return
+
+        frame = batch[0] if len(batch) == 1 else {
+            'type': 'batch',
+            'run_id': self.run_id,
+            'events': batch,
+        }
+        try:
+            await self._send(json.dumps(frame, default=_json_default))
+        except Exception as e:
+            # Client went away; keep persisting so it can resume
+            self._send_failed = True
+            logger.info(f"[EventStream] Run {self.run_id}: send failed ({e}), persisting only")
+            return
+        self.stats['frames'] += 1
+        self.stats['sent'] += len(batch)
+
+    async def _persist(self, batch: List[Dict[str, Any]]) -> None:
+        # Messages replayed from the store already have an event_id
+        messages = [m for m in batch if 'event_id' not in m]
+        if not messages:
+            return
+        try:
+            event_ids = await self._store.emit_events(self.run_id, [
+                RunEvent(
+                    event_type=message.get('type', 'unknown'),
+                    agent_id=(message.get('data') or {}).get('agent_id'),
+                    timestamp=message.get('timestamp') or datetime.now().isoformat(),
+                    data=message.get('data') or {},
+                )
+                for message in messages
+            ])
+        except Exception as e:
+            logger.warning(f"[EventStream] Run {self.run_id}: could not persist {len(messages)} events: {e}")
+            return
+        for message, event_id in zip(messages, event_ids):
+            message['event_id'] = event_id
+        self.stats['persisted'] += len(messages)
+
+
+def event_to_message(run_id: str, event: RunEvent) -> Dict[str, Any]:
+    """RunStore stream entry → websocket message."""
+    return {
+        'type': event.event_type,
+        'run_id': run_id,
+        'event_id': event.event_id,
+        'data': event.data,
+        'timestamp': event.timestamp,
+    }
+
+
+async def replay_run_events(
+    stream: RunEventStream,
+    store: RunStore,
+    run_id: str,
+    last_event_id: str = "0",
+    block_ms: int = 1000,
+    max_idle_reads: int = 300,
+) -> str:
+    """
+    Send a run's events after last_event_id, then follow the stream
+    until the run finishes. Returns the id of the last event sent.
+    """
+    last_id = last_event_id or "0"
+    terminal_reads = 0
+    idle_reads = 0
+
+    while idle_reads < max_idle_reads:
+        events = await store.read_events(run_id, last_id, count=100, block_ms=block_ms)
+        if events:
+            idle_reads = terminal_reads = 0
+            for event in events:
+                stream.put(event_to_message(run_id, event))
+                last_id = event.event_id
+            await stream.join()  # backpressure: don't read further ahead than the client
+            if events[-1].event_type in FINAL_TYPES:
+                break
+            continue
+
+        idle_reads += 1
+        status = await store.get_status(run_id)
+        if status is None:
+            break
+        if status in TERMINAL_STATUSES:
+            # The final event is written just after the status flips; read once more
+            terminal_reads += 1
+            if terminal_reads > 1:
+                break
+
+    return last_id
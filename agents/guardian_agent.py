@@ -454,9 +454,9 @@ class GuardianAgent(BaseAgent):
                 # Fallback: fetch only if not available from earlier agents
                 logger.debug("[Guardian] html_content not in context, fetching from %s", context.url)
                 try:
-                    import httpx
-                    async with httpx.AsyncClient(timeout=10.0) as client:
-                        resp = await client.get(context.url)
+                    from agents.content_fetch.http_client import outbound_client
+                    async with outbound_client() as client:
+                        resp = await client.get(context.url, timeout=10.0)
                         html_content = resp.text[:50000]  # Max 50KB
                 except Exception as e:
                     logger.warning("[Guardian] Could not fetch HTML for presence detection: %s", e)
@@ -1358,7 +1358,8 @@ class GuardianAgent(BaseAgent):
             domain = urlparse(url).netloc or url
             domain = domain.replace('www.', '')
             
-            w = whois.whois(domain)
+            # python-whois is blocking socket I/O; keep it off the event loop
+            w = await asyncio.to_thread(whois.whois, domain)
             
             creation_date = w.creation_date
             if isinstance(creation_date, list):
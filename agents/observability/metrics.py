@@ -304,6 +304,28 @@ class MetricsCollector:
             ['agent_id', 'model']
         )
 
+        # LLM gateway admissions by lane and outcome
+        self._metrics['llm_gateway_calls_total'] = Counter(
+            'growth_engine_llm_gateway_calls_total',
+            'LLM gateway attempts by lane and outcome',
+            ['lane', 'result']  # ok, rate_limited, timeout, retryable, fatal
+        )
+
+        # Time spent queued for a gateway slot
+        self._metrics['llm_gateway_wait_seconds'] = Histogram(
+            'growth_engine_llm_gateway_wait_seconds',
+            'Seconds queued for an LLM gateway slot',
+            ['lane'],
+            buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, float('inf')]
+        )
+
+        # Current adaptive concurrency limit
+        self._metrics['llm_gateway_limit'] = Gauge(
+            'growth_engine_llm_gateway_limit',
+            'Current LLM gateway concurrency limit',
+            []
+        )
+
         # ============== ANALYSIS METRICS ==============
 
         # Analysis requests
@@ -336,6 +358,80 @@ class MetricsCollector:
             []
         )
 
+        # ============== CACHE METRICS ==============
+
+        # Cache lookups by outcome
+        self._metrics['cache_requests_total'] = Counter(
+            'growth_engine_cache_requests_total',
+            'Cache lookups by outcome',
+            ['cache', 'result']  # hit_memory, hit_redis, stale, miss, coalesced
+        )
+
+        # LLM response cache lookups per call-site label
+        self._metrics['llm_cache_requests_total'] = Counter(
+            'growth_engine_llm_cache_requests_total',
+            'LLM response cache lookups by outcome',
+            ['label', 'result']  # hit_memory, hit_redis, hit_disk, miss, coalesced, refresh, skip
+        )
+
+        # ============== RATE LIMIT METRICS ==============
+
+        # Rate limiter decisions
+        self._metrics['rate_limit_requests_total'] = Counter(
+            'growth_engine_rate_limit_requests_total',
+            'Rate limiter decisions',
+            ['scope', 'result']  # scope: route prefix or *, result: allowed/limited
+        )
+
+        # ============== DATABASE POOL METRICS ==============
+
+        # Connections checked out per budget
+        self._metrics['db_pool_in_use'] = Gauge(
+            'growth_engine_db_pool_in_use',
+            'Shared database pool connections held, per budget',
+            ['budget']
+        )
+
+        # Time spent waiting for a connection
+        self._metrics['db_pool_wait_seconds'] = Histogram(
+            'growth_engine_db_pool_wait_seconds',
+            'Wait for a shared database pool connection in seconds',
+            ['budget'],
+            buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, float('inf')]
+        )
+
+        # Acquires by outcome
+        self._metrics['db_pool_acquires_total'] = Counter(
+            'growth_engine_db_pool_acquires_total',
+            'Shared database pool acquires',
+            ['budget', 'result']  # ok, timeout, error
+        )
+
+        # ============== NOTIFICATION METRICS ==============
+
+        # One websocket send
+        self._metrics['notification_delivery_seconds'] = Histogram(
+            'growth_engine_notification_delivery_seconds',
+            'Notification websocket send time per connection in seconds',
+            ['result'],  # ok, timeout, error
+            buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float('inf')]
+        )
+
+        # One notification to all of its connections
+        self._metrics['notification_fanout_seconds'] = Histogram(
+            'growth_engine_notification_fanout_seconds',
+            'Time to deliver a notification to all of its connections in seconds',
+            ['kind'],  # user, broadcast
+            buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float('inf')]
+        )
+
+        # Connections closed for not keeping up
+        self._metrics['notification_evictions_total'] = Counter(
+            'growth_engine_notification_evictions_total',
+            'Notification websockets evicted',
+            ['reason']
+        )
+
         # ============== ERROR METRICS ==============
 
         # Errors by type
@@ -452,6 +548,12 @@ class MetricsCollector:
         if cost_usd is not None:
             self._metrics['llm_cost_usd_total'].inc(cost_usd, agent_id=agent_id, model=model)
 
+    def record_llm_gateway_call(self, lane: str, result: str, wait_seconds: float, limit: int):
+        """Record an LLM gateway attempt"""
+        self._metrics['llm_gateway_calls_total'].inc(lane=lane, result=result)
+        self._metrics['llm_gateway_wait_seconds'].observe(wait_seconds, lane=lane)
+        self._metrics['llm_gateway_limit'].set(limit)
+
     def record_analysis(self, status: str, language: str, duration_seconds: float = None,
                        score: int = None, competitor_count: int = None):
         """Record analysis request metrics"""
@@ -466,6 +568,40 @@ class MetricsCollector:
         if competitor_count is not None:
             self._metrics['competitors_analyzed_total'].inc(competitor_count)
 
+    def record_cache_lookup(self, cache: str, result: str):
+        """Record a cache lookup outcome"""
+        self._metrics['cache_requests_total'].inc(cache=cache, result=result)
+
+    def record_llm_cache_lookup(self, label: str, result: str):
+        """Record an LLM response cache lookup outcome"""
+        self._metrics['llm_cache_requests_total'].inc(label=label, result=result)
+
+    def record_rate_limit(self, scope: str, result: str):
+        """Record a rate limiter decision"""
+        self._metrics['rate_limit_requests_total'].inc(scope=scope, result=result)
+
+    def record_db_pool_acquire(self, budget: str, wait_seconds: float, result: str, in_use: int):
+        """Record a shared database pool acquire"""
+        self._metrics['db_pool_acquires_total'].inc(budget=budget, result=result)
+        self._metrics['db_pool_wait_seconds'].observe(wait_seconds, budget=budget)
+        self._metrics['db_pool_in_use'].set(in_use, budget=budget)
+
+    def record_db_pool_release(self, budget: str, in_use: int):
+        """Record a connection returned to the shared database pool"""
+        self._metrics['db_pool_in_use'].set(in_use, budget=budget)
+
+    def record_notification_delivery(self, seconds: float, result: str):
+        """Record one notification websocket send"""
+        self._metrics['notification_delivery_seconds'].observe(seconds, result=result)
+
+    def record_notification_fanout(self, kind: str, seconds: float):
+        """Record delivering one notification to all of its connections"""
+        self._metrics['notification_fanout_seconds'].observe(seconds, kind=kind)
+
+    def record_notification_eviction(self, reason: str):
+        """Record a notification websocket closed for not keeping up"""
+        self._metrics['notification_evictions_total'].inc(reason=reason)
+
     def record_error(self, agent_id: str, error_type: str):
         """Record error"""
         self._metrics['errors_total'].inc(agent_id=agent_id, error_type=error_type)
@@ -21,6 +21,7 @@ from .agent_types import (
     OrchestrationResult,
     SwarmEvent
 )
+from .agent_dag import AgentDAG
 from .base_agent import BaseAgent
 from .scout_agent import ScoutAgent
 from .analyst_agent import AnalystAgent
@@ -51,23 +52,19 @@ class GrowthEngineOrchestrator:
 
     For true concurrent execution, each run_analysis call receives its own
     RunContext which isolates all per-run state.
-    """
 
-    EXECUTION_PLAN = [
-        ['scout'],
-        ['analyst'],
-        ['guardian', 'prospector'],
-        ['strategist'],
-        ['planner']
-    ]
+    Agents run as a dependency graph built from each agent's `dependencies`
+    (see agent_dag.py); the schedule is reported in swarm_summary['schedule'].
+    """
 
     def __init__(self):
         self.agents: Dict[str, BaseAgent] = {}
         self._register_agents()
         self._active_runs: set = set()  # Track active run IDs for is_running property
 
-        # These are set per-call in run_analysis for backwards compatibility
-        # but the actual isolation happens via RunContext
+        # Process-wide callbacks, used only for runs without a RunContext.
+        # Runs with a RunContext route events through run_context.emit_*
+        # so concurrent runs never share sinks (see RunContext.subscribe)
         self._on_insight = None
         self._on_progress = None
         self._on_agent_complete = None
@@ -101,6 +98,11 @@ class GrowthEngineOrchestrator:
     
     def set_callbacks(self, on_insight=None, on_progress=None, 
                       on_agent_complete=None, on_agent_start=None, on_swarm_event=None):
+        """
+        Callbacks for runs started without a RunContext. These are shared by
+        every such run on this (singleton) orchestrator; per-run consumers
+        should use run_context.subscribe(...) instead.
+        """
         self._on_insight = on_insight
         self._on_progress = on_progress
         self._on_agent_complete = on_agent_complete
@@ -159,8 +161,7 @@ class GrowthEngineOrchestrator:
         if user_id:
             try:
                 from unified_context import get_unified_context
-                from database import run_in_db_thread
-                raw = await run_in_db_thread(get_unified_context, user_id)
+                raw = await get_unified_context(user_id)
                 unified_context_data = raw.to_dict() if raw else {}
             except Exception as e:
                 logger.warning(f"[Orchestrator] Unified context error: {e}")
@@ -184,45 +185,50 @@ class GrowthEngineOrchestrator:
         logger.info(f"[Orchestrator] 🎯 Target: {url}")
 
         errors = []
+        schedule = None
 
         try:
-            # Set callbacks and RunContext for each per-run agent
-            logger.info(f"[Orchestrator] 🔧 Setting callbacks: on_progress={'SET' if self._on_progress else 'NOT SET'}")
+            # Route each per-run agent's events through its own RunContext
+            # (falls back to the process-wide callbacks without one)
             for agent in run_agents.values():
-                agent.set_callbacks(
-                    on_insight=self._on_insight,
-                    on_progress=self._on_progress,
-                    on_swarm_event=self._on_swarm_event
-                )
-                logger.info(f"[Orchestrator] ✅ Callbacks set for {agent.name}: on_progress={'SET' if agent._on_progress else 'NOT SET'}")
-                # Inject RunContext if provided
                 if run_context:
+                    agent.set_callbacks(
+                        on_insight=run_context.emit_insight,
+                        on_progress=run_context.emit_progress,
+                        on_swarm_event=run_context.emit_swarm_event
+                    )
                     agent.set_run_context(run_context)
-
-            # Execute phases
-            for phase_idx, phase_agents in enumerate(self.EXECUTION_PLAN, 1):
-                # Check for cancellation before each phase
-                if run_context and await run_context.check_cancelled():
-                    logger.info(f"[Orchestrator] Run cancelled before phase {phase_idx}")
-                    errors.append("Run cancelled by user")
-                    break
-
-                logger.info(f"[Orchestrator] === PHASE {phase_idx}: {phase_agents} ===")
-
-                self._check_dependencies(phase_agents, context, run_agents)
-
-                if len(phase_agents) > 1:
-                    results = await self._run_parallel(phase_agents, context, run_context, run_agents)
                 else:
-                    results = [await self._run_agent(phase_agents[0], context, run_context, run_agents)]
-
-                for result in results:
-                    if result:
-                        context.agent_results[result.agent_id] = result
-                        if self._on_agent_complete:
-                            self._on_agent_complete(result.agent_id, result)
-                        if result.status == AgentStatus.ERROR:
-                            errors.append(f"{result.agent_name}: {result.error}")
+                    agent.set_callbacks(
+                        on_insight=self._on_insight,
+                        on_progress=self._on_progress,
+                        on_swarm_event=self._on_swarm_event
+                    )
+
+            # Execute agents as a dependency graph: each one starts as soon as
+            # its own dependencies are done, not when a whole phase is done
+            dag = AgentDAG.from_agents(run_agents)
+
+            async def run_one(agent_id: str) -> Optional[AgentResult]:
+                result = await self._run_agent(agent_id, context, run_context, run_agents)
+                if result:
+                    context.agent_results[result.agent_id] = result
+                    if run_context:
+                        run_context.emit_agent_complete(result.agent_id, result)
+                    elif self._on_agent_complete:
+                        self._on_agent_complete(result.agent_id, result)
+                    if result.status == AgentStatus.ERROR:
+                        errors.append(f"{result.agent_name}: {result.error}")
+                return result
+
+            schedule = await dag.run(
+                run_one,
+                should_stop=run_context.check_cancelled if run_context else None
+            )
+            if schedule.cancelled:
+                logger.info("[Orchestrator] Run cancelled, remaining agents not started")
+                errors.append("Run cancelled by user")
+            self._trace_schedule(schedule, run_context)
 
         except Exception as e:
             logger.error(f"[Orchestrator] Fatal error: {e}", exc_info=True)
@@ -247,7 +253,8 @@ class GrowthEngineOrchestrator:
             'total_messages': message_bus.get_stats()['total_sent'],
             'blackboard_entries': len(blackboard.get_all_keys()),
             'run_id': run_context.run_id if run_context else None,
-            'learning': learning_stats
+            'learning': learning_stats,
+            'schedule': schedule.to_dict() if schedule else None
         }
 
         logger.info(f"📊 Swarm: {swarm_summary['total_messages']} messages, {swarm_summary['blackboard_entries']} blackboard entries")
@@ -277,7 +284,9 @@ class GrowthEngineOrchestrator:
                               error="Run cancelled")
 
         logger.info(f"[Orchestrator] ▶️ {agent.name}")
-        if self._on_agent_start:
+        if run_context:
+            run_context.emit_agent_start(agent_id, agent.name)
+        elif self._on_agent_start:
             self._on_agent_start(agent_id, agent.name)
 
         # Get per-agent timeout from RunContext or use default
@@ -309,46 +318,19 @@ class GrowthEngineOrchestrator:
             return AgentResult(agent_id=agent_id, agent_name=agent.name,
                               status=AgentStatus.ERROR, execution_time_ms=0, error=str(e))
 
-    async def _run_parallel(
-        self,
-        agent_ids: List[str],
-        context: AnalysisContext,
-        run_context: Optional['RunContext'] = None,
-        run_agents: Optional[Dict[str, BaseAgent]] = None,
-    ) -> List[AgentResult]:
-        """Run multiple agents in parallel."""
-        logger.info(f"[Orchestrator] ⚡ Parallel: {agent_ids}")
-        tasks = [self._run_agent(aid, context, run_context, run_agents) for aid in agent_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        processed = []
-        for idx, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed.append(AgentResult(
-                    agent_id=agent_ids[idx], agent_name=agent_ids[idx],
-                    status=AgentStatus.ERROR, execution_time_ms=0, error=str(result)
-                ))
-            elif result:
-                processed.append(result)
-        return processed
-
-    def _check_dependencies(
-        self,
-        agent_ids: List[str],
-        context: AnalysisContext,
-        run_agents: Optional[Dict[str, BaseAgent]] = None,
-    ) -> bool:
-        """Check that all dependencies are met."""
-        agents_to_use = run_agents if run_agents is not None else self.agents
-        for agent_id in agent_ids:
-            agent = agents_to_use.get(agent_id)
-            if not agent:
-                continue
-            for dep_id in agent.dependencies:
-                if dep_id not in context.agent_results:
-                    logger.warning(f"[Orchestrator] Missing dep {dep_id} for {agent_id}")
-        return True
-    
+    def _trace_schedule(self, schedule, run_context: Optional['RunContext'] = None) -> None:
+        """Log per-agent queueing delay and the critical path into the run trace."""
+        critical = ' → '.join(schedule.critical_path) or '-'
+        logger.info(f"[Orchestrator] 🧭 Critical path: {critical} ({schedule.makespan_ms:.0f} ms)")
+        if not run_context:
+            return
+        for agent_id, timing in schedule.timings.items():
+            run_context.trace.log('agent_schedule', agent_id=agent_id, data=timing.to_dict())
+        run_context.trace.log('critical_path', data={
+            'agents': schedule.critical_path,
+            'makespan_ms': schedule.makespan_ms,
+        })
+
     def _verify_learning_predictions(
         self,
         context: AnalysisContext,
@@ -489,7 +471,8 @@ class GrowthEngineOrchestrator:
         return [a.to_info_dict() for a in self.agents.values()]
     
     def get_execution_plan(self) -> List[List[str]]:
-        return self.EXECUTION_PLAN
+        """Agents grouped by dependency depth (display only; execution is per-agent)."""
+        return AgentDAG.from_agents(self.agents).levels()
 
     def get_learning_stats(self) -> Dict[str, Any]:
         """Get learning system statistics for monitoring."""
@@ -3,19 +3,28 @@
 Growth Engine 2.0 - Redis Blackboard
 Persistent, scalable blackboard implementation using Redis
 
-Version: 3.0.0
+Version: 3.1.0
 
 This provides the same interface as the in-memory Blackboard but stores
 data in Redis for:
 - Persistence across restarts
 - Horizontal scaling (multiple workers share state)
 - Pub/Sub for real-time notifications
+
+publish() is a single EVALSHA of PUBLISH_SCRIPT: version compare-and-bump,
+index update, history trim, stats and notification happen atomically in
+one round trip, so concurrent writers on different workers can no longer
+both read version N and both write N+1. The scripts only touch keys passed
+in KEYS, all under one hash tag, so they also run on Redis Cluster.
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import re
+import time
+import uuid
 from typing import Dict, Any, List, Optional, Callable, Set, Union
 from datetime import datetime
 from dataclasses import dataclass, field
@@ -43,6 +52,135 @@ class RedisConnectionError(Exception):
     pass
 
 
+# Index maintenance shared by the scripts below. Every key a script touches
+# is computed in Python and passed in KEYS (the EVAL contract; all keys share
+# the blackboard's {hash tag}, so they live in one Cluster slot). KEYS holds
+# the script's fixed keys, then three groups sized by ARGV:
+#   namespace zsets   <ns>, <ns>:<dotted prefix>
+#   sets to leave     the entry's current agent/category/tag index zsets
+#   sets to join      the new entry's agent/category/tag index zsets
+# All indexes are zsets scored by publish timestamp, so each can be paged.
+# The caller says which agent/category/tags it computed "sets to leave"
+# from; if the stored entry disagrees the script changes nothing and
+# returns -1 (or {-1, ...}) so the caller re-reads and retries.
+_INDEX_LUA = """
+local function key_groups(first, ...)
+    local groups, i = {}, first
+    for _, n in ipairs({...}) do
+        local group = {}
+        for _ = 1, tonumber(n) do
+            group[#group + 1] = KEYS[i]
+            i = i + 1
+        end
+        groups[#groups + 1] = group
+    end
+    return unpack(groups)
+end
+
+local function same_index(agent, category, tags, expected_agent, expected_category, expected_tags)
+    return agent == expected_agent and (category or '') == expected_category
+        and (tags or '[]') == expected_tags
+end
+
+local function unindex(key, namespaces, sets, expiry)
+    for _, z in ipairs(namespaces) do redis.call('ZREM', z, key) end
+    for _, s in ipairs(sets) do redis.call('ZREM', s, key) end
+    redis.call('ZREM', expiry, key)
+end
+
+local function index(key, score, namespaces, sets)
+    for _, z in ipairs(namespaces) do redis.call('ZADD', z, score, key) end
+    for _, s in ipairs(sets) do redis.call('ZADD', s, score, key) end
+end
+"""
+
+# KEYS: entry hash, history list, stats hash, expiry zset,
+#       then namespace zsets, sets to leave, sets to join
+# ARGV: key, hash, agent_id, timestamp, ttl, value, tags, metadata,
+#       category, history record, history max size, channel,
+#       score (epoch seconds), expire-at, backstop expire-at
+#       (expire-at + EXPIRY_GRACE), #namespaces, #leave, #join,
+#       expected stored agent_id, category, tags
+#
+# Returns {0, <existing entry as flat HGETALL>} when the content hash is
+# unchanged, {-1, agent_id, category, tags} when the stored entry is indexed
+# differently than expected, otherwise {1, version, previous value JSON or false}.
+PUBLISH_SCRIPT = _INDEX_LUA + """
+local current = redis.call('HMGET', KEYS[1], 'hash', 'version', 'value', 'agent_id', 'category', 'tags')
+local old_hash, old_version, old_value = current[1], current[2], current[3]
+-- Entries written before content hashes existed compare by stored JSON
+if old_value and (old_hash == ARGV[2] or (not old_hash and old_value == ARGV[6])) then
+    return {0, redis.call('HGETALL', KEYS[1])}
+end
+if current[4] and not same_index(current[4], current[5], current[6], ARGV[19], ARGV[20], ARGV[21]) then
+    return {-1, current[4], current[5] or '', current[6] or '[]'}
+end
+
+local namespaces, leave, join = key_groups(5, ARGV[16], ARGV[17], ARGV[18])
+local version = (tonumber(old_version) or 0) + 1
+unindex(ARGV[1], namespaces, leave, KEYS[4])
+
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1],
+    'key', ARGV[1], 'hash', ARGV[2], 'agent_id', ARGV[3], 'timestamp', ARGV[4],
+    'value', ARGV[6], 'tags', ARGV[7], 'metadata', ARGV[8], 'version', version)
+if ARGV[5] ~= '' then
+    redis.call('HSET', KEYS[1], 'ttl', ARGV[5])
+    -- Due entries are removed through DELETE_SCRIPT (which needs the hash
+    -- to unindex them); the Redis expiry is only a backstop
+    redis.call('ZADD', KEYS[4], tonumber(ARGV[14]), ARGV[1])
+    redis.call('EXPIREAT', KEYS[1], tonumber(ARGV[15]))
+end
+if ARGV[9] ~= '' then
+    redis.call('HSET', KEYS[1], 'category', ARGV[9])
+    redis.call('HINCRBY', KEYS[3], 'category:' .. ARGV[9], 1)
+end
+if old_value then
+    redis.call('HSET', KEYS[1], 'previous_value', old_value)
+end
+index(ARGV[1], tonumber(ARGV[13]), namespaces, join)
+
+redis.call('LPUSH', KEYS[2], ARGV[10])
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[11]) - 1)
+
+redis.call('HINCRBY', KEYS[3], 'total_writes', 1)
+redis.call('HINCRBY', KEYS[3], 'agent:' .. ARGV[3] .. ':writes', 1)
+
+redis.call('PUBLISH', ARGV[12], cjson.encode({key = ARGV[1], version = version, hash = ARGV[2]}))
+return {1, version, old_value}
+"""
+
+# KEYS: entry hash, expiry zset, then namespace zsets, sets to leave
+# ARGV: key, #namespaces, #leave, expected stored agent_id, category, tags,
+#       due-before (epoch seconds; '' deletes unconditionally)
+#
+# Returns 1 if deleted, 0 if missing (or not yet due), -1 if the stored
+# entry is indexed differently than expected. Expiry pruning uses the
+# due-before check so an entry republished meanwhile is left alone.
+DELETE_SCRIPT = _INDEX_LUA + """
+if ARGV[7] ~= '' then
+    local due = redis.call('ZSCORE', KEYS[2], ARGV[1])
+    if not due or tonumber(due) > tonumber(ARGV[7]) then return 0 end
+end
+local f = redis.call('HMGET', KEYS[1], 'agent_id', 'category', 'tags')
+if f[1] and not same_index(f[1], f[2], f[3], ARGV[4], ARGV[5], ARGV[6]) then
+    return -1
+end
+local namespaces, leave = key_groups(3, ARGV[2], ARGV[3])
+unindex(ARGV[1], namespaces, leave, KEYS[2])
+return redis.call('DEL', KEYS[1])
+"""
+
+# Seconds an expired entry hash outlives its TTL if nothing prunes it
+EXPIRY_GRACE = 86400
+
+
+def content_hash(value: Any) -> str:
+    """Stable digest of a value for change detection (dict key order ignored)."""
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
 class RedisBlackboard:
     """
     Redis-backed blackboard implementation.
@@ -50,20 +188,45 @@ class RedisBlackboard:
     Stores entries in Redis hashes with automatic TTL support.
     Uses Pub/Sub for real-time subscriber notifications.
 
-    Key schema:
+    Key schema (every key starts with the hash tag {<key_prefix>:blackboard},
+    so a blackboard's keys share one Cluster slot; "blackboard:" below):
     - blackboard:entries:<key> - Hash containing entry data
-    - blackboard:index:category:<category> - Set of keys in category
-    - blackboard:index:agent:<agent_id> - Set of keys by agent
+    - blackboard:ns - Sorted set of all keys, scored by publish time
+    - blackboard:ns:<prefix> - Same, per dotted key prefix ("scout",
+      "scout.competitors", ...), so "scout.*" reads one small zset
+    - blackboard:index:category:<category> - Sorted set of keys in category
+    - blackboard:index:agent:<agent_id> - Sorted set of keys by agent
+    - blackboard:index:tag:<tag> - Sorted set of keys with tag
+      (index zsets are scored by publish time, like the namespaces)
+    - blackboard:expiry - Sorted set of TTL'd keys, scored by expiry time
+    - blackboard:tmp:<id> - Short-lived ZINTERSTORE result of a filtered query
     - blackboard:history - List of all published keys (capped)
     - blackboard:stats - Hash of statistics
 
+    Queries never SCAN the keyspace: they page through a namespace zset
+    (ZRANGE), or through its ZINTERSTORE with tag/category zsets.
+
     Pub/Sub channels:
-    - blackboard:updates - All entry updates
-    - blackboard:updates:<pattern> - Pattern-specific updates
+    - blackboard:updates:<first key segment> - {key, version, hash} per
+      write; listeners fetch the entry only if a local subscriber matches
     """
 
     PREFIX = "blackboard"
     HISTORY_MAX_SIZE = 10000
+    QUERY_PAGE_SIZE = 200
+    PRUNE_INTERVAL = 1.0  # seconds between expiry sweeps per process
+    PRUNE_BATCH = 500
+    INDEX_RETRIES = 5  # script calls when another writer re-indexes the entry meanwhile
+    QUERY_TEMP_TTL = 30  # seconds a filtered query's intersection may outlive the query
+
+    # Entry fields that decide which index sets hold the key
+    INDEX_FIELDS = ('agent_id', 'category', 'tags')
+
+    # Fields fetched for query results (previous_value and hash are skipped)
+    QUERY_FIELDS = (
+        'key', 'value', 'agent_id', 'timestamp', 'ttl',
+        'tags', 'metadata', 'category', 'version',
+    )
 
     def __init__(
         self,
@@ -90,6 +253,9 @@ class RedisBlackboard:
 
         # Redis clients (lazy initialization)
         self._redis: Optional[aioredis.Redis] = None
+        self._publish_script = None
+        self._delete_script = None
+        self._last_prune = 0.0
         self._pubsub: Optional[aioredis.client.PubSub] = None
         self._pubsub_task: Optional[asyncio.Task] = None
 
@@ -108,8 +274,23 @@ class RedisBlackboard:
         logger.info(f"[RedisBlackboard] Initialized with prefix '{key_prefix}'")
 
     def _key(self, *parts: str) -> str:
-        """Build Redis key with prefix"""
-        return f"{self._key_prefix}:{self.PREFIX}:{':'.join(parts)}"
+        """Build Redis key with prefix (a hash tag: one Cluster slot per blackboard)"""
+        return f"{{{self._key_prefix}:{self.PREFIX}}}:{':'.join(parts)}"
+
+    def _namespace_keys(self, key: str) -> List[str]:
+        """Namespace zsets listing key: all keys, then each dotted prefix."""
+        segments = key.split('.')
+        return [self._key('ns')] + [
+            self._key('ns', '.'.join(segments[:i])) for i in range(1, len(segments))
+        ]
+
+    def _index_sets(self, agent_id: Optional[str], category: Optional[str], tags: Optional[str]) -> List[str]:
+        """Agent/category/tag index zsets for an entry's stored fields (tags as JSON)."""
+        sets = [self._key('index', 'agent', agent_id)] if agent_id else []
+        if category:
+            sets.append(self._key('index', 'category', category))
+        sets.extend(self._key('index', 'tag', tag) for tag in json.loads(tags or '[]'))
+        return sets
 
     async def connect(self) -> bool:
         """
@@ -190,9 +371,12 @@ class RedisBlackboard:
                     continue
 
                 try:
-                    # Parse the entry from message
                     data = json.loads(message['data'])
-                    entry = self._dict_to_entry(data)
+                    if not self._has_local_subscriber(data['key']):
+                        continue
+                    entry = await self.get_entry(data['key'])
+                    if entry is None:
+                        continue
 
                     # Notify local subscribers
                     await self._notify_local_subscribers(entry)
@@ -270,25 +454,8 @@ class RedisBlackboard:
             The created BlackboardEntry
         """
         await self._ensure_connected()
+        self._register_scripts()
 
-        redis_key = self._key('entries', key)
-
-        # Check for existing entry
-        existing_data = await self._redis.hgetall(redis_key)
-        version = 1
-        previous_value = None
-
-        if existing_data:
-            existing = self._dict_to_entry(existing_data)
-            version = existing.version + 1
-            previous_value = existing.value
-
-            # Skip if value hasn't changed
-            if not existing.has_changed(value):
-                logger.debug(f"[RedisBlackboard] Skipping unchanged value for '{key}'")
-                return existing
-
-        # Create entry
         entry = BlackboardEntry(
             key=key,
             value=value,
@@ -297,48 +464,71 @@ class RedisBlackboard:
             tags=tags or set(),
             metadata=metadata or {},
             category=category,
-            version=version,
-            previous_value=previous_value
         )
-
-        # Store in Redis
-        entry_dict = self._entry_to_dict(entry)
-
-        async with self._redis.pipeline() as pipe:
-            # Store entry
-            await pipe.hset(redis_key, mapping=entry_dict)
-
-            # Set TTL if specified
-            if ttl:
-                await pipe.expire(redis_key, ttl)
-
-            # Update indexes
-            if category:
-                await pipe.sadd(self._key('index', 'category', category.value), key)
-            await pipe.sadd(self._key('index', 'agent', agent_id), key)
-
-            # Add to history (capped list)
-            await pipe.lpush(self._key('history'), json.dumps({
-                'key': key,
-                'agent_id': agent_id,
-                'timestamp': entry.timestamp.isoformat(),
-                'category': category.value if category else None,
-            }))
-            await pipe.ltrim(self._key('history'), 0, self.HISTORY_MAX_SIZE - 1)
-
-            # Update stats
-            await pipe.hincrby(self._key('stats'), 'total_writes', 1)
-            await pipe.hincrby(self._key('stats'), f'agent:{agent_id}:writes', 1)
-            if category:
-                await pipe.hincrby(self._key('stats'), f'category:{category.value}', 1)
-
-            # Publish update notification
-            await pipe.publish(
-                self._key('updates', key.split('.')[0]),  # Use first part as channel
-                json.dumps(entry_dict)
+        value_hash = content_hash(value)
+        tags_json = json.dumps(sorted(entry.tags))
+        category_value = category.value if category else ''
+        namespaces = self._namespace_keys(key)
+        join = self._index_sets(agent_id, category_value, tags_json)
+        history_record = json.dumps({
+            'key': key,
+            'agent_id': agent_id,
+            'timestamp': entry.timestamp.isoformat(),
+            'category': category.value if category else None,
+        })
+
+        # Assume the stored entry is indexed like the new one (a rewrite by the
+        # same agent); if not, the script returns its fields and we retry
+        expected = (agent_id, category_value, tags_json)
+        for _ in range(self.INDEX_RETRIES):
+            leave = self._index_sets(*expected)
+            result = await self._publish_script(
+                keys=[
+                    self._key('entries', key),
+                    self._key('history'),
+                    self._key('stats'),
+                    self._key('expiry'),
+                    *namespaces,
+                    *leave,
+                    *join,
+                ],
+                args=[
+                    key,
+                    value_hash,
+                    agent_id,
+                    entry.timestamp.isoformat(),
+                    ttl or '',
+                    json.dumps(value),
+                    tags_json,
+                    json.dumps(entry.metadata),
+                    category_value,
+                    history_record,
+                    self.HISTORY_MAX_SIZE,
+                    self._key('updates', key.split('.')[0]),  # Use first part as channel
+                    entry.timestamp.timestamp(),
+                    entry.timestamp.timestamp() + ttl if ttl else '',
+                    int(entry.timestamp.timestamp()) + ttl + EXPIRY_GRACE if ttl else '',
+                    len(namespaces),
+                    len(leave),
+                    len(join),
+                    *expected,
+                ],
             )
+            if int(result[0]) != -1:
+                break
+            expected = tuple(result[1:4])
+        else:
+            raise RuntimeError(f"Blackboard entry '{key}' kept changing while publishing")
+
+        if int(result[0]) == 0:
+            logger.debug(f"[RedisBlackboard] Skipping unchanged value for '{key}'")
+            flat = result[1]
+            return self._dict_to_entry(dict(zip(flat[::2], flat[1::2])))
 
-            await pipe.execute()
+        version = int(result[1])
+        entry.version = version
+        if len(result) > 2 and result[2] is not None:
+            entry.previous_value = json.loads(result[2])
 
         logger.info(
             f"[RedisBlackboard] Published '{key}' (v{version}): {str(value)[:80]}..."
@@ -372,6 +562,8 @@ class RedisBlackboard:
             return default
 
         entry = self._dict_to_entry(data)
+        if entry.is_expired():
+            return default
 
         # Update read stats
         if agent_id:
@@ -390,7 +582,8 @@ class RedisBlackboard:
         if not data:
             return None
 
-        return self._dict_to_entry(data)
+        entry = self._dict_to_entry(data)
+        return None if entry.is_expired() else entry
 
     async def get_many(
         self,
@@ -411,7 +604,8 @@ class RedisBlackboard:
         for key, data in zip(keys, results):
             if data:
                 entry = self._dict_to_entry(data)
-                result[key] = entry.value
+                if not entry.is_expired():
+                    result[key] = entry.value
 
         return result
 
@@ -423,58 +617,103 @@ class RedisBlackboard:
         category: Optional[DataCategory] = None,
         limit: int = 100
     ) -> List[BlackboardEntry]:
-        """Query blackboard with pattern matching"""
+        """
+        Query blackboard with pattern matching.
+
+        Reads the namespace zset for the pattern's literal key prefix
+        ("scout.*" → ns:scout) a page at a time. With tag/category filters
+        the intersection is ZINTERSTOREd into a short-lived key and paged
+        the same way. Results are in publish order, like the in-memory
+        Blackboard.
+        """
         await self._ensure_connected()
+        await self._prune_expired()
 
-        # Use Redis SCAN for pattern matching
-        redis_pattern = self._key('entries', pattern.replace('*', '*'))
+        if '*' not in pattern:
+            entries = await self._fetch_entries([pattern])
+            return [e for e in entries if self._matches_filters(e, tags, category)][:limit]
 
-        entries = []
-
-        # If category specified, use index
+        namespace = self._namespace_key(pattern)
+        filter_sets = [self._key('index', 'tag', tag) for tag in sorted(tags or ())]
         if category:
-            keys = await self._redis.smembers(self._key('index', 'category', category.value))
-            keys = [k for k in keys if self._pattern_matches(pattern, k)]
-        else:
-            # Scan for matching keys
-            keys = []
-            cursor = 0
-            while True:
-                cursor, batch = await self._redis.scan(
-                    cursor=cursor,
-                    match=redis_pattern,
-                    count=100
-                )
+            filter_sets.append(self._key('index', 'category', category.value))
 
-                for redis_key in batch:
-                    # Extract original key from Redis key
-                    key = redis_key.replace(f"{self._key('entries')}:", "")
-                    keys.append(key)
+        entries: List[BlackboardEntry] = []
+        source = namespace
+        if filter_sets:
+            # Weight 0 on the filters keeps the namespace timestamp as the score
+            source = self._key('tmp', uuid.uuid4().hex)
+            async with self._redis.pipeline() as pipe:
+                await pipe.zinterstore(source, {namespace: 1, **{key: 0 for key in filter_sets}})
+                await pipe.expire(source, self.QUERY_TEMP_TTL)
+                await pipe.execute()
 
-                if cursor == 0 or len(keys) >= limit:
+        try:
+            page = max(limit, self.QUERY_PAGE_SIZE)
+            start = 0
+            while len(entries) < limit:
+                batch = await self._redis.zrange(source, start, start + page - 1)
+                keys = [k for k in batch if self._pattern_matches(pattern, k)]
+                entries.extend(await self._fetch_entries(keys))
+                if len(batch) < page:
                     break
+                start += page
+        finally:
+            if source != namespace:
+                await self._redis.delete(source)
 
-        # Fetch entries
-        async with self._redis.pipeline() as pipe:
-            for key in keys[:limit]:
-                await pipe.hgetall(self._key('entries', key))
+        logger.debug(f"[RedisBlackboard] Query '{pattern}' returned {len(entries[:limit])} entries")
 
-            results = await pipe.execute()
+        return entries[:limit]
 
-        for data in results:
-            if data:
-                entry = self._dict_to_entry(data)
+    def _namespace_key(self, pattern: str) -> str:
+        """Namespace zset for the whole key segments before the first wildcard."""
+        segments = pattern.split('.')
+        literal: List[str] = []
+        for segment in segments[:-1]:
+            if '*' in segment:
+                break
+            literal.append(segment)
+        return self._key('ns', '.'.join(literal)) if literal else self._key('ns')
 
-                # Tag filter
-                if tags and not tags.issubset(entry.tags):
-                    continue
+    async def _fetch_entries(self, keys: List[str]) -> List[BlackboardEntry]:
+        """HMGET the query fields for keys in one pipeline; drops missing and expired entries."""
+        if not keys:
+            return []
 
-                entries.append(entry)
+        async with self._redis.pipeline() as pipe:
+            for key in keys:
+                await pipe.hmget(self._key('entries', key), self.QUERY_FIELDS)
 
-        logger.debug(f"[RedisBlackboard] Query '{pattern}' returned {len(entries)} entries")
+            results = await pipe.execute()
 
+        entries = []
+        for values in results:
+            data = {f: v for f, v in zip(self.QUERY_FIELDS, values) if v is not None}
+            if not data.get('key'):
+                continue
+            entry = self._dict_to_entry(data)
+            if not entry.is_expired():
+                entries.append(entry)
         return entries
 
+    @staticmethod
+    def _matches_filters(
+        entry: BlackboardEntry,
+        tags: Optional[Set[str]],
+        category: Optional[DataCategory],
+    ) -> bool:
+        if tags and not tags.issubset(entry.tags):
+            return False
+        return category is None or entry.category == category
+
+    def _has_local_subscriber(self, key: str) -> bool:
+        return any(
+            regex.match(key)
+            for pattern, regex in self._compiled_patterns.items()
+            if pattern in self._subscriptions
+        )
+
     def _pattern_matches(self, pattern: str, key: str) -> bool:
         """Check if key matches glob pattern"""
         if pattern not in self._compiled_patterns:
@@ -492,23 +731,10 @@ class RedisBlackboard:
         """Query by category (fast indexed lookup)"""
         await self._ensure_connected()
 
-        keys = await self._redis.smembers(self._key('index', 'category', category.value))
-        keys = list(keys)[:limit]
-
-        entries = []
-
-        if keys:
-            async with self._redis.pipeline() as pipe:
-                for key in keys:
-                    await pipe.hgetall(self._key('entries', key))
-
-                results = await pipe.execute()
+        await self._prune_expired()
 
-            for data in results:
-                if data:
-                    entries.append(self._dict_to_entry(data))
-
-        return entries
+        keys = await self._redis.zrange(self._key('index', 'category', category.value), 0, limit - 1)
+        return await self._fetch_entries(keys)
 
     async def query_by_agent(
         self,
@@ -519,23 +745,10 @@ class RedisBlackboard:
         """Get all entries published by specific agent"""
         await self._ensure_connected()
 
-        keys = await self._redis.smembers(self._key('index', 'agent', from_agent))
-        keys = list(keys)[:limit]
-
-        entries = []
-
-        if keys:
-            async with self._redis.pipeline() as pipe:
-                for key in keys:
-                    await pipe.hgetall(self._key('entries', key))
-
-                results = await pipe.execute()
-
-            for data in results:
-                if data:
-                    entries.append(self._dict_to_entry(data))
+        await self._prune_expired()
 
-        return entries
+        keys = await self._redis.zrange(self._key('index', 'agent', from_agent), 0, limit - 1)
+        return await self._fetch_entries(keys)
 
     def subscribe(
         self,
@@ -622,29 +835,53 @@ class RedisBlackboard:
             logger.debug(f"[RedisBlackboard] Notified {notifications} subscribers for '{entry.key}'")
 
     async def delete(self, key: str):
-        """Delete entry"""
+        """Delete entry and its index memberships (read fields, then one script call)"""
         await self._ensure_connected()
+        self._register_scripts()
 
-        redis_key = self._key('entries', key)
+        for _ in range(self.INDEX_RETRIES):
+            fields = await self._redis.hmget(self._key('entries', key), self.INDEX_FIELDS)
+            deleted = await self._delete_script(**self._delete_call(key, fields))
+            if deleted != -1:
+                break
+        else:
+            raise RuntimeError(f"Blackboard entry '{key}' kept changing while deleting")
 
-        # Get entry first to update indexes
-        data = await self._redis.hgetall(redis_key)
+        if deleted:
+            logger.debug(f"[RedisBlackboard] Deleted '{key}'")
 
-        if data:
-            entry = self._dict_to_entry(data)
+    async def _delete_entries(self, keys: List[str], due_before: Any = '') -> int:
+        """
+        Delete entries and their index memberships in two pipelined round
+        trips (read index fields, run DELETE_SCRIPT per key). Entries
+        re-indexed in between (or republished, with due_before) are left
+        alone. Returns how many were deleted.
+        """
+        if not keys:
+            return 0
+        self._register_scripts()
 
-            async with self._redis.pipeline() as pipe:
-                # Delete entry
-                await pipe.delete(redis_key)
+        async with self._redis.pipeline() as pipe:
+            for key in keys:
+                await pipe.hmget(self._key('entries', key), self.INDEX_FIELDS)
+            fields = await pipe.execute()
 
-                # Update indexes
-                if entry.category:
-                    await pipe.srem(self._key('index', 'category', entry.category.value), key)
-                await pipe.srem(self._key('index', 'agent', entry.agent_id), key)
+        async with self._redis.pipeline() as pipe:
+            for key, values in zip(keys, fields):
+                await self._delete_script(**self._delete_call(key, values, due_before), client=pipe)
+            results = await pipe.execute()
 
-                await pipe.execute()
+        return sum(1 for deleted in results if deleted == 1)
 
-            logger.debug(f"[RedisBlackboard] Deleted '{key}'")
+    def _delete_call(self, key: str, fields: List[Optional[str]], due_before: Any = '') -> Dict[str, Any]:
+        """DELETE_SCRIPT keys/args for an entry whose index fields were read as `fields`."""
+        agent_id, category, tags = fields
+        namespaces = self._namespace_keys(key)
+        leave = self._index_sets(agent_id, category, tags)
+        return {
+            'keys': [self._key('entries', key), self._key('expiry'), *namespaces, *leave],
+            'args': [key, len(namespaces), len(leave), agent_id or '', category or '', tags or '[]', due_before],
+        }
 
     async def clear(self, pattern: Optional[str] = None):
         """Clear entries matching pattern (or all)"""
@@ -656,7 +893,7 @@ class RedisBlackboard:
             while True:
                 cursor, keys = await self._redis.scan(
                     cursor=cursor,
-                    match=f"{self._key_prefix}:{self.PREFIX}:*",
+                    match=self._key('*'),
                     count=100
                 )
 
@@ -668,36 +905,124 @@ class RedisBlackboard:
 
             logger.info("[RedisBlackboard] Cleared all entries")
         else:
-            # Clear matching entries
-            entries = await self.query(pattern, limit=10000)
-
-            for entry in entries:
-                await self.delete(entry.key)
-
-            logger.info(f"[RedisBlackboard] Cleared {len(entries)} entries")
+            # Walk the namespace index from the end: deleting inside the
+            # current window never shifts the windows still to come
+            namespace = self._namespace_key(pattern)
+            page = self.QUERY_PAGE_SIZE
+            cleared = 0
+            end = await self._redis.zcard(namespace)
+            while end > 0:
+                batch = await self._redis.zrange(namespace, max(0, end - page), end - 1)
+                keys = [k for k in batch if self._pattern_matches(pattern, k)]
+                cleared += await self._delete_entries(keys)
+                end -= page
+
+            logger.info(f"[RedisBlackboard] Cleared {cleared} entries")
 
     async def get_all_keys(self) -> List[str]:
         """Get all current keys"""
         await self._ensure_connected()
+        await self._prune_expired()
 
-        keys = []
-        cursor = 0
+        return list(await self._redis.zrange(self._key('ns'), 0, -1))
+
+    async def rebuild_indexes(self) -> int:
+        """
+        Index entries written before namespace/tag indexes existed.
+
+        One-off SCAN of this blackboard's entries; safe to re-run.
+        """
+        await self._ensure_connected()
 
+        entries_prefix = f"{self._key('entries')}:"
+        indexed = 0
+        cursor = 0
         while True:
-            cursor, batch = await self._redis.scan(
-                cursor=cursor,
-                match=self._key('entries', '*'),
-                count=100
-            )
+            cursor, batch = await self._redis.scan(cursor=cursor, match=f"{entries_prefix}*", count=500)
+            keys = [redis_key[len(entries_prefix):] for redis_key in batch]
+            entries = await self._fetch_entries(keys)
+            async with self._redis.pipeline() as pipe:
+                for entry in entries:
+                    score = entry.timestamp.timestamp()
+                    await pipe.zadd(self._key('ns'), {entry.key: score})
+                    segments = entry.key.split('.')
+                    for i in range(1, len(segments)):
+                        await pipe.zadd(self._key('ns', '.'.join(segments[:i])), {entry.key: score})
+                    for index_key in self._index_sets(entry.agent_id, entry.category and entry.category.value,
+                                                      json.dumps(sorted(entry.tags))):
+                        await pipe.zadd(index_key, {entry.key: score})
+                    if entry.ttl:
+                        await pipe.zadd(self._key('expiry'), {entry.key: score + entry.ttl})
+                await pipe.execute()
+            indexed += len(entries)
+            if cursor == 0:
+                break
 
+        logger.info(f"[RedisBlackboard] Rebuilt indexes for {indexed} entries")
+        return indexed
+
+    async def migrate_legacy_keys(self) -> int:
+        """
+        Move entries from the pre-3.1 key schema (<key_prefix>:blackboard:*,
+        without the hash tag) to the current one, then delete the old keys.
+
+        Each entry is republished with its agent, tags, metadata, category and
+        remaining TTL (it gets a new timestamp and starts again at version 1).
+        Run once every worker writes the new schema; safe to re-run.
+        """
+        await self._ensure_connected()
+
+        legacy_prefix = f"{self._key_prefix}:{self.PREFIX}:"
+        moved = 0
+        cursor = 0
+        while True:
+            cursor, batch = await self._redis.scan(cursor=cursor, match=f"{legacy_prefix}entries:*", count=500)
             for redis_key in batch:
-                key = redis_key.replace(f"{self._key('entries')}:", "")
-                keys.append(key)
+                data = await self._redis.hgetall(redis_key)
+                if not data.get('key'):
+                    continue
+                entry = self._dict_to_entry(data)
+                ttl = None
+                if entry.ttl:
+                    ttl = await self._redis.ttl(redis_key)
+                    if ttl <= 0:
+                        continue  # expired meanwhile
+                await self.publish(
+                    entry.key, entry.value, entry.agent_id, ttl=ttl,
+                    tags=entry.tags, metadata=entry.metadata, category=entry.category,
+                )
+                moved += 1
+            if cursor == 0:
+                break
 
+        cursor = 0
+        while True:
+            cursor, batch = await self._redis.scan(cursor=cursor, match=f"{legacy_prefix}*", count=500)
+            if batch:
+                await self._redis.delete(*batch)
             if cursor == 0:
                 break
 
-        return keys
+        logger.info(f"[RedisBlackboard] Migrated {moved} entries from the legacy key schema")
+        return moved
+
+    def _register_scripts(self):
+        if self._publish_script is None:
+            # redis-py sends EVALSHA and reloads the script on NOSCRIPT
+            self._publish_script = self._redis.register_script(PUBLISH_SCRIPT)
+            self._delete_script = self._redis.register_script(DELETE_SCRIPT)
+
+    async def _prune_expired(self):
+        """Unindex and delete entries whose TTL has passed (at most once per PRUNE_INTERVAL)."""
+        now = time.time()
+        if now - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+
+        due = await self._redis.zrangebyscore(self._key('expiry'), '-inf', now, start=0, num=self.PRUNE_BATCH)
+        pruned = await self._delete_entries(due, due_before=now)
+        if pruned:
+            logger.debug(f"[RedisBlackboard] Pruned {pruned} expired entries")
 
     async def get_stats(self) -> Dict[str, Any]:
         """Get statistics"""
@@ -724,7 +1049,8 @@ class RedisBlackboard:
                 by_category[cat] = int(value)
 
         # Count entries
-        total_entries = len(await self.get_all_keys())
+        await self._prune_expired()
+        total_entries = await self._redis.zcard(self._key('ns'))
 
         return {
             'total_entries': total_entries,
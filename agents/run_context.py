@@ -56,21 +56,16 @@ class RunLimits:
     Concurrency and timeout limits for a run.
     Prevents resource exhaustion.
 
-    NOTE: llm_semaphore and scrape_semaphore are available for controlling
-    concurrent LLM/scrape operations. To use them, wrap LLM/scrape calls:
-
-        async with run_context.limits.llm_semaphore:
-            response = await openai.chat.completions.create(...)
+    NOTE: scrape_semaphore limits concurrent scrapes within a run:
 
         async with run_context.limits.scrape_semaphore:
             result = await scraper.fetch(url)
 
-    Semaphore usage is enforced in:
-    - main.py: all chat.completions.create() calls wrapped with _LLM_SEMAPHORE
-    - BaseAgent._call_llm(): injectable helper for agent-level LLM calls
+    LLM calls are not limited per run: BaseAgent._call_llm() and main.py go
+    through the process-wide LLM gateway (core/llm_gateway.py), which adapts
+    concurrency to 429s and latency.
     """
     # Semaphores
-    llm_concurrency: int = 5          # Max concurrent LLM calls
     scrape_concurrency: int = 3       # Max concurrent web scrapes
 
     # Timeouts (seconds) - generous for analysis tasks
@@ -92,20 +87,12 @@ class RunLimits:
 
     def __post_init__(self):
         """Create semaphores"""
-        self._llm_semaphore: Optional[asyncio.Semaphore] = None
         self._scrape_semaphore: Optional[asyncio.Semaphore] = None
 
     def get_agent_timeout(self, agent_id: str) -> float:
         """Get timeout for specific agent, or default"""
         return self.agent_timeouts.get(agent_id, self.agent_timeout)
 
-    @property
-    def llm_semaphore(self) -> asyncio.Semaphore:
-        """Get or create LLM semaphore"""
-        if self._llm_semaphore is None:
-            self._llm_semaphore = asyncio.Semaphore(self.llm_concurrency)
-        return self._llm_semaphore
-
     @property
     def scrape_semaphore(self) -> asyncio.Semaphore:
         """Get or create scrape semaphore"""
@@ -155,6 +142,16 @@ class RunTrace:
         }
 
 
+@dataclass(eq=False)
+class RunSubscriber:
+    """One consumer of a run's events (see RunContext.subscribe)"""
+    on_insight: Optional[Callable] = None
+    on_progress: Optional[Callable] = None
+    on_agent_start: Optional[Callable] = None
+    on_agent_complete: Optional[Callable] = None
+    on_swarm_event: Optional[Callable] = None
+
+
 class RunContext:
     """
     Isolated execution context for a single analysis run.
@@ -245,7 +242,10 @@ class RunContext:
         # Event is created lazily to avoid asyncio issues when instantiating outside async context
         self._cancel_event: Optional[asyncio.Event] = None
 
-        # Callbacks for progress updates
+        # Per-run event fan-out (see subscribe / emit_*)
+        self._subscribers: List[RunSubscriber] = []
+
+        # Legacy run_id-prefixed callbacks (set_callbacks)
         self._on_progress: Optional[Callable] = None
         self._on_agent_start: Optional[Callable] = None
         self._on_agent_complete: Optional[Callable] = None
@@ -375,7 +375,11 @@ class RunContext:
         on_agent_complete: Callable = None,
         on_insight: Callable = None
     ):
-        """Set progress callbacks (for WebSocket updates)"""
+        """
+        Set run_id-prefixed callbacks: on_progress(run_id, agent_id, progress, message),
+        on_agent_start(run_id, agent_id, agent_name), on_agent_complete(run_id, agent_id, result),
+        on_insight(run_id, agent_id, insight). Prefer subscribe().
+        """
         self._on_progress = on_progress
         self._on_agent_start = on_agent_start
         self._on_agent_complete = on_agent_complete
@@ -488,89 +492,111 @@ class RunContext:
         except asyncio.TimeoutError:
             return False
 
-    async def emit_progress(self, agent_id: str, progress: float, message: str = None):
-        """Emit progress update (persists to RunStore stream)"""
-        self.trace.log('progress', agent_id=agent_id, data={'progress': progress, 'message': message})
+    def subscribe(
+        self,
+        on_insight: Callable = None,
+        on_progress: Callable = None,
+        on_agent_start: Callable = None,
+        on_agent_complete: Callable = None,
+        on_swarm_event: Callable = None
+    ) -> Callable[[], None]:
+        """
+        Receive this run's events (and only this run's). Callbacks are sync
+        and take the same arguments as the agent/orchestrator callbacks:
+        on_insight(AgentInsight), on_progress(AgentProgress),
+        on_agent_start(agent_id, agent_name), on_agent_complete(agent_id, AgentResult),
+        on_swarm_event(SwarmEvent).
 
-        # Emit to RunStore stream (for cross-worker WS forwarding)
-        await self.run_store.emit_event(self.run_id, RunEvent(
-            event_type='agent.progress',
-            agent_id=agent_id,
-            data={'progress': progress, 'message': message}
-        ))
+        Returns a function that removes the subscription.
+        """
+        subscriber = RunSubscriber(
+            on_insight=on_insight,
+            on_progress=on_progress,
+            on_agent_start=on_agent_start,
+            on_agent_complete=on_agent_complete,
+            on_swarm_event=on_swarm_event
+        )
+        self._subscribers.append(subscriber)
+
+        def unsubscribe():
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
 
+        return unsubscribe
+
+    def _fan_out(self, kind: str, *args):
+        for subscriber in list(self._subscribers):
+            callback = getattr(subscriber, kind)
+            if callback is None:
+                continue
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"[RunContext] Run {self.run_id}: {kind} subscriber error: {e}")
+
+    # Event routing. Agents and the orchestrator call these synchronously
+    # (they are wired as the agents' callbacks); persisting the client-visible
+    # event stream is left to the subscriber (RunEventStream) so a resumed
+    # websocket replays exactly what it would have received.
+
+    def emit_progress(self, progress: Any):
+        """Route an AgentProgress update to this run's subscribers"""
+        agent_id = getattr(progress, 'agent_id', None)
+        value = getattr(progress, 'progress', None)
+        message = getattr(progress, 'current_task', None)
+        self.trace.log('progress', agent_id=agent_id, data={'progress': value, 'message': message})
+
+        self._fan_out('on_progress', progress)
         if self._on_progress:
             try:
-                self._on_progress(self.run_id, agent_id, progress, message)
+                self._on_progress(self.run_id, agent_id, value, message)
             except Exception as e:
                 logger.error(f"[RunContext] Progress callback error: {e}")
 
-    async def emit_agent_start(self, agent_id: str, agent_name: str):
-        """Emit agent start event (persists to RunStore stream)"""
+    def emit_agent_start(self, agent_id: str, agent_name: str):
+        """Route an agent start to this run's subscribers"""
         self.trace.log('agent_start', agent_id=agent_id, data={'name': agent_name})
 
-        await self.run_store.emit_event(self.run_id, RunEvent(
-            event_type='agent.start',
-            agent_id=agent_id,
-            data={'name': agent_name}
-        ))
-
+        self._fan_out('on_agent_start', agent_id, agent_name)
         if self._on_agent_start:
             try:
                 self._on_agent_start(self.run_id, agent_id, agent_name)
             except Exception as e:
                 logger.error(f"[RunContext] Agent start callback error: {e}")
 
-    async def emit_agent_complete(self, agent_id: str, result: Any):
-        """Emit agent complete event (persists to RunStore stream)"""
+    def emit_agent_complete(self, agent_id: str, result: Any):
+        """Route an agent result to this run's subscribers"""
         status_str = str(result.status) if hasattr(result, 'status') else 'unknown'
         self.trace.log('agent_complete', agent_id=agent_id, data={'status': status_str})
 
-        await self.run_store.emit_event(self.run_id, RunEvent(
-            event_type='agent.complete',
-            agent_id=agent_id,
-            data={'status': status_str}
-        ))
-
+        self._fan_out('on_agent_complete', agent_id, result)
         if self._on_agent_complete:
             try:
                 self._on_agent_complete(self.run_id, agent_id, result)
             except Exception as e:
                 logger.error(f"[RunContext] Agent complete callback error: {e}")
 
-    async def emit_insight(self, agent_id: str, insight: Any):
-        """Emit insight event (persists to RunStore stream)"""
+    def emit_insight(self, insight: Any):
+        """Route an AgentInsight to this run's subscribers"""
+        agent_id = getattr(insight, 'agent_id', None)
         insight_type = str(insight.insight_type) if hasattr(insight, 'insight_type') else 'unknown'
         self.trace.log('insight', agent_id=agent_id, data={'type': insight_type})
 
-        # Serialize insight for Redis
-        insight_data = {
-            'type': insight_type,
-            'message': str(insight.message) if hasattr(insight, 'message') else '',
-            'priority': str(insight.priority) if hasattr(insight, 'priority') else 'medium'
-        }
-
-        await self.run_store.emit_event(self.run_id, RunEvent(
-            event_type='agent.insight',
-            agent_id=agent_id,
-            data=insight_data
-        ))
-
+        self._fan_out('on_insight', insight)
         if self._on_insight:
             try:
                 self._on_insight(self.run_id, agent_id, insight)
             except Exception as e:
                 logger.error(f"[RunContext] Insight callback error: {e}")
 
-    async def emit_swarm_event(self, event_type: str, data: Dict[str, Any]):
-        """Emit generic swarm event (persists to RunStore stream)"""
-        self.trace.log(event_type, data=data)
+    def emit_swarm_event(self, event: Any):
+        """Route a SwarmEvent to this run's subscribers"""
+        event_type = getattr(event, 'event_type', 'swarm_event')
+        event_type = getattr(event_type, 'value', event_type)
+        self.trace.log(str(event_type), agent_id=getattr(event, 'from_agent', None),
+                       data={'to_agent': getattr(event, 'to_agent', None), 'subject': getattr(event, 'subject', None)})
 
-        await self.run_store.emit_event(self.run_id, RunEvent(
-            event_type=event_type,
-            agent_id=data.get('from_agent'),
-            data=data
-        ))
+        self._fan_out('on_swarm_event', event)
 
     async def read_events(self, last_id: str = "0", count: int = 100, block_ms: int = 0) -> List[RunEvent]:
         """Read events from stream (for WS forwarding)"""
@@ -624,9 +650,14 @@ def get_run_context(run_id: str) -> Optional[RunContext]:
     return RunContext.get_by_id(run_id)
 
 
+def get_shared_run_store() -> RunStore:
+    """The shared RunStore (Redis in prod, InMemory in dev)"""
+    return RunContext._get_shared_store()
+
+
 async def get_run_from_store(run_id: str) -> Optional[Dict[str, Any]]:
     """Get run data from RunStore (Redis - works across workers)"""
-    store = RunContext._get_shared_store()
+    store = get_shared_run_store()
     return await store.get_run(run_id)
 
 
@@ -637,7 +668,7 @@ async def list_runs_from_store(
     user_id: str = None
 ) -> List[Dict[str, Any]]:
     """List runs from RunStore (Redis - works across workers)"""
-    store = RunContext._get_shared_store()
+    store = get_shared_run_store()
     return await store.list_runs(limit=limit, offset=offset, status=status, user_id=user_id)
 
 
@@ -653,5 +684,5 @@ async def cancel_run(run_id: str, reason: str = "User cancelled") -> bool:
         return True
 
     # Otherwise cancel via RunStore directly
-    store = RunContext._get_shared_store()
+    store = get_shared_run_store()
     return await store.cancel(run_id)
@@ -13,17 +13,48 @@ Redis keys:
 - run:{run_id}:result  (JSON - final result, optional)
 - run:{run_id}:trace   (LIST - trace events)
 - run:{run_id}:cancelled (string "1", short TTL)
+- run:{run_id}:summary (HASH - run_id, user_id, url, status, created_at,
+                        started_at, completed_at; what listings read)
 - runs:index           (ZSET - timestamp -> run_id for listing)
-- runs:status:{status} (SET - run_ids by status for filtering)
+- runs:by_status:{status} (ZSET - timestamp -> run_id, runs in one status)
+- runs:user:{user_id}  (ZSET - timestamp -> run_id, one user's runs)
+
+RedisRunStore writes:
+- TTLs are set once, when the run is created (the event stream and trace
+  list are created empty then); later writes keep the existing TTL
+- Events are buffered per run and written behind in one pipeline every
+  RUN_EVENT_FLUSH_MS, or as soon as RUN_EVENT_FLUSH_MAX events are pending
+- A status transition is a single atomic script (status, status indexes,
+  meta and summary timestamps together)
+
+Retention: per-run keys expire after RUN_DATA_TTL, but the shared indexes
+would keep their ids forever. RedisRunStore prunes runs older than
+RUN_DATA_TTL from runs:index and the status indexes in batches (at most every
+RUN_INDEX_PRUNE_INTERVAL seconds), and trims a user's index whenever it is
+written or listed. User indexes themselves expire with the user's last run.
+
+Single-node Redis only: STATUS_SCRIPT and PRUNE_INDEX_SCRIPT touch a run's
+keys together with the shared runs:index and runs:by_status:* indexes, and
+these keys have no common {hash tag} (the braces above are placeholders),
+so on Redis Cluster the scripts fail with CROSSSLOT. Unlike the blackboard
+and fan-out keys, a shared tag would put every run in one slot; a Cluster
+deployment needs per-run scripts and indexes maintained separately.
+
+Status indexes are scored by creation time like runs:index, so listing by
+status is one ZREVRANGE page. Runs created before they existed are only in
+the old runs:status:{status} sets; rebuild_indexes() adds them (the old sets
+can be deleted afterwards).
 """
 
 import asyncio
 import json
 import logging
 import os
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 
@@ -35,6 +66,87 @@ RUN_DATA_TTL = 7 * 24 * 3600     # 7 days for meta/status/result/trace
 CANCELLED_TTL = 6 * 3600         # 6 hours for cancel flag
 EVENT_STREAM_TTL = 24 * 3600     # 24 hours for event stream
 
+# Write-behind event buffer (RedisRunStore)
+RUN_EVENT_FLUSH_MS = float(os.getenv("RUN_EVENT_FLUSH_MS", "5"))
+RUN_EVENT_FLUSH_MAX = int(os.getenv("RUN_EVENT_FLUSH_MAX", "64"))
+EVENT_STREAM_MAXLEN = 1000       # Keep last 1000 events per run
+
+# Index retention (RedisRunStore)
+RUN_INDEX_PRUNE_INTERVAL = float(os.getenv("RUN_INDEX_PRUNE_INTERVAL", "60"))
+RUN_INDEX_PRUNE_BATCH = int(os.getenv("RUN_INDEX_PRUNE_BATCH", "500"))
+
+TERMINAL_RUN_STATUSES = ('completed', 'failed', 'cancelled')
+RUN_STATUSES = ('pending', 'running', 'completed', 'failed', 'cancelled', 'timeout')
+
+# Fields of run:{run_id}:summary ('' for None)
+SUMMARY_FIELDS = ('run_id', 'user_id', 'url', 'status', 'created_at', 'started_at', 'completed_at')
+
+# Atomic status transition.
+# KEYS: status, meta, summary, runs:index, then the status index of every
+#       candidate status
+# ARGV: run_id, status, now (iso), ttl, now (timestamp), then the statuses of
+#       those indexes
+# The old status is only known inside the script, so the indexes it could be
+# in are all declared. Returns the previous status (or false).
+# The keys span slots: single-node Redis only (see the module docstring)
+STATUS_SCRIPT = """
+local old = redis.call('GET', KEYS[1])
+if old then
+    redis.call('SET', KEYS[1], ARGV[2], 'KEEPTTL')
+else
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[4])
+end
+local created = redis.call('ZSCORE', KEYS[4], ARGV[1]) or ARGV[5]
+for i = 5, #KEYS do
+    local name = ARGV[i + 1]
+    if name == ARGV[2] then
+        redis.call('ZADD', KEYS[i], created, ARGV[1])
+    elseif name == old then
+        redis.call('ZREM', KEYS[i], ARGV[1])
+    end
+end
+
+local stamp = nil
+if ARGV[2] == 'running' then
+    stamp = 'started_at'
+elseif ARGV[2] == 'completed' or ARGV[2] == 'failed' or ARGV[2] == 'cancelled' then
+    stamp = 'completed_at'
+end
+
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('HSET', KEYS[3], 'status', ARGV[2])
+    if stamp == 'completed_at' or (stamp and (redis.call('HGET', KEYS[3], 'started_at') or '') == '') then
+        redis.call('HSET', KEYS[3], stamp, ARGV[3])
+    end
+end
+
+local raw = redis.call('GET', KEYS[2])
+if raw and stamp then
+    local meta = cjson.decode(raw)
+    if stamp == 'completed_at' or meta['started_at'] == nil or meta['started_at'] == cjson.null then
+        meta[stamp] = ARGV[3]
+        redis.call('SET', KEYS[2], cjson.encode(meta), 'KEEPTTL')
+    end
+end
+return old
+"""
+
+# Drop runs created before the cutoff from runs:index and the status indexes.
+# KEYS: runs:index, status indexes...
+# ARGV: cutoff (timestamp), batch size
+# Returns the number of run ids removed. Single-node Redis only, like STATUS_SCRIPT
+PRUNE_INDEX_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #ids == 0 then
+    return 0
+end
+for i = 2, #KEYS do
+    redis.call('ZREM', KEYS[i], unpack(ids))
+end
+redis.call('ZREM', KEYS[1], unpack(ids))
+return #ids
+"""
+
 
 @dataclass
 class RunMeta:
@@ -117,7 +229,7 @@ class RunStore(ABC):
         status: Optional[str] = None,
         user_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """List runs with filtering"""
+        """List runs with filtering (newest first); entries have 'meta' and 'status'"""
         pass
 
     @abstractmethod
@@ -146,6 +258,10 @@ class RunStore(ABC):
         """Emit event to stream, returns event_id"""
         pass
 
+    async def emit_events(self, run_id: str, events: List[RunEvent]) -> List[str]:
+        """Emit several events in order, returns their event_ids"""
+        return [await self.emit_event(run_id, event) for event in events]
+
     @abstractmethod
     async def read_events(
         self,
@@ -267,16 +383,14 @@ class InMemoryRunStore(RunStore):
         count: int = 100,
         block_ms: int = 0
     ) -> List[RunEvent]:
-        if run_id not in self._events:
-            return []
-
         last_idx = int(last_id) if last_id != "0" else 0
-        events = self._events[run_id][last_idx:last_idx + count]
+        events = self._events.get(run_id, [])[last_idx:last_idx + count]
 
-        # Simulate blocking if no events (for long polling)
+        # Simulate blocking if no events (for long polling), also before the
+        # run's first event, like XREAD BLOCK on a stream that does not exist yet
         if not events and block_ms > 0:
             await asyncio.sleep(block_ms / 1000.0)
-            events = self._events[run_id][last_idx:last_idx + count]
+            events = self._events.get(run_id, [])[last_idx:last_idx + count]
 
         return events
 
@@ -298,12 +412,34 @@ class RedisRunStore(RunStore):
         """
         self._redis = redis_client
         self._redis_url = redis_url or os.environ.get('REDIS_URL', 'redis://localhost:6379')
-        self._connected = False
+        self._connected = redis_client is not None
+        self._status_script = None
+        self._prune_index_script = None
+        self._last_index_prune = 0.0
+
+        # Write-behind event buffer: run_id -> [(event, future)]
+        self._pending_events: Dict[str, List[Tuple[RunEvent, asyncio.Future]]] = {}
+        self._pending_count = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        # Runs whose stream/trace TTLs are known to be set (bounded, most recent)
+        self._ttl_runs: 'OrderedDict[str, None]' = OrderedDict()
+
         logger.info(f"[RedisRunStore] Initialized (url={self._redis_url[:30]}...)")
 
+    # Class-level so tests and benchmarks can tune them per instance
+    EVENT_FLUSH_INTERVAL = RUN_EVENT_FLUSH_MS / 1000.0
+    EVENT_FLUSH_MAX = RUN_EVENT_FLUSH_MAX
+    TTL_RUNS_MAX = 10000
+    PRUNE_INTERVAL = RUN_INDEX_PRUNE_INTERVAL
+    PRUNE_BATCH = RUN_INDEX_PRUNE_BATCH
+    LIST_PAGE_SIZE = 200
+
     async def _ensure_connected(self):
         """Ensure Redis connection is established"""
         if self._connected and self._redis:
+            self._register_scripts()
             return
 
         try:
@@ -314,6 +450,7 @@ class RedisRunStore(RunStore):
                 decode_responses=True
             )
             self._connected = True
+            self._register_scripts()
             logger.info("[RedisRunStore] Connected to Redis")
         except ImportError:
             raise RuntimeError("redis[async] package required for RedisRunStore. pip install redis[async]")
@@ -322,6 +459,29 @@ class RedisRunStore(RunStore):
         """Generate Redis key"""
         return f"run:{run_id}:{suffix}"
 
+    def _register_scripts(self):
+        if self._status_script is None:
+            # redis-py sends EVALSHA and reloads the script on NOSCRIPT
+            self._status_script = self._redis.register_script(STATUS_SCRIPT)
+            self._prune_index_script = self._redis.register_script(PRUNE_INDEX_SCRIPT)
+
+    def _needs_ttl(self, run_id: str) -> bool:
+        """
+        True the first time this worker writes the stream/trace of a run it
+        did not create (the keys might not exist yet, so they have no TTL).
+        """
+        if run_id in self._ttl_runs:
+            self._ttl_runs.move_to_end(run_id)
+            return False
+        self._mark_ttl(run_id)
+        return True
+
+    def _mark_ttl(self, run_id: str):
+        self._ttl_runs[run_id] = None
+        self._ttl_runs.move_to_end(run_id)
+        while len(self._ttl_runs) > self.TTL_RUNS_MAX:
+            self._ttl_runs.popitem(last=False)
+
     async def create_run(self, run_id: str, meta: RunMeta) -> bool:
         await self._ensure_connected()
 
@@ -333,45 +493,65 @@ class RedisRunStore(RunStore):
         # Set initial status
         pipe.set(self._key(run_id, 'status'), 'pending', ex=RUN_DATA_TTL)
 
+        # Create the trace list and (empty) event stream now so their TTLs
+        # are set once here instead of on every append
+        trace_key = self._key(run_id, 'trace')
+        pipe.rpush(trace_key, json.dumps(RunEvent(event_type='run_created').to_dict()))
+        pipe.expire(trace_key, RUN_DATA_TTL)
+        stream_key = self._key(run_id, 'events')
+        # MAXLEN 0 trims the entry right away; an emptied stream key is kept
+        pipe.xadd(stream_key, {'type': 'run_created'}, maxlen=0, approximate=False)
+        pipe.expire(stream_key, EVENT_STREAM_TTL)
+
+        # Compact summary for listings
+        summary_key = self._key(run_id, 'summary')
+        summary = {**meta.to_dict(), 'run_id': run_id, 'status': 'pending'}
+        pipe.hset(summary_key, mapping={f: summary.get(f) or '' for f in SUMMARY_FIELDS})
+        pipe.expire(summary_key, RUN_DATA_TTL)
+
         # Add to index (ZSET with timestamp as score)
         timestamp = datetime.now().timestamp()
         pipe.zadd('runs:index', {run_id: timestamp})
 
-        # Add to status set
-        pipe.sadd('runs:status:pending', run_id)
+        # Add to the user's index, dropping that user's expired runs
+        if meta.user_id:
+            user_key = self._user_index_key(meta.user_id)
+            pipe.zadd(user_key, {run_id: timestamp})
+            pipe.zremrangebyscore(user_key, '-inf', timestamp - RUN_DATA_TTL)
+            pipe.expire(user_key, RUN_DATA_TTL)
+
+        # Add to the status index
+        pipe.zadd(self._status_index_key('pending'), {run_id: timestamp})
 
         await pipe.execute()
+        self._mark_ttl(run_id)
         logger.debug(f"[RedisRunStore] Created run {run_id}")
+
+        await self._maybe_prune_indexes()
         return True
 
+    def _user_index_key(self, user_id: str) -> str:
+        return f"runs:user:{user_id}"
+
+    def _status_index_key(self, status: str) -> str:
+        return f"runs:by_status:{status}"
+
+    def _set_status_call(self, run_id: str, status: str, client=None):
+        statuses = RUN_STATUSES if status in RUN_STATUSES else (*RUN_STATUSES, status)
+        return self._status_script(
+            keys=[
+                self._key(run_id, 'status'), self._key(run_id, 'meta'), self._key(run_id, 'summary'),
+                'runs:index', *(self._status_index_key(s) for s in statuses),
+            ],
+            args=[run_id, status, datetime.now().isoformat(), RUN_DATA_TTL, datetime.now().timestamp(), *statuses],
+            client=client
+        )
+
     async def set_status(self, run_id: str, status: str) -> bool:
         await self._ensure_connected()
 
-        # Get old status to update sets
-        old_status = await self.get_status(run_id)
-
-        pipe = self._redis.pipeline()
+        old_status = await self._set_status_call(run_id, status)
 
-        # Update status
-        pipe.set(self._key(run_id, 'status'), status, ex=RUN_DATA_TTL)
-
-        # Update status sets
-        if old_status:
-            pipe.srem(f'runs:status:{old_status}', run_id)
-        pipe.sadd(f'runs:status:{status}', run_id)
-
-        # Update meta timestamps
-        meta_key = self._key(run_id, 'meta')
-        meta_json = await self._redis.get(meta_key)
-        if meta_json:
-            meta = json.loads(meta_json)
-            if status == 'running' and not meta.get('started_at'):
-                meta['started_at'] = datetime.now().isoformat()
-            elif status in ('completed', 'failed', 'cancelled'):
-                meta['completed_at'] = datetime.now().isoformat()
-            pipe.set(meta_key, json.dumps(meta), ex=RUN_DATA_TTL)
-
-        await pipe.execute()
         logger.debug(f"[RedisRunStore] Run {run_id} status: {old_status} -> {status}")
         return True
 
@@ -421,40 +601,155 @@ class RedisRunStore(RunStore):
         status: Optional[str] = None,
         user_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
+        """
+        List runs, newest first, from the indexes and summary hashes.
+
+        Entries carry 'run_id', 'meta' (summary fields), 'status' and
+        'has_result'; fetch the result itself with get_run().
+        """
         await self._ensure_connected()
+        await self._maybe_prune_indexes()
 
-        # Get run IDs
-        if status:
-            # Get from status set, then sort by timestamp
-            run_ids = list(await self._redis.smembers(f'runs:status:{status}'))
-            # Get scores for sorting
-            if run_ids:
-                scores = await self._redis.zmscore('runs:index', run_ids)
-                run_ids = [rid for rid, score in sorted(
-                    zip(run_ids, scores),
-                    key=lambda x: x[1] or 0,
-                    reverse=True
-                ) if score is not None]
+        if user_id:
+            user_key = self._user_index_key(user_id)
+            await self._redis.zremrangebyscore(user_key, '-inf', datetime.now().timestamp() - RUN_DATA_TTL)
+            if status:
+                return await self._list_filtered(user_key, status, limit, offset)
+            run_ids = await self._redis.zrevrange(user_key, offset, offset + limit - 1)
+        elif status:
+            # Status indexes are scored by creation, like runs:index
+            run_ids = await self._redis.zrevrange(self._status_index_key(status), offset, offset + limit - 1)
         else:
             # Get from index (sorted by timestamp, newest first)
             run_ids = await self._redis.zrevrange('runs:index', offset, offset + limit - 1)
 
+        return await self._fetch_summaries(run_ids)
+
+    async def _list_filtered(self, index_key: str, status: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """Page through an index, keeping runs in the given status."""
+        runs: List[Dict[str, Any]] = []
+        skipped = 0
+        start = 0
+        while len(runs) < limit:
+            run_ids = await self._redis.zrevrange(index_key, start, start + self.LIST_PAGE_SIZE - 1)
+            if not run_ids:
+                break
+            start += len(run_ids)
+            for run in await self._fetch_summaries(run_ids):
+                if run['status'] != status:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                runs.append(run)
+                if len(runs) == limit:
+                    break
+        return runs
+
+    async def _fetch_summaries(self, run_ids: List[str]) -> List[Dict[str, Any]]:
+        """Summary hashes for run_ids (one round trip), skipping expired runs."""
         if not run_ids:
             return []
 
-        # Fetch runs
+        pipe = self._redis.pipeline()
+        for run_id in run_ids:
+            pipe.hgetall(self._key(run_id, 'summary'))
+            pipe.exists(self._key(run_id, 'result'))
+        replies = await pipe.execute()
+
         runs = []
-        for run_id in run_ids[offset:offset + limit]:
+        for run_id, summary, has_result in zip(run_ids, replies[::2], replies[1::2]):
+            if summary:
+                meta = {f: summary.get(f) or None for f in SUMMARY_FIELDS if f != 'status'}
+                runs.append({
+                    'run_id': run_id,
+                    'meta': meta,
+                    'status': summary.get('status') or 'unknown',
+                    'has_result': bool(has_result),
+                })
+                continue
+            # Runs created before summaries existed
             run = await self.get_run(run_id)
             if run:
-                # Filter by user_id if specified
-                if user_id and run['meta'].get('user_id') != user_id:
-                    continue
                 run['run_id'] = run_id
+                run['has_result'] = run.pop('result', None) is not None
                 runs.append(run)
-
         return runs
 
+    async def _maybe_prune_indexes(self):
+        """prune_indexes() at most once per PRUNE_INTERVAL."""
+        now = time.time()
+        if now - self._last_index_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_index_prune = now
+        try:
+            await self.prune_indexes()
+        except Exception as e:
+            logger.warning(f"[RedisRunStore] Index prune failed: {e}")
+
+    async def prune_indexes(self) -> int:
+        """
+        Remove one batch (PRUNE_BATCH) of expired run ids from runs:index and
+        the status indexes. Returns how many were removed; callers that want a
+        full sweep can repeat until it returns 0.
+        """
+        await self._ensure_connected()
+        cutoff = datetime.now().timestamp() - RUN_DATA_TTL
+        pruned = await self._prune_index_script(
+            keys=['runs:index', *(self._status_index_key(s) for s in RUN_STATUSES)],
+            args=[cutoff, self.PRUNE_BATCH]
+        )
+        if pruned:
+            logger.info(f"[RedisRunStore] Pruned {pruned} expired runs from indexes")
+        return int(pruned or 0)
+
+    async def rebuild_indexes(self) -> int:
+        """
+        One-off backfill of summaries, user indexes and status indexes for
+        runs created before they existed. Returns the number of runs whose
+        summary was backfilled.
+        """
+        await self._ensure_connected()
+        cutoff = datetime.now().timestamp() - RUN_DATA_TTL
+        rebuilt = 0
+        start = 0
+        while True:
+            entries = await self._redis.zrange('runs:index', start, start + self.LIST_PAGE_SIZE - 1, withscores=True)
+            if not entries:
+                break
+            start += len(entries)
+
+            pipe = self._redis.pipeline()
+            for run_id, _ in entries:
+                pipe.exists(self._key(run_id, 'summary'))
+                pipe.get(self._key(run_id, 'meta'))
+                pipe.get(self._key(run_id, 'status'))
+                pipe.ttl(self._key(run_id, 'meta'))
+            replies = await pipe.execute()
+
+            pipe = self._redis.pipeline()
+            for i, (run_id, score) in enumerate(entries):
+                has_summary, meta_json, status, ttl = replies[i * 4:i * 4 + 4]
+                if score < cutoff:
+                    continue
+                if status:
+                    pipe.zadd(self._status_index_key(status), {run_id: score})
+                if has_summary or not meta_json:
+                    continue
+                summary = {**json.loads(meta_json), 'run_id': run_id, 'status': status or 'unknown'}
+                summary_key = self._key(run_id, 'summary')
+                pipe.hset(summary_key, mapping={f: summary.get(f) or '' for f in SUMMARY_FIELDS})
+                pipe.expire(summary_key, ttl if ttl and ttl > 0 else RUN_DATA_TTL)
+                if summary.get('user_id'):
+                    user_key = self._user_index_key(summary['user_id'])
+                    pipe.zadd(user_key, {run_id: score})
+                    pipe.expire(user_key, RUN_DATA_TTL)
+                rebuilt += 1
+            await pipe.execute()
+
+        logger.info(f"[RedisRunStore] Backfilled summaries for {rebuilt} runs")
+        return rebuilt
+
     async def cancel(self, run_id: str) -> bool:
         await self._ensure_connected()
 
@@ -463,9 +758,9 @@ class RedisRunStore(RunStore):
         # Set cancel flag with short TTL
         pipe.set(self._key(run_id, 'cancelled'), '1', ex=CANCELLED_TTL)
 
-        # Update status
+        # Update status in the same round trip
+        await self._set_status_call(run_id, 'cancelled', client=pipe)
         await pipe.execute()
-        await self.set_status(run_id, 'cancelled')
 
         logger.info(f"[RedisRunStore] Run {run_id} cancelled")
         return True
@@ -478,11 +773,19 @@ class RedisRunStore(RunStore):
 
     async def append_trace(self, run_id: str, event: RunEvent) -> bool:
         await self._ensure_connected()
-        await self._redis.rpush(
-            self._key(run_id, 'trace'),
-            json.dumps(event.to_dict())
-        )
-        await self._redis.expire(self._key(run_id, 'trace'), RUN_DATA_TTL)
+        trace_key = self._key(run_id, 'trace')
+        entry = json.dumps(event.to_dict())
+
+        if not self._needs_ttl(run_id):
+            # TTL was set when the run was created
+            await self._redis.rpush(trace_key, entry)
+            return True
+
+        pipe = self._redis.pipeline()
+        pipe.rpush(trace_key, entry)
+        pipe.expire(trace_key, RUN_DATA_TTL)
+        pipe.expire(self._key(run_id, 'events'), EVENT_STREAM_TTL)
+        await pipe.execute()
         return True
 
     async def get_trace(self, run_id: str, limit: int = 100) -> List[RunEvent]:
@@ -495,27 +798,99 @@ class RedisRunStore(RunStore):
         return [RunEvent.from_dict(json.loads(e)) for e in events_json]
 
     async def emit_event(self, run_id: str, event: RunEvent) -> str:
-        """Emit event to Redis Stream"""
+        """Emit event to Redis Stream (buffered, see emit_events)"""
+        return (await self.emit_events(run_id, [event]))[0]
+
+    async def emit_events(self, run_id: str, events: List[RunEvent]) -> List[str]:
+        """
+        Queue events for the run's stream and wait for their stream ids.
+
+        Events from every caller are written behind in one pipeline, either
+        EVENT_FLUSH_INTERVAL after the first one was queued or as soon as
+        EVENT_FLUSH_MAX are pending. Order per run is preserved.
+        """
+        if not events:
+            return []
         await self._ensure_connected()
 
-        stream_key = self._key(run_id, 'events')
+        loop = asyncio.get_running_loop()
+        futures = []
+        pending = self._pending_events.setdefault(run_id, [])
+        for event in events:
+            future = loop.create_future()
+            pending.append((event, future))
+            futures.append(future)
+        self._pending_count += len(events)
 
-        # Add to stream
-        event_id = await self._redis.xadd(
-            stream_key,
-            {
-                'type': event.event_type,
-                'agent_id': event.agent_id or '',
-                'timestamp': event.timestamp,
-                'data': json.dumps(event.data)
-            },
-            maxlen=1000  # Keep last 1000 events
-        )
+        if self._pending_count >= self.EVENT_FLUSH_MAX:
+            await self.flush_events()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
 
-        # Set TTL on stream
-        await self._redis.expire(stream_key, EVENT_STREAM_TTL)
+        return list(await asyncio.gather(*futures))
 
-        return event_id
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.EVENT_FLUSH_INTERVAL)
+        finally:
+            self._flush_task = None
+        await self.flush_events()
+
+    async def flush_events(self):
+        """Write every pending event now (one pipeline)."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        # The lock keeps pipelines in order, so a run's events reach the
+        # stream in the order they were emitted
+        async with self._flush_lock:
+            if not self._pending_count:
+                return
+            batch, self._pending_events = self._pending_events, {}
+            self._pending_count = 0
+
+            pipe = self._redis.pipeline()
+            # One slot per queued command: the event an XADD reply belongs to, or None
+            slots: List[Optional[Tuple[RunEvent, asyncio.Future]]] = []
+            futures: List[asyncio.Future] = []
+            for run_id, items in batch.items():
+                stream_key = self._key(run_id, 'events')
+                for event, future in items:
+                    pipe.xadd(
+                        stream_key,
+                        {
+                            'type': event.event_type,
+                            'agent_id': event.agent_id or '',
+                            'timestamp': event.timestamp,
+                            'data': json.dumps(event.data, default=str)
+                        },
+                        maxlen=EVENT_STREAM_MAXLEN
+                    )
+                    slots.append((event, future))
+                    futures.append(future)
+                if self._needs_ttl(run_id):
+                    # Run created by another worker (or before this release)
+                    pipe.expire(stream_key, EVENT_STREAM_TTL)
+                    pipe.expire(self._key(run_id, 'trace'), RUN_DATA_TTL)
+                    slots.extend((None, None))
+
+            try:
+                results = await pipe.execute()
+            except Exception as e:
+                logger.error(f"[RedisRunStore] Event flush failed ({len(futures)} events): {e}")
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for slot, reply in zip(slots, results):
+                if slot is None:
+                    continue
+                event, future = slot
+                event.event_id = reply
+                if not future.done():
+                    future.set_result(reply)
+            logger.debug(f"[RedisRunStore] Flushed {len(futures)} events for {len(batch)} runs")
 
     async def read_events(
         self,
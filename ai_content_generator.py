@@ -6,12 +6,14 @@ Production-ready AI text generation with:
 - Pydantic validation
 - Retry logic with exponential backoff
 - Rate limiting
+- Combined mode: all sections in one JSON-schema completion
 - Language support (EN/FI/SV)
 - Industry detection
 - No hallucinated numbers
 """
 
 import asyncio
+import json
 import logging
 import re
 import hashlib
@@ -26,11 +28,15 @@ except ImportError:
     OPENAI_AVAILABLE = False
 
 try:
-    from pydantic import BaseModel, Field, validator
+    from pydantic import BaseModel, Field, ValidationError, validator
     PYDANTIC_AVAILABLE = True
 except ImportError:
     PYDANTIC_AVAILABLE = False
 
+from app.config import AI_INSIGHTS_GENERATION_MODE
+from core.llm_cache import completion_text, get_llm_cache
+from core.llm_gateway import get_llm_gateway
+
 logger = logging.getLogger(__name__)
 
 # ============================================================================
@@ -38,10 +44,9 @@ logger = logging.getLogger(__name__)
 # ============================================================================
 
 OPENAI_MODEL = "gpt-4o-mini"  # or "gpt-4o" for better quality
-MAX_RETRIES = 3
-TIMEOUT_SECONDS = 30
-MAX_CONCURRENT_REQUESTS = 3  # Semaphore limit
+TIMEOUT_SECONDS = 30  # Per attempt; retries and concurrency live in core/llm_gateway.py
 MAX_CONTEXT_CHARS = 8000  # Token budget safety
+GENERATION_MODE = AI_INSIGHTS_GENERATION_MODE  # "combined" or "separate"
 
 # ============================================================================
 # LANGUAGE CONFIGURATION
@@ -75,6 +80,32 @@ FINNISH_INDUSTRY_KEYWORDS = {
     "professional": ["palvelu", "asiantuntija", "konsultointi", "ratkaisu", "yritys", "toimisto"]
 }
 
+# Shared prompt frameworks (per-section prompts and the combined prompt)
+SWOT_FRAMEWORK = """
+**SWOT ANALYSIS RULES:**
+- Strengths: What you do BETTER than competitors (use actual scores)
+- Weaknesses: Real technical/content gaps that hurt performance (be specific!)
+- Opportunities: What you could capture with improvements
+- Threats: Real competitive threats from the data (competitors ahead, technology gaps)
+"""
+
+CREATIVITY_FRAMEWORK = """
+**RADICAL CREATIVITY MINDSET:**
+- Creativity is a GROWTH STRATEGY, not decoration
+- Focus on "changing the reach", not just "changing the flavour"
+- Avoid process thinking traps (analyzing white spots until they turn grey)
+- Recommend actions that drive NEW segments, deeper commitment, REAL growth
+- Replace incremental improvements with transformative possibilities
+"""
+
+EXECUTIVE_FRAMEWORK = """
+**EXECUTIVE LENS:**
+- Focus on GROWTH POTENTIAL, not just current gaps
+- Frame weaknesses as market opportunities
+- Think: "What new territory can we capture?" not "What's broken?"
+- Creative permission beats creative intelligence
+"""
+
 # ============================================================================
 # PYDANTIC MODELS FOR VALIDATION
 # ============================================================================
@@ -137,45 +168,35 @@ class LLMClient:
         self, 
         prompt: str, 
         max_tokens: int = 1000,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        label: str = "ai_content",
+        response_format: Optional[Dict[str, Any]] = None
     ) -> Optional[str]:
-        """Generate text with retry logic"""
+        """Generate text through the LLM gateway (retries, backoff) and the LLM cache"""
         
         if not self.client:
             logger.warning("LLM client not initialized")
             return None
         
-        for attempt in range(MAX_RETRIES):
-            try:
-                response = await asyncio.wait_for(
-                    self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[{"role": "user", "content": prompt}],
-                        max_tokens=max_tokens,
-                        temperature=temperature
-                    ),
-                    timeout=TIMEOUT_SECONDS
-                )
-                return response.choices[0].message.content.strip()
-            
-            except asyncio.TimeoutError:
-                logger.warning(f"Timeout on attempt {attempt + 1}/{MAX_RETRIES}")
-                if attempt == MAX_RETRIES - 1:
-                    return None
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
-            
-            except Exception as e:
-                if "rate_limit" in str(e).lower() or "429" in str(e):
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Rate limit hit, waiting {wait_time}s")
-                    await asyncio.sleep(wait_time)
-                else:
-                    logger.error(f"LLM generation failed: {e}")
-                    if attempt == MAX_RETRIES - 1:
-                        return None
-                    await asyncio.sleep(1)
+        request = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if response_format:
+            request["response_format"] = response_format
         
-        return None
+        async def create():
+            return await get_llm_gateway().chat(self.client, label=label, timeout=TIMEOUT_SECONDS, **request)
+        
+        try:
+            response = await get_llm_cache().completion(label, request, create)
+        except Exception as e:
+            logger.error(f"LLM generation failed ({label}): {e}")
+            return None
+        text = completion_text(response)
+        return text.strip() if text else None
 
 # ============================================================================
 # CONTEXT PREPARATION (structured data + safe text extraction)
@@ -291,6 +312,21 @@ def build_structured_context(
 # AI GENERATION FUNCTIONS (with strict prompts)
 # ============================================================================
 
+def competitor_context(numbers: Dict[str, Any]) -> str:
+    """Competitor block for SWOT prompts (empty without competitor scores)"""
+    if not numbers.get('competitor_scores'):
+        return ""
+    return f"""
+**COMPETITOR DATA (CRITICAL - use this for threats!):**
+- Your score: {numbers.get('your_score', 0)}/100
+- Competitor average: {numbers.get('competitor_avg', 0)}/100
+- Gap: {numbers.get('competitor_avg', 0) - numbers.get('your_score', 0)} points
+"""
+
+def context_json(context: Dict[str, Any]) -> str:
+    """Context as real JSON for the ```json block in prompts (not a Python repr)"""
+    return json.dumps(context, ensure_ascii=False, default=str)
+
 async def generate_ai_swot(
     context: Dict[str, Any],
     language: str,
@@ -303,29 +339,11 @@ async def generate_ai_swot(
     metadata = context['metadata']
     
     lang_instruction = LANGUAGE_INSTRUCTIONS.get(language, LANGUAGE_INSTRUCTIONS['en'])
-    
-    # SWOT framework - balanced and realistic
-    swot_framework = """
-**SWOT ANALYSIS RULES:**
-- Strengths: What you do BETTER than competitors (use actual scores)
-- Weaknesses: Real technical/content gaps that hurt performance (be specific!)
-- Opportunities: What you could capture with improvements
-- Threats: Real competitive threats from the data (competitors ahead, technology gaps)
-"""
-
-    # Determine competitive context
-    comp_context = ""
-    if 'competitor_scores' in numbers and numbers.get('competitor_scores'):
-        comp_context = f"""
-**COMPETITOR DATA (CRITICAL - use this for threats!):**
-- Your score: {numbers.get('your_score', 0)}/100
-- Competitor average: {numbers.get('competitor_avg', 0)}/100
-- Gap: {numbers.get('competitor_avg', 0) - numbers.get('your_score', 0)} points
-"""
+    comp_context = competitor_context(numbers)
 
     prompt = f"""You are a digital strategy analyst. {lang_instruction}
 
-{swot_framework}
+{SWOT_FRAMEWORK}
 {comp_context}
 
 **CRITICAL RULES:**
@@ -336,7 +354,7 @@ async def generate_ai_swot(
 
 **Context (READ-ONLY):**
 ```json
-{context}
+{context_json(context)}
 ```
 
 **Task:**
@@ -363,7 +381,7 @@ Generate a SWOT analysis based ONLY on the data above. Return valid JSON:
 Return ONLY the JSON, no explanations.
 """
     
-    response = await llm_client.generate(prompt, max_tokens=800, temperature=0.6)
+    response = await llm_client.generate(prompt, max_tokens=800, temperature=0.6, label="swot")
     
     if not response:
         return None
@@ -402,19 +420,9 @@ async def generate_ai_recommendations(
     
     lang_instruction = LANGUAGE_INSTRUCTIONS.get(language, LANGUAGE_INSTRUCTIONS['en'])
     
-    # Radical creativity framework
-    creativity_framework = """
-**RADICAL CREATIVITY MINDSET:**
-- Creativity is a GROWTH STRATEGY, not decoration
-- Focus on "changing the reach", not just "changing the flavour"
-- Avoid process thinking traps (analyzing white spots until they turn grey)
-- Recommend actions that drive NEW segments, deeper commitment, REAL growth
-- Replace incremental improvements with transformative possibilities
-"""
-    
     prompt = f"""You are a digital growth strategist with radical creativity mindset. {lang_instruction}
 
-{creativity_framework}
+{CREATIVITY_FRAMEWORK}
 
 **CRITICAL RULES:**
 1. Use ONLY scores from context.numbers
@@ -425,7 +433,7 @@ async def generate_ai_recommendations(
 
 **Context:**
 ```json
-{context}
+{context_json(context)}
 ```
 
 **Task:**
@@ -448,7 +456,7 @@ Generate exactly 5 prioritized, GROWTH-ORIENTED recommendations. Return as JSON
 Return ONLY the JSON array, no explanations.
 """
     
-    response = await llm_client.generate(prompt, max_tokens=600, temperature=0.7)
+    response = await llm_client.generate(prompt, max_tokens=600, temperature=0.7, label="recommendations")
     
     if not response:
         return None
@@ -482,22 +490,13 @@ async def generate_ai_executive_summary(
     
     lang_instruction = LANGUAGE_INSTRUCTIONS.get(language, LANGUAGE_INSTRUCTIONS['en'])
     
-    # Radical creativity lens for executives
-    exec_framework = """
-**EXECUTIVE LENS:**
-- Focus on GROWTH POTENTIAL, not just current gaps
-- Frame weaknesses as market opportunities
-- Think: "What new territory can we capture?" not "What's broken?"
-- Creative permission beats creative intelligence
-"""
-    
     prompt = f"""You are a growth-oriented business strategist writing for C-level executives. {lang_instruction}
 
-{exec_framework}
+{EXECUTIVE_FRAMEWORK}
 
 **Context:**
 ```json
-{context}
+{context_json(context)}
 ```
 
 **Task:**
@@ -516,7 +515,7 @@ Write a 2-3 sentence executive summary that:
 Return ONLY the summary text, 50-200 words.
 """
     
-    response = await llm_client.generate(prompt, max_tokens=300, temperature=0.6)
+    response = await llm_client.generate(prompt, max_tokens=300, temperature=0.6, label="executive_summary")
     
     if not response:
         return None
@@ -544,7 +543,7 @@ async def generate_ai_action_priority(
 
 **Context:**
 ```json
-{context}
+{context_json(context)}
 ```
 
 **Task:**
@@ -567,7 +566,7 @@ Generate 3-5 prioritized action items. Return as JSON array:
 Return ONLY the JSON array.
 """
     
-    response = await llm_client.generate(prompt, max_tokens=700, temperature=0.6)
+    response = await llm_client.generate(prompt, max_tokens=700, temperature=0.6, label="action_priority")
     
     if not response:
         return None
@@ -592,6 +591,232 @@ Return ONLY the JSON array.
         logger.error(f"Action priority parsing failed: {e}")
         return None
 
+# ============================================================================
+# COMBINED GENERATION (all sections in one structured completion)
+# ============================================================================
+
+SECTIONS = ("swot", "recommendations", "executive_summary", "action_priority")
+
+# Output budget per section; a combined call asks for the sum of its sections
+SECTION_MAX_TOKENS = {
+    "swot": 800,
+    "recommendations": 600,
+    "executive_summary": 300,
+    "action_priority": 700
+}
+
+SECTION_FRAMEWORKS = {
+    "swot": SWOT_FRAMEWORK,
+    "recommendations": CREATIVITY_FRAMEWORK,
+    "executive_summary": EXECUTIVE_FRAMEWORK
+}
+
+SECTION_TASKS = {
+    "swot": """**swot** - SWOT analysis based ONLY on the context:
+- strengths: 2-4 specific strengths with actual scores
+- weaknesses: 2-4 SPECIFIC weaknesses, each referencing a low score or missing feature
+- opportunities: 2-3 growth opportunities based on weak areas
+- threats: 2-3 REAL threats: competitor gaps, technology aging, market changes
+No generic statements like "Improve SEO" or "Market competition".""",
+    "recommendations": """**recommendations** - exactly 5 prioritized, GROWTH-ORIENTED recommendations.
+Each must be TRANSFORMATIVE and specific and reference exact scores when relevant.
+Good: "Transform mobile experience to capture 70% more market (mobile_score: 5/15 → new segment opportunity)"
+Bad: "Improve mobile responsiveness" ← Too incremental!""",
+    "executive_summary": """**executive_summary** - 2-3 sentences (50-500 characters) for C-level executives.
+State overall_score, frame gaps as GROWTH OPPORTUNITIES, end with possibility thinking.""",
+    "action_priority": """**action_priority** - 3-5 action items, critical first:
+category security|content|seo|mobile|analytics, priority critical|high|medium|low,
+score_impact a realistic 1-15 points, description a clear action."""
+}
+
+# What a section must be when pydantic is not installed
+SECTION_TYPES = {
+    "swot": dict,
+    "recommendations": list,
+    "executive_summary": str,
+    "action_priority": list
+}
+
+# Values that pass AIGeneratedContent, standing in for sections a call did not ask for
+_SECTION_PLACEHOLDERS = {
+    "swot": {
+        "strengths": ["placeholder strength"],
+        "weaknesses": ["placeholder weakness"],
+        "opportunities": ["placeholder opportunity"],
+        "threats": []
+    },
+    "recommendations": ["placeholder recommendation"],
+    "executive_summary": "Placeholder executive summary used only while validating other sections.",
+    "action_priority": [
+        {"category": "seo", "priority": "low", "score_impact": 1, "description": "placeholder"}
+    ],
+    "confidence_score": 0,
+    "sentiment_score": 0.0
+}
+
+# JSON schema keywords OpenAI strict mode rejects; AIGeneratedContent checks them instead
+_STRICT_UNSUPPORTED = {"title", "minLength", "maxLength", "minItems", "maxItems", "minimum", "maximum"}
+
+
+def _strict_schema(node: Any) -> Any:
+    """Reduce a pydantic JSON schema to what strict structured outputs accept"""
+    if isinstance(node, list):
+        return [_strict_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    strict = {}
+    for key, value in node.items():
+        if key in _STRICT_UNSUPPORTED:
+            continue
+        if key in ("properties", "$defs"):
+            strict[key] = {name: _strict_schema(sub) for name, sub in value.items()}
+        else:
+            strict[key] = _strict_schema(value)
+    if strict.get("type") == "object" and "properties" in strict:
+        strict["additionalProperties"] = False
+        strict["required"] = list(strict["properties"])
+    return strict
+
+
+def section_response_format(sections: Tuple[str, ...] = SECTIONS) -> Dict[str, Any]:
+    """response_format asking for exactly `sections`, derived from AIGeneratedContent"""
+    if not PYDANTIC_AVAILABLE:
+        return {"type": "json_object"}
+    
+    # Pydantic v2 deprecates .schema(); v1 only has it
+    model_schema = getattr(AIGeneratedContent, "model_json_schema", None) or AIGeneratedContent.schema
+    schema = _strict_schema(model_schema())
+    schema["properties"] = {section: schema["properties"][section] for section in sections}
+    schema["required"] = list(sections)
+    
+    # Drop definitions only the left-out sections use
+    used = json.dumps(schema["properties"])
+    definitions = {name: sub for name, sub in schema.get("$defs", {}).items() if f"#/$defs/{name}" in used}
+    schema.pop("$defs", None)
+    if definitions:
+        schema["$defs"] = definitions
+    
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "ai_insights", "strict": True, "schema": schema}
+    }
+
+
+def validate_sections(data: Any, sections: Tuple[str, ...] = SECTIONS) -> Dict[str, Any]:
+    """
+    Sections of a combined response that pass AIGeneratedContent, normalised.
+    Missing or invalid sections are left out so the caller can regenerate them.
+    """
+    if not isinstance(data, dict):
+        return {}
+    candidate = {section: data[section] for section in sections if data.get(section) is not None}
+    
+    if not PYDANTIC_AVAILABLE:
+        return {
+            section: value for section, value in candidate.items()
+            if isinstance(value, SECTION_TYPES[section]) and value
+        }
+    
+    failed = set(sections) - set(candidate)
+    while True:
+        document = {**_SECTION_PLACEHOLDERS}
+        document.update({section: value for section, value in candidate.items() if section not in failed})
+        try:
+            validated = AIGeneratedContent(**document).dict()
+        except ValidationError as e:
+            invalid = {error["loc"][0] for error in e.errors() if error["loc"]} - failed
+            if not invalid:
+                return {}
+            failed |= invalid
+            continue
+        return {section: validated[section] for section in sections if section not in failed}
+
+
+async def generate_ai_sections(
+    context: Dict[str, Any],
+    language: str,
+    llm_client: LLMClient,
+    sections: Tuple[str, ...] = SECTIONS
+) -> Dict[str, Any]:
+    """
+    Generate several sections in one structured completion (context sent once)
+    
+    Returns only the sections that came back valid; callers regenerate the rest.
+    """
+    
+    numbers = context['numbers']
+    lang_instruction = LANGUAGE_INSTRUCTIONS.get(language, LANGUAGE_INSTRUCTIONS['en'])
+    
+    frameworks = "".join(SECTION_FRAMEWORKS.get(section, "") for section in sections)
+    comp_context = competitor_context(numbers) if "swot" in sections else ""
+    tasks = "\n\n".join(SECTION_TASKS[section] for section in sections)
+    
+    prompt = f"""You are a digital growth strategist writing for C-level executives. {lang_instruction}
+{frameworks}{comp_context}
+**CRITICAL RULES:**
+1. Use ONLY numbers from the context.numbers section below
+2. Be SPECIFIC - reference actual scores and missing features
+3. Frame gaps as growth opportunities, not just problems
+
+**Context (READ-ONLY):**
+```json
+{context_json(context)}
+```
+
+**Task:**
+Return ONE JSON object with these keys:
+
+{tasks}
+
+Return ONLY the JSON object, no explanations.
+"""
+    
+    response = await llm_client.generate(
+        prompt,
+        max_tokens=sum(SECTION_MAX_TOKENS[section] for section in sections),
+        temperature=0.6,
+        label="ai_insights",
+        response_format=section_response_format(sections)
+    )
+    
+    if not response:
+        return {}
+    
+    try:
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        data = json.loads(json_match.group() if json_match else response)
+    except ValueError as e:
+        logger.warning(f"Combined AI insights response is not JSON: {e}")
+        return {}
+    
+    generated = validate_sections(data, sections)
+    missing = [section for section in sections if section not in generated]
+    if missing:
+        logger.warning(f"Combined AI insights missing or invalid: {', '.join(missing)}")
+    
+    return generated
+
+
+async def generate_sections_separately(
+    context: Dict[str, Any],
+    language: str,
+    llm_client: LLMClient
+) -> Dict[str, Any]:
+    """One completion per section; returns the sections that succeeded"""
+    
+    results = await asyncio.gather(
+        generate_ai_swot(context, language, llm_client),
+        generate_ai_recommendations(context, language, llm_client),
+        generate_ai_executive_summary(context, language, llm_client),
+        generate_ai_action_priority(context, language, llm_client),
+        return_exceptions=True  # Don't fail all if one fails
+    )
+    
+    return {
+        section: result for section, result in zip(SECTIONS, results)
+        if isinstance(result, SECTION_TYPES[section]) and result
+    }
+
 # ============================================================================
 # FALLBACK FUNCTIONS
 # ============================================================================
@@ -801,7 +1026,8 @@ async def generate_full_ai_insights(
     html: str,
     language: str = 'en',
     api_key: Optional[str] = None,
-    return_debug_info: bool = False
+    return_debug_info: bool = False,
+    generation_mode: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Main function to generate all AI insights
@@ -813,6 +1039,9 @@ async def generate_full_ai_insights(
         language: 'en', 'fi', or 'sv'
         api_key: OpenAI API key (optional)
         return_debug_info: Include prompt/context hash for debugging
+        generation_mode: 'combined' (one call for every section, then one
+            for any that failed) or 'separate' (one call per section);
+            defaults to AI_INSIGHTS_GENERATION_MODE
     
     Returns:
         Dict with all AI-generated content + metadata
@@ -833,43 +1062,47 @@ async def generate_full_ai_insights(
     # Initialize LLM client
     llm_client = LLMClient(api_key=api_key)
     
-    # Rate limiting with semaphore
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-    
-    async def rate_limited_task(coro):
-        async with semaphore:
-            return await coro
-    
-    # Generate all content in parallel (with rate limiting)
-    try:
-        results = await asyncio.gather(
-            rate_limited_task(generate_ai_swot(context, language, llm_client)),
-            rate_limited_task(generate_ai_recommendations(context, language, llm_client)),
-            rate_limited_task(generate_ai_executive_summary(context, language, llm_client)),
-            rate_limited_task(generate_ai_action_priority(context, language, llm_client)),
-            return_exceptions=True  # Don't fail all if one fails
-        )
-        
-        swot, recommendations, summary, action_priority = results
-        
-    except Exception as e:
-        logger.error(f"Parallel generation failed: {e}")
-        swot, recommendations, summary, action_priority = None, None, None, None
+    mode = (generation_mode or GENERATION_MODE).lower()
+    if mode not in ("combined", "separate"):
+        logger.warning(f"Unknown generation mode: {mode}, defaulting to 'combined'")
+        mode = "combined"
+    
+    generated: Dict[str, Any] = {}
+    llm_calls = 0
+    
+    if mode == "combined":
+        generated = await generate_ai_sections(context, language, llm_client)
+        llm_calls += 1
+        missing = tuple(section for section in SECTIONS if section not in generated)
+        if generated and missing:
+            # Partial failure: regenerate only the missing sections
+            generated.update(await generate_ai_sections(context, language, llm_client, missing))
+            llm_calls += 1
+    
+    if not generated:
+        # Separate mode, or the combined call failed outright (e.g. a model
+        # without structured outputs); the LLM gateway bounds concurrency
+        generated = await generate_sections_separately(context, language, llm_client)
+        llm_calls += len(SECTIONS)
     
     # Use fallbacks for failed generations
-    if not isinstance(swot, dict) or swot is None:
+    swot = generated.get("swot")
+    if swot is None:
         logger.warning("Using SWOT fallback")
         swot = fallback_swot(context, language)
     
-    if not isinstance(recommendations, list) or not recommendations:
+    recommendations = generated.get("recommendations")
+    if recommendations is None:
         logger.warning("Using recommendations fallback")
         recommendations = fallback_recommendations(context, language)
     
-    if not isinstance(summary, str) or not summary:
+    summary = generated.get("executive_summary")
+    if summary is None:
         logger.warning("Using summary fallback")
         summary = fallback_summary(context, language)
     
-    if not isinstance(action_priority, list) or not action_priority:
+    action_priority = generated.get("action_priority")
+    if action_priority is None:
         logger.warning("Using action priority fallback")
         action_priority = fallback_action_priority(context, language)
     
@@ -895,11 +1128,13 @@ async def generate_full_ai_insights(
             "language": language,
             "timestamp": datetime.utcnow().isoformat(),
             "model": OPENAI_MODEL,
+            "generation_mode": mode,
+            "llm_calls": llm_calls,
             "fallbacks_used": {
-                "swot": not isinstance(results[0], dict),
-                "recommendations": not isinstance(results[1], list),
-                "summary": not isinstance(results[2], str),
-                "action_priority": not isinstance(results[3], list)
+                "swot": "swot" not in generated,
+                "recommendations": "recommendations" not in generated,
+                "summary": "executive_summary" not in generated,
+                "action_priority": "action_priority" not in generated
             }
         }
     
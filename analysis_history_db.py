@@ -10,6 +10,8 @@ import asyncpg
 import logging
 from dataclasses import dataclass
 
+from core.db_pool import open_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,7 +54,8 @@ class AnalysisHistoryDB:
     async def connect(self):
         """Initialize database connection pool"""
         try:
-            self.pool = await asyncpg.create_pool(
+            self.pool = await open_pool(
+                "analysis_history",
                 self.database_url,
                 min_size=2,
                 max_size=10,
@@ -249,9 +252,11 @@ class AnalysisHistoryDB:
                     
                     # Increment usage
                     await self.increment_usage(user_id, 'single')
-                    
-                    logger.info(f"✅ Saved single analysis: {analysis_id} for {user_id}")
-                    return analysis_id
+            
+            from unified_context import invalidate_context
+            invalidate_context(user_id)
+            logger.info(f"✅ Saved single analysis: {analysis_id} for {user_id}")
+            return analysis_id
                     
         except Exception as e:
             logger.error(f"❌ Error saving single analysis: {e}")
@@ -349,12 +354,14 @@ class AnalysisHistoryDB:
                         'discovery', 
                         len(competitors)
                     )
-                    
-                    logger.info(
-                        f"✅ Saved competitor discovery: {analysis_id} "
-                        f"({len(competitors)} competitors) for {user_id}"
-                    )
-                    return analysis_id
+            
+            from unified_context import invalidate_context
+            invalidate_context(user_id)
+            logger.info(
+                f"✅ Saved competitor discovery: {analysis_id} "
+                f"({len(competitors)} competitors) for {user_id}"
+            )
+            return analysis_id
                     
         except Exception as e:
             logger.error(f"❌ Error saving competitor discovery: {e}")
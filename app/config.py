@@ -85,16 +85,44 @@ SCORING_CONFIG = load_scoring_config()
 # Single source of truth — fail-fast in production, stable dev fallback
 from agents.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 
+# Verified bearer tokens are reused for this many seconds (0 = verify every request)
+IDENTITY_TOKEN_CACHE_TTL = int(os.getenv("IDENTITY_TOKEN_CACHE_TTL", "60"))
+IDENTITY_TOKEN_CACHE_SIZE = int(os.getenv("IDENTITY_TOKEN_CACHE_SIZE", "10000"))
+
 # ============================================================================
 # PERFORMANCE SETTINGS
 # ============================================================================
 
 CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
 MAX_CACHE_SIZE = int(os.getenv("MAX_CACHE_SIZE", "100"))
+# Expired analyses are still served (and refreshed in the background) for this long
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "600"))
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
 DEFAULT_USER_LIMIT = int(os.getenv("DEFAULT_USER_LIMIT", "1"))
 
+# ============================================================================
+# DATABASE POOL
+# ============================================================================
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+# One asyncpg pool per worker, shared by every subsystem
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "15"))
+# Max connections each subsystem may hold at once ("name=n,..."; unlisted = DB_POOL_MAX_SIZE).
+# platform sizes the SQLAlchemy engine (app/db/session.py), which keeps its own connections
+DB_POOL_BUDGETS = os.getenv(
+    "DB_POOL_BUDGETS",
+    "legacy=8,analysis_history=8,history=4,alerts=4,scheduled_analysis=3,scheduler=2,context=5,platform=5",
+)
+# Seconds to wait for a connection before giving up
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30"))
+DB_POOL_COMMAND_TIMEOUT = float(os.getenv("DB_POOL_COMMAND_TIMEOUT", "60"))
+# Per-user unified context cache (seconds; writes invalidate it on every worker
+# through the fan-out hub)
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "300"))
+CONTEXT_CACHE_MAX_USERS = int(os.getenv("CONTEXT_CACHE_MAX_USERS", "1000"))
+
 # ============================================================================
 # SPA & CONTENT FETCH CONFIGURATION
 # ============================================================================
@@ -133,6 +161,42 @@ PLAYWRIGHT_ENABLED = os.getenv("PLAYWRIGHT_ENABLED", "false").lower() == "true"
 PLAYWRIGHT_TIMEOUT = int(os.getenv("PLAYWRIGHT_TIMEOUT", "30000"))
 PLAYWRIGHT_WAIT_FOR = os.getenv("PLAYWRIGHT_WAIT_FOR", "networkidle")
 
+# Shared browser pool (started in the app lifespan when PLAYWRIGHT_ENABLED is
+# also set, see agents/content_fetch/browser_pool.py)
+BROWSER_POOL_ENABLED = os.getenv("BROWSER_POOL_ENABLED", "true").lower() == "true"
+BROWSER_POOL_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "4"))
+BROWSER_POOL_RECYCLE_AFTER = int(os.getenv("BROWSER_POOL_RECYCLE_AFTER", "100"))
+BROWSER_POOL_MIN_FREE_MB = int(os.getenv("BROWSER_POOL_MIN_FREE_MB", "256"))
+# Minimum seconds a browser lives before memory pressure may recycle it again
+BROWSER_POOL_MEMORY_RECYCLE_INTERVAL = float(os.getenv("BROWSER_POOL_MEMORY_RECYCLE_INTERVAL", "60"))
+
+# Competitor fan-out (see agents/content_fetch/scrape_budget.py)
+# SCRAPE_MAX_CONCURRENCY is the process-wide budget shared by every request;
+# COMPETITOR_ANALYSIS_CONCURRENCY caps a single discovery/radar run.
+SCRAPE_MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", "8"))
+COMPETITOR_ANALYSIS_CONCURRENCY = int(os.getenv("COMPETITOR_ANALYSIS_CONCURRENCY", "4"))
+
+# Worker threads for CPU-bound analysis stages (see core/stage_graph.py)
+ANALYSIS_STAGE_THREADS = int(os.getenv("ANALYSIS_STAGE_THREADS", "4"))
+
+# Worker processes for HTML scoring (see core/cpu_pool.py); 0 = score in-process
+ANALYSIS_PROCESS_WORKERS = int(os.getenv("ANALYSIS_PROCESS_WORKERS", "2"))
+ANALYSIS_PROCESS_START_METHOD = os.getenv("ANALYSIS_PROCESS_START_METHOD", "forkserver")
+ANALYSIS_PROCESS_MAX_TASKS = int(os.getenv("ANALYSIS_PROCESS_MAX_TASKS", "200"))
+
+# ============================================================================
+# OUTBOUND HTTP CLIENT
+# ============================================================================
+
+# One pooled httpx client per worker (see agents/content_fetch/http_client.py)
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "true").lower() == "true"
+HTTP_CLIENT_MAX_CONNECTIONS = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", "100"))
+HTTP_CLIENT_MAX_KEEPALIVE = int(os.getenv("HTTP_CLIENT_MAX_KEEPALIVE", "20"))
+HTTP_CLIENT_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY", "30"))
+HTTP_CLIENT_MAX_PER_HOST = int(os.getenv("HTTP_CLIENT_MAX_PER_HOST", "6"))
+DNS_CACHE_TTL = int(os.getenv("DNS_CACHE_TTL", "300"))
+DNS_NEGATIVE_CACHE_TTL = int(os.getenv("DNS_NEGATIVE_CACHE_TTL", "30"))
+
 # ============================================================================
 # USER AGENT
 # ============================================================================
@@ -148,6 +212,79 @@ USER_AGENT = os.getenv("USER_AGENT",
 
 RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
 RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "10"))
+# Authenticated users, keyed by token subject (0 = same as RATE_LIMIT_PER_MINUTE)
+RATE_LIMIT_USER_PER_MINUTE = int(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "0"))
+# Max requests in a burst (0 = the per-minute limit)
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "0"))
+# Per-route limits: "/api/v1/analyze=5/60,/api/v1/agents=20" (requests[/seconds])
+RATE_LIMIT_ROUTES = os.getenv("RATE_LIMIT_ROUTES", "")
+# "memory" (per worker) or "redis" (shared, needs REDIS_URL)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+# Upper bound on tracked clients per worker (memory backend)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Redis backend: connect/read timeout (seconds), and how long to limit in-process
+# after a Redis failure before trying Redis again
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25"))
+RATE_LIMIT_REDIS_COOLDOWN = float(os.getenv("RATE_LIMIT_REDIS_COOLDOWN", "30"))
+
+# ============================================================================
+# PUSH FAN-OUT (alerts SSE, notification websockets)
+# ============================================================================
+
+# "memory" (per worker) or "redis" (routes to whichever worker holds the connection, needs REDIS_URL)
+FANOUT_BACKEND = os.getenv("FANOUT_BACKEND", "memory").lower()
+# Messages kept per user and channel for replay on reconnect
+FANOUT_REPLAY_SIZE = int(os.getenv("FANOUT_REPLAY_SIZE", "200"))
+# Seconds a user's replay log (and sequence) outlives their last message
+FANOUT_REPLAY_TTL = int(os.getenv("FANOUT_REPLAY_TTL", "86400"))
+# Seconds one notification websocket send may take before it counts as slow
+NOTIFICATION_SEND_TIMEOUT = float(os.getenv("NOTIFICATION_SEND_TIMEOUT", "5"))
+# Consecutive slow sends before the connection is closed (clients resume with last_seq)
+NOTIFICATION_SLOW_STRIKES = int(os.getenv("NOTIFICATION_SLOW_STRIKES", "3"))
+
+# ============================================================================
+# LLM GATEWAY (adaptive concurrency, priority lanes, token budget)
+# ============================================================================
+
+# In-flight completions per worker: start, floor and ceiling of the AIMD limit
+LLM_GATEWAY_INITIAL_CONCURRENCY = int(os.getenv("LLM_GATEWAY_INITIAL_CONCURRENCY", "8"))
+LLM_GATEWAY_MIN_CONCURRENCY = int(os.getenv("LLM_GATEWAY_MIN_CONCURRENCY", "1"))
+LLM_GATEWAY_MAX_CONCURRENCY = int(os.getenv("LLM_GATEWAY_MAX_CONCURRENCY", "32"))
+# Largest fraction of the limit background work (schedules, discovery) may hold
+LLM_GATEWAY_BACKGROUND_SHARE = float(os.getenv("LLM_GATEWAY_BACKGROUND_SHARE", "0.5"))
+# Seconds; slower completions count as congestion
+LLM_GATEWAY_LATENCY_TARGET = float(os.getenv("LLM_GATEWAY_LATENCY_TARGET", "30"))
+# Tokens per minute per worker process (0 = no budget, rely on 429s); the
+# account-wide budget is this times the uvicorn worker count (2 in the Dockerfile)
+LLM_GATEWAY_TPM = int(os.getenv("LLM_GATEWAY_TPM", "0"))
+LLM_GATEWAY_MAX_RETRIES = int(os.getenv("LLM_GATEWAY_MAX_RETRIES", "4"))
+# Seconds per attempt
+LLM_GATEWAY_TIMEOUT = float(os.getenv("LLM_GATEWAY_TIMEOUT", "60"))
+
+# ============================================================================
+# LLM RESPONSE CACHE
+# ============================================================================
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+# Default seconds a response is reused
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+# Per-label TTLs: "swot=604800,books_receipt=0" (0 = never cache that label)
+LLM_CACHE_TTLS = os.getenv("LLM_CACHE_TTLS", "")
+# In-process LRU entries per worker
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+# Shared tier on disk when REDIS_URL is not set (empty = memory only)
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+# Honour X-LLM-Cache / Cache-Control request headers. Off by default: any
+# client could otherwise force uncached (paid) completions on every request
+LLM_CACHE_ALLOW_BYPASS = os.getenv("LLM_CACHE_ALLOW_BYPASS", "false").lower() == "true"
+
+# ============================================================================
+# AI INSIGHTS
+# ============================================================================
+
+# "combined": every section in one structured completion, only failed
+# sections regenerated; "separate": one completion per section
+AI_INSIGHTS_GENERATION_MODE = os.getenv("AI_INSIGHTS_GENERATION_MODE", "combined").lower()
 
 # ============================================================================
 # EXTERNAL API KEYS
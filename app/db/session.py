@@ -2,8 +2,8 @@
 
 This is the SQLAlchemy-native session used by all canonical-identity code
 (auth/v2 endpoints, platform user/org lookups, fact API). It coexists with
-the legacy psycopg2 pool in `database.py` — the two never share connections
-or transactions. Anything that touches `users`/`organizations`/`credits`/
+the shared asyncpg pool in `core/db_pool.py` (which the legacy `database.py`
+helpers run on) — the two never share connections or transactions. Anything that touches `users`/`organizations`/`credits`/
 `entitlements` goes through this session; anything that touches `analyses`/
 `competitor_*` continues to use the psycopg2 helpers.
 """
@@ -46,7 +46,16 @@ _session_maker = None
 def get_engine():
     global _engine
     if _engine is None:
-        _engine = create_async_engine(_async_dsn(), pool_pre_ping=True)
+        # SQLAlchemy keeps its own asyncpg connections; cap them at the
+        # `platform` budget of the shared pool settings (DB_POOL_BUDGETS)
+        from core.db_pool import get_db_pool
+
+        _engine = create_async_engine(
+            _async_dsn(),
+            pool_pre_ping=True,
+            pool_size=get_db_pool().budget_limit("platform"),
+            max_overflow=0,
+        )
     return _engine
 
 
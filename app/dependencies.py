@@ -5,23 +5,19 @@ Brandista API - FastAPI Dependencies
 Shared dependencies for authentication, rate limiting, and database access
 """
 
-import time
 import logging
 from typing import Optional, Dict
-from collections import defaultdict
 from fastapi import HTTPException, Header, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 
-from app.config import SECRET_KEY, ALGORITHM, RATE_LIMIT_ENABLED, RATE_LIMIT_PER_MINUTE
+from app.config import RATE_LIMIT_ENABLED
+from core.identity_cache import get_identity_cache
+from core.rate_limit import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
-# Rate limiting storage
-request_counts: Dict[str, list] = defaultdict(list)
-
 # ============================================================================
 # AUTHENTICATION DEPENDENCIES
 # ============================================================================
@@ -44,7 +40,7 @@ async def get_current_user(
     token = credentials.credentials
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = get_identity_cache().decode(token)
         username: str = payload.get("sub")
         
         if username is None:
@@ -85,7 +81,7 @@ async def get_optional_user(
     token = authorization.replace("Bearer ", "")
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = get_identity_cache().decode(token)
         username: str = payload.get("sub")
         
         if username:
@@ -99,12 +95,13 @@ async def get_optional_user(
 # RATE LIMITING
 # ============================================================================
 
-async def check_rate_limit(client_ip: str) -> None:
+async def check_rate_limit(client_ip: str, path: str = "") -> None:
     """
     Check if client has exceeded rate limit
     
     Args:
         client_ip: Client IP address
+        path: Request path (for per-route limits)
         
     Raises:
         HTTPException: 429 if rate limit exceeded
@@ -112,23 +109,14 @@ async def check_rate_limit(client_ip: str) -> None:
     if not RATE_LIMIT_ENABLED:
         return
     
-    now = time.time()
-    
-    # Clean up old requests (older than 1 minute)
-    request_counts[client_ip] = [
-        t for t in request_counts[client_ip] 
-        if now - t < 60
-    ]
-    
-    # Check if limit exceeded
-    if len(request_counts[client_ip]) >= RATE_LIMIT_PER_MINUTE:
+    result = await get_rate_limiter().hit(f"ip:{client_ip}", path)
+    if not result.allowed:
+        headers = result.headers()
         raise HTTPException(
             status_code=429,
-            detail=f"Rate limit exceeded: {RATE_LIMIT_PER_MINUTE} requests per minute"
+            detail=f"Rate limit exceeded, retry after {headers['Retry-After']}s",
+            headers=headers
         )
-    
-    # Add current request
-    request_counts[client_ip].append(now)
 
 # ============================================================================
 # DATABASE DEPENDENCIES
@@ -33,6 +33,7 @@ from starlette.middleware.sessions import SessionMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.config import APP_NAME, APP_VERSION, SECRET_KEY
+from core.llm_cache import LLMCacheModeMiddleware
 
 # Import legacy main for gradual migration
 # This allows us to use existing functionality while refactoring
@@ -76,11 +77,24 @@ async def lifespan(app: FastAPI):
     if hasattr(legacy_main, 'init_users'):
         legacy_main.init_users()
     
+    # One asyncpg pool per worker; history, alerts, scheduler and the legacy
+    # sync helpers all draw on named budgets of it
+    try:
+        from core.db_pool import start_db_pool
+
+        _db_pool = await start_db_pool()
+        if _db_pool.started:
+            logger.info(f"✅ Shared database pool started (max {_db_pool.max_size} connections)")
+    except Exception as e:
+        logger.error(f"❌ Shared database pool failed to start: {e}")
+
     # Initialize database if available
     if hasattr(legacy_main, 'DATABASE_ENABLED') and legacy_main.DATABASE_ENABLED:
         try:
             if hasattr(legacy_main, 'init_database'):
-                legacy_main.init_database()
+                from database import run_in_db_thread
+
+                await run_in_db_thread(legacy_main.init_database)
             logger.info("✅ Database initialized")
         except Exception as e:
             logger.error(f"❌ Database initialization failed: {e}")
@@ -127,11 +141,82 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ AlertService/Scheduler initialization failed: {e}")
 
+    # Start the shared Playwright browser pool (SPA rendering)
+    _browser_pool = None
+    try:
+        from agents.content_fetch.browser_pool import get_browser_pool
+
+        if await get_browser_pool().start():
+            _browser_pool = get_browser_pool()
+            logger.info("✅ Playwright browser pool started")
+        else:
+            logger.info("ℹ️ Browser pool disabled — SPA renders launch a browser per call")
+    except Exception as e:
+        logger.error(f"❌ Browser pool initialization failed: {e}")
+
+    # Shared outbound HTTP client (keep-alive pool + DNS cache)
+    _http_client_started = False
+    try:
+        from agents.content_fetch.http_client import start_http_client
+
+        await start_http_client()
+        _http_client_started = True
+        logger.info("✅ Pooled HTTP client started")
+    except Exception as e:
+        logger.error(f"❌ HTTP client initialization failed: {e}")
+
+    # Worker processes for CPU-bound HTML scoring (preloaded with the legacy module)
+    try:
+        from core.cpu_pool import start_cpu_pool
+
+        _cpu_pool = await start_cpu_pool(preload=("main",))
+        if _cpu_pool.enabled:
+            logger.info(f"✅ HTML scoring process pool started ({_cpu_pool.workers} workers)")
+    except Exception as e:
+        logger.error(f"❌ HTML scoring process pool failed, scoring in-process: {e}")
+
+    # Unified context cache invalidations from the other workers
+    try:
+        from unified_context import subscribe_context_invalidations
+
+        await subscribe_context_invalidations()
+    except Exception as e:
+        logger.error(f"❌ Context cache invalidation fan-out failed, caches are per worker: {e}")
+
     yield
 
     # Shutdown
     logger.info("🛑 Shutting down application")
 
+    if _browser_pool:
+        try:
+            await _browser_pool.stop()
+            logger.info("🛑 Browser pool stopped")
+        except Exception as e:
+            logger.error(f"❌ Error stopping browser pool: {e}")
+
+    if _http_client_started:
+        try:
+            from agents.content_fetch.http_client import close_http_client
+
+            await close_http_client()
+            logger.info("🛑 HTTP client closed")
+        except Exception as e:
+            logger.error(f"❌ Error closing HTTP client: {e}")
+
+    try:
+        from core.analysis_cache import get_analysis_cache
+
+        await get_analysis_cache().close()
+    except Exception as e:
+        logger.error(f"❌ Error closing analysis cache: {e}")
+
+    from core.cpu_pool import shutdown_cpu_pool
+    from core.stage_graph import shutdown_stage_executor
+
+    shutdown_stage_executor()
+    shutdown_cpu_pool()
+
     # Stop scheduler first (it depends on alert service)
     if _scheduler:
         try:
@@ -148,6 +233,24 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"❌ Error closing AlertService: {e}")
 
+    # Fan-out hub (alerts SSE + notification websockets across workers)
+    try:
+        from core.fanout import close_fanout_hub
+        from unified_context import unsubscribe_context_invalidations
+
+        await unsubscribe_context_invalidations()
+        await close_fanout_hub()
+    except Exception as e:
+        logger.error(f"❌ Error closing fan-out hub: {e}")
+
+    # LLM response cache (Redis connection)
+    try:
+        from core.llm_cache import close_llm_cache
+
+        await close_llm_cache()
+    except Exception as e:
+        logger.error(f"❌ Error closing LLM cache: {e}")
+
     # Close history database
     if hasattr(legacy_main, 'history_db') and legacy_main.history_db:
         try:
@@ -156,6 +259,17 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"❌ Error closing history DB: {e}")
 
+    # Last: every subsystem above held a budget of the shared pool
+    try:
+        from core.db_pool import close_db_pool
+        from database import close_connection_pool
+
+        await close_db_pool()
+        close_connection_pool()
+        logger.info("🗄️ Shared database pool closed")
+    except Exception as e:
+        logger.error(f"❌ Error closing database pool: {e}")
+
 # ============================================================================
 # CREATE FASTAPI APP
 # ============================================================================
@@ -198,7 +312,8 @@ app.add_middleware(
         "Accept",
         "Origin",
         "Access-Control-Request-Method",
-        "Access-Control-Request-Headers"
+        "Access-Control-Request-Headers",
+        "X-LLM-Cache"
     ],
     expose_headers=["*"],
     max_age=600
@@ -224,6 +339,9 @@ class UTF8Middleware(BaseHTTPMiddleware):
 
 app.add_middleware(UTF8Middleware)
 
+# LLM cache bypass headers (X-LLM-Cache, Cache-Control)
+app.add_middleware(LLMCacheModeMiddleware)
+
 # ============================================================================
 # REGISTER ROUTERS
 # ============================================================================
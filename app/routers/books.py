@@ -24,6 +24,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
 
 from app.dependencies import get_current_user
+from core.llm_cache import completion_text, get_llm_cache
+from core.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -97,27 +99,30 @@ _transactions: Dict[str, List[TransactionRecord]] = {}
 # OPENAI HELPER
 # ============================================================================
 
-async def _call_gpt(system_prompt: str, user_message: str) -> str:
-    """Call OpenAI GPT and return the response text."""
+async def _call_gpt(system_prompt: str, user_message: str, label: str = "books") -> str:
+    """Call OpenAI GPT and return the response text (cached per identical request)."""
     try:
         from openai import AsyncOpenAI
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise HTTPException(503, "OpenAI API key not configured")
 
-        client = AsyncOpenAI(api_key=api_key)
-        model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
-        response = await client.chat.completions.create(
-            model=model,
-            messages=[
+        request = {
+            "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_message},
             ],
-            temperature=0.2,
-            max_tokens=2000,
-        )
-        return response.choices[0].message.content.strip()
+            "temperature": 0.2,
+            "max_tokens": 2000,
+        }
+
+        async def create():
+            client = AsyncOpenAI(api_key=api_key)
+            return await get_llm_gateway().chat(client, label=label, **request)
+
+        response = await get_llm_cache().completion(label, request, create)
+        return (completion_text(response) or "").strip()
     except ImportError:
         raise HTTPException(503, "OpenAI library not available")
 
@@ -195,7 +200,7 @@ async def analyze_receipt(
     logger.info(f"[Books] Analyzing receipt for {user.get('username', '?')} ({len(req.text)} chars)")
 
     try:
-        raw = await _call_gpt(RECEIPT_SYSTEM_PROMPT, req.text)
+        raw = await _call_gpt(RECEIPT_SYSTEM_PROMPT, req.text, label="books_receipt")
 
         # Strip markdown code block if GPT wraps it
         if raw.startswith("```"):
@@ -314,7 +319,7 @@ async def suggest_accounts(
     user_msg = f"Tapahtuma: {req.description}\nSumma: {req.amount}€"
 
     try:
-        raw = await _call_gpt(ACCOUNT_SYSTEM_PROMPT, user_msg)
+        raw = await _call_gpt(ACCOUNT_SYSTEM_PROMPT, user_msg, label="books_account")
 
         # Strip markdown code block
         if raw.startswith("```"):
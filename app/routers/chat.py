@@ -23,6 +23,7 @@ except ImportError:
     from main import openai_client, OPENAI_MODEL
 
 from app.dependencies import get_optional_user
+from core.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -220,7 +221,9 @@ async def chat(
         logger.info(f"Chat request from {current_user.get('username') if current_user else 'anonymous'}: {request.message[:50]}...")
         
         # Call OpenAI API
-        response = await openai_client.chat.completions.create(
+        response = await get_llm_gateway().chat(
+            openai_client,
+            label="chat",
             model=OPENAI_MODEL,
             messages=messages,
             temperature=0.7,
@@ -13,6 +13,8 @@ import logging
 import json
 import os
 
+from core.llm_gateway import get_llm_gateway
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Chat WebSocket"])
@@ -126,7 +128,9 @@ async def websocket_chat_endpoint(websocket: WebSocket):
                         })
                     
                     # Call OpenAI API
-                    response = await openai_client.chat.completions.create(
+                    response = await get_llm_gateway().chat(
+                        openai_client,
+                        label="chat_ws",
                         model=OPENAI_MODEL,
                         messages=messages,
                         temperature=0.7,
@@ -11,6 +11,7 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import logging
 
+from database import run_in_db_thread
 from unified_context import (
     get_unified_context,
     get_user_profile,
@@ -91,7 +92,7 @@ class ContextResponse(BaseModel):
 @router.on_event("startup")
 async def startup_init_tables():
     """Initialize database tables on startup"""
-    init_unified_context_tables()
+    await run_in_db_thread(init_unified_context_tables)
 
 
 # ============================================================================
@@ -108,7 +109,7 @@ async def get_context(
     This is the main endpoint that aggregates all data for AI agents.
     """
     try:
-        context = get_unified_context(user_id)
+        context = await get_unified_context(user_id)
         
         response = ContextResponse(
             user_id=user_id,
@@ -142,7 +143,7 @@ async def get_context_prompt(
     from unified_context import context_to_agent_system_prompt
     
     try:
-        context = get_unified_context(user_id)
+        context = await get_unified_context(user_id)
         
         if agent_id:
             prompt = context_to_agent_system_prompt(context, agent_id)
@@ -173,7 +174,7 @@ async def get_context_prompt(
 @router.get("/{user_id}/profile")
 async def get_profile(user_id: str):
     """Get user profile"""
-    profile = get_user_profile(user_id)
+    profile = await run_in_db_thread(get_user_profile, user_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
@@ -182,7 +183,8 @@ async def get_profile(user_id: str):
 @router.post("/{user_id}/profile")
 async def create_or_update_profile(user_id: str, profile: ProfileCreate):
     """Create or update user profile"""
-    success = save_user_profile(
+    success = await run_in_db_thread(
+        save_user_profile,
         user_id=user_id,
         url=profile.url,
         industry=profile.industry,
@@ -206,13 +208,14 @@ async def list_analyses(
     limit: int = Query(10, ge=1, le=100)
 ):
     """Get recent analyses for user"""
-    return get_recent_analyses(user_id, limit=limit)
+    return await run_in_db_thread(get_recent_analyses, user_id, limit=limit)
 
 
 @router.post("/{user_id}/analyses")
 async def save_analysis_result(user_id: str, analysis: AnalysisSave):
     """Save analysis result"""
-    analysis_id = save_analysis(
+    analysis_id = await run_in_db_thread(
+        save_analysis,
         user_id=user_id,
         url=analysis.url,
         score=analysis.score,
@@ -244,13 +247,14 @@ async def list_tracked_competitors(
     active_only: bool = Query(True)
 ):
     """Get tracked competitors (Radar)"""
-    return get_tracked_competitors(user_id, active_only=active_only)
+    return await run_in_db_thread(get_tracked_competitors, user_id, active_only=active_only)
 
 
 @router.post("/{user_id}/tracked")
 async def track_competitor(user_id: str, competitor: CompetitorTrack):
     """Add competitor to tracking (Radar)"""
-    success = add_tracked_competitor(
+    success = await run_in_db_thread(
+        add_tracked_competitor,
         user_id=user_id,
         url=competitor.url,
         domain=competitor.domain,
@@ -268,12 +272,23 @@ async def track_competitor(user_id: str, competitor: CompetitorTrack):
 @router.delete("/{user_id}/tracked")
 async def untrack_competitor(user_id: str, url: str):
     """Remove competitor from tracking"""
-    from unified_context import connect_db
+    updated = await run_in_db_thread(_deactivate_tracked_competitor, user_id, url)
+    if updated is None:
+        raise HTTPException(status_code=500, detail="Database unavailable")
+    if updated == 0:
+        raise HTTPException(status_code=404, detail="Competitor not found")
+    
+    return {"status": "ok", "message": "Competitor untracked"}
+
+
+def _deactivate_tracked_competitor(user_id: str, url: str) -> Optional[int]:
+    """Rows updated, or None without a database connection"""
+    from unified_context import connect_db, invalidate_context
     from database import release_connection
     
     conn = connect_db()
     if not conn:
-        raise HTTPException(status_code=500, detail="Database unavailable")
+        return None
     
     try:
         cursor = conn.cursor()
@@ -283,11 +298,8 @@ async def untrack_competitor(user_id: str, url: str):
             WHERE user_id = %s AND url = %s
         """, (user_id, url))
         conn.commit()
-        
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Competitor not found")
-        
-        return {"status": "ok", "message": "Competitor untracked"}
+        invalidate_context(user_id)
+        return cursor.rowcount
     finally:
         cursor.close()
         release_connection(conn)
@@ -304,7 +316,7 @@ async def list_discovered_competitors(
     limit: int = Query(50, ge=1, le=200)
 ):
     """Get discovered competitors"""
-    return get_discovered_competitors(user_id, status=status, limit=limit)
+    return await run_in_db_thread(get_discovered_competitors, user_id, status=status, limit=limit)
 
 
 @router.post("/{user_id}/discovered/status")
@@ -317,17 +329,18 @@ async def update_discovery_status(user_id: str, update: DiscoveredStatusUpdate):
             detail=f"Invalid status. Must be one of: {valid_statuses}"
         )
     
-    success = update_discovered_status(user_id, update.url, update.status)
+    success = await run_in_db_thread(update_discovered_status, user_id, update.url, update.status)
     
     if not success:
         raise HTTPException(status_code=404, detail="Discovered competitor not found")
     
     # If marking as "tracking", also add to tracked competitors
     if update.status == 'tracking':
-        discovered = get_discovered_competitors(user_id)
+        discovered = await run_in_db_thread(get_discovered_competitors, user_id)
         comp = next((c for c in discovered if c['url'] == update.url), None)
         if comp:
-            add_tracked_competitor(
+            await run_in_db_thread(
+                add_tracked_competitor,
                 user_id=user_id,
                 url=comp['url'],
                 domain=comp.get('domain'),
@@ -350,7 +363,8 @@ async def list_insights(
     limit: int = Query(50, ge=1, le=500)
 ):
     """Get historical agent insights"""
-    return get_agent_insights(
+    return await run_in_db_thread(
+        get_agent_insights,
         user_id=user_id,
         agent_id=agent_id,
         days=days,
@@ -365,7 +379,7 @@ async def list_insights(
 @router.get("/{user_id}/trends")
 async def get_trends(user_id: str):
     """Get calculated trends for user"""
-    context = get_unified_context(user_id)
+    context = await get_unified_context(user_id)
     return {
         "user_id": user_id,
         "trends": context.trends,
@@ -3,7 +3,10 @@ Brandista Alert Service — SSE real-time alerts + REST API
 
 This is the central nerve system for live agent alerts:
   1. AlertService persists alerts to PostgreSQL and broadcasts to SSE clients
-  2. SSE endpoint streams alerts in real-time (heartbeat 30s)
+     on every worker (core.fanout, "alerts" channel)
+  2. SSE endpoint streams alerts in real-time (heartbeat 30s). Each alert
+     carries its per-user sequence as the event id; a reconnecting
+     EventSource sends Last-Event-ID and gets the alerts it missed
   3. REST endpoints for fetching, marking read, acknowledging
 
 Usage:
@@ -32,6 +35,9 @@ import asyncpg
 from fastapi import APIRouter, Request, Query, HTTPException
 from fastapi.responses import StreamingResponse
 
+from core.db_pool import open_pool
+from core.fanout import FanoutHub, FanoutMessage, get_fanout_hub
+
 logger = logging.getLogger(__name__)
 
 # ============================================================================
@@ -125,20 +131,26 @@ CREATE_SCHEDULES_INDEXES = [
 # ALERT SERVICE (singleton)
 # ============================================================================
 
+ALERTS_CHANNEL = "alerts"
+
+
 class AlertService:
     """
     Central alert management:
     - Persists alerts to PostgreSQL
-    - Broadcasts to connected SSE clients via asyncio.Queue
+    - Broadcasts through the fan-out hub to SSE clients on any worker
+      (this worker's clients via asyncio.Queue)
     - Manages alert lifecycle (read/unread, acknowledge)
     """
 
-    def __init__(self):
+    def __init__(self, hub: Optional[FanoutHub] = None):
         self.pool: Optional[asyncpg.Pool] = None
-        # Per-user SSE client queues: user_id → Set[asyncio.Queue]
+        # Per-user SSE client queues: user_id → Set[asyncio.Queue] of (seq, Alert)
         self._client_queues: Dict[str, Set[asyncio.Queue]] = {}
         self._lock = asyncio.Lock()
         self._initialized = False
+        self.hub = hub or get_fanout_hub()
+        self.hub.register(ALERTS_CHANNEL, self._deliver)
 
     async def initialize(self, database_url: str):
         """Create connection pool and ensure tables exist."""
@@ -149,7 +161,9 @@ class AlertService:
         clean_url = database_url.replace("postgresql+asyncpg://", "postgresql://")
 
         try:
-            self.pool = await asyncpg.create_pool(
+            # The worker's shared pool (alerts budget) when clean_url is its database
+            self.pool = await open_pool(
+                "alerts",
                 clean_url,
                 min_size=1,
                 max_size=5,
@@ -248,7 +262,7 @@ class AlertService:
             created_at=now.isoformat(),
         )
 
-        # Broadcast to connected SSE clients
+        # Broadcast to connected SSE clients (any worker)
         await self._broadcast(user_id, alert)
 
         logger.info(
@@ -319,11 +333,13 @@ class AlertService:
     # ------------------------------------------------------------------
 
     async def register_client(self, user_id: str) -> asyncio.Queue:
-        """Register a new SSE client. Returns a Queue to listen on."""
+        """Register a new SSE client. Returns a Queue of (seq, Alert) to listen on."""
         queue: asyncio.Queue = asyncio.Queue(maxsize=100)
         async with self._lock:
             if user_id not in self._client_queues:
                 self._client_queues[user_id] = set()
+                # First client of this user on this worker: route their alerts here
+                await self.hub.track(ALERTS_CHANNEL, user_id)
             self._client_queues[user_id].add(queue)
         logger.info(f"📡 SSE client connected: {user_id} (total: {self._count_clients()})")
         return queue
@@ -335,22 +351,28 @@ class AlertService:
                 self._client_queues[user_id].discard(queue)
                 if not self._client_queues[user_id]:
                     del self._client_queues[user_id]
+                    await self.hub.untrack(ALERTS_CHANNEL, user_id)
         logger.info(f"📡 SSE client disconnected: {user_id} (total: {self._count_clients()})")
 
-    async def _broadcast(self, user_id: str, alert: Alert):
-        """Push alert to all SSE queues for this user."""
-        queues = self._client_queues.get(user_id, set())
+    async def _broadcast(self, user_id: str, alert: Alert) -> int:
+        """Publish alert to the user's SSE clients on every worker. Returns its sequence."""
+        return await self.hub.publish(ALERTS_CHANNEL, user_id, alert.to_dict())
+
+    async def _deliver(self, message: FanoutMessage):
+        """Push a fanned-out alert to all of this worker's SSE queues for the user."""
+        alert = Alert(**message.payload)
+        queues = self._client_queues.get(message.user_id, set())
         dead_queues = set()
         for queue in queues:
             try:
-                queue.put_nowait(alert)
+                queue.put_nowait((message.seq, alert))
             except asyncio.QueueFull:
                 dead_queues.add(queue)
         # Clean up dead queues
         for q in dead_queues:
             async with self._lock:
-                if user_id in self._client_queues:
-                    self._client_queues[user_id].discard(q)
+                if message.user_id in self._client_queues:
+                    self._client_queues[message.user_id].discard(q)
 
     def _count_clients(self) -> int:
         return sum(len(qs) for qs in self._client_queues.values())
@@ -433,6 +455,7 @@ alerts_router = APIRouter(prefix="/api/core/alerts", tags=["Alerts"])
 async def alert_stream(
     request: Request,
     token: str = Query(..., description="JWT token for authentication"),
+    last_seq: Optional[int] = Query(None, ge=0, description="Resume after this alert sequence"),
 ):
     """
     Server-Sent Events endpoint for real-time alerts.
@@ -440,9 +463,13 @@ async def alert_stream(
     Connect with: new EventSource('/api/core/alerts/stream?token=YOUR_JWT')
 
     Events:
-      - `alert`: New alert data (JSON)
+      - `alert`: New alert data (JSON); the event id is the user's alert sequence
       - `heartbeat`: Keep-alive (every 30s)
       - `connected`: Initial connection confirmation
+
+    On reconnect EventSource sends the last event id (Last-Event-ID); alerts
+    after it are replayed instead of the unread catch-up. last_seq does the
+    same for clients that reconnect by hand.
     """
     payload = _verify_token(token)
     if not payload:
@@ -453,26 +480,47 @@ async def alert_stream(
         raise HTTPException(status_code=401, detail="No user identity in token")
 
     svc = get_alert_service()
+    resume_after = last_seq if last_seq is not None else _parse_event_id(request.headers.get("last-event-id"))
 
     async def event_generator():
+        # Registered first, so nothing published from here on is missed
         queue = await svc.register_client(user_id)
         try:
-            # 1. Send connection confirmation
-            yield _sse_event("connected", {"user_id": user_id, "ts": _now_iso()})
-
-            # 2. Send catch-up: last 10 unread alerts
-            try:
-                recent = await svc.get_alerts(user_id, limit=10, unread_only=True)
-                for alert in reversed(recent):  # oldest first
-                    yield _sse_event("alert", alert.to_dict())
-            except Exception as e:
-                logger.error(f"Catch-up failed: {e}")
+            # 1. Replay what a reconnecting client missed
+            replay = None
+            if resume_after is not None:
+                replay = await svc.hub.replay(ALERTS_CHANNEL, user_id, resume_after)
+                cursor = replay.cursor
+            else:
+                cursor = await svc.hub.head(ALERTS_CHANNEL, user_id)
+
+            # 2. Send connection confirmation. While resuming it carries no id:
+            # the client's Last-Event-ID must only advance with replayed alerts
+            yield _sse_event("connected", {"user_id": user_id, "ts": _now_iso()},
+                             event_id=cursor if replay is None else None)
+
+            if replay is not None:
+                for message in replay.messages:
+                    yield _sse_event("alert", message.payload, event_id=message.seq)
+
+            # 3. Send catch-up: last 10 unread alerts (fresh connects, or a replay gap)
+            if replay is None or not replay.complete:
+                try:
+                    recent = await svc.get_alerts(user_id, limit=10, unread_only=True)
+                    for alert in reversed(recent):  # oldest first
+                        yield _sse_event("alert", alert.to_dict())
+                except Exception as e:
+                    logger.error(f"Catch-up failed: {e}")
 
-            # 3. Real-time loop with heartbeat
+            # 4. Real-time loop with heartbeat
             while True:
                 try:
-                    alert = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield _sse_event("alert", alert.to_dict())
+                    seq, alert = await asyncio.wait_for(queue.get(), timeout=30.0)
+                    if seq and seq <= cursor:
+                        continue  # already sent by the replay / catch-up
+                    if seq:
+                        cursor = seq
+                    yield _sse_event("alert", alert.to_dict(), event_id=seq or None)
                 except asyncio.TimeoutError:
                     # Heartbeat
                     yield _sse_event("heartbeat", {"ts": _now_iso()})
@@ -663,9 +711,17 @@ async def create_schedule(request: Request, token: str = Query(...)):
 # HELPERS
 # ============================================================================
 
-def _sse_event(event_type: str, data: dict) -> str:
+def _sse_event(event_type: str, data: dict, event_id: Optional[int] = None) -> str:
     """Format a Server-Sent Event string."""
-    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(0, int(value)) if value else None
+    except ValueError:
+        return None
 
 
 def _now_iso() -> str:
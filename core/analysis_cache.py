@@ -0,0 +1,298 @@
+"""
+Two-tier cache for website analysis results.
+
+Replaces get_from_cache/set_cache in main.py, which called the synchronous
+redis client from async handlers, trimmed the in-memory dict by sorting it,
+and let concurrent requests for the same URL each run the full analysis.
+
+  1. Front tier: in-process LRU (OrderedDict, O(1) get/set/evict)
+  2. Back tier: async Redis (redis.asyncio), shared across workers
+  3. Single-flight: concurrent misses for one key share one computation
+  4. Stale-while-revalidate: for CACHE_STALE_TTL seconds after expiry the
+     old result is served while one background task refreshes it
+
+Values are stored as JSON text, so every caller gets its own copy and a
+handler that mutates its result cannot corrupt the cache.
+
+Usage:
+  # At app startup / shutdown:
+  cache = get_analysis_cache()
+  ...
+  await cache.close()
+
+  # Per analysis:
+  result = await cache.get_or_compute(cache_key, lambda: run_analysis(url))
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.config import CACHE_STALE_TTL, CACHE_TTL, MAX_CACHE_SIZE, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_ASYNC_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_ASYNC_AVAILABLE = False
+
+try:
+    from agents.observability.metrics import get_metrics
+except ImportError:
+    get_metrics = None
+
+Compute = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class _Flight:
+    """One in-progress computation and the callers waiting for it."""
+
+    task: asyncio.Task
+    waiters: int = 0
+    background: bool = False
+
+
+class AnalysisCache:
+    """In-process LRU in front of async Redis, with single-flight and SWR."""
+
+    def __init__(
+        self,
+        max_entries: int = MAX_CACHE_SIZE,
+        ttl: int = CACHE_TTL,
+        stale_ttl: int = CACHE_STALE_TTL,
+        redis_url: Optional[str] = REDIS_URL,
+        name: str = "analysis",
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.stale_ttl = max(0, stale_ttl)
+        self.name = name
+        self._redis_url = redis_url
+        self._redis = None
+        # key → (stored_at epoch seconds, JSON payload); order = recency
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._stats = {
+            "hit_memory": 0,
+            "hit_redis": 0,
+            "stale": 0,
+            "miss": 0,
+            "coalesced": 0,
+            "redis_errors": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fresh cached value or None; never computes."""
+        entry = await self._read(key)
+        if entry is None:
+            self._count("miss")
+            return None
+        stored_at, payload, tier = entry
+        if time.time() - stored_at >= self.ttl:
+            self._count("miss")
+            return None
+        self._count(tier)
+        return json.loads(payload)
+
+    async def set(self, key: str, data: Dict[str, Any]) -> None:
+        payload = self._encode(key, data)
+        if payload is not None:
+            await self._write(key, payload, time.time())
+
+    async def get_or_compute(self, key: str, compute: Compute) -> Dict[str, Any]:
+        """
+        Return the cached value for key, computing it at most once.
+
+        Fresh hit → cached copy. Stale hit → cached copy, plus one background
+        refresh. Miss → join the in-flight computation or start it.
+        Failures are not cached; they propagate to every waiting caller.
+        """
+        entry = await self._read(key)
+        if entry is not None:
+            stored_at, payload, tier = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                self._count(tier)
+                return json.loads(payload)
+            if age < self.ttl + self.stale_ttl:
+                self._count("stale")
+                self._revalidate(key, compute)
+                return json.loads(payload)
+
+        flight = self._inflight.get(key)
+        leader = flight is None
+        if leader:
+            self._count("miss")
+            flight = self._start_flight(key, compute)
+        else:
+            self._count("coalesced")
+
+        flight.waiters += 1
+        try:
+            result, payload = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            # Nobody is left to use the result: stop spending work on it
+            if flight.waiters == 0 and not flight.background and not flight.task.done():
+                flight.task.cancel()
+        # Every caller gets its own round-tripped copy, so types match a cache hit
+        if payload is not None:
+            return json.loads(payload)
+        return result if leader else copy.deepcopy(result)
+
+    def clear(self) -> None:
+        """Drop the in-process tier (Redis entries expire on their own)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = sum(self._stats[k] for k in ("hit_memory", "hit_redis", "stale", "miss", "coalesced"))
+        hits = self._stats["hit_memory"] + self._stats["hit_redis"] + self._stats["stale"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "redis": self._redis is not None,
+        }
+
+    async def close(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._redis is not None:
+            try:
+                await self._redis.aclose()
+            except Exception:
+                pass
+            self._redis = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _start_flight(self, key: str, compute: Compute, background: bool = False) -> _Flight:
+        async def run() -> Tuple[Dict[str, Any], Optional[str]]:
+            result = await compute()
+            payload = self._encode(key, result)
+            if payload is not None:
+                await self._write(key, payload, time.time())
+            return result, payload
+
+        flight = _Flight(task=asyncio.create_task(run()), background=background)
+        self._inflight[key] = flight
+
+        def done(task: asyncio.Task) -> None:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+            if not task.cancelled() and task.exception() is not None and background:
+                logger.warning("[analysis_cache] background refresh failed for %s: %s", key, task.exception())
+
+        flight.task.add_done_callback(done)
+        return flight
+
+    @staticmethod
+    def _encode(key: str, data: Dict[str, Any]) -> Optional[str]:
+        """JSON payload for data, or None (logged) when it cannot be cached."""
+        try:
+            return json.dumps(data, default=str)
+        except (TypeError, ValueError) as e:
+            logger.warning("[analysis_cache] cannot serialize %s, not caching: %s", key, e)
+            return None
+
+    def _revalidate(self, key: str, compute: Compute) -> None:
+        if key in self._inflight:
+            return
+        flight = self._start_flight(key, compute, background=True)
+        self._background.add(flight.task)
+        flight.task.add_done_callback(self._background.discard)
+
+    async def _read(self, key: str) -> Optional[Tuple[float, str, str]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0], entry[1], "hit_memory"
+
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(key)
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            logger.warning("[analysis_cache] Redis get error: %s", e)
+            return None
+        if not raw:
+            return None
+        try:
+            envelope = json.loads(raw)
+            stored_at = datetime.fromisoformat(envelope["timestamp"]).timestamp()
+            payload = json.dumps(envelope["data"])
+        except (ValueError, KeyError, TypeError):
+            return None
+        self._remember(key, stored_at, payload)
+        return stored_at, payload, "hit_redis"
+
+    async def _write(self, key: str, payload: str, stored_at: float) -> None:
+        self._remember(key, stored_at, payload)
+        client = self._client()
+        if client is None:
+            return
+        # Same envelope get_from_cache/set_cache used, so existing entries stay readable
+        envelope = '{"data": %s, "timestamp": %s}' % (
+            payload, json.dumps(datetime.fromtimestamp(stored_at).isoformat())
+        )
+        try:
+            await client.setex(key, self.ttl + self.stale_ttl, envelope)
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            logger.warning("[analysis_cache] Redis set error: %s", e)
+
+    def _remember(self, key: str, stored_at: float, payload: str) -> None:
+        self._entries[key] = (stored_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _client(self):
+        if self._redis is None and self._redis_url and REDIS_ASYNC_AVAILABLE:
+            self._redis = aioredis.from_url(self._redis_url, decode_responses=True)
+        return self._redis
+
+    def _count(self, result: str) -> None:
+        self._stats[result] += 1
+        if get_metrics is not None:
+            get_metrics().record_cache_lookup(self.name, result)
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache()
+    return _analysis_cache
@@ -0,0 +1,213 @@
+"""
+Process pool for CPU-bound HTML scoring.
+
+BeautifulSoup parsing and the regex-heavy analyzers in main.py hold the GIL,
+so even on a worker thread a 2 MB page slows every other request (and the
+websockets) on that uvicorn worker. Jobs submitted here run in separate
+processes instead.
+
+Contract for jobs:
+  - func must be a module-level function (pickled by reference)
+  - arguments and return value must be picklable plain data
+    (str / dict / list / dataclasses) — never a soup or a ParsedPage
+
+Fallback: if the pool is disabled (ANALYSIS_PROCESS_WORKERS=0), not started,
+or a worker died (OOM-killed on a huge page), the job runs in-process on
+the given fallback executor, or directly in the calling thread.
+
+Usage:
+  # At app startup / shutdown:
+  await start_cpu_pool(preload=("main",))
+  ...
+  shutdown_cpu_pool()
+
+  # Per job:
+  scores = await get_cpu_pool().run(score_html_page, job, fallback=executor)
+"""
+
+import asyncio
+import functools
+import importlib
+import logging
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from app.config import (
+    ANALYSIS_PROCESS_MAX_TASKS,
+    ANALYSIS_PROCESS_START_METHOD,
+    ANALYSIS_PROCESS_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Consecutive worker crashes before the pool is given up on for good
+MAX_POOL_RESTARTS = 3
+
+
+def _preload_modules(modules: Sequence[str]) -> None:
+    """Worker initializer: import heavy modules before the first job arrives."""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:  # pragma: no cover - logged in the child
+            logger.warning("[cpu_pool] preload of %s failed: %s", name, e)
+
+
+def _is_picklable(func: Callable[..., Any]) -> bool:
+    """Functions pickle by reference, so this is cheap; a partial's args are not checked."""
+    while isinstance(func, functools.partial):
+        func = func.func
+    try:
+        pickle.dumps(func)
+    except Exception:
+        return False
+    return True
+
+
+class CPUPool:
+    """ProcessPoolExecutor wrapper with lazy start, crash recovery and fallback."""
+
+    def __init__(
+        self,
+        workers: int = ANALYSIS_PROCESS_WORKERS,
+        start_method: str = ANALYSIS_PROCESS_START_METHOD,
+        max_tasks_per_child: int = ANALYSIS_PROCESS_MAX_TASKS,
+    ):
+        self.workers = max(0, workers)
+        self.start_method = start_method
+        self.max_tasks_per_child = max_tasks_per_child
+        self._preload: Sequence[str] = ()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._started = False
+        self._restarts = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "fallbacks": 0,
+            "crashes": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """True when jobs go to worker processes rather than the fallback."""
+        return self._started and self.workers > 0 and self._restarts < MAX_POOL_RESTARTS
+
+    async def start(self, preload: Sequence[str] = ()) -> None:
+        """Create the pool and spin up every worker so the first request is not slowed."""
+        if self.workers <= 0:
+            logger.info("[cpu_pool] disabled (ANALYSIS_PROCESS_WORKERS=0), scoring stays in-process")
+            return
+        self._preload = tuple(preload)
+        self._started = True
+        pool = self._ensure_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*(loop.run_in_executor(pool, os.getpid) for _ in range(self.workers)))
+        except BrokenProcessPool:
+            self.shutdown()
+            raise
+        logger.info("[cpu_pool] started %s %s worker(s)", self.workers, self.start_method)
+
+    async def run(self, func: Callable[..., Any], *args: Any, fallback: Optional[Executor] = None) -> Any:
+        """Run func(*args) in a worker process, or in-process when the pool is unavailable."""
+        if not self.enabled:
+            return await self._run_in_process(func, args, fallback)
+        if not _is_picklable(func):
+            logger.error("[cpu_pool] %r is not a module-level function; running in-process", func)
+            return await self._run_in_process(func, args, fallback)
+
+        pool = self._ensure_pool()
+        loop = asyncio.get_running_loop()
+        self._stats["submitted"] += 1
+        try:
+            result = await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool as e:
+            self._stats["crashes"] += 1
+            self._discard_pool(pool)
+            logger.error("[cpu_pool] worker died (%s); running %s in-process", e, getattr(func, "__name__", func))
+            return await self._run_in_process(func, args, fallback)
+        self._restarts = 0
+        self._stats["completed"] += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "workers": self.workers,
+            "start_method": self.start_method,
+            "enabled": self.enabled,
+            "restarts": self._restarts,
+        }
+
+    def shutdown(self) -> None:
+        self._started = False
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            context = multiprocessing.get_context(self.start_method)
+            if self.start_method == "forkserver" and self._preload:
+                # Imported once in the fork server; workers fork from it warm
+                context.set_forkserver_preload(list(self._preload))
+            kwargs: Dict[str, Any] = {}
+            if self.max_tasks_per_child > 0 and self.start_method != "fork":
+                # Recycle workers so parser memory fragmentation cannot build up
+                kwargs["max_tasks_per_child"] = self.max_tasks_per_child
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_preload_modules,
+                initargs=(tuple(self._preload),),
+                **kwargs,
+            )
+        return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        if self._pool is pool:
+            self._restarts += 1
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            if self._restarts >= MAX_POOL_RESTARTS:
+                logger.error("[cpu_pool] %s consecutive crashes, falling back to in-process scoring", self._restarts)
+
+    async def _run_in_process(self, func: Callable[..., Any], args: tuple, fallback: Optional[Executor]) -> Any:
+        self._stats["fallbacks"] += 1
+        if fallback is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(fallback, func, *args)
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_cpu_pool: Optional[CPUPool] = None
+
+
+def get_cpu_pool() -> CPUPool:
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = CPUPool()
+    return _cpu_pool
+
+
+async def start_cpu_pool(preload: Sequence[str] = ()) -> CPUPool:
+    pool = get_cpu_pool()
+    await pool.start(preload=preload)
+    return pool
+
+
+def shutdown_cpu_pool() -> None:
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown()
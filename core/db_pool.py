@@ -0,0 +1,570 @@
+"""
+Shared asyncpg pool with per-subsystem budgets.
+
+Each worker used to open its own Postgres pool per subsystem: psycopg2 in
+database.py, asyncpg in AnalysisHistoryDB, history_api, ScheduledAnalysisManager,
+AlertService and AgentScheduler, plus the SQLAlchemy engine. That was dozens of
+mostly idle connections per worker, and pods ran into max_connections.
+
+  1. One asyncpg pool per worker (DB_POOL_MAX_SIZE), started in lifespan
+  2. Subsystems take a named PoolBudget instead of a pool. A budget looks like
+     an asyncpg pool to its users (`async with pool.acquire() as conn`) but
+     holds at most its DB_POOL_BUDGETS share, so a busy subsystem queues
+     behind its own budget instead of starving the others
+  3. Saturation: per-budget in-use / peak / waiting / wait time / timeouts,
+     in stats() (/health) and in MetricsCollector
+  4. Legacy psycopg2-style code (database.py, unified_context.py) gets a
+     SyncConnection: the same cursor / commit / rollback calls, executed on
+     the shared pool from a worker thread (run_in_db_thread), so neither the
+     event loop nor a psycopg2 connection is held while Postgres works.
+     Calls made on the event loop thread itself cannot wait on the loop; for
+     those sync_connection() returns None and database.py falls back to its
+     small psycopg2 pool. Statements run through conn.fetch / conn.execute,
+     so asyncpg's statement cache serves repeats in one round trip; the
+     parameter and column types the adapter needs are described once per
+     query and kept (DatabasePool.describe)
+
+Usage:
+  # At app startup / shutdown:
+  await start_db_pool()
+  ...
+  await close_db_pool()
+
+  # In a subsystem (falls back to a private pool for another database):
+  self.pool = await open_pool("alerts", database_url, min_size=1, max_size=5)
+  async with self.pool.acquire() as conn:
+      ...
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config import (
+    DATABASE_URL,
+    DB_POOL_ACQUIRE_TIMEOUT,
+    DB_POOL_BUDGETS,
+    DB_POOL_COMMAND_TIMEOUT,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    asyncpg = None
+    ASYNCPG_AVAILABLE = False
+
+try:
+    from agents.observability.metrics import get_metrics
+except ImportError:
+    get_metrics = None
+
+
+def normalize_dsn(dsn: Optional[str]) -> str:
+    """postgres:// and postgresql+asyncpg:// → postgresql:// (what asyncpg expects)."""
+    dsn = (dsn or "").strip()
+    if dsn.startswith("postgres://"):
+        dsn = "postgresql://" + dsn[len("postgres://"):]
+    return dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """'legacy=8,alerts=4' → {'legacy': 8, 'alerts': 4}."""
+    budgets: Dict[str, int] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, size = item.partition("=")
+        try:
+            budgets[name.strip()] = max(1, int(size))
+        except ValueError:
+            logger.warning("[db_pool] Ignoring bad DB_POOL_BUDGETS entry %r", item)
+    return budgets
+
+
+class PoolBudget:
+    """A subsystem's share of the shared pool, usable where an asyncpg.Pool was."""
+
+    def __init__(self, manager: "DatabasePool", name: str, limit: int):
+        self.manager = manager
+        self.name = name
+        self.limit = limit
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_use = 0
+        self.peak = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, timeout: Optional[float] = None):
+        return self._acquire(timeout)
+
+    @asynccontextmanager
+    async def _acquire(self, timeout: Optional[float]):
+        conn = await self.checkout(timeout)
+        try:
+            yield conn
+        finally:
+            await self.checkin(conn)
+
+    async def checkout(self, timeout: Optional[float] = None):
+        """Take a connection (waiting for the budget, then the pool). Pair with checkin()."""
+        timeout = self.manager.acquire_timeout if timeout is None else timeout
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+            try:
+                pool = await self.manager.start()
+                if pool is None:
+                    raise ConnectionError("database pool is not available")
+                remaining = max(0.001, timeout - (time.monotonic() - started))
+                conn = await pool.acquire(timeout=remaining)
+            except BaseException:
+                self._slots.release()
+                raise
+        except asyncio.TimeoutError:
+            self._record(started, "timeout")
+            self.timeouts += 1
+            raise
+        except Exception:
+            self._record(started, "error")
+            raise
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+        self.peak = max(self.peak, self.in_use)
+        self.acquired += 1
+        self._record(started, "ok")
+        return conn
+
+    async def checkin(self, conn) -> None:
+        try:
+            await self.manager.release(conn)
+        finally:
+            self.in_use -= 1
+            self._slots.release()
+            if get_metrics is not None:
+                get_metrics().record_db_pool_release(self.name, self.in_use)
+
+    def _record(self, started: float, result: str) -> None:
+        waited = time.monotonic() - started
+        self.wait_seconds += waited
+        if get_metrics is not None:
+            get_metrics().record_db_pool_acquire(self.name, waited, result, self.in_use)
+
+    # asyncpg.Pool conveniences
+    async def execute(self, query: str, *args, timeout: Optional[float] = None) -> str:
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args, timeout=timeout)
+
+    async def fetch(self, query: str, *args, timeout: Optional[float] = None) -> list:
+        async with self.acquire() as conn:
+            return await conn.fetch(query, *args, timeout=timeout)
+
+    async def fetchrow(self, query: str, *args, timeout: Optional[float] = None):
+        async with self.acquire() as conn:
+            return await conn.fetchrow(query, *args, timeout=timeout)
+
+    async def fetchval(self, query: str, *args, column: int = 0, timeout: Optional[float] = None):
+        async with self.acquire() as conn:
+            return await conn.fetchval(query, *args, column=column, timeout=timeout)
+
+    async def close(self) -> None:
+        """No-op: the shared pool is closed by close_db_pool() at shutdown."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "peak": self.peak,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_seconds * 1000 / max(1, self.acquired + self.timeouts), 2),
+        }
+
+
+class DatabasePool:
+    """The worker's one asyncpg pool and its named budgets."""
+
+    # Described statements kept for the sync adapter (see describe())
+    STATEMENT_TYPES_MAX = 512
+
+    def __init__(
+        self,
+        dsn: Optional[str] = DATABASE_URL,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        budgets: Optional[Dict[str, int]] = None,
+        acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT,
+        command_timeout: float = DB_POOL_COMMAND_TIMEOUT,
+    ):
+        self.dsn = normalize_dsn(dsn)
+        self.min_size = min_size
+        self.max_size = max(1, max_size)
+        self.budget_limits = budgets if budgets is not None else parse_budgets(DB_POOL_BUDGETS)
+        self.acquire_timeout = acquire_timeout
+        self.command_timeout = command_timeout
+        self._budgets: Dict[str, PoolBudget] = {}
+        self._pool = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        # query -> (parameter types, column names, column types)
+        self._statement_types: "OrderedDict[str, Tuple[List[str], List[str], List[str]]]" = OrderedDict()
+        self.sync_fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.dsn) and ASYNCPG_AVAILABLE
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def serves(self, dsn: Optional[str]) -> bool:
+        """True if dsn is the shared pool's database."""
+        return self.enabled and normalize_dsn(dsn) == self.dsn
+
+    def budget_limit(self, name: str) -> int:
+        return self.budget_limits.get(name, self.max_size)
+
+    def budget(self, name: str) -> PoolBudget:
+        if name not in self._budgets:
+            self._budgets[name] = PoolBudget(self, name, self.budget_limit(name))
+        return self._budgets[name]
+
+    async def start(self):
+        """Create the pool once; returns it (None when disabled)."""
+        if self._pool is not None or not self.enabled:
+            return self._pool
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._pool is None:
+                self._pool = await asyncpg.create_pool(
+                    self.dsn,
+                    min_size=min(self.min_size, self.max_size),
+                    max_size=self.max_size,
+                    command_timeout=self.command_timeout,
+                )
+                self._loop = asyncio.get_running_loop()
+                self._loop_thread = threading.get_ident()
+                logger.info("[db_pool] Shared pool started (max %s connections)", self.max_size)
+        return self._pool
+
+    async def release(self, conn) -> None:
+        """Return a connection to the pool (nothing to do once the pool is closed)."""
+        if self._pool is not None:
+            await self._pool.release(conn)
+
+    async def describe(self, conn, query: str) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Parameter types, column names and column types of query. Prepared
+        once per query and worker; after that the types come from here and
+        the statement itself from asyncpg's cache.
+        """
+        types = self._statement_types.get(query)
+        if types is not None:
+            self._statement_types.move_to_end(query)
+            return types
+        stmt = await conn.prepare(query)
+        attributes = stmt.get_attributes()
+        types = (
+            [param.name for param in stmt.get_parameters()],
+            [attr.name for attr in attributes],
+            [attr.type.name for attr in attributes],
+        )
+        self._statement_types[query] = types
+        while len(self._statement_types) > self.STATEMENT_TYPES_MAX:
+            self._statement_types.popitem(last=False)
+        return types
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            try:
+                await self._pool.close()
+            except Exception as e:
+                logger.warning("[db_pool] Error closing pool: %s", e)
+            self._pool = None
+            self._loop = None
+            self._loop_thread = None
+            self._budgets.clear()
+
+    def sync_connection(self, budget: str = "legacy") -> Optional["SyncConnection"]:
+        """
+        A psycopg2-style connection on the shared pool, for blocking code
+        running in a worker thread. None if the pool is not running or the
+        caller is on the event loop thread (it could never be served).
+        """
+        if self._pool is None or self._loop is None or self._loop.is_closed():
+            return None
+        if threading.get_ident() == self._loop_thread:
+            self.sync_fallbacks += 1
+            return None
+        return SyncConnection(self.budget(budget), self._loop)
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self._pool
+        return {
+            "enabled": self.enabled,
+            "started": pool is not None,
+            "max_size": self.max_size,
+            "size": pool.get_size() if pool is not None else 0,
+            "idle": pool.get_idle_size() if pool is not None else 0,
+            "sync_fallbacks": self.sync_fallbacks,
+            "budgets": {name: budget.stats() for name, budget in self._budgets.items()},
+        }
+
+
+# ============================================================================
+# SYNC ADAPTER (psycopg2-style calls on the shared pool)
+# ============================================================================
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+
+
+def to_asyncpg_query(sql: str, params=None) -> Tuple[str, List[Any]]:
+    """psycopg2 placeholders (%s, %(name)s, %%) → asyncpg ($1..) and positional args."""
+    if params is None:
+        return sql, []  # psycopg2 does no %-formatting without parameters
+    args: List[Any] = []
+    named: Dict[str, int] = {}
+    positional = iter(params if isinstance(params, (list, tuple)) else ())
+
+    def replace(match: "re.Match") -> str:
+        token = match.group(0)
+        if token == "%%":
+            return "%"
+        name = match.group(1)
+        if name is None:
+            args.append(next(positional))
+            return f"${len(args)}"
+        if name not in named:
+            args.append(params[name])
+            named[name] = len(args)
+        return f"${named[name]}"
+
+    return _PLACEHOLDER.sub(replace, sql), args
+
+
+_INT_TYPES = {"int2", "int4", "int8"}
+_FLOAT_TYPES = {"float4", "float8"}
+_TEXT_TYPES = {"text", "varchar", "bpchar", "name"}
+_JSON_TYPES = {"json", "jsonb"}
+
+
+def adapt_param(value, type_name: str):
+    """
+    Coerce a value the way psycopg2's literal quoting would let Postgres
+    cast it (asyncpg checks parameter types strictly).
+    """
+    if value is None:
+        return None
+    if type_name in _JSON_TYPES:
+        return value if isinstance(value, str) else json.dumps(value, default=str)
+    if type_name in _TEXT_TYPES and not isinstance(value, str):
+        return str(value)
+    if type_name in _INT_TYPES and not isinstance(value, int):
+        return int(Decimal(str(value)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    if type_name in _FLOAT_TYPES and not isinstance(value, float):
+        return float(value)
+    if type_name == "numeric" and isinstance(value, (float, str)):
+        return Decimal(str(value))
+    if type_name in ("timestamp", "timestamptz") and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if type_name == "date" and isinstance(value, str):
+        return date.fromisoformat(value)
+    if type_name.startswith("_") and isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def _decode_value(value, type_name: str):
+    # psycopg2 returns json/jsonb already parsed; asyncpg returns the text
+    if type_name in _JSON_TYPES and isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+class SyncCursor:
+    """The part of the psycopg2 cursor API the legacy modules use."""
+
+    def __init__(self, connection: "SyncConnection"):
+        self.connection = connection
+        self._rows: List[tuple] = []
+        self._pos = 0
+        self.rowcount = -1
+        self.description = None
+
+    def execute(self, sql: str, params=None) -> None:
+        rows, columns, status = self.connection._call(self.connection._execute(sql, params))
+        self._rows = rows
+        self._pos = 0
+        self.description = [(name,) for name in columns] if columns else None
+        self.rowcount = len(rows) if columns else _status_rowcount(status)
+
+    def executemany(self, sql: str, seq_of_params: Sequence) -> None:
+        total = 0
+        for params in seq_of_params:
+            self.execute(sql, params)
+            total += max(0, self.rowcount)
+        self.rowcount = total
+
+    def fetchone(self) -> Optional[tuple]:
+        if self._pos >= len(self._rows):
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchmany(self, size: int = 1) -> List[tuple]:
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self) -> List[tuple]:
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self) -> None:
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _status_rowcount(status: Optional[str]) -> int:
+    # 'UPDATE 3', 'INSERT 0 1', 'DELETE 0'; -1 for statements without a count
+    try:
+        return int((status or "").rsplit(" ", 1)[-1])
+    except ValueError:
+        return -1
+
+
+class SyncConnection:
+    """
+    psycopg2-style connection backed by the shared pool. Every call is run
+    on the event loop with run_coroutine_threadsafe, so it must be used from
+    a worker thread. Like psycopg2, statements run in a transaction that
+    commit() / rollback() end; close() returns the connection to the pool.
+    """
+
+    def __init__(self, budget: PoolBudget, loop: asyncio.AbstractEventLoop):
+        self._budget = budget
+        self._loop = loop
+        self._conn = self._call(budget.checkout())
+        self._tx = None
+        self.closed = False
+
+    def cursor(self, *args, **kwargs) -> SyncCursor:
+        return SyncCursor(self)
+
+    def commit(self) -> None:
+        if self._tx is not None:
+            self._call(self._end_transaction(commit=True))
+
+    def rollback(self) -> None:
+        if self._tx is not None:
+            self._call(self._end_transaction(commit=False))
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._call(self._release())
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _execute(self, sql: str, params) -> Tuple[List[tuple], List[str], Optional[str]]:
+        if self._tx is None:
+            self._tx = self._conn.transaction()
+            await self._tx.start()
+        query, args = to_asyncpg_query(sql, params)
+        param_types, columns, column_types = await self._budget.manager.describe(self._conn, query)
+        args = [adapt_param(value, param_types[i]) for i, value in enumerate(args)]
+        if not columns:
+            # execute() returns the status ('UPDATE 3') for rowcount
+            return [], [], await self._conn.execute(query, *args)
+        records = await self._conn.fetch(query, *args)
+        rows = [tuple(_decode_value(value, column_types[i]) for i, value in enumerate(record)) for record in records]
+        return rows, columns, None
+
+    async def _end_transaction(self, commit: bool) -> None:
+        tx, self._tx = self._tx, None
+        if commit:
+            await tx.commit()
+        else:
+            await tx.rollback()
+
+    async def _release(self) -> None:
+        try:
+            if self._tx is not None:
+                await self._end_transaction(commit=False)
+        except Exception as e:
+            logger.warning("[db_pool] Rollback on release failed: %s", e)
+        finally:
+            await self._budget.checkin(self._conn)
+
+    def __bool__(self) -> bool:
+        return not self.closed
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_db_pool: Optional[DatabasePool] = None
+
+
+def get_db_pool() -> DatabasePool:
+    global _db_pool
+    if _db_pool is None:
+        _db_pool = DatabasePool()
+    return _db_pool
+
+
+async def start_db_pool() -> DatabasePool:
+    pool = get_db_pool()
+    await pool.start()
+    return pool
+
+
+async def close_db_pool() -> None:
+    if _db_pool is not None:
+        await _db_pool.close()
+
+
+async def open_pool(budget: str, dsn: Optional[str], **pool_kwargs):
+    """
+    The shared pool's `budget` if dsn is its database, otherwise a private
+    asyncpg pool created with pool_kwargs (e.g. HISTORY_DATABASE_URL pointing
+    elsewhere). Either way the result supports acquire() and close().
+    """
+    shared = get_db_pool()
+    if shared.serves(dsn):
+        await shared.start()
+        return shared.budget(budget)
+    return await asyncpg.create_pool(normalize_dsn(dsn), **pool_kwargs)
@@ -0,0 +1,479 @@
+"""
+Cross-worker fan-out for per-user push channels (alerts SSE, notification websockets).
+
+AlertService._broadcast only pushed into the current worker's SSE queues and
+NotificationConnectionManager.send_to_user only reached websockets attached
+to the current worker. An alert created by AgentScheduler or
+ScheduledAnalysisManager on worker A never reached a user connected to
+worker B until they reconnected and got the catch-up.
+
+  1. FanoutHub (one per worker) publishes (channel, user_id, payload) to a
+     backend and passes incoming messages to the channel's handler, which
+     delivers them to the local connections
+  2. Routing by user: a worker subscribes to a user's topic only while it
+     holds a connection for that user (track / untrack, reference counted),
+     so a message goes only to the workers that can deliver it
+  3. Every message gets a per-user, per-channel sequence number and is kept
+     in a bounded replay log (FANOUT_REPLAY_SIZE, FANOUT_REPLAY_TTL). A
+     client that reconnects with the last sequence it saw gets what it missed
+  4. Backends: MemoryFanoutBus (one process; hubs sharing a bus behave like
+     workers sharing Redis, which is how the tests run) and
+     RedisFanoutBackend, where one Lua call increments the sequence, appends
+     to a stream whose entry IDs are the sequence numbers and PUBLISHes to
+     the user's channel. A topic's keys share one {hash tag}, so the script
+     also runs on Redis Cluster. If Redis fails, the hub delivers locally so
+     this worker's clients still get the message
+  5. Deliveries to different users run concurrently: a slow handler only
+     holds up later messages for its own topic, which stay in order
+
+Usage:
+  hub = get_fanout_hub()
+  hub.register("alerts", deliver)            # async deliver(message)
+  await hub.track("alerts", user_id)         # first local connection
+  seq = await hub.publish("alerts", user_id, alert.to_dict())
+  seq = await hub.publish("alerts", user_id, payload, text=encoded)  # pre-encoded JSON
+  replay = await hub.replay("alerts", user_id, after_seq=last_event_id)
+  await hub.untrack("alerts", user_id)       # last local connection closed
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.config import FANOUT_BACKEND, FANOUT_REPLAY_SIZE, FANOUT_REPLAY_TTL, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_ASYNC_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_ASYNC_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class FanoutMessage:
+    channel: str
+    user_id: str
+    seq: int  # 0: delivered locally while the backend was down, not replayable
+    payload: dict
+    text: Optional[str] = None  # payload as JSON, when the publisher or backend already has it
+
+
+Deliver = Callable[[FanoutMessage], Awaitable[None]]
+
+
+class Replay(NamedTuple):
+    cursor: int  # highest sequence covered; live messages at or below it are duplicates
+    messages: List[FanoutMessage]
+    complete: bool  # False if messages after the requested sequence were already trimmed
+
+
+# ============================================================================
+# IN-MEMORY BACKEND
+# ============================================================================
+
+@dataclass
+class _UserLog:
+    seq: int = 0
+    expires_at: float = 0.0
+    messages: Deque[FanoutMessage] = field(default_factory=deque)
+
+
+class MemoryFanoutBus:
+    """Sequences, replay logs and subscriptions in this process."""
+
+    def __init__(self, replay_size: int = FANOUT_REPLAY_SIZE, replay_ttl: float = FANOUT_REPLAY_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.replay_size = max(1, replay_size)
+        self.replay_ttl = replay_ttl
+        self._clock = clock
+        self._logs: "OrderedDict[Tuple[str, str], _UserLog]" = OrderedDict()
+        self._subscribers: Dict[Tuple[str, str], Set[Deliver]] = {}
+
+    async def publish(self, channel: str, user_id: str, payload: dict, text: Optional[str] = None) -> int:
+        now = self._clock()
+        self._expire(now)
+        key = (channel, user_id)
+        log = self._logs.pop(key, None) or _UserLog()
+        self._logs[key] = log  # most recently written last
+        log.seq += 1
+        log.expires_at = now + self.replay_ttl
+        message = FanoutMessage(channel, user_id, log.seq, payload, text)
+        log.messages.append(message)
+        while len(log.messages) > self.replay_size:
+            log.messages.popleft()
+        subscribers = list(self._subscribers.get(key, ()))
+        results = await asyncio.gather(*(deliver(message) for deliver in subscribers), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("[fanout] Delivery to %s/%s failed: %s", channel, user_id, result)
+        return log.seq
+
+    async def replay(self, channel: str, user_id: str, after_seq: int) -> Tuple[int, List[FanoutMessage]]:
+        self._expire(self._clock())
+        log = self._logs.get((channel, user_id))
+        if log is None:
+            return 0, []
+        return log.seq, [m for m in log.messages if m.seq > after_seq]
+
+    async def head(self, channel: str, user_id: str) -> int:
+        self._expire(self._clock())
+        log = self._logs.get((channel, user_id))
+        return log.seq if log is not None else 0
+
+    async def subscribe(self, channel: str, user_id: str, deliver: Deliver) -> None:
+        self._subscribers.setdefault((channel, user_id), set()).add(deliver)
+
+    async def unsubscribe(self, channel: str, user_id: str, deliver: Deliver) -> None:
+        subscribers = self._subscribers.get((channel, user_id))
+        if subscribers is not None:
+            subscribers.discard(deliver)
+            if not subscribers:
+                del self._subscribers[(channel, user_id)]
+
+    async def close(self) -> None:
+        pass
+
+    def _expire(self, now: float) -> None:
+        # Logs are ordered by last write, so expired ones are at the front
+        while self._logs:
+            key, log = next(iter(self._logs.items()))
+            if log.expires_at > now:
+                break
+            del self._logs[key]
+
+    def __len__(self) -> int:
+        return len(self._logs)
+
+
+# ============================================================================
+# REDIS BACKEND
+# ============================================================================
+
+# KEYS: sequence, stream, pub/sub channel (one hash tag). ARGV: payload, max log length, ttl.
+# Stream entry IDs are "<seq>-0", so XRANGE by sequence is the replay. If the
+# sequence key was lost while the stream survived, continue after the stream.
+PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+local last = redis.call('XREVRANGE', KEYS[2], '+', '-', 'COUNT', 1)[1]
+if last then
+  local last_seq = tonumber(string.match(last[1], '^(%d+)'))
+  if last_seq >= seq then
+    seq = last_seq + 1
+    redis.call('SET', KEYS[1], seq)
+  end
+end
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], seq .. '-0', 'm', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+redis.call('PUBLISH', KEYS[3], seq .. ' ' .. ARGV[1])
+return seq
+"""
+
+
+class RedisFanoutBackend:
+    """
+    Per-user pub/sub channels plus a capped stream per user for replay.
+
+    Key schema (one {hash tag} per topic, so a topic lives in one Cluster slot):
+        fanout:{<channel>:<user_id>}:seq    INCR sequence
+        fanout:{<channel>:<user_id>}:log    stream of "<seq>-0" entries
+        fanout:{<channel>:<user_id>}:live   pub/sub channel
+    """
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL, prefix: str = "fanout:",
+                 replay_size: int = FANOUT_REPLAY_SIZE, replay_ttl: int = FANOUT_REPLAY_TTL):
+        self._redis_url = redis_url
+        self.prefix = prefix
+        self.replay_size = max(1, replay_size)
+        self.replay_ttl = max(1, int(replay_ttl))
+        self._redis = None
+        self._script = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        # pub/sub channel name -> (channel, user_id, deliver)
+        self._topics: Dict[str, Tuple[str, str, Deliver]] = {}
+        # Per-topic delivery queues, each drained by its own task while non-empty
+        self._queues: Dict[str, Deque[FanoutMessage]] = {}
+        self._drainers: Dict[str, asyncio.Task] = {}
+        self.errors = 0
+        self.dropped = 0
+
+    def _keys(self, channel: str, user_id: str) -> Tuple[str, str, str]:
+        base = f"{self.prefix}{{{channel}:{user_id}}}"
+        return f"{base}:seq", f"{base}:log", f"{base}:live"
+
+    def _client(self):
+        if self._redis is None:
+            if not (self._redis_url and REDIS_ASYNC_AVAILABLE):
+                raise ConnectionError("Redis fan-out is not configured")
+            self._redis = aioredis.from_url(self._redis_url, decode_responses=True)
+            # redis-py sends EVALSHA and reloads the script on NOSCRIPT
+            self._script = self._redis.register_script(PUBLISH_SCRIPT)
+        return self._redis
+
+    async def publish(self, channel: str, user_id: str, payload: dict, text: Optional[str] = None) -> int:
+        self._client()
+        if text is None:
+            text = json.dumps(payload, default=str)
+        seq = await self._script(
+            keys=list(self._keys(channel, user_id)),
+            args=[text, self.replay_size, self.replay_ttl],
+        )
+        return int(seq)
+
+    async def replay(self, channel: str, user_id: str, after_seq: int) -> Tuple[int, List[FanoutMessage]]:
+        seq_key, log_key, _ = self._keys(channel, user_id)
+        async with self._client().pipeline(transaction=True) as pipe:
+            pipe.get(seq_key)
+            pipe.xrange(log_key, min=f"{max(0, after_seq) + 1}-0", max="+")
+            head, entries = await pipe.execute()
+        messages = [
+            FanoutMessage(channel, user_id, int(entry_id.split("-", 1)[0]), json.loads(fields["m"]), fields["m"])
+            for entry_id, fields in entries
+        ]
+        return int(head or 0), messages
+
+    async def head(self, channel: str, user_id: str) -> int:
+        return int(await self._client().get(self._keys(channel, user_id)[0]) or 0)
+
+    async def subscribe(self, channel: str, user_id: str, deliver: Deliver) -> None:
+        live = self._keys(channel, user_id)[2]
+        self._topics[live] = (channel, user_id, deliver)
+        pubsub = await self._ensure_pubsub()
+        await pubsub.subscribe(live)
+
+    async def unsubscribe(self, channel: str, user_id: str, deliver: Deliver) -> None:
+        live = self._keys(channel, user_id)[2]
+        self._topics.pop(live, None)
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(live)
+
+    async def _ensure_pubsub(self):
+        if self._pubsub is None:
+            self._pubsub = self._client().pubsub()
+            # A standing subscription, so the reader always has a connection to read
+            await self._pubsub.subscribe(f"{self.prefix}control")
+            self._reader = asyncio.create_task(self._read())
+        return self._pubsub
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes; clients catch up via replay
+                self.errors += 1
+                logger.warning("[fanout] Redis pub/sub error: %s", e)
+                await asyncio.sleep(1.0)
+                continue
+            if message is None:
+                continue
+            live = message["channel"]
+            topic = self._topics.get(live)
+            if topic is None:
+                continue
+            channel, user_id, _ = topic
+            seq, _, data = message["data"].partition(" ")
+            try:
+                self._enqueue(live, FanoutMessage(channel, user_id, int(seq), json.loads(data), data))
+            except ValueError as e:
+                logger.error("[fanout] Malformed message on %s: %s", live, e)
+
+    def _enqueue(self, live: str, message: FanoutMessage) -> None:
+        queue = self._queues.setdefault(live, deque())
+        if len(queue) >= self.replay_size:
+            # A stuck handler: drop the oldest; the client can catch up via replay
+            queue.popleft()
+            self.dropped += 1
+        queue.append(message)
+        if live not in self._drainers:
+            self._drainers[live] = asyncio.create_task(self._drain(live))
+
+    async def _drain(self, live: str) -> None:
+        queue = self._queues[live]
+        try:
+            while queue:
+                message = queue.popleft()
+                topic = self._topics.get(live)
+                if topic is None:
+                    continue
+                try:
+                    await topic[2](message)
+                except Exception as e:
+                    logger.error("[fanout] Delivery to %s/%s failed: %s", message.channel, message.user_id, e)
+        finally:
+            del self._drainers[live]
+            if not queue:
+                self._queues.pop(live, None)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        drainers = list(self._drainers.values())
+        for task in drainers:
+            task.cancel()
+        if drainers:
+            await asyncio.gather(*drainers, return_exceptions=True)
+        self._queues.clear()
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+        if self._redis is not None:
+            try:
+                await self._redis.aclose()
+            except Exception:
+                pass
+            self._redis = None
+            self._script = None
+        self._topics.clear()
+
+
+# ============================================================================
+# HUB
+# ============================================================================
+
+class FanoutHub:
+    """This worker's side of the fan-out: channel handlers and tracked users."""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryFanoutBus()
+        self._handlers: Dict[str, Deliver] = {}
+        self._tracked: Dict[Tuple[str, str], int] = {}
+        self._stats = {"published": 0, "delivered": 0, "local_fallbacks": 0, "backend_errors": 0}
+
+    def register(self, channel: str, handler: Deliver) -> None:
+        """handler(message) delivers to this worker's connections of message.user_id."""
+        self._handlers[channel] = handler
+
+    async def track(self, channel: str, user_id: str) -> None:
+        """A local connection for user_id opened: route the user's messages here."""
+        key = (channel, user_id)
+        self._tracked[key] = self._tracked.get(key, 0) + 1
+        if self._tracked[key] == 1:
+            try:
+                await self.backend.subscribe(channel, user_id, self._dispatch)
+            except Exception as e:
+                self._stats["backend_errors"] += 1
+                logger.warning("[fanout] Subscribe %s/%s failed: %s", channel, user_id, e)
+
+    async def untrack(self, channel: str, user_id: str) -> None:
+        key = (channel, user_id)
+        count = self._tracked.get(key, 0) - 1
+        if count > 0:
+            self._tracked[key] = count
+            return
+        if self._tracked.pop(key, None) is None:
+            return
+        try:
+            await self.backend.unsubscribe(channel, user_id, self._dispatch)
+        except Exception as e:
+            self._stats["backend_errors"] += 1
+            logger.warning("[fanout] Unsubscribe %s/%s failed: %s", channel, user_id, e)
+
+    def is_tracked(self, channel: str, user_id: str) -> bool:
+        return (channel, user_id) in self._tracked
+
+    async def publish(self, channel: str, user_id: str, payload: dict, text: Optional[str] = None) -> int:
+        """
+        Send payload to user_id's connections on every worker; returns its sequence.
+        text, if given, is payload already encoded as a JSON object; it is sent
+        as is and handed to the channel handlers, so nothing re-encodes it.
+        """
+        try:
+            seq = await self.backend.publish(channel, user_id, payload, text)
+        except Exception as e:
+            self._stats["backend_errors"] += 1
+            self._stats["local_fallbacks"] += 1
+            logger.warning("[fanout] Publish failed, delivering on this worker only: %s", e)
+            if self.is_tracked(channel, user_id):
+                await self._dispatch(FanoutMessage(channel, user_id, 0, payload, text))
+            return 0
+        self._stats["published"] += 1
+        return seq
+
+    async def replay(self, channel: str, user_id: str, after_seq: int) -> Replay:
+        """Messages after after_seq still in the replay log."""
+        try:
+            head, messages = await self.backend.replay(channel, user_id, after_seq)
+            restarted = after_seq > head
+            if restarted:
+                # The sequence restarted (log expired, backend reset): all of it is new
+                after_seq = 0
+                head, messages = await self.backend.replay(channel, user_id, 0)
+        except Exception as e:
+            self._stats["backend_errors"] += 1
+            logger.warning("[fanout] Replay %s/%s failed: %s", channel, user_id, e)
+            return Replay(after_seq, [], False)
+        complete = not restarted and (head == after_seq or bool(messages and messages[0].seq == after_seq + 1))
+        return Replay(max(head, after_seq), messages, complete)
+
+    async def head(self, channel: str, user_id: str) -> int:
+        """The user's latest sequence on channel (0 if none or unknown)."""
+        try:
+            return await self.backend.head(channel, user_id)
+        except Exception as e:
+            self._stats["backend_errors"] += 1
+            logger.warning("[fanout] Sequence lookup %s/%s failed: %s", channel, user_id, e)
+            return 0
+
+    async def _dispatch(self, message: FanoutMessage) -> None:
+        handler = self._handlers.get(message.channel)
+        if handler is None:
+            return
+        await handler(message)
+        self._stats["delivered"] += 1
+
+    def stats(self) -> Dict[str, object]:
+        backend = self.backend
+        return {
+            **self._stats,
+            "backend": "redis" if isinstance(backend, RedisFanoutBackend) else "memory",
+            "tracked_users": len(self._tracked),
+            "redis_errors": getattr(backend, "errors", 0),
+        }
+
+    async def close(self) -> None:
+        self._tracked.clear()
+        await self.backend.close()
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_fanout_hub: Optional[FanoutHub] = None
+
+
+def get_fanout_hub() -> FanoutHub:
+    global _fanout_hub
+    if _fanout_hub is None:
+        if FANOUT_BACKEND == "redis" and REDIS_URL:
+            backend = RedisFanoutBackend(REDIS_URL)
+        else:
+            if FANOUT_BACKEND == "redis":
+                logger.warning("[fanout] FANOUT_BACKEND=redis but REDIS_URL is not set; fan-out is per worker")
+            backend = MemoryFanoutBus()
+        _fanout_hub = FanoutHub(backend)
+    return _fanout_hub
+
+
+async def close_fanout_hub() -> None:
+    if _fanout_hub is not None:
+        await _fanout_hub.close()
@@ -0,0 +1,252 @@
+"""
+Identity cache: indexed user lookup and verified-token reuse.
+
+get_current_user runs on every authenticated request. It used to resolve the
+token's `sub` (an email OR a username, depending on how the token was issued)
+with a direct USERS_DB lookup followed by two linear scans over every user,
+and it verified the JWT signature again for each request.
+
+  1. UserIndex is the USERS_DB dict with `username` and `email` secondary
+     indexes. The indexes are maintained by the dict's own write methods, so
+     every assignment or delete in main.py (init_users, DB sync, OAuth
+     sign-in, magic link, admin endpoints) keeps them in sync
+  2. TokenCache keeps verified JWT payloads for a short TTL (never past the
+     token's own exp), keyed by a hash of the token, so repeated requests
+     with the same bearer token skip signature verification. The resolved
+     USERS_DB key is memoised with the entry until the user table changes
+
+Usage:
+  cache = get_identity_cache()
+  payload, user_key = cache.identify(token)   # raises jwt errors like jwt.decode
+  user_data = cache.users.get(user_key)
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import jwt
+
+from app.config import ALGORITHM, IDENTITY_TOKEN_CACHE_SIZE, IDENTITY_TOKEN_CACHE_TTL, SECRET_KEY
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class UserIndex(dict):
+    """
+    USERS_DB: key → user dict, with lookups by the `username` and `email` fields.
+
+    Only the key→record mapping is tracked. Code that edits a record's
+    username or email in place must call reindex(key) afterwards.
+    """
+
+    INDEXED_FIELDS = ("username", "email")
+
+    def __init__(self, users: Optional[dict] = None):
+        super().__init__()
+        self._indexes: Dict[str, Dict[str, List[str]]] = {field: {} for field in self.INDEXED_FIELDS}
+        self.version = 0
+        if users:
+            self.update(users)
+
+    # --- lookups ---
+
+    def find(self, identifier: str) -> Tuple[Optional[str], Optional[dict]]:
+        """Key and record for a key, username or email (in that order)."""
+        if identifier in self:
+            return identifier, self[identifier]
+        for field in self.INDEXED_FIELDS:
+            key = self.find_key(field, identifier)
+            if key is not None:
+                return key, self[key]
+        return None, None
+
+    def find_key(self, field: str, value) -> Optional[str]:
+        """First key (in insertion order) whose record has `field` == value."""
+        keys = self._indexes[field].get(value)
+        return keys[0] if keys else None
+
+    def find_by_email(self, email: str) -> Tuple[Optional[str], Optional[dict]]:
+        key = self.find_key("email", email)
+        return (key, self[key]) if key is not None else (None, None)
+
+    # --- writes ---
+
+    def __setitem__(self, key, record) -> None:
+        if key in self:
+            self._unindex(key, dict.__getitem__(self, key))
+        dict.__setitem__(self, key, record)
+        self._index(key, record)
+        self.version += 1
+
+    def __delitem__(self, key) -> None:
+        self._unindex(key, dict.__getitem__(self, key))
+        dict.__delitem__(self, key)
+        self.version += 1
+
+    def pop(self, key, default=_MISSING):
+        if key in self:
+            record = self[key]
+            del self[key]
+            return record
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def popitem(self):
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, other=(), **kwargs) -> None:
+        items = other.items() if hasattr(other, "items") else other
+        for key, record in items:
+            self[key] = record
+        for key, record in kwargs.items():
+            self[key] = record
+
+    def clear(self) -> None:
+        dict.clear(self)
+        for index in self._indexes.values():
+            index.clear()
+        self.version += 1
+
+    def reset(self, users: dict) -> None:
+        """Replace every user, keeping this object (USERS_DB is imported by reference)."""
+        self.clear()
+        self.update(users)
+
+    def reindex(self, key) -> None:
+        """Refresh the indexes after a record's username or email was edited in place."""
+        for index in self._indexes.values():
+            for value, keys in list(index.items()):
+                if key in keys:
+                    keys.remove(key)
+                    if not keys:
+                        del index[value]
+        if key in self:
+            self._index(key, self[key])
+        self.version += 1
+
+    def _index(self, key, record) -> None:
+        if not isinstance(record, dict):
+            return
+        for field, index in self._indexes.items():
+            value = record.get(field)
+            if value is not None:
+                index.setdefault(value, []).append(key)
+
+    def _unindex(self, key, record) -> None:
+        if not isinstance(record, dict):
+            return
+        for field, index in self._indexes.items():
+            keys = index.get(record.get(field))
+            if keys and key in keys:
+                keys.remove(key)
+                if not keys:
+                    del index[record.get(field)]
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class _CachedToken:
+    __slots__ = ("payload", "expires_at", "user_key", "users_version")
+
+    def __init__(self, payload: dict, expires_at: float):
+        self.payload = payload
+        self.expires_at = expires_at
+        self.user_key: Optional[str] = None
+        self.users_version = -1
+
+
+class IdentityCache:
+    """Verified-token cache in front of a UserIndex."""
+
+    def __init__(
+        self,
+        users: Optional[UserIndex] = None,
+        token_ttl: float = IDENTITY_TOKEN_CACHE_TTL,
+        max_tokens: int = IDENTITY_TOKEN_CACHE_SIZE,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.users = users if users is not None else UserIndex()
+        self.token_ttl = token_ttl
+        self.max_tokens = max(1, max_tokens)
+        self._clock = clock
+        self._tokens: "OrderedDict[str, _CachedToken]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def decode(self, token: str) -> dict:
+        """jwt.decode with a cache; raises ExpiredSignatureError / InvalidTokenError on a miss."""
+        return self._entry(token).payload
+
+    def identify(self, token: str) -> Tuple[dict, Optional[str]]:
+        """Verified payload and the USERS_DB key its `sub` resolves to (None if unknown)."""
+        entry = self._entry(token)
+        if entry.users_version != self.users.version:
+            sub = entry.payload.get("sub")
+            entry.user_key = self.users.find(sub)[0] if sub else None
+            entry.users_version = self.users.version
+        return entry.payload, entry.user_key
+
+    def forget(self, tokens: Iterable[str] = ()) -> None:
+        """Drop the given tokens, or every cached token when none are given."""
+        tokens = list(tokens)
+        if not tokens:
+            self._tokens.clear()
+        for token in tokens:
+            self._tokens.pop(self._token_key(token), None)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "users": len(self.users), "tokens": len(self._tokens)}
+
+    def _entry(self, token: str) -> _CachedToken:
+        key = self._token_key(token)
+        now = self._clock()
+        entry = self._tokens.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._stats["hits"] += 1
+                self._tokens.move_to_end(key)
+                return entry
+            del self._tokens[key]
+
+        self._stats["misses"] += 1
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        entry = _CachedToken(payload, now + self.token_ttl)
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            entry.expires_at = min(entry.expires_at, float(exp))
+        if self.token_ttl > 0 and entry.expires_at > now:
+            self._tokens[key] = entry
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        # Cached entries are keyed by a digest, not the bearer token itself
+        return hashlib.sha256(token.encode()).hexdigest()
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_identity_cache: Optional[IdentityCache] = None
+
+
+def get_identity_cache() -> IdentityCache:
+    global _identity_cache
+    if _identity_cache is None:
+        _identity_cache = IdentityCache()
+    return _identity_cache
@@ -0,0 +1,479 @@
+"""
+Content-addressed cache for LLM chat completions.
+
+safe_llm_call, BaseAgent._call_llm, LLMClient.generate and the books
+router sent every prompt to OpenAI, so re-running an analysis for the same
+site, or a user pressing "regenerate", paid for an identical completion.
+
+  1. Key: sha256 over the normalized request — messages (NFC, unified
+     newlines, trailing whitespace stripped), model, temperature,
+     max_tokens, response_format and any other sampling parameters
+  2. Tiers: in-process LRU → Redis (shared, REDIS_URL) or, without Redis,
+     one JSON file per key under LLM_CACHE_DIR
+  3. TTL per label (LABEL_TTLS, overridden by LLM_CACHE_TTLS
+     "swot=604800,..."), LLM_CACHE_TTL otherwise; 0 turns caching off for
+     that label. The books router's generation labels default to 0, so a
+     regenerate gets a new answer
+  4. Single-flight: concurrent identical requests share one completion
+  5. Bypass: X-LLM-Cache: refresh (or Cache-Control: no-cache) skips the
+     read but stores the new answer; X-LLM-Cache: off (or no-store) skips
+     both. Code can do the same with `with llm_cache_mode("refresh"):`
+  6. Hit rates per label in stats() (/health) and the
+     llm_cache_requests_total metric
+
+Only complete answers are stored: empty content, truncated output
+(finish_reason "length"), streams, tool calls and n > 1 are never cached.
+A hit returns a response-shaped object (choices[0].message.content), so
+callers handle cached and fresh completions the same way.
+
+Usage:
+  response = await get_llm_cache().completion(
+      "swot", request, lambda: client.chat.completions.create(**request)
+  )
+  text = completion_text(response)
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+from app.config import (
+    LLM_CACHE_ALLOW_BYPASS,
+    LLM_CACHE_DIR,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL,
+    LLM_CACHE_TTLS,
+    REDIS_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_ASYNC_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_ASYNC_AVAILABLE = False
+
+try:
+    from agents.observability.metrics import get_metrics
+except ImportError:
+    get_metrics = None
+
+# Bump to orphan every stored answer (e.g. after a prompt-wide guardrail change)
+KEY_VERSION = "v1"
+KEY_PREFIX = f"llmcache:{KEY_VERSION}:"
+
+# Request fields that do not change the answer
+_IGNORED_FIELDS = {"timeout", "extra_headers", "extra_query", "user"}
+_RESULTS = ("hit_memory", "hit_redis", "hit_disk", "miss", "coalesced", "refresh", "skip")
+_HITS = ("hit_memory", "hit_redis", "hit_disk", "coalesced")
+
+MODES = ("use", "refresh", "off")
+_mode: ContextVar[str] = ContextVar("llm_cache_mode", default="use")
+
+Create = Callable[[], Awaitable[Any]]
+
+
+# ============================================================================
+# KEYS
+# ============================================================================
+
+def normalize_text(text: str) -> str:
+    """Same prompt, same text: NFC, \\n newlines, no trailing whitespace, single blank lines."""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cacheable(request: Mapping[str, Any]) -> bool:
+    """Requests whose answer is one message we can store and replay."""
+    if request.get("stream") or (request.get("n") or 1) > 1:
+        return False
+    return not any(request.get(field) for field in ("tools", "functions"))
+
+
+def cache_key(request: Mapping[str, Any]) -> str:
+    """Content address of a chat completion request."""
+    fields = {k: v for k, v in request.items() if k not in _IGNORED_FIELDS and v is not None}
+    fields["messages"] = [
+        {k: _normalize(v) if k == "content" else v for k, v in message.items()}
+        for message in request.get("messages") or []
+    ]
+    if "temperature" in fields:
+        fields["temperature"] = round(float(fields["temperature"]), 4)
+    canonical = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return KEY_PREFIX + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# Built-in per-label TTLs; LLM_CACHE_TTLS entries take precedence
+LABEL_TTLS: Dict[str, int] = {
+    "books": 0,
+    "books_receipt": 0,
+    "books_account": 0,
+}
+
+
+def parse_ttls(spec: str) -> Dict[str, int]:
+    """'swot=604800,books_receipt=0' → {'swot': 604800, 'books_receipt': 0}."""
+    ttls: Dict[str, int] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        label, _, seconds = item.partition("=")
+        try:
+            ttls[label.strip()] = max(0, int(seconds))
+        except ValueError:
+            logger.warning("[llm_cache] Ignoring bad LLM_CACHE_TTLS entry %r", item)
+    return ttls
+
+
+# ============================================================================
+# RESPONSES
+# ============================================================================
+
+def completion_text(response: Any) -> Optional[str]:
+    """choices[0].message.content, or None for an empty/failed response."""
+    try:
+        return response.choices[0].message.content
+    except (AttributeError, IndexError, TypeError):
+        return None
+
+
+def _finish_reason(response: Any) -> Optional[str]:
+    try:
+        return response.choices[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return None
+
+
+def cached_completion(text: str, model: Optional[str] = None) -> SimpleNamespace:
+    """A chat completion-shaped object for a cached answer (no tokens used)."""
+    message = SimpleNamespace(role="assistant", content=text, tool_calls=None)
+    return SimpleNamespace(
+        id="cached",
+        model=model,
+        cached=True,
+        choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+        usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0, total_tokens=0),
+    )
+
+
+# ============================================================================
+# BYPASS
+# ============================================================================
+
+def mode_from_headers(headers: Mapping[str, str]) -> str:
+    """Cache mode requested by a client ("use" unless it asked otherwise)."""
+    if not LLM_CACHE_ALLOW_BYPASS:
+        return "use"
+    explicit = (headers.get("x-llm-cache") or "").strip().lower()
+    if explicit in ("off", "no-store"):
+        return "off"
+    if explicit in ("refresh", "bypass", "no-cache"):
+        return "refresh"
+    directives = (headers.get("cache-control") or "").lower()
+    if "no-store" in directives:
+        return "off"
+    if "no-cache" in directives:
+        return "refresh"
+    return "use"
+
+
+@contextlib.contextmanager
+def llm_cache_mode(mode: str) -> Iterator[None]:
+    """Run a block with the cache in another mode ("use", "refresh", "off")."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM cache mode: {mode}")
+    token = _mode.set(mode)
+    try:
+        yield
+    finally:
+        _mode.reset(token)
+
+
+def current_mode() -> str:
+    return _mode.get()
+
+
+class LLMCacheModeMiddleware:
+    """ASGI middleware: applies the request's X-LLM-Cache / Cache-Control to LLM calls it makes."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            headers = {
+                k.decode("latin-1").lower(): v.decode("latin-1")
+                for k, v in scope.get("headers") or []
+            }
+            mode = mode_from_headers(headers)
+            if mode != "use":
+                with llm_cache_mode(mode):
+                    await self.app(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class LLMCache:
+    """In-process LRU in front of Redis (or disk), keyed by request content."""
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        default_ttl: int = LLM_CACHE_TTL,
+        ttls: Optional[Dict[str, int]] = None,
+        redis_url: Optional[str] = REDIS_URL,
+        cache_dir: Optional[str] = LLM_CACHE_DIR,
+        enabled: bool = LLM_CACHE_ENABLED,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self.ttls = {**LABEL_TTLS, **parse_ttls(LLM_CACHE_TTLS)} if ttls is None else ttls
+        self.enabled = enabled
+        self._redis_url = redis_url if REDIS_ASYNC_AVAILABLE else None
+        self._redis = None
+        self._dir = Path(cache_dir) if cache_dir and not self._redis_url else None
+        self._clock = clock
+        # key → (expires_at epoch seconds, text); order = recency
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._labels: Dict[str, Dict[str, int]] = {}
+        self._errors = {"redis_errors": 0, "disk_errors": 0}
+
+    @property
+    def tier(self) -> str:
+        if self._redis_url:
+            return "redis"
+        return "disk" if self._dir is not None else "memory"
+
+    def ttl_for(self, label: str) -> int:
+        return self.ttls.get(label, self.default_ttl)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def completion(self, label: str, request: Mapping[str, Any], create: Create) -> Any:
+        """
+        Return a chat completion for request, calling create() only on a miss.
+
+        create() performs the real request (semaphores, retries and timeouts
+        stay with the caller) and may return None on failure; failures and
+        incomplete answers are never stored. Concurrent identical requests
+        wait for the first one.
+        """
+        mode = _mode.get()
+        ttl = self.ttl_for(label)
+        if not self.enabled or mode == "off" or ttl <= 0 or not cacheable(request):
+            self._count(label, "skip")
+            return await create()
+
+        key = cache_key(request)
+        if mode == "use":
+            hit = await self._read(key)
+            if hit is not None:
+                text, tier = hit
+                self._count(label, tier)
+                return cached_completion(text, request.get("model"))
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._count(label, "coalesced")
+                return await asyncio.shield(flight)
+            self._count(label, "miss")
+        else:
+            self._count(label, "refresh")
+
+        flight = asyncio.create_task(self._fill(key, ttl, create))
+        if mode == "use":
+            self._inflight[key] = flight
+            flight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded: a caller that gives up does not waste the paid-for answer
+        return await asyncio.shield(flight)
+
+    def clear(self) -> None:
+        """Drop the in-process tier (Redis/disk entries expire on their own)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        labels = {label: {**counts, "hit_rate": _hit_rate(counts)} for label, counts in self._labels.items()}
+        totals = {result: sum(c[result] for c in self._labels.values()) for result in _RESULTS}
+        return {
+            "enabled": self.enabled,
+            "tier": self.tier,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hit_rate": _hit_rate(totals),
+            **totals,
+            **self._errors,
+            "labels": labels,
+        }
+
+    async def close(self) -> None:
+        if self._inflight:
+            await asyncio.gather(*self._inflight.values(), return_exceptions=True)
+        if self._redis is not None:
+            try:
+                await self._redis.aclose()
+            except Exception:
+                pass
+            self._redis = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _fill(self, key: str, ttl: int, create: Create) -> Any:
+        response = await create()
+        text = completion_text(response)
+        if text and text.strip() and _finish_reason(response) in (None, "stop"):
+            await self._write(key, text, ttl)
+        return response
+
+    async def _read(self, key: str) -> Optional[Tuple[str, str]]:
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1], "hit_memory"
+            del self._entries[key]
+
+        if self.tier == "memory":
+            return None
+        if self.tier == "redis":
+            raw = await self._redis_get(key)
+        else:
+            raw = await asyncio.to_thread(self._disk_get, key)
+        if not raw:
+            return None
+        try:
+            envelope = json.loads(raw)
+            expires_at, text = float(envelope["expires_at"]), envelope["text"]
+        except (ValueError, KeyError, TypeError):
+            return None
+        if expires_at <= now:
+            return None
+        self._remember(key, expires_at, text)
+        return text, f"hit_{self.tier}"
+
+    async def _write(self, key: str, text: str, ttl: int) -> None:
+        expires_at = self._clock() + ttl
+        self._remember(key, expires_at, text)
+        envelope = json.dumps({"expires_at": expires_at, "text": text}, ensure_ascii=False)
+        if self.tier == "redis":
+            client = self._client()
+            try:
+                await client.setex(key, ttl, envelope)
+            except Exception as e:
+                self._errors["redis_errors"] += 1
+                logger.warning("[llm_cache] Redis set error: %s", e)
+        elif self.tier == "disk":
+            await asyncio.to_thread(self._disk_put, key, envelope)
+
+    def _remember(self, key: str, expires_at: float, text: str) -> None:
+        self._entries[key] = (expires_at, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _redis_get(self, key: str) -> Optional[str]:
+        try:
+            return await self._client().get(key)
+        except Exception as e:
+            self._errors["redis_errors"] += 1
+            logger.warning("[llm_cache] Redis get error: %s", e)
+            return None
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = aioredis.from_url(self._redis_url, decode_responses=True)
+        return self._redis
+
+    def _path(self, key: str) -> Path:
+        digest = key[len(KEY_PREFIX):]
+        return self._dir / KEY_VERSION / digest[:2] / f"{digest}.json"
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            return path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            self._errors["disk_errors"] += 1
+            logger.warning("[llm_cache] Disk read error for %s: %s", path, e)
+            return None
+
+    def _disk_put(self, key: str, envelope: str) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename: readers in other workers never see half a file
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(envelope, encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            self._errors["disk_errors"] += 1
+            logger.warning("[llm_cache] Disk write error for %s: %s", path, e)
+
+    def _count(self, label: str, result: str) -> None:
+        counts = self._labels.get(label)
+        if counts is None:
+            counts = self._labels[label] = dict.fromkeys(_RESULTS, 0)
+        counts[result] += 1
+        if get_metrics is not None:
+            get_metrics().record_llm_cache_lookup(label, result)
+
+
+def _hit_rate(counts: Mapping[str, int]) -> float:
+    lookups = sum(counts[r] for r in _HITS) + counts["miss"]
+    return round(sum(counts[r] for r in _HITS) / lookups, 3) if lookups else 0.0
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_llm_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMCache()
+    return _llm_cache
+
+
+async def close_llm_cache() -> None:
+    global _llm_cache
+    if _llm_cache is not None:
+        await _llm_cache.close()
+        _llm_cache = None
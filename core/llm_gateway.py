@@ -0,0 +1,501 @@
+"""
+One gateway for every OpenAI chat completion in the process.
+
+LLM concurrency used to be fixed and fragmented: _LLM_SEMAPHORE(5) in
+main.py, RunLimits.llm_concurrency per run, a per-call semaphore in
+generate_full_ai_insights and retry loops that string-matched "429". No
+two of them knew about each other, so a burst of scheduled runs could fill
+the account's rate limit while a user waited on chat.
+
+  1. Adaptive concurrency (AIMD): the in-flight limit grows by one after a
+     window of fast successes and is cut in half on a 429 (by 10% when a
+     completion takes longer than LLM_GATEWAY_LATENCY_TARGET); at most one
+     cut per cooldown, so one burst of 429s counts once
+  2. Priority lanes: "interactive" (chat, /ai-analyze, anything in a
+     request) always gets the next free slot; "background" (scheduled
+     analysis, agent schedules, discovery) may hold at most
+     LLM_GATEWAY_BACKGROUND_SHARE of the limit
+  3. Token budget: LLM_GATEWAY_TPM tokens per minute, reserved up front
+     from prompt size + max_tokens and settled from response usage (a
+     timeout keeps the whole reservation, other failures refund it). The
+     bucket (like the Retry-After pause) is per process: with N uvicorn
+     workers set it to the account limit divided by N
+  4. Retry-After: a 429/503 that carries one pauses every call through the
+     gateway until it passes; other retryable failures back off per call
+  5. Retries live here (429, 5xx, timeouts, connection errors); the OpenAI
+     client's own retries are switched off so every attempt is counted
+
+Lane selection is a context variable: requests run "interactive", and
+background jobs wrap their loop in `with llm_lane("background"):` (tasks
+they create inherit it).
+
+Usage:
+  response = await get_llm_gateway().chat(
+      openai_client, label="swot", model=..., messages=[...], max_tokens=800
+  )
+
+Load testing: scripts/fake_openai_server.py serves a rate-limited
+/v1/chat/completions; scripts/bench_llm_gateway.py drives mixed lanes
+through the gateway against it.
+"""
+
+import asyncio
+import contextlib
+import logging
+import random
+import time
+import weakref
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, Mapping, Optional
+
+from app.config import (
+    LLM_GATEWAY_BACKGROUND_SHARE,
+    LLM_GATEWAY_INITIAL_CONCURRENCY,
+    LLM_GATEWAY_LATENCY_TARGET,
+    LLM_GATEWAY_MAX_CONCURRENCY,
+    LLM_GATEWAY_MAX_RETRIES,
+    LLM_GATEWAY_MIN_CONCURRENCY,
+    LLM_GATEWAY_TIMEOUT,
+    LLM_GATEWAY_TPM,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    from agents.observability.metrics import get_metrics
+except ImportError:
+    get_metrics = None
+
+LANES = ("interactive", "background")
+_lane: ContextVar[str] = ContextVar("llm_lane", default="interactive")
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+@contextlib.contextmanager
+def llm_lane(lane: str) -> Iterator[None]:
+    """Run a block (and the tasks it starts) in another gateway lane."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane: {lane}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+# ============================================================================
+# ERRORS
+# ============================================================================
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After / retry-after-ms header on an API error, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        if headers.get("retry-after"):
+            return max(0.0, float(headers["retry-after"]))
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def _classify(error: BaseException) -> str:
+    """'rate_limited', 'timeout', 'retryable' or 'fatal'."""
+    if isinstance(error, asyncio.TimeoutError) or type(error).__name__ == "APITimeoutError":
+        return "timeout"
+    status = _status_code(error)
+    if status == 429:
+        # Quota exhaustion is not congestion: retrying only burns time
+        body = getattr(error, "body", None)
+        code = getattr(error, "code", None) or (body.get("code") if isinstance(body, dict) else None)
+        return "fatal" if code == "insufficient_quota" else "rate_limited"
+    if status in _RETRYABLE_STATUS:
+        return "retryable"
+    if status is None and (isinstance(error, OSError) or type(error).__name__ == "APIConnectionError"):
+        return "retryable"
+    return "fatal"
+
+
+# ============================================================================
+# AIMD LIMIT + TOKEN BUDGET
+# ============================================================================
+
+class AIMDLimit:
+    """Additive-increase / multiplicative-decrease concurrency limit."""
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 64,
+        latency_target: float = 30.0,
+        backoff: float = 0.5,
+        latency_backoff: float = 0.9,
+        cooldown: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.value = float(min(self.maximum, max(self.minimum, initial)))
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.latency_backoff = latency_backoff
+        self.cooldown = cooldown
+        self._clock = clock
+        self._successes = 0
+        self._last_decrease = float("-inf")
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self.value)
+
+    def on_success(self, latency: float) -> None:
+        if self.latency_target and latency > self.latency_target:
+            self._decrease(self.latency_backoff)
+            return
+        self._successes += 1
+        # +1 per window of `limit` successes ≈ +1 per round trip at full load
+        if self._successes >= self.limit and self.value < self.maximum:
+            self.value = min(self.maximum, self.value + 1)
+            self._successes = 0
+            self.increases += 1
+
+    def on_congestion(self) -> None:
+        self._decrease(self.backoff)
+
+    def _decrease(self, factor: float) -> None:
+        now = self._clock()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.value = max(self.minimum, self.value * factor)
+        self._successes = 0
+        self.decreases += 1
+
+
+class TokenBudget:
+    """Tokens-per-minute bucket: reserve an estimate, settle with real usage."""
+
+    def __init__(self, tokens_per_minute: int, clock: Callable[[], float] = time.monotonic):
+        self.capacity = max(0, tokens_per_minute)
+        self.rate = self.capacity / 60.0
+        self._clock = clock
+        self.tokens = float(self.capacity)
+        self._updated = clock()
+        self.waits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def reserve(self, tokens: int) -> int:
+        """Wait until `tokens` fit in the budget and take them; returns what was taken."""
+        if not self.enabled:
+            return 0
+        tokens = min(tokens, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return tokens
+            self.waits += 1
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Replace the reservation with the tokens the response actually used."""
+        if not self.enabled:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + reserved - used)
+
+
+def estimate_tokens(request: Mapping[str, Any]) -> int:
+    """Rough upper bound for a request: ~4 characters per prompt token + max_tokens."""
+    chars = 0
+    for message in request.get("messages") or []:
+        content = message.get("content")
+        chars += len(content) if isinstance(content, str) else len(str(content or ""))
+    return chars // 4 + 8 * len(request.get("messages") or []) + int(request.get("max_tokens") or 1000)
+
+
+# ============================================================================
+# GATEWAY
+# ============================================================================
+
+class LLMGateway:
+    """Adaptive, lane-aware admission for chat completions."""
+
+    def __init__(
+        self,
+        initial_concurrency: int = LLM_GATEWAY_INITIAL_CONCURRENCY,
+        min_concurrency: int = LLM_GATEWAY_MIN_CONCURRENCY,
+        max_concurrency: int = LLM_GATEWAY_MAX_CONCURRENCY,
+        background_share: float = LLM_GATEWAY_BACKGROUND_SHARE,
+        latency_target: float = LLM_GATEWAY_LATENCY_TARGET,
+        tokens_per_minute: int = LLM_GATEWAY_TPM,
+        max_retries: int = LLM_GATEWAY_MAX_RETRIES,
+        timeout: float = LLM_GATEWAY_TIMEOUT,
+        backoff_base: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.aimd = AIMDLimit(initial_concurrency, min_concurrency, max_concurrency,
+                              latency_target=latency_target, clock=clock)
+        self.budget = TokenBudget(tokens_per_minute, clock=clock)
+        self.background_share = min(1.0, max(0.0, background_share))
+        self.max_retries = max(0, max_retries)
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self._clock = clock
+        self._active: Dict[str, int] = dict.fromkeys(LANES, 0)
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._paused_until = 0.0
+        self._clients: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+        self._stats = {
+            "calls": 0,
+            "ok": 0,
+            "errors": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "pauses": 0,
+            "tokens": 0,
+        }
+        self._lane_stats = {lane: {"calls": 0, "wait_seconds": 0.0, "peak_waiting": 0} for lane in LANES}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def chat(
+        self,
+        client: Any,
+        *,
+        label: str = "llm",
+        lane: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **request: Any,
+    ) -> Any:
+        """
+        client.chat.completions.create(**request) under the gateway's limits.
+
+        Retries congestion and transient failures, honouring Retry-After;
+        the last error is raised once retries run out (fatal errors at once).
+        """
+        lane = lane or _lane.get()
+        if lane not in LANES:
+            raise ValueError(f"Unknown LLM lane: {lane}")
+        create = self._create_for(client)
+        model = str(request.get("model") or "")
+        self._stats["calls"] += 1
+        self._lane_stats[lane]["calls"] += 1
+
+        attempt = 0
+        while True:
+            # Budget and Retry-After waits happen before a slot is taken, so
+            # a call held back by them does not block the ones behind it
+            await self._wait_pause()
+            reserved = await self.budget.reserve(estimate_tokens(request))
+            try:
+                waited = await self._acquire(lane)
+            except BaseException:
+                self.budget.settle(reserved, 0)
+                raise
+            try:
+                started = self._clock()
+                try:
+                    response = await asyncio.wait_for(create(**request), timeout or self.timeout)
+                except Exception as e:
+                    kind = _classify(e)
+                    # A timed-out request may still run (and bill) upstream
+                    self.budget.settle(reserved, reserved if kind == "timeout" else 0)
+                    self._on_failure(kind, e)
+                    self._record(lane, label, model, kind, waited, self._clock() - started)
+                    if kind == "fatal" or attempt >= self.max_retries:
+                        self._stats["errors"] += 1
+                        raise
+                    delay = self._backoff(attempt, e)
+                else:
+                    latency = self._clock() - started
+                    usage = getattr(response, "usage", None)
+                    used = getattr(usage, "total_tokens", None) or reserved
+                    self.budget.settle(reserved, used)
+                    self.aimd.on_success(latency)
+                    self._stats["ok"] += 1
+                    self._stats["tokens"] += used
+                    self._record(lane, label, model, "ok", waited, latency, usage)
+                    return response
+            finally:
+                self._release(lane)
+
+            attempt += 1
+            self._stats["retries"] += 1
+            logger.info("[llm_gateway] %s retry %d/%d in %.1fs", label, attempt, self.max_retries, delay)
+            await asyncio.sleep(delay)
+
+    @property
+    def limit(self) -> int:
+        return self.aimd.limit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "limit": self.limit,
+            "limit_increases": self.aimd.increases,
+            "limit_decreases": self.aimd.decreases,
+            "background_limit": self._background_limit(),
+            "active": dict(self._active),
+            "waiting": {lane: len(q) for lane, q in self._waiters.items()},
+            "paused_for": round(max(0.0, self._paused_until - self._clock()), 2),
+            "tpm": self.budget.capacity,
+            "tpm_available": int(self.budget.tokens) if self.budget.enabled else None,
+            "tpm_waits": self.budget.waits,
+            "lanes": {
+                lane: {**s, "wait_seconds": round(s["wait_seconds"], 3)} for lane, s in self._lane_stats.items()
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def _background_limit(self) -> int:
+        return max(1, int(self.limit * self.background_share))
+
+    def _can_start(self, lane: str) -> bool:
+        if sum(self._active.values()) >= self.limit:
+            return False
+        return lane == "interactive" or self._active["background"] < self._background_limit()
+
+    async def _acquire(self, lane: str) -> float:
+        """Take a slot in lane (interactive first); returns seconds waited."""
+        queued_ahead = self._waiters["interactive"] or (lane == "background" and self._waiters["background"])
+        if not queued_ahead and self._can_start(lane):
+            self._active[lane] += 1
+            return 0.0
+
+        started = self._clock()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        stats = self._lane_stats[lane]
+        stats["peak_waiting"] = max(stats["peak_waiting"], len(self._waiters[lane]))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(lane)  # granted just as the caller gave up
+            else:
+                with contextlib.suppress(ValueError):
+                    self._waiters[lane].remove(future)
+            raise
+        waited = self._clock() - started
+        stats["wait_seconds"] += waited
+        return waited
+
+    def _release(self, lane: str) -> None:
+        self._active[lane] -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        for lane in LANES:
+            queue = self._waiters[lane]
+            while queue and self._can_start(lane):
+                future = queue.popleft()
+                if future.done():
+                    continue
+                self._active[lane] += 1
+                future.set_result(None)
+
+    # ------------------------------------------------------------------
+    # Failures, pauses, retries
+    # ------------------------------------------------------------------
+
+    def _on_failure(self, kind: str, error: BaseException) -> None:
+        if kind == "rate_limited":
+            self._stats["rate_limited"] += 1
+            self.aimd.on_congestion()
+        elif kind == "timeout":
+            self._stats["timeouts"] += 1
+            self.aimd.on_congestion()
+        pause = retry_after(error) if kind in ("rate_limited", "retryable") else None
+        if pause:
+            until = self._clock() + pause
+            if until > self._paused_until:
+                self._paused_until = until
+                self._stats["pauses"] += 1
+                logger.warning("[llm_gateway] Provider asked to retry after %.1fs; pausing all calls", pause)
+        self._wake()
+
+    async def _wait_pause(self) -> None:
+        while True:
+            delay = self._paused_until - self._clock()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        if retry_after(error):
+            return 0.0  # the global pause already covers it
+        # Full jitter so retried callers do not come back in lockstep
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def _create_for(self, client: Any) -> Callable[..., Any]:
+        """client.chat.completions.create with the SDK's own retries disabled."""
+        try:
+            derived = self._clients.get(client)
+        except TypeError:
+            derived = None
+        if derived is None:
+            with_options = getattr(client, "with_options", None)
+            derived = with_options(max_retries=0) if callable(with_options) else client
+            with contextlib.suppress(TypeError):
+                self._clients[client] = derived
+        return derived.chat.completions.create
+
+    def _record(self, lane: str, label: str, model: str, result: str, waited: float,
+                seconds: float, usage: Any = None) -> None:
+        if get_metrics is None:
+            return
+        metrics = get_metrics()
+        metrics.record_llm_gateway_call(lane, result, waited, self.limit)
+        metrics.record_llm_request(
+            label, model, "success" if result == "ok" else result, seconds,
+            input_tokens=getattr(usage, "prompt_tokens", None),
+            output_tokens=getattr(usage, "completion_tokens", None),
+        )
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_llm_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway()
+    return _llm_gateway
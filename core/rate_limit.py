@@ -0,0 +1,370 @@
+"""
+Request rate limiting (GCRA) with optional Redis backing.
+
+Replaces the defaultdict(list) of request timestamps in main.py's
+rate_limit_middleware, which rebuilt a client's whole list on every request,
+never forgot an IP, and let every worker enforce its own limit.
+
+  1. GCRA (generic cell rate algorithm): the state per key is a single
+     number, the "theoretical arrival time"; a check is O(1)
+  2. Idle keys are evicted: once a key's TAT is in the past it is
+     indistinguishable from a new key, so it can be dropped. The in-process
+     backend sweeps those lazily and caps the total (RATE_LIMIT_MAX_KEYS)
+  3. Per-user and per-route limits: authenticated requests are keyed by the
+     token's subject (RATE_LIMIT_USER_PER_MINUTE), anonymous ones by client
+     IP; RATE_LIMIT_ROUTES gives path prefixes their own limit and bucket
+  4. RATE_LIMIT_BACKEND=redis runs the same algorithm as one Lua script on
+     Redis (server clock, key TTL = time until idle), so a limit holds
+     across workers. On Redis errors the in-process backend takes over, and
+     stays in charge for RATE_LIMIT_REDIS_COOLDOWN seconds, so an outage
+     costs one short socket timeout (RATE_LIMIT_REDIS_TIMEOUT) per cooldown
+     rather than one per request
+
+Usage:
+  limiter = get_rate_limiter()
+  result = await limiter.hit(identity="ip:1.2.3.4", path=request.url.path)
+  if not result.allowed:
+      ...  # 429, Retry-After: result.retry_after
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from app.config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_PER_MINUTE,
+    RATE_LIMIT_REDIS_COOLDOWN,
+    RATE_LIMIT_REDIS_TIMEOUT,
+    RATE_LIMIT_ROUTES,
+    RATE_LIMIT_USER_PER_MINUTE,
+    REDIS_URL,
+)
+from core.identity_cache import get_identity_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_ASYNC_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_ASYNC_AVAILABLE = False
+
+try:
+    from agents.observability.metrics import get_metrics
+except ImportError:
+    get_metrics = None
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`requests` per `period` seconds, allowing bursts of up to `burst` requests."""
+
+    requests: int
+    period: float = 60.0
+    burst: Optional[int] = None
+
+    @property
+    def interval(self) -> float:
+        """Seconds of capacity one request uses."""
+        return self.period / max(1, self.requests)
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.burst or self.requests)
+
+    @classmethod
+    def parse(cls, spec: str, burst: Optional[int] = None) -> "RateLimit":
+        """'30' (per minute), '30/60' or '30/10s' → RateLimit."""
+        spec = spec.strip()
+        requests, _, period = spec.partition("/")
+        period = period.strip().rstrip("s") or "60"
+        return cls(requests=int(requests), period=float(period), burst=burst)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until the request would be allowed (0 if allowed)
+    reset_after: float  # seconds until the bucket is full again
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def gcra(tat: Optional[float], now: float, limit: RateLimit, cost: int = 1) -> Tuple[RateLimitResult, Optional[float]]:
+    """
+    One GCRA decision. Returns the result and the new TAT to store
+    (None when the request is denied and nothing changes).
+    """
+    interval = limit.interval
+    burst_window = interval * limit.capacity
+    tat = max(tat or now, now)
+    new_tat = tat + interval * cost
+    allow_at = new_tat - burst_window
+
+    if now < allow_at:
+        return RateLimitResult(
+            allowed=False,
+            limit=limit.capacity,
+            remaining=0,
+            retry_after=allow_at - now,
+            reset_after=tat - now,
+        ), None
+
+    return RateLimitResult(
+        allowed=True,
+        limit=limit.capacity,
+        remaining=int((burst_window - (new_tat - now)) / interval + 1e-9),
+        retry_after=0.0,
+        reset_after=new_tat - now,
+    ), new_tat
+
+
+class MemoryRateLimitBackend:
+    """Per-process GCRA state: key → TAT, in least-recently-hit order."""
+
+    SWEEP_PER_HIT = 8
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max(1, max_keys)
+        self._clock = clock
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    async def hit(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        now = self._clock()
+        self._sweep(now)
+        result, new_tat = gcra(self._tats.get(key), now, limit, cost)
+        if new_tat is not None:
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+                self.evicted += 1
+        return result
+
+    def _sweep(self, now: float) -> None:
+        # Oldest-hit keys come first; drop the ones that have gone idle
+        for _ in range(self.SWEEP_PER_HIT):
+            if not self._tats:
+                return
+            key, tat = next(iter(self._tats.items()))
+            if tat > now:
+                return
+            del self._tats[key]
+            self.evicted += 1
+
+
+# KEYS: bucket
+# ARGV: interval (ms), capacity, cost
+# Returns {allowed, remaining, retry_after_ms, reset_after_ms}
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local interval = tonumber(ARGV[1])
+local burst_window = interval * tonumber(ARGV[2])
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval * tonumber(ARGV[3])
+local allow_at = new_tat - burst_window
+
+if now < allow_at then
+    return {0, 0, math.ceil(allow_at - now), math.ceil(tat - now)}
+end
+
+local ttl = math.ceil(new_tat - now)
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', ttl)
+return {1, math.floor((burst_window - (new_tat - now)) / interval + 1e-9), 0, ttl}
+"""
+
+
+class RedisRateLimitBackend:
+    """GCRA in one Lua call per request; state shared by every worker."""
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL, prefix: str = "ratelimit:",
+                 fallback: Optional[MemoryRateLimitBackend] = None,
+                 timeout: float = RATE_LIMIT_REDIS_TIMEOUT, cooldown: float = RATE_LIMIT_REDIS_COOLDOWN,
+                 clock: Callable[[], float] = time.monotonic):
+        self._redis_url = redis_url
+        self._redis = None
+        self._script = None
+        self.prefix = prefix
+        self.fallback = fallback or MemoryRateLimitBackend()
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self._clock = clock
+        # Redis is skipped until then, after a failure
+        self._down_until = 0.0
+        self.errors = 0
+        self.skipped = 0
+
+    async def hit(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        script = self._get_script()
+        if script is None:
+            return await self.fallback.hit(key, limit, cost)
+        if self._clock() < self._down_until:
+            self.skipped += 1
+            return await self.fallback.hit(key, limit, cost)
+        try:
+            allowed, remaining, retry_ms, reset_ms = await script(
+                keys=[self.prefix + key],
+                args=[limit.interval * 1000, limit.capacity, cost],
+            )
+        except Exception as e:
+            self.errors += 1
+            self._down_until = self._clock() + self.cooldown
+            logger.warning("[rate_limit] Redis error, limiting in-process for %.0fs: %s", self.cooldown, e)
+            return await self.fallback.hit(key, limit, cost)
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=limit.capacity,
+            remaining=int(remaining),
+            retry_after=int(retry_ms) / 1000,
+            reset_after=int(reset_ms) / 1000,
+        )
+
+    def _get_script(self):
+        if self._script is None and self._redis_url and REDIS_ASYNC_AVAILABLE:
+            # Short timeouts: an unreachable Redis must not stall requests
+            self._redis = aioredis.from_url(
+                self._redis_url,
+                decode_responses=True,
+                socket_connect_timeout=self.timeout,
+                socket_timeout=self.timeout,
+            )
+            # redis-py sends EVALSHA and reloads the script on NOSCRIPT
+            self._script = self._redis.register_script(GCRA_SCRIPT)
+        return self._script
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            try:
+                await self._redis.aclose()
+            except Exception:
+                pass
+            self._redis = None
+            self._script = None
+
+
+class RateLimiter:
+    """Picks the limit and bucket for a request and asks the backend."""
+
+    def __init__(
+        self,
+        default: RateLimit,
+        user_limit: Optional[RateLimit] = None,
+        routes: Optional[Dict[str, RateLimit]] = None,
+        backend=None,
+    ):
+        self.default = default
+        self.user_limit = user_limit or default
+        # Longest prefix first, so the most specific route wins
+        self.routes = dict(sorted((routes or {}).items(), key=lambda kv: -len(kv[0])))
+        self.backend = backend or MemoryRateLimitBackend()
+        self._stats = {"allowed": 0, "limited": 0}
+
+    def rule_for(self, path: str, authenticated: bool = False) -> Tuple[str, RateLimit]:
+        for prefix, limit in self.routes.items():
+            if path.startswith(prefix):
+                return prefix, limit
+        return "*", self.user_limit if authenticated else self.default
+
+    async def hit(self, identity: str, path: str = "", cost: int = 1) -> RateLimitResult:
+        """Count one request from identity ('user:<sub>' or 'ip:<addr>') to path."""
+        scope, limit = self.rule_for(path, authenticated=identity.startswith("user:"))
+        result = await self.backend.hit(f"{identity}|{scope}", limit, cost)
+        outcome = "allowed" if result.allowed else "limited"
+        self._stats[outcome] += 1
+        if get_metrics is not None:
+            get_metrics().record_rate_limit(scope, outcome)
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        backend = self.backend
+        memory = getattr(backend, "fallback", backend)
+        return {
+            **self._stats,
+            "backend": "redis" if isinstance(backend, RedisRateLimitBackend) else "memory",
+            "keys": len(memory),
+            "evicted": memory.evicted,
+            "redis_errors": getattr(backend, "errors", 0),
+            "redis_skipped": getattr(backend, "skipped", 0),
+        }
+
+    async def close(self) -> None:
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            await close()
+
+
+def request_identity(client_ip: Optional[str], authorization: Optional[str] = None) -> str:
+    """'user:<sub>' for a valid bearer token, else 'ip:<client ip>'."""
+    if authorization and authorization.startswith("Bearer "):
+        try:
+            # Shares get_current_user's verified-token cache
+            payload = get_identity_cache().decode(authorization[7:])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except Exception:
+            pass  # invalid or expired: rate limit as anonymous
+    return f"ip:{client_ip or 'unknown'}"
+
+
+def parse_routes(spec: str) -> Dict[str, RateLimit]:
+    """'/api/v1/analyze=5/60,/api/v1/agents=20' → {prefix: RateLimit}."""
+    routes: Dict[str, RateLimit] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, _, limit = item.partition("=")
+        try:
+            routes[prefix.strip()] = RateLimit.parse(limit)
+        except ValueError:
+            logger.warning("[rate_limit] Ignoring bad RATE_LIMIT_ROUTES entry %r", item)
+    return routes
+
+
+# ============================================================================
+# SINGLETON
+# ============================================================================
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        burst = RATE_LIMIT_BURST or None
+        if RATE_LIMIT_BACKEND == "redis" and REDIS_URL:
+            backend = RedisRateLimitBackend(REDIS_URL)
+        else:
+            if RATE_LIMIT_BACKEND == "redis":
+                logger.warning("[rate_limit] RATE_LIMIT_BACKEND=redis but REDIS_URL is not set; limiting per worker")
+            backend = MemoryRateLimitBackend()
+        _rate_limiter = RateLimiter(
+            default=RateLimit(RATE_LIMIT_PER_MINUTE, 60.0, burst),
+            user_limit=RateLimit(RATE_LIMIT_USER_PER_MINUTE or RATE_LIMIT_PER_MINUTE, 60.0, burst),
+            routes=parse_routes(RATE_LIMIT_ROUTES),
+            backend=backend,
+        )
+    return _rate_limiter
@@ -27,6 +27,9 @@ from typing import Optional, Dict, List
 
 import asyncpg
 
+from core.db_pool import open_pool
+from core.llm_gateway import llm_lane
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,8 +51,8 @@ class AgentScheduler:
         from core.alerts import AlertService
 
         clean_url = database_url.replace("postgresql+asyncpg://", "postgresql://")
-        self.pool = await asyncpg.create_pool(
-            clean_url, min_size=1, max_size=3, command_timeout=60
+        self.pool = await open_pool(
+            "scheduler", clean_url, min_size=1, max_size=3, command_timeout=60
         )
         self.alert_service = alert_service
         logger.info("✅ AgentScheduler initialized")
@@ -86,18 +89,20 @@ class AgentScheduler:
         await asyncio.sleep(10)
         logger.info("🔄 AgentScheduler loop started")
 
-        while self._running:
-            try:
-                await self._process_due_schedules()
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"[Scheduler] Error in loop: {e}", exc_info=True)
-
-            try:
-                await asyncio.sleep(self._check_interval)
-            except asyncio.CancelledError:
-                break
+        # Agent runs started from here inherit the background LLM lane
+        with llm_lane("background"):
+            while self._running:
+                try:
+                    await self._process_due_schedules()
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"[Scheduler] Error in loop: {e}", exc_info=True)
+
+                try:
+                    await asyncio.sleep(self._check_interval)
+                except asyncio.CancelledError:
+                    break
 
     async def _process_due_schedules(self):
         """Find and execute all due scheduled agent runs."""
@@ -0,0 +1,219 @@
+"""
+Small dependency-graph runner for the stages of one analysis.
+
+_run_comprehensive_analysis used to await every analyzer one after another,
+although most of them only need the parsed page. Stages are now declared
+with their dependencies and each starts as soon as its inputs are ready:
+
+- mode="async": awaited on the event loop (network stages, LLM calls)
+- mode="thread": CPU-bound work on a small dedicated thread pool, so the
+  loop keeps serving other requests while a large page is scored
+- mode="process": CPU-bound work in the process pool (core/cpu_pool.py);
+  func and its inputs must be picklable. Runs on the thread pool when the
+  process pool is not available.
+- optional stages may fail; dependents then receive None
+- every stage reports wait time (ready → started) and run time
+
+Usage:
+  graph = StageGraph()
+  graph.add("parse", lambda: page.soup, mode="thread")
+  graph.add("content", analyze_content_quality_sync, deps=("parse",), mode="thread")
+  graph.add("sitemap", lambda: check_sitemap_exists(url), optional=True)
+  results = await graph.run()
+  graph.timings()  # {"content": {"wait_ms": .., "run_ms": .., "status": ..}}
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import ANALYSIS_STAGE_THREADS
+from core.cpu_pool import get_cpu_pool
+
+logger = logging.getLogger(__name__)
+
+STAGE_MODES = ("async", "thread", "process")
+
+
+class StageGraphError(ValueError):
+    """The graph itself is invalid (unknown dependency, cycle, duplicate)."""
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+    mode: str = "async"
+    optional: bool = False
+    # Filled in by StageGraph.run()
+    status: str = "pending"
+    ready_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class _RunClock:
+    origin: float = field(default_factory=time.perf_counter)
+
+    def ms(self, t: Optional[float]) -> Optional[float]:
+        return round((t - self.origin) * 1000, 1) if t is not None else None
+
+
+def _call_in_thread(stage: Stage, args: List[Any]) -> Any:
+    """Run a stage in a worker thread; async callables get a private loop."""
+    stage.started_at = time.perf_counter()
+    value = stage.func(*args)
+    if inspect.isawaitable(value):
+        value = asyncio.run(_await(value))
+    return value
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+class StageGraph:
+    """Declare stages with dependencies, then run them with maximum overlap."""
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self._stages: Dict[str, Stage] = {}
+        self._executor = executor
+        self._clock: Optional[_RunClock] = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *,
+        deps: Tuple[str, ...] = (),
+        mode: str = "async",
+        optional: bool = False,
+    ) -> "StageGraph":
+        """
+        Register a stage. func receives the results of deps, positionally.
+
+        Dependencies must be added before the stages that use them, which
+        also rules out cycles.
+        """
+        if name in self._stages:
+            raise StageGraphError(f"Duplicate stage: {name}")
+        if mode not in STAGE_MODES:
+            raise StageGraphError(f"Unknown stage mode: {mode}")
+        missing = [d for d in deps if d not in self._stages]
+        if missing:
+            raise StageGraphError(f"Stage {name} depends on unknown stage(s): {missing}")
+        self._stages[name] = Stage(name=name, func=func, deps=tuple(deps), mode=mode, optional=optional)
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage; returns {stage name: result}. Required failures raise."""
+        self._clock = _RunClock()
+        tasks: Dict[str, asyncio.Task] = {}
+        for stage in self._stages.values():
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, tasks))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
+
+    def timings(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage wait/run times in ms, relative to the start of run()."""
+        if self._clock is None:
+            return {}
+        clock = self._clock
+        report: Dict[str, Dict[str, Any]] = {}
+        for stage in self._stages.values():
+            entry: Dict[str, Any] = {
+                "status": stage.status,
+                "mode": stage.mode,
+                "start_ms": clock.ms(stage.started_at),
+                "end_ms": clock.ms(stage.finished_at),
+            }
+            if stage.ready_at is not None and stage.started_at is not None:
+                entry["wait_ms"] = round((stage.started_at - stage.ready_at) * 1000, 1)
+            if stage.started_at is not None and stage.finished_at is not None:
+                entry["run_ms"] = round((stage.finished_at - stage.started_at) * 1000, 1)
+            if stage.error:
+                entry["error"] = stage.error
+            report[stage.name] = entry
+        return report
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _run_stage(self, stage: Stage, tasks: Dict[str, asyncio.Task]) -> Any:
+        args = []
+        for dep in stage.deps:
+            dep_result = await asyncio.shield(tasks[dep])
+            args.append(dep_result)
+        stage.ready_at = time.perf_counter()
+        stage.status = "running"
+        try:
+            if stage.mode == "thread":
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self._executor or get_stage_executor(), _call_in_thread, stage, args
+                )
+            elif stage.mode == "process":
+                stage.started_at = stage.ready_at
+                result = await get_cpu_pool().run(
+                    stage.func, *args, fallback=self._executor or get_stage_executor()
+                )
+            else:
+                stage.started_at = stage.ready_at
+                result = stage.func(*args)
+                if inspect.isawaitable(result):
+                    result = await result
+        except asyncio.CancelledError:
+            stage.status = "cancelled"
+            raise
+        except Exception as e:
+            stage.finished_at = time.perf_counter()
+            stage.error = f"{type(e).__name__}: {str(e)[:200]}"
+            if not stage.optional:
+                stage.status = "failed"
+                raise
+            stage.status = "skipped_error"
+            logger.warning("[stage_graph] optional stage %s failed: %s", stage.name, e)
+            return None
+        stage.finished_at = time.perf_counter()
+        stage.status = "done"
+        return result
+
+
+# ============================================================================
+# SINGLETON EXECUTOR
+# ============================================================================
+
+_stage_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Thread pool for CPU stages; separate from the loop's default executor (DNS)."""
+    global _stage_executor
+    if _stage_executor is None:
+        _stage_executor = ThreadPoolExecutor(
+            max_workers=max(1, ANALYSIS_STAGE_THREADS),
+            thread_name_prefix="analysis-stage",
+        )
+    return _stage_executor
+
+
+def shutdown_stage_executor() -> None:
+    global _stage_executor
+    if _stage_executor is not None:
+        _stage_executor.shutdown(wait=False, cancel_futures=True)
+        _stage_executor = None
@@ -33,7 +33,10 @@ async def run_in_db_thread(func, *args, **kwargs):
     )
 
 
-# Connection pool (lazy-initialised on first use)
+# Fallback psycopg2 pool (lazy-initialised on first use). Once the shared
+# asyncpg pool is running (core/db_pool.py, started in lifespan) connections
+# for calls made from worker threads come from there instead; this pool only
+# serves calls made before startup or directly on the event loop thread.
 _connection_pool: psycopg2.pool.ThreadedConnectionPool = None
 
 
@@ -44,9 +47,10 @@ def get_connection_pool() -> psycopg2.pool.ThreadedConnectionPool:
         if not db_url:
             return None
         try:
+            from core.db_pool import get_db_pool
             _connection_pool = psycopg2.pool.ThreadedConnectionPool(
-                minconn=2,
-                maxconn=10,
+                minconn=0,
+                maxconn=get_db_pool().budget_limit("legacy"),
                 dsn=db_url,
             )
         except Exception as e:
@@ -55,8 +59,25 @@ def get_connection_pool() -> psycopg2.pool.ThreadedConnectionPool:
     return _connection_pool
 
 
+def close_connection_pool():
+    """Close the fallback psycopg2 pool (called at shutdown)."""
+    global _connection_pool
+    if _connection_pool is not None and not _connection_pool.closed:
+        _connection_pool.closeall()
+    _connection_pool = None
+
+
 def connect_db():
     """Get a connection from the pool. Call release_connection() when done."""
+    from core.db_pool import get_db_pool
+    try:
+        conn = get_db_pool().sync_connection("legacy")
+    except Exception as e:
+        logger.error("[DB] Shared pool error: %s", e)
+        return None
+    if conn is not None:
+        return conn
+
     pool = get_connection_pool()
     if pool is None:
         return None
@@ -69,6 +90,10 @@ def connect_db():
 
 def release_connection(conn):
     """Return a connection to the pool. Must be called in finally blocks."""
+    from core.db_pool import SyncConnection
+    if isinstance(conn, SyncConnection):
+        conn.close()
+        return
     pool = get_connection_pool()
     if pool and conn:
         pool.putconn(conn)
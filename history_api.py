@@ -92,8 +92,9 @@ async def get_db_pool():
         if not database_url:
             return None
         try:
-            import asyncpg
-            _pool = await asyncpg.create_pool(
+            from core.db_pool import open_pool
+            _pool = await open_pool(
+                "history",
                 database_url,
                 min_size=1,
                 max_size=5,
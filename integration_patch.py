@@ -69,7 +69,7 @@ async def ai_analyze_comprehensive(
         
         # === URL VALIDATION ===
         url = clean_url(request.url)
-        _reject_ssrf(url)
+        await _reject_ssrf(url)
         
         # === PERFORM ANALYSIS ===
         result = await _perform_comprehensive_analysis_internal(
@@ -101,8 +101,6 @@ async def ai_analyze_comprehensive(
         if not history_db and user.role != "admin":
             user_search_counts[user.username] = user_search_counts.get(user.username, 0) + 1
         
-        background_tasks.add_task(cleanup_cache)
-        
         logger.info(
             f"✅ Analysis complete for {user.username}: {url} | "
             f"Score: {result['basic_analysis']['digital_maturity_score']}"
@@ -22,12 +22,11 @@ import time
 import socket
 import ipaddress
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
 from urllib.parse import urlparse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from collections import defaultdict
-from functools import lru_cache
+from functools import lru_cache, partial
 
 # ============================================================================
 # ENVIRONMENT SETUP (EARLY)
@@ -56,6 +55,26 @@ from bs4 import BeautifulSoup
 import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 
+from app.config import COMPETITOR_ANALYSIS_CONCURRENCY
+from core.analysis_cache import get_analysis_cache
+from core.cpu_pool import get_cpu_pool, shutdown_cpu_pool, start_cpu_pool
+from core.db_pool import close_db_pool, get_db_pool, start_db_pool
+from core.fanout import close_fanout_hub, get_fanout_hub
+from core.identity_cache import get_identity_cache
+from core.llm_cache import LLMCacheModeMiddleware, close_llm_cache, completion_text, get_llm_cache
+from core.llm_gateway import get_llm_gateway, llm_lane
+from core.rate_limit import get_rate_limiter, request_identity
+from core.stage_graph import StageGraph, shutdown_stage_executor
+from agents.content_fetch.browser_pool import block_heavy_resources, get_browser_pool
+from agents.content_fetch.http_client import (
+    close_http_client,
+    get_dns_cache,
+    outbound_client,
+    start_http_client,
+)
+from agents.content_fetch.ssrf_guard import SSRFError, check_url as check_ssrf_url
+from agents.content_fetch.parsed_page import ParsedPage
+from agents.content_fetch.scrape_budget import domain_key, get_scrape_budget, run_bounded
 from agents.scoring_constants import (
     DEFAULT_ANNUAL_REVENUE_EUR, CHATGPT_WEIGHTS, PERPLEXITY_WEIGHTS,
     SCORE_THRESHOLDS, factor_status, get_positioning_tier,
@@ -76,6 +95,7 @@ except ImportError:
 # ============================================================================
 from fastapi import FastAPI, HTTPException, Header, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
 from pydantic import BaseModel, Field
 
@@ -192,7 +212,9 @@ try:
         update_user_in_db,
         delete_user_from_db,
         sync_hardcoded_users_to_db,
-        get_user_preferences_from_db
+        get_user_preferences_from_db,
+        run_in_db_thread,
+        close_connection_pool
     )
     DATABASE_ENABLED = True
     logger.info("✅ Database module imported successfully")
@@ -209,6 +231,8 @@ except ImportError as e:
     def sync_hardcoded_users_to_db(users): pass
     def init_database(): pass
     def get_user_preferences_from_db(username): return None
+    async def run_in_db_thread(func, *args, **kwargs): return func(*args, **kwargs)
+    def close_connection_pool(): pass
 
 # ============================================================================
 # ANALYSIS HISTORY DATABASE
@@ -418,7 +442,7 @@ REDIS_URL = os.getenv("REDIS_URL")
 # ============================================================================
 
 # Global variables (single source of truth)
-analysis_cache: Dict[str, Dict[str, Any]] = {}
+analysis_cache = get_analysis_cache()  # LRU + async Redis, see core/analysis_cache.py
 user_search_counts: Dict[str, int] = {}
 magic_link_auth = None
 oauth = None
@@ -427,9 +451,6 @@ task_queue = None
 openai_client = None
 history_db = None  # Type hint added in imports if AnalysisHistoryDB available
 
-# Module-level semaphore — max 5 concurrent LLM calls (mirrors RunContext.limits.llm_concurrency)
-_LLM_SEMAPHORE = asyncio.Semaphore(5)
-
 # Hallucination guard — graceful import (module exists in agents/)
 try:
     from agents.hallucination_guard import (
@@ -454,12 +475,14 @@ async def safe_llm_call(
     temperature: float = 0.5,
     response_format: Optional[Dict[str, str]] = None,
     label: str = 'llm_call',
+    cache_label: Optional[str] = None,
 ) -> Optional[str]:
     """
     Wrap an OpenAI chat completion with anti-hallucination guardrails + post-validation.
 
     Returns the LLM-generated text content, or None if the call fails.
     Validation issues are logged but do not raise — the caller decides how to handle.
+    Identical requests are answered from the LLM cache under cache_label (default: label).
     """
     if not openai_client:
         logger.warning(f"[safe_llm_call:{label}] OpenAI client not available")
@@ -477,10 +500,12 @@ async def safe_llm_call(
     if response_format:
         kwargs["response_format"] = response_format
 
+    async def create():
+        return await get_llm_gateway().chat(openai_client, label=cache_label or label, **kwargs)
+
     try:
-        async with _LLM_SEMAPHORE:
-            response = await openai_client.chat.completions.create(**kwargs)
-        text = response.choices[0].message.content if response and response.choices else None
+        response = await get_llm_cache().completion(cache_label or label, kwargs, create)
+        text = completion_text(response)
     except Exception as e:
         logger.error(f"[safe_llm_call:{label}] LLM call failed: {e}", exc_info=False)
         return None
@@ -968,6 +993,16 @@ async def fetch_with_playwright(url: str, timeout: int = PLAYWRIGHT_TIMEOUT) ->
         return None
     
     try:
+        # Shared browser from the lifespan pool — fresh context per call
+        pool = get_browser_pool()
+        if pool.started:
+            async with pool.page(
+                user_agent=USER_AGENT,
+                viewport={'width': 1920, 'height': 1080},
+                block_resources=BLOCK_HEAVY_RESOURCES,
+            ) as page:
+                return await _playwright_snapshot(page, url, timeout)
+
         async with async_playwright() as p:
             browser = await p.chromium.launch(
                 headless=True,
@@ -984,65 +1019,73 @@ async def fetch_with_playwright(url: str, timeout: int = PLAYWRIGHT_TIMEOUT) ->
                 viewport={'width': 1920, 'height': 1080}
             )
             
-            # Set longer timeout for SPA loading
-            page.set_default_timeout(timeout)
-            
             try:
-                # Navigate and wait for content
-                response = await page.goto(url, wait_until=PLAYWRIGHT_WAIT_FOR, timeout=timeout)
-                
-                if not response or response.status != 200:
-                    await browser.close()
-                    return None
-                
-                # Wait a bit more for dynamic content
-                await page.wait_for_timeout(2000)
-                
-                # Get final HTML after JS rendering
-                html_content = await page.content()
-                
-                # Get some additional metrics
-                title = await page.title()
-                
-                await browser.close()
-                
-                return {
-                    'html': html_content,
-                    'title': title,
-                    'status': response.status,
-                    'console_errors': [],
-                    'rendering_method': 'playwright',
-                    'final_url': page.url
-                }
-                
-            except Exception as e:
+                # Same rendering (and cost) as the pooled path
+                if BLOCK_HEAVY_RESOURCES:
+                    await page.route("**/*", block_heavy_resources)
+                return await _playwright_snapshot(page, url, timeout)
+            finally:
                 await browser.close()
-                logger.error(f"Playwright page error for {url}: {e}")
-                return None
                 
     except Exception as e:
         logger.error(f"Playwright browser error for {url}: {e}")
         return None
 
+async def _playwright_snapshot(page, url: str, timeout: int) -> Optional[Dict[str, Any]]:
+    """Navigate an open Playwright page and capture the rendered HTML"""
+    # Set longer timeout for SPA loading
+    page.set_default_timeout(timeout)
+    
+    try:
+        # Navigate and wait for content
+        response = await page.goto(url, wait_until=PLAYWRIGHT_WAIT_FOR, timeout=timeout)
+        
+        if not response or response.status != 200:
+            return None
+        
+        # Wait for the network to settle instead of a fixed sleep
+        # (goto already waited for it when PLAYWRIGHT_WAIT_FOR == "networkidle")
+        if PLAYWRIGHT_WAIT_FOR != "networkidle":
+            try:
+                await page.wait_for_load_state("networkidle", timeout=2000)
+            except Exception:
+                pass
+        
+        # Get final HTML after JS rendering
+        html_content = await page.content()
+        
+        # Get some additional metrics
+        title = await page.title()
+        
+        return {
+            'html': html_content,
+            'title': title,
+            'status': response.status,
+            'console_errors': [],
+            'rendering_method': 'playwright',
+            'final_url': page.url
+        }
+        
+    except Exception as e:
+        logger.error(f"Playwright page error for {url}: {e}")
+        return None
+
 # ============================================================================
 # FETCH UTILITIES
 # ============================================================================
 
 async def fetch_url_with_retries(url: str, timeout: int = REQUEST_TIMEOUT, retries: int = MAX_RETRIES) -> Optional[httpx.Response]:
     """Enhanced HTTP fetching with retries"""
-    headers = {'User-Agent': USER_AGENT}
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+    }
     last_error = None
     
-    for attempt in range(retries):
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
-            }
-            async with httpx.AsyncClient(
-                timeout=timeout, follow_redirects=True, verify=True,
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-            ) as client:
-                response = await client.get(url, headers=headers)
+    # Retries reuse the pooled connection instead of reconnecting per attempt
+    async with outbound_client() as client:
+        for attempt in range(retries):
+            try:
+                response = await client.get(url, headers=headers, timeout=timeout)
                 
                 if response.status_code == 200:
                     return response
@@ -1059,18 +1102,18 @@ async def fetch_url_with_retries(url: str, timeout: int = REQUEST_TIMEOUT, retri
                     logger.warning(f"Failed to fetch {url}: Status {response.status_code}")
                     return response
                     
-        except httpx.TimeoutException as e:
-            last_error = e
-            logger.warning(f"Timeout fetching {url} (attempt {attempt+1})")
-        except httpx.RequestError as e:
-            last_error = e
-            logger.error(f"Request error for {url}: {e}")
-        except Exception as e:
-            last_error = e
-            logger.error(f"Unexpected error for {url}: {e}")
-        
-        if attempt < retries - 1:
-            await asyncio.sleep(1 * (attempt + 1))
+            except httpx.TimeoutException as e:
+                last_error = e
+                logger.warning(f"Timeout fetching {url} (attempt {attempt+1})")
+            except httpx.RequestError as e:
+                last_error = e
+                logger.error(f"Request error for {url}: {e}")
+            except Exception as e:
+                last_error = e
+                logger.error(f"Unexpected error for {url}: {e}")
+            
+            if attempt < retries - 1:
+                await asyncio.sleep(1 * (attempt + 1))
     
     logger.error(f"All retry attempts failed for {url}: {last_error}")
     return None
@@ -1125,7 +1168,7 @@ async def fetch_url_with_smart_rendering(url: str, timeout: int = REQUEST_TIMEOU
 # MODERN WEB ANALYSIS
 # ============================================================================
 
-def analyze_modern_web_features(html: str, spa_info: Dict[str, Any]) -> Dict[str, Any]:
+def analyze_modern_web_features(html: Union[str, ParsedPage], spa_info: Dict[str, Any]) -> Dict[str, Any]:
     """
     PARANNELTU versio - tarkempi ja nopeampi
     
@@ -1139,13 +1182,18 @@ def analyze_modern_web_features(html: str, spa_info: Dict[str, Any]) -> Dict[str
     """
     
     try:
-        # Parse HTML efficiently
-        soup = BeautifulSoup(html, 'html.parser')
-        script_content = _extract_script_content(soup)
-        style_content = _extract_style_content(soup)
-        
-        # Framework detection (advanced)
-        frameworks = _detect_frameworks_advanced(html, script_content, soup)
+        # Reuse the shared parse (accepts a raw HTML string for older callers)
+        page = ParsedPage.ensure(html)
+        html = page.html
+        soup = page.soup
+        script_content = page.script_content
+        style_content = page.style_content
+        
+        # Framework detection (advanced) — Wappalyzer is expensive, run once per page
+        frameworks = list(page.memo(
+            'detected_frameworks',
+            lambda: _detect_frameworks_advanced(html, script_content, soup),
+        ))
         has_spa = bool(frameworks or spa_info.get('spa_detected', False))
         
         # Modern CSS
@@ -1593,13 +1641,18 @@ async def lifespan(app: FastAPI):
     
     # 1. Initialize database if enabled
     if DATABASE_ENABLED:
+        # Shared asyncpg pool first: the sync helpers below run on it from db threads
+        try:
+            await start_db_pool()
+        except Exception as e:
+            logger.error(f"❌ Shared database pool failed to start: {e}")
         try:
-            init_database()
-            sync_hardcoded_users_to_db(USERS_DB)
+            await run_in_db_thread(init_database)
+            await run_in_db_thread(sync_hardcoded_users_to_db, USERS_DB)
             logger.info("✅ Database initialized and users synced")
             
             # Load users from database
-            db_users = get_all_users_from_db()
+            db_users = await run_in_db_thread(get_all_users_from_db)
             for db_user in db_users:
                 username = db_user['username']
                 if username not in USERS_DB:
@@ -1735,10 +1788,42 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Scheduled analysis initialization failed: {e}")
 
+    # 5.5. Start the shared Playwright browser pool (SPA rendering)
+    browser_pool_started = False
+    try:
+        browser_pool_started = await get_browser_pool().start()
+        if browser_pool_started:
+            logger.info("✅ Playwright browser pool started")
+    except Exception as e:
+        logger.error(f"❌ Browser pool initialization failed: {e}")
+
+    # 5.6. Shared outbound HTTP client (keep-alive pool + DNS cache)
+    try:
+        await start_http_client()
+        logger.info("✅ Pooled HTTP client started")
+    except Exception as e:
+        logger.error(f"❌ HTTP client initialization failed: {e}")
+
+    # 5.7. Worker processes for CPU-bound HTML scoring
+    try:
+        await start_cpu_pool(preload=("main",))
+        if get_cpu_pool().enabled:
+            logger.info(f"✅ HTML scoring process pool started ({get_cpu_pool().workers} workers)")
+    except Exception as e:
+        logger.error(f"❌ HTML scoring process pool failed, scoring in-process: {e}")
+
+    # 5.8. Unified context cache invalidations from the other workers
+    try:
+        from unified_context import subscribe_context_invalidations
+        await subscribe_context_invalidations()
+    except Exception as e:
+        logger.error(f"❌ Context cache invalidation fan-out failed, caches are per worker: {e}")
+
     # 6. Log startup summary
     logger.info(f"🚀 {APP_NAME} v{APP_VERSION} started")
     logger.info(f"📊 Scoring weights: {SCORING_CONFIG.weights}")
     logger.info(f"🎭 Playwright: {'enabled' if PLAYWRIGHT_AVAILABLE and PLAYWRIGHT_ENABLED else 'disabled'}")
+    logger.info(f"🎭 Browser pool: {'running' if browser_pool_started else 'disabled (per-call launch)'}")
     logger.info(f"🤖 OpenAI: {'configured' if openai_client else 'not configured'}")
     logger.info(f"📧 Magic Link: {'ready' if magic_link_auth else 'not available'}")
     logger.info(f"🗄️ Redis: {'connected' if redis_client else 'not connected'}")
@@ -1769,6 +1854,51 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Error shutting down scheduled manager: {e}")
 
+    # After every subsystem holding a budget of it
+    try:
+        await close_db_pool()
+        close_connection_pool()
+    except Exception as e:
+        logger.error(f"❌ Error closing database pool: {e}")
+
+    if browser_pool_started:
+        try:
+            await get_browser_pool().stop()
+            logger.info("🎭 Browser pool stopped")
+        except Exception as e:
+            logger.error(f"❌ Error stopping browser pool: {e}")
+
+    try:
+        await close_http_client()
+        logger.info("🌐 HTTP client closed")
+    except Exception as e:
+        logger.error(f"❌ Error closing HTTP client: {e}")
+
+    try:
+        await analysis_cache.close()
+    except Exception as e:
+        logger.error(f"❌ Error closing analysis cache: {e}")
+
+    try:
+        await get_rate_limiter().close()
+    except Exception as e:
+        logger.error(f"❌ Error closing rate limiter: {e}")
+
+    try:
+        from unified_context import unsubscribe_context_invalidations
+        await unsubscribe_context_invalidations()
+        await close_fanout_hub()
+    except Exception as e:
+        logger.error(f"❌ Error closing fan-out hub: {e}")
+
+    try:
+        await close_llm_cache()
+    except Exception as e:
+        logger.error(f"❌ Error closing LLM cache: {e}")
+
+    shutdown_stage_executor()
+    shutdown_cpu_pool()
+
     logger.info("🛑 Shutting down application")
 
 # Now recreate app WITH lifespan
@@ -1809,7 +1939,8 @@ app.add_middleware(
         "Accept",
         "Origin",
         "Access-Control-Request-Method",
-        "Access-Control-Request-Headers"
+        "Access-Control-Request-Headers",
+        "X-LLM-Cache"
     ],
     expose_headers=["*"],
     max_age=600
@@ -1837,6 +1968,7 @@ class UTF8Middleware(BaseHTTPMiddleware):
         return response
 
 app.add_middleware(UTF8Middleware)
+app.add_middleware(LLMCacheModeMiddleware)
 
 # ============================================================================
 # GROWTH ENGINE 2.0 - AGENT ROUTES
@@ -1950,20 +2082,26 @@ except Exception as e:  # noqa: BLE001
 async def options_handler():
     return {}
 
-# Rate limiting
+# Rate limiting (GCRA per user / IP and route, see core/rate_limit.py)
 if RATE_LIMIT_ENABLED:
-    request_counts = defaultdict(list)
+    rate_limiter = get_rate_limiter()
     
     @app.middleware("http")
     async def rate_limit_middleware(request: Request, call_next):
-        client_ip = request.client.host
-        now = time.time()
-        request_counts[client_ip] = [t for t in request_counts[client_ip] if now - t < 60]
-        
-        if len(request_counts[client_ip]) >= RATE_LIMIT_PER_MINUTE:
-            raise HTTPException(429, f"Rate limit exceeded: {RATE_LIMIT_PER_MINUTE}/min")
+        identity = request_identity(
+            request.client.host if request.client else None,
+            request.headers.get("authorization"),
+        )
+        result = await rate_limiter.hit(identity, request.url.path)
+        
+        if not result.allowed:
+            headers = result.headers()
+            return JSONResponse(
+                status_code=429,
+                content={"detail": f"Rate limit exceeded, retry after {headers['Retry-After']}s"},
+                headers=headers,
+            )
         
-        request_counts[client_ip].append(now)
         return await call_next(request)
 
 
@@ -1977,7 +2115,9 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 # ✅ PLACEHOLDER - Täytetään init_users() funktiossa
-USERS_DB = {}
+# Indexed by username and email; the object is shared with the identity cache,
+# so it is refilled in place rather than rebound
+USERS_DB = get_identity_cache().users
 
 # ✅ User storage for email verification
 user_store = {}
@@ -2021,8 +2161,7 @@ def _build_users_db() -> dict:
 
 def init_users():
     """Initialize users from environment variables"""
-    global USERS_DB
-    USERS_DB = _build_users_db()
+    USERS_DB.reset(_build_users_db())
     # Security: Do not log password hashes, even partial
     logger.info("🔐 User authentication initialized")
     logger.info(f"   Loaded {len(USERS_DB)} users")
@@ -2368,7 +2507,7 @@ def create_access_token(data: dict) -> str:
 
 def verify_token(token: str) -> Optional[dict]:
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return get_identity_cache().decode(token)
     except ExpiredSignatureError:
         logger.warning("Token expired")
         return None
@@ -2381,8 +2520,15 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> Optio
         return None
     try:
         token = authorization.split(" ")[1]
-        payload = verify_token(token)
-        if not payload:
+        try:
+            # Cached per token: a repeat request skips signature verification
+            # and the user lookup (key, then username / email index)
+            payload, user_key = get_identity_cache().identify(token)
+        except ExpiredSignatureError:
+            logger.warning("Token expired")
+            return None
+        except InvalidTokenError as e:
+            logger.warning(f"JWT error: {e}")
             return None
         
         sub = payload.get("sub")  # Can be email OR username
@@ -2391,32 +2537,7 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> Optio
         if not sub:
             return None
         
-        # 🔍 Try to find user by sub (which can be email OR username)
-        user_data = None
-        user_key = None
-        
-        # 1. Direct key lookup (fastest)
-        if sub in USERS_DB:
-            user_data = USERS_DB[sub]
-            user_key = sub
-        
-        # 2. Search by username field (for old tokens with username as sub)
-        if not user_data:
-            for key, data in USERS_DB.items():
-                if data.get("username") == sub:
-                    user_data = data
-                    user_key = key
-                    logger.info(f"🔍 Found user by username: {sub} → {key}")
-                    break
-        
-        # 3. Search by email field
-        if not user_data:
-            for key, data in USERS_DB.items():
-                if data.get("email") == sub:
-                    user_data = data
-                    user_key = key
-                    logger.info(f"🔍 Found user by email: {sub} → {key}")
-                    break
+        user_data = USERS_DB.get(user_key) if user_key is not None else None
         
         if not user_data:
             # 🆕 User not in USERS_DB - create UserInfo from token (for OAuth users)
@@ -2483,36 +2604,16 @@ def get_cache_key(url: str, analysis_type: str = "basic") -> str:
 def is_cache_valid(timestamp: datetime) -> bool:
     return (datetime.now() - timestamp).total_seconds() < CACHE_TTL
 
-def _reject_ssrf(url: str):
-    """Block localhost/private networks & .local hosts before fetching"""
-    parsed = urlparse(url)
-    host = parsed.hostname or ""
-    if not host:
-        raise HTTPException(400, "Invalid URL")
-    if host == "localhost" or host.endswith(".local"):
-        raise HTTPException(400, "URL not allowed")
+async def _reject_ssrf(url: str):
+    """Block localhost/private networks & .local hosts before fetching.
+
+    Resolves without blocking the event loop, through the DNS cache shared
+    with the pooled HTTP client, so the fetch reuses the checked addresses.
+    """
     try:
-        for fam in (socket.AF_INET, socket.AF_INET6):
-            try:
-                infos = socket.getaddrinfo(host, None, fam, socket.SOCK_STREAM)
-            except socket.gaierror:
-                continue
-            for res in infos:
-                ip_str = res[4][0]
-                ip = ipaddress.ip_address(ip_str)
-                private_nets = [
-                    ipaddress.ip_network("127.0.0.0/8"),
-                    ipaddress.ip_network("10.0.0.0/8"),
-                    ipaddress.ip_network("172.16.0.0/12"),
-                    ipaddress.ip_network("192.168.0.0/16"),
-                    ipaddress.ip_network("::1/128"),
-                    ipaddress.ip_network("fc00::/7"),
-                    ipaddress.ip_network("fe80::/10"),
-                ]
-                if any(ip in net for net in private_nets):
-                    raise HTTPException(400, "URL not allowed")
-    except ValueError:
-        raise HTTPException(400, "URL not allowed")
+        await check_ssrf_url(url, get_dns_cache())
+    except SSRFError as e:
+        raise HTTPException(400, str(e))
 
 def clean_url(url: str) -> str:
     url = url.strip()
@@ -2543,40 +2644,17 @@ def create_score_breakdown_with_aliases(breakdown_raw: Dict[str, int]) -> Dict[s
     
     return result
 
-async def cleanup_cache():
-    if len(analysis_cache) <= MAX_CACHE_SIZE:
-        return
-    items_to_remove = len(analysis_cache) - MAX_CACHE_SIZE
-    sorted_items = sorted(analysis_cache.items(), key=lambda x: x[1]['timestamp'])
-    for key, _ in sorted_items[:items_to_remove]:
-        del analysis_cache[key]
-    logger.info(f"Cache cleanup: removed {items_to_remove} entries")
+def analysis_cache_key(url: str, analysis_type: str) -> str:
+    """Cache key of a _perform_comprehensive_analysis_internal result."""
+    # FIX 11: cache version v6.3.2 with analysis_type support
+    return get_cache_key(url, f"ai_{analysis_type}_v6.3.2")
+
 async def get_from_cache(key: str) -> Optional[Dict[str, Any]]:
-    if not redis_client:
-        return analysis_cache.get(key, {}).get('data') if key in analysis_cache and is_cache_valid(analysis_cache[key]['timestamp']) else None
-    
-    try:
-        cached_data = redis_client.get(key)
-        if cached_data:
-            data = json.loads(cached_data)
-            if is_cache_valid(datetime.fromisoformat(data['timestamp'])):
-                return data['data']
-            else:
-                redis_client.delete(key)
-    except Exception as e:
-        logger.error(f"Redis get error: {e}")
-    
-    return None
+    return await analysis_cache.get(key)
 
 async def set_cache(key: str, data: Dict[str, Any]):
-    analysis_cache[key] = {'data': data, 'timestamp': datetime.now()}
-    
-    if redis_client:
-        try:
-            cache_data = {'data': data, 'timestamp': datetime.now().isoformat()}
-            redis_client.setex(key, CACHE_TTL, json.dumps(cache_data))
-        except Exception as e:
-            logger.error(f"Redis set error: {e}")
+    await analysis_cache.set(key, data)
+
 # ============================================================================
 # ANALYSIS HELPERS
 # ============================================================================
@@ -2699,15 +2777,10 @@ async def check_sitemap_exists(url: str) -> bool:
             f"{base_url}/sitemap_index.xml",
         ]
 
-        async with httpx.AsyncClient(
-            timeout=10,
-            follow_redirects=True,
-            verify=True,
-            limits=httpx.Limits(max_keepalive_connections=2, max_connections=4)
-        ) as client:
+        async with outbound_client() as client:
             for sitemap_url in sitemap_urls:
                 try:
-                    res = await client.head(sitemap_url, headers={"User-Agent": USER_AGENT})
+                    res = await client.head(sitemap_url, headers={"User-Agent": USER_AGENT}, timeout=10)
                     if res.status_code == 200:
                         # Verify it's actually XML, not a redirect to homepage
                         content_type = res.headers.get('content-type', '')
@@ -2715,7 +2788,7 @@ async def check_sitemap_exists(url: str) -> bool:
                             logger.info(f"[sitemap] Found sitemap at {sitemap_url}")
                             return True
                         # HEAD might not return content-type properly, try GET
-                        res2 = await client.get(sitemap_url, headers={"User-Agent": USER_AGENT})
+                        res2 = await client.get(sitemap_url, headers={"User-Agent": USER_AGENT}, timeout=10)
                         if res2.status_code == 200 and ('<?xml' in res2.text[:200] or '<urlset' in res2.text[:500] or '<sitemapindex' in res2.text[:500]):
                             logger.info(f"[sitemap] Found sitemap at {sitemap_url} (verified via GET)")
                             return True
@@ -2724,8 +2797,8 @@ async def check_sitemap_exists(url: str) -> bool:
 
         # Also check robots.txt for Sitemap directive
         try:
-            async with httpx.AsyncClient(timeout=8, follow_redirects=True, verify=True) as client:
-                robots_res = await client.get(f"{base_url}/robots.txt", headers={"User-Agent": USER_AGENT})
+            async with outbound_client() as client:
+                robots_res = await client.get(f"{base_url}/robots.txt", headers={"User-Agent": USER_AGENT}, timeout=8)
                 if robots_res.status_code == 200 and 'sitemap' in robots_res.text.lower():
                     logger.info(f"[sitemap] Found sitemap reference in robots.txt")
                     return True
@@ -3002,12 +3075,14 @@ def calculate_seo_score_configurable(soup: BeautifulSoup, url: str) -> Tuple[int
 
 async def analyze_basic_metrics_enhanced(
     url: str, 
-    html: str, 
+    html: Union[str, ParsedPage], 
     headers: Optional[httpx.Headers] = None,
     rendering_info: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """Enhanced basic analysis that incorporates SPA detection and modern web features"""
-    soup = BeautifulSoup(html, 'html.parser')
+    page = ParsedPage.ensure(html, url=url)
+    html = page.html
+    soup = page.soup
     score_components = {category: 0 for category in SCORING_CONFIG.weights.keys()}
     details: Dict[str, Any] = {}
     
@@ -3038,8 +3113,7 @@ async def analyze_basic_metrics_enhanced(
         details.update(seo_details)
         
         # CONTENT
-        text = extract_clean_text(soup)
-        word_count = len(text.split())
+        word_count = len(page.words)
         content_score = calculate_content_score_configurable(word_count)
         freshness_score = check_content_freshness(soup, html)
         img_opt = analyze_image_optimization(soup)
@@ -3063,7 +3137,7 @@ async def analyze_basic_metrics_enhanced(
         if check_robots_indicators(html): score_components['technical'] += 1
         
         # ✅ MODERN WEB FEATURES & FRAMEWORK DETECTION
-        modern_features = analyze_modern_web_features(html, rendering_info.get('spa_info', {}) if rendering_info else {})
+        modern_features = analyze_modern_web_features(page, rendering_info.get('spa_info', {}) if rendering_info else {})
         if modern_features['is_modern']:
             bonus = min(5, modern_features['modernity_score'] // 20)
             score_components['technical'] += bonus
@@ -3086,7 +3160,7 @@ async def analyze_basic_metrics_enhanced(
         
         # ✅ FALLBACK: If no frameworks detected, scan HTML directly
         if not detected_frameworks:
-            html_lower = html.lower()
+            html_lower = page.html_lower
             
             # Check for React
             if 'react' in html_lower or '__REACT' in html or 'data-reactroot' in html or 'data-react-helmet' in html:
@@ -3153,7 +3227,7 @@ async def analyze_basic_metrics_enhanced(
             mobile_raw += 20
 
         # Tarkista media queries
-        if '@media' in html.lower():
+        if '@media' in page.html_lower:
             mobile_raw += 20
 
         # SPA mobile bonus
@@ -3173,7 +3247,7 @@ async def analyze_basic_metrics_enhanced(
             'score': mobile_score_100,
             'has_viewport': details.get('has_viewport', False),
             'responsive_signals': detect_responsive_signals(html),
-            'media_queries': '@media' in html.lower(),
+            'media_queries': '@media' in page.html_lower,
             'spa_bonus_applied': details.get('spa_mobile_bonus', False)
         }
         
@@ -3192,8 +3266,8 @@ async def analyze_basic_metrics_enhanced(
             if len(html) < 100_000: score_components['performance'] += 2
             elif len(html) < 200_000: score_components['performance'] += 1
         
-        if 'lazy' in html.lower() or 'loading="lazy"' in html: score_components['performance'] += 2
-        if 'webp' in html.lower(): score_components['performance'] += 1
+        if 'lazy' in page.html_lower or 'loading="lazy"' in html: score_components['performance'] += 2
+        if 'webp' in page.html_lower: score_components['performance'] += 1
         
         total_score = sum(score_components.values())
         final_score = max(0, min(100, total_score))
@@ -3270,9 +3344,11 @@ async def analyze_basic_metrics_enhanced(
             'technology_description': 'Analysis failed'
         }
 
-async def analyze_technical_aspects(url: str, html: str, headers: Optional[httpx.Headers] = None) -> Dict[str, Any]:
+async def analyze_technical_aspects(url: str, html: Union[str, ParsedPage], headers: Optional[httpx.Headers] = None) -> Dict[str, Any]:
     """Complete technical analysis"""
-    soup = BeautifulSoup(html, 'html.parser')
+    page = ParsedPage.ensure(html, url=url)
+    html = page.html
+    soup = page.soup
     tech_score = 0
     
     # SSL Check - check if URL uses HTTPS (already normalized by clean_url)
@@ -3342,16 +3418,16 @@ async def analyze_technical_aspects(url: str, html: str, headers: Optional[httpx
     performance_indicators = []
     if 'loading="lazy"' in html: 
         performance_indicators.append('Lazy loading')
-    if '.webp' in (html or '').lower():
+    if '.webp' in page.html_lower:
         performance_indicators.append('WebP images')
-    if 'rel="preload"' in (html or '').lower():
+    if 'rel="preload"' in page.html_lower:
         performance_indicators.append('Preloading')
 
     final = max(0, min(100, tech_score))
     
     # ✅ FRAMEWORK DETECTION - Detect frameworks using modern features analysis
     try:
-        modern_features = analyze_modern_web_features(html, {'spa_detected': False})
+        modern_features = analyze_modern_web_features(page, {'spa_detected': False})
         all_detected = modern_features.get('detected_frameworks', [])
         technology_description = modern_features.get('technology_description', 'Standard')
         modern_js_features = modern_features.get('modern_js_features', 0)
@@ -3369,7 +3445,7 @@ async def analyze_technical_aspects(url: str, html: str, headers: Optional[httpx
         
         # ✅ FALLBACK: If no frameworks detected, scan HTML directly
         if not detected_frameworks:
-            html_lower = html.lower()
+            html_lower = page.html_lower
             
             # Check for React
             if 'react' in html_lower or '__REACT' in html or 'data-reactroot' in html or 'data-react-helmet' in html:
@@ -3528,11 +3604,13 @@ def is_content_cache_valid(timestamp: datetime) -> bool:
 # ---------------------------------------------------------------------------
 from agents.content_fetch import get_website_content  # noqa: F401
 
-async def analyze_content_quality(html: str) -> Dict[str, Any]:
+async def analyze_content_quality(html: Union[str, ParsedPage]) -> Dict[str, Any]:
     """Complete content analysis"""
-    soup = BeautifulSoup(html, 'html.parser')
-    text = extract_clean_text(soup)
-    words = text.split()
+    page = ParsedPage.ensure(html)
+    html = page.html
+    soup = page.soup
+    text = page.text
+    words = page.words
     wc = len(words)
     score = 0
     
@@ -3557,7 +3635,7 @@ async def analyze_content_quality(html: str) -> Dict[str, Any]:
     if soup.find_all('img'): 
         score += 5
         media_types.append('images')
-    if soup.find_all('video') or 'youtube' in html.lower(): 
+    if soup.find_all('video') or 'youtube' in page.html_lower: 
         score += 5
         media_types.append('video')
     
@@ -3571,7 +3649,9 @@ async def analyze_content_quality(html: str) -> Dict[str, Any]:
     
     # Blog detection
     blog_patterns = ['/blog', '/news', '/articles']
-    has_blog = any(soup.find('a', href=re.compile(p, re.I)) for p in blog_patterns)
+    has_blog = any(
+        re.search(p, a['href'], re.I) for p in blog_patterns for a in page.links
+    )
     if has_blog: score += 10
     
     final = max(0, min(100, score))
@@ -3587,9 +3667,11 @@ async def analyze_content_quality(html: str) -> Dict[str, Any]:
         'interactive_elements': interactive
     }
 
-async def analyze_ux_elements(html: str) -> Dict[str, Any]:
+async def analyze_ux_elements(html: Union[str, ParsedPage]) -> Dict[str, Any]:
     """Complete UX analysis"""
-    soup = BeautifulSoup(html, 'html.parser')
+    page = ParsedPage.ensure(html)
+    html = page.html
+    soup = page.soup
     
     # Navigation scoring
     nav_score = 0
@@ -3608,7 +3690,7 @@ async def analyze_ux_elements(html: str) -> Dict[str, Any]:
     # Design framework detection
     design_score = 0
     design_frameworks = []
-    hl = html.lower()
+    hl = page.html_lower
     for fw, pts in {'tailwind':25,'bootstrap':20,'foundation':15}.items():
         if fw in hl: 
             design_score += pts
@@ -3674,15 +3756,17 @@ async def analyze_ux_elements(html: str) -> Dict[str, Any]:
         'design_frameworks': design_frameworks
     }
 
-async def analyze_social_media_presence(url: str, html: str) -> Dict[str, Any]:
+async def analyze_social_media_presence(url: str, html: Union[str, ParsedPage]) -> Dict[str, Any]:
     """Complete social media analysis"""
+    page = ParsedPage.ensure(html, url=url)
+    html = page.html
+    soup = page.soup
     platforms = extract_social_platforms(html)
-    soup = BeautifulSoup(html, 'html.parser')
     
     score = len(platforms) * 10
     
     # Sharing buttons check
-    has_sharing = any(p in html.lower() for p in ['addtoany','sharethis','addthis','social-share'])
+    has_sharing = any(p in page.html_lower for p in ['addtoany','sharethis','addthis','social-share'])
     if has_sharing: score += 15
     
     # Open Graph tags
@@ -4523,31 +4607,16 @@ def _assess_content_comprehensiveness(content: Dict[str, Any], html: str, soup:
         recommendations=recommendations
     )
 
-def _check_authority_markers(technical: Dict[str, Any], basic: Dict[str, Any], html: str = "", soup: BeautifulSoup = None) -> AISearchFactor:
-    """Check authority signals that AI models consider, including E-E-A-T"""
-    score = 0
-    findings = []
-    recommendations = []
-
-    # HTTPS (trust signal) — 10p (baseline, nearly all sites have it)
-    if basic.get('has_ssl', False):
-        score += 10
-        findings.append("HTTPS enabled")
-    else:
-        recommendations.append("CRITICAL: Enable HTTPS for trust")
+def _authority_page_signals(html: str = "", soup: BeautifulSoup = None) -> Dict[str, Any]:
+    """
+    Page-level (HTML) part of the authority factor: E-E-A-T and freshness.
 
-    # Security headers — 10p
-    security_headers = technical.get('security_headers', {})
-    sec_pts = 0
-    if security_headers.get('csp'):
-        sec_pts += 5
-    if security_headers.get('strict_transport'):
-        sec_pts += 5
-    if sec_pts > 0:
-        score += sec_pts
-        findings.append(f"Security headers configured ({sec_pts}/10)")
+    Plain data so score_html_page can compute it in the worker process;
+    _check_authority_markers combines it with the technical checks.
+    """
+    findings = []
 
-    # E-E-A-T signals — 30p (NEW)
+    # E-E-A-T signals
     eeat_score = 0
     html_lower = html.lower() if html else ""
 
@@ -4600,11 +4669,7 @@ def _check_authority_markers(technical: Dict[str, Any], basic: Dict[str, Any], h
             eeat_score += 5
             findings.append("Social proof/reviews detected — trust signal")
 
-    score += min(30, eeat_score)
-    if eeat_score < 10:
-        recommendations.append("Add E-E-A-T signals: author info, about page, expertise markers, reviews")
-
-    # Freshness metadata — 10p (NEW)
+    # Freshness metadata
     freshness_score = 0
     if soup:
         date_metas = [
@@ -4634,6 +4699,56 @@ def _check_authority_markers(technical: Dict[str, Any], basic: Dict[str, Any], h
             if freshness_score >= 10:
                 break
 
+    return {
+        "eeat_score": eeat_score,
+        "freshness_score": freshness_score,
+        "findings": findings,
+    }
+
+def _check_authority_markers(
+    technical: Dict[str, Any],
+    basic: Dict[str, Any],
+    html: str = "",
+    soup: BeautifulSoup = None,
+    page_signals: Optional[Dict[str, Any]] = None
+) -> AISearchFactor:
+    """
+    Check authority signals that AI models consider, including E-E-A-T.
+    Pass page_signals (from _authority_page_signals) to skip the HTML scan.
+    """
+    score = 0
+    findings = []
+    recommendations = []
+
+    # HTTPS (trust signal) — 10p (baseline, nearly all sites have it)
+    if basic.get('has_ssl', False):
+        score += 10
+        findings.append("HTTPS enabled")
+    else:
+        recommendations.append("CRITICAL: Enable HTTPS for trust")
+
+    # Security headers — 10p
+    security_headers = technical.get('security_headers', {})
+    sec_pts = 0
+    if security_headers.get('csp'):
+        sec_pts += 5
+    if security_headers.get('strict_transport'):
+        sec_pts += 5
+    if sec_pts > 0:
+        score += sec_pts
+        findings.append(f"Security headers configured ({sec_pts}/10)")
+
+    # E-E-A-T signals — 30p, freshness metadata — 10p (from the HTML)
+    if page_signals is None:
+        page_signals = _authority_page_signals(html, soup)
+    eeat_score = page_signals["eeat_score"]
+    freshness_score = page_signals["freshness_score"]
+    findings.extend(page_signals["findings"])
+
+    score += min(30, eeat_score)
+    if eeat_score < 10:
+        recommendations.append("Add E-E-A-T signals: author info, about page, expertise markers, reviews")
+
     score += min(10, freshness_score)
     if freshness_score == 0:
         recommendations.append("Add date metadata (article:published_time, dateModified in JSON-LD)")
@@ -4765,17 +4880,12 @@ async def _check_ai_accessibility(url: str, technical: Dict[str, Any]) -> AISear
     parsed = urlparse(url)
     base_url = f"{parsed.scheme}://{parsed.netloc}"
 
-    async with httpx.AsyncClient(
-        timeout=10,
-        follow_redirects=True,
-        verify=True,
-        limits=httpx.Limits(max_keepalive_connections=2, max_connections=4)
-    ) as client:
+    async with outbound_client() as client:
         # --- a) llms.txt / llms-full.txt ---
         has_llms_txt = False
         for llms_path in ['/llms.txt', '/llms-full.txt']:
             try:
-                res = await client.get(f"{base_url}{llms_path}", headers={"User-Agent": USER_AGENT})
+                res = await client.get(f"{base_url}{llms_path}", headers={"User-Agent": USER_AGENT}, timeout=10)
                 if res.status_code == 200 and len(res.text.strip()) > 50:
                     has_llms_txt = True
                     score += 30
@@ -4794,7 +4904,7 @@ async def _check_ai_accessibility(url: str, technical: Dict[str, Any]) -> AISear
         ai_bots = ['GPTBot', 'ChatGPT-User', 'CCBot', 'PerplexityBot', 'Google-Extended', 'Amazonbot', 'ClaudeBot', 'anthropic-ai']
         robots_text = None
         try:
-            res = await client.get(f"{base_url}/robots.txt", headers={"User-Agent": USER_AGENT})
+            res = await client.get(f"{base_url}/robots.txt", headers={"User-Agent": USER_AGENT}, timeout=10)
             if res.status_code == 200:
                 robots_text = res.text
                 score += 5  # Has robots.txt at all
@@ -4853,7 +4963,7 @@ async def _check_ai_accessibility(url: str, technical: Dict[str, Any]) -> AISear
         if technical.get('has_sitemap', False):
             try:
                 sitemap_url = f"{base_url}/sitemap.xml"
-                res = await client.get(sitemap_url, headers={"User-Agent": USER_AGENT})
+                res = await client.get(sitemap_url, headers={"User-Agent": USER_AGENT}, timeout=10)
                 if res.status_code == 200 and '<url>' in res.text:
                     url_count = res.text.count('<url>')
                     score += 15
@@ -4879,9 +4989,22 @@ async def _check_ai_accessibility(url: str, technical: Dict[str, Any]) -> AISear
         recommendations=recommendations
     )
 
+def _ai_html_factors(page: ParsedPage, content: Dict[str, Any]) -> Dict[str, Any]:
+    """AI visibility factors that depend only on the page and its content analysis."""
+    html, soup = page.html, page.soup
+    return {
+        'structured_data': _check_schema_markup(html, soup),
+        'semantic_structure': _check_semantic_structure(html, soup),
+        'content_depth': _assess_content_comprehensiveness(content, html, soup),
+        'conversational_format': _check_conversational_readiness(html, soup, content),
+        # Plain data: the factor itself needs has_sitemap, final only after the HTTP check
+        'authority_page_signals': _authority_page_signals(html, soup),
+    }
+
+
 async def analyze_ai_search_visibility(
     url: str,
-    html: str,
+    html: Union[str, ParsedPage],
     basic: Dict[str, Any],
     technical: Dict[str, Any],
     content: Dict[str, Any],
@@ -4893,15 +5016,20 @@ async def analyze_ai_search_visibility(
     authority/E-E-A-T, conversational readiness, AI accessibility (llms.txt + robots.txt)
     """
 
-    soup = BeautifulSoup(html, 'html.parser')
+    page = ParsedPage.ensure(html, url=url)
+    # HTML-only factors may already have been computed by score_html_page
+    html_factors = page.memo("ai_html_factors", lambda: _ai_html_factors(page, content))
 
     # Run all factor analyses (6 factors)
     factors = {
-        'structured_data': _check_schema_markup(html, soup),
-        'semantic_structure': _check_semantic_structure(html, soup),
-        'content_depth': _assess_content_comprehensiveness(content, html, soup),
-        'authority_signals': _check_authority_markers(technical, basic, html, soup),
-        'conversational_format': _check_conversational_readiness(html, soup, content),
+        'structured_data': html_factors['structured_data'],
+        'semantic_structure': html_factors['semantic_structure'],
+        'content_depth': html_factors['content_depth'],
+        # Reads has_sitemap, which is only final after the HTTP sitemap check
+        'authority_signals': _check_authority_markers(
+            technical, basic, page_signals=html_factors['authority_page_signals']
+        ),
+        'conversational_format': html_factors['conversational_format'],
         'ai_accessibility': await _check_ai_accessibility(url, technical),
     }
 
@@ -5003,7 +5131,7 @@ async def generate_ai_insights(
     content: Dict[str, Any],
     ux: Dict[str, Any],
     social: Dict[str, Any],
-    html: str,
+    html: Union[str, ParsedPage],
     language: str = 'en',
     analysis_type: str = 'comprehensive'
 ) -> AIAnalysis:
@@ -5077,12 +5205,13 @@ async def generate_ai_insights(
                 "Each should be one clear sentence covering different areas (technical, content, SEO, UX, social). "
                 "Return as a list with hyphens, no introduction:\n" + context
             )
-            async with _LLM_SEMAPHORE:
-                response = await openai_client.chat.completions.create(
-                    model=OPENAI_MODEL,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=500, temperature=0.6
-                )
+            response = await get_llm_gateway().chat(
+                openai_client,
+                label='ai_insights_recommendations',
+                model=OPENAI_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=500, temperature=0.6
+            )
             ai_text = response.choices[0].message.content.strip()
             lines = [line.strip() for line in ai_text.splitlines() if line.strip()]
             cleaned = []
@@ -6816,29 +6945,10 @@ async def login(request: LoginRequest):
     user = None
     user_key = None
     
-    # 1. Yritä suoraa email-hakua
-    if request.username in USERS_DB:
-        user = USERS_DB[request.username]
-        user_key = request.username
-        logger.info(f"✅ Found user by email key: {user_key}")
-    
-    # 2. Etsi username-kentällä
-    if not user:
-        for email, user_data in USERS_DB.items():
-            if user_data.get("username") == request.username:
-                user = user_data
-                user_key = email
-                logger.info(f"✅ Found user by username field: {request.username} (email: {email})")
-                break
-    
-    # 3. Yritä myös email-kentällä (jos käyttäjä syötti emailin)
-    if not user:
-        for email, user_data in USERS_DB.items():
-            if user_data.get("email") == request.username:
-                user = user_data
-                user_key = email
-                logger.info(f"✅ Found user by email field: {request.username}")
-                break
+    # Avain, sitten username- ja email-kenttä (indeksoitu)
+    user_key, user = USERS_DB.find(request.username)
+    if user:
+        logger.info(f"✅ Found user: {request.username} (key: {user_key})")
     
     if not user:
         logger.warning(f"❌ USER NOT FOUND: {request.username}")
@@ -6941,14 +7051,9 @@ async def verify_magic_link_get(token: str, req: Request):
             raise HTTPException(400, "Invalid magic link response")
         
         # 🔍 HELPER: Find existing user by email in USERS_DB (keys are usernames, not emails)
-        existing_user = None
-        existing_username = None
-        for uname, udata in USERS_DB.items():
-            if udata.get("email") == email:
-                existing_user = udata
-                existing_username = uname
-                logger.info(f"🔍 Found existing user by email: {uname} with role: {udata.get('role')}")
-                break
+        existing_username, existing_user = USERS_DB.find_by_email(email)
+        if existing_user:
+            logger.info(f"🔍 Found existing user by email: {existing_username} with role: {existing_user.get('role')}")
         
         # If user exists in USERS_DB (created by admin), use their role
         if existing_user:
@@ -7097,7 +7202,7 @@ async def google_callback(request: Request, background_tasks: BackgroundTasks):
             from database import get_user_from_db, DATABASE_ENABLED
             
             if DATABASE_ENABLED:
-                db_user = get_user_from_db(username)
+                db_user = await run_in_db_thread(get_user_from_db, username)
                 if db_user:
                     existing_user = db_user
                     existing_username = db_user['username']
@@ -7111,14 +7216,11 @@ async def google_callback(request: Request, background_tasks: BackgroundTasks):
         
         # ✅ STEP 2: If not in DB, check memory (USERS_DB)
         if not existing_user:
-            for uname, udata in USERS_DB.items():
-                if udata.get("email") == email:
-                    existing_user = udata
-                    existing_username = uname
-                    role = udata.get("role", "user")
-                    is_new_user = False
-                    logger.info(f"📋 Found user in memory: {username} with role: {role}")
-                    break
+            existing_username, existing_user = USERS_DB.find_by_email(email)
+            if existing_user:
+                role = existing_user.get("role", "user")
+                is_new_user = False
+                logger.info(f"📋 Found user in memory: {username} with role: {role}")
         
         # ✅ STEP 3: Add to user_store (temporary session store)
         if email not in user_store:
@@ -7176,7 +7278,8 @@ async def google_callback(request: Request, background_tasks: BackgroundTasks):
                 from database import create_user_in_db, DATABASE_ENABLED
                 
                 if DATABASE_ENABLED:
-                    success = create_user_in_db(
+                    success = await run_in_db_thread(
+                        create_user_in_db,
                         username=username,
                         hashed_password=hashed_password,
                         role=role,
@@ -7334,7 +7437,7 @@ async def google_native_login(request: GoogleNativeRequest):
     try:
         from database import get_user_from_db, DATABASE_ENABLED
         if DATABASE_ENABLED:
-            db_user = get_user_from_db(username)
+            db_user = await run_in_db_thread(get_user_from_db, username)
             if db_user:
                 role = db_user.get("role", "user")
                 logger.info(f"google_native: DB user found: {username} role={role}")
@@ -7344,11 +7447,10 @@ async def google_native_login(request: GoogleNativeRequest):
         logger.warning(f"google_native: DB lookup error: {e}")
 
     if role == "user":
-        for _, udata in USERS_DB.items():
-            if udata.get("email") == email:
-                role = udata.get("role", "user")
-                logger.info(f"google_native: USERS_DB hit for {email} role={role}")
-                break
+        _, udata = USERS_DB.find_by_email(email)
+        if udata:
+            role = udata.get("role", "user")
+            logger.info(f"google_native: USERS_DB hit for {email} role={role}")
 
     # Refresh user_store so /auth/me + downstream code paths see consistent
     # metadata for this email. Overwriting previous session is intentional —
@@ -7465,14 +7567,125 @@ async def _perform_comprehensive_analysis_internal(
     if analysis_type not in ("basic", "comprehensive", "ai_enhanced"):
         analysis_type = "comprehensive"  # Default fallback
 
-    # Check cache (include analysis_type in cache key)
-    # FIX 11: Updated cache version to v6.3.2 with analysis_type support
-    cache_key = get_cache_key(url, f"ai_{analysis_type}_v6.3.2")
-    cached_result = await get_from_cache(cache_key)
-    if cached_result:
-        logger.info(f"Cache hit for {url} (type: {analysis_type})")
-        return cached_result
+    # Cached per (url, analysis_type); concurrent requests for the same key
+    # share one run, and recently expired results are served while refreshing
+    cache_key = analysis_cache_key(url, analysis_type)
+    return await analysis_cache.get_or_compute(
+        cache_key,
+        lambda: _run_comprehensive_analysis(
+            url=url,
+            company_name=company_name,
+            language=language,
+            force_playwright=force_playwright,
+            user=user,
+            revenue_input=revenue_input,
+            analysis_type=analysis_type,
+        ),
+    )
+
+
+@dataclass
+class HtmlScoringJob:
+    """Picklable input of score_html_page — raw HTML, never a parsed soup."""
+    url: str
+    html: str
+    rendering_info: Dict[str, Any]
+    include_ai_factors: bool = False
+
+
+@dataclass
+class HtmlScores:
+    """Picklable output of score_html_page — plain dicts (and AISearchFactor models)."""
+    basic: Dict[str, Any]
+    technical: Dict[str, Any]
+    content: Dict[str, Any]
+    ux: Dict[str, Any]
+    social: Dict[str, Any]
+    interactive: Optional[Dict[str, Any]] = None
+    ai_factors: Optional[Dict[str, Any]] = None
+    timings: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def score_html_page(job: HtmlScoringJob) -> HtmlScores:
+    """
+    CPU-bound HTML scoring stage of a comprehensive analysis.
+
+    Module-level and synchronous so it can run in the process pool
+    (core/cpu_pool.py): the page is parsed once here, in the worker. The
+    async analyzers run on a private event loop, so an await inside them
+    still works; call this off the event loop thread (worker or executor).
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return _score_html_page(job, loop.run_until_complete)
+    finally:
+        loop.close()
+
+
+def _score_html_page(job: HtmlScoringJob, run) -> HtmlScores:
+    page = ParsedPage(job.html, url=job.url)
+    timings: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+
+    def timed(name: str, func, optional: bool = False):
+        started = time.perf_counter()
+        try:
+            value = func()
+        except Exception as e:
+            if not optional:
+                raise
+            errors[name] = f"{type(e).__name__}: {str(e)[:200]}"
+            value = None
+        timings[f"html_scoring.{name}"] = {
+            "status": "done" if name not in errors else "skipped_error",
+            "run_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        return value
 
+    timed("parse", page.warm)
+    basic = timed("basic", lambda: run(analyze_basic_metrics_enhanced(
+        job.url, page,
+        headers=httpx.Headers({}),
+        rendering_info=job.rendering_info
+    )))
+    technical = timed("technical", lambda: run(analyze_technical_aspects(
+        job.url, page,
+        headers=httpx.Headers({})
+    )))
+    content = timed("content", lambda: run(analyze_content_quality(page)))
+    ux = timed("ux", lambda: run(analyze_ux_elements(page)))
+    social = timed("social", lambda: run(analyze_social_media_presence(job.url, page)))
+    interactive = timed(
+        "interactive", lambda: detect_interactive_elements(page.soup, job.html), optional=True
+    )
+    ai_factors = None
+    if job.include_ai_factors:
+        ai_factors = timed("ai_factors", lambda: _ai_html_factors(page, content), optional=True)
+
+    return HtmlScores(
+        basic=basic,
+        technical=technical,
+        content=content,
+        ux=ux,
+        social=social,
+        interactive=interactive,
+        ai_factors=ai_factors,
+        timings=timings,
+        errors=errors,
+    )
+
+
+async def _run_comprehensive_analysis(
+    url: str,
+    company_name: Optional[str],
+    language: str,
+    force_playwright: bool,
+    user: Optional[UserInfo],
+    revenue_input: Optional[RevenueInputRequest],
+    analysis_type: str,
+) -> Dict[str, Any]:
+    """Uncached analysis run behind _perform_comprehensive_analysis_internal."""
     logger.info(f"Starting {analysis_type} analysis for {url}")
     
     # Fetch website content with smart rendering
@@ -7483,6 +7696,9 @@ async def _perform_comprehensive_analysis_internal(
     
     if not html_content or len(html_content.strip()) < 100:
         raise HTTPException(400, "Website returned insufficient content")
+
+    # Parse once — every analyzer below shares this soup and its derived views
+    page = ParsedPage(html_content, url=url)
     
     rendering_info = {
         'spa_detected': bool(used_spa),
@@ -7491,29 +7707,37 @@ async def _perform_comprehensive_analysis_internal(
         'final_url': url
     }
     
-    # Perform all analyses
-    basic_analysis = await analyze_basic_metrics_enhanced(
-        url, html_content,
-        headers=httpx.Headers({}),
-        rendering_info=rendering_info
-    )
-    
-    technical_audit = await analyze_technical_aspects(
-        url, html_content,
-        headers=httpx.Headers({})
-    )
-
+    # Independent stages run as a dependency graph: the sitemap probe is in
+    # flight while the page is scored in a worker process (off the event loop).
+    graph = StageGraph()
     # ✅ FIX: Sitemap detection - check actual /sitemap.xml via HTTP
     # check_sitemap_indicators() only looks at HTML <link> and <a> tags,
     # but most sitemaps are only referenced in robots.txt, not in HTML.
-    if not technical_audit.get('has_sitemap', False):
-        try:
-            sitemap_found = await check_sitemap_exists(url)
-            if sitemap_found:
-                logger.info(f"✅ Sitemap found via HTTP check for {url} (HTML check missed it)")
-                technical_audit['has_sitemap'] = True
-        except Exception as e:
-            logger.warning(f"Sitemap HTTP check failed for {url}: {e}")
+    # Started speculatively; only consulted if the HTML check missed it.
+    graph.add("sitemap", lambda: check_sitemap_exists(url), optional=True)
+    graph.add("html_scoring", partial(score_html_page, HtmlScoringJob(
+        url=url,
+        html=html_content,
+        rendering_info=rendering_info,
+        include_ai_factors=(analysis_type == "ai_enhanced"),
+    )), mode="process")
+    graph.add("competitive", lambda scores: analyze_competitive_positioning(url, scores.basic),
+              deps=("html_scoring",))
+    stages = await graph.run()
+
+    scores: HtmlScores = stages["html_scoring"]
+    basic_analysis = scores.basic
+    technical_audit = scores.technical
+    content_analysis = scores.content
+    ux_analysis = scores.ux
+    social_analysis = scores.social
+    competitive_analysis = stages["competitive"]
+    if scores.ai_factors is not None:
+        page.memo("ai_html_factors", lambda: scores.ai_factors)
+
+    if not technical_audit.get('has_sitemap', False) and stages["sitemap"]:
+        logger.info(f"✅ Sitemap found via HTTP check for {url} (HTML check missed it)")
+        technical_audit['has_sitemap'] = True
 
     # Enrich technical audit with modern features
     if 'modern_features' in basic_analysis.get('detailed_findings', {}):
@@ -7535,12 +7759,6 @@ async def _perform_comprehensive_analysis_internal(
         technical_audit['detected_frameworks'] = []
         technical_audit['modern_js_features'] = 0
     
-    # Perform remaining analyses
-    content_analysis = await analyze_content_quality(html_content)
-    ux_analysis = await analyze_ux_elements(html_content)
-    social_analysis = await analyze_social_media_presence(url, html_content)
-    competitive_analysis = await analyze_competitive_positioning(url, basic_analysis)
-    
     # Score breakdown with aliases
     sb_with_aliases = create_score_breakdown_with_aliases(
         basic_analysis.get('score_breakdown', {})
@@ -7549,7 +7767,7 @@ async def _perform_comprehensive_analysis_internal(
     # AI insights (conditional based on analysis_type)
     ai_analysis = await generate_ai_insights(
         url, basic_analysis, technical_audit, content_analysis,
-        ux_analysis, social_analysis, html_content,
+        ux_analysis, social_analysis, page,
         language=language,
         analysis_type=analysis_type
     )
@@ -7576,13 +7794,10 @@ async def _perform_comprehensive_analysis_internal(
     # Extract modern features for detailed analysis
     modern_features = basic_analysis.get('detailed_findings', {}).get('modern_features', {})
     
-    # Extract interaction patterns
-    interaction_data = None
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        interaction_data = detect_interactive_elements(soup, html_content)
-    except Exception as e:
-        logger.warning(f"Could not detect interactive elements: {e}")
+    # Extract interaction patterns (computed with the HTML scores)
+    interaction_data = scores.interactive
+    if interaction_data is None:
+        logger.warning(f"Could not detect interactive elements: {scores.errors.get('interactive')}")
         interaction_data = {
             'interaction_patterns': [],
             'interactivity_score': 0
@@ -7717,7 +7932,8 @@ async def _perform_comprehensive_analysis_internal(
             "playwright_available": PLAYWRIGHT_AVAILABLE,
             "scoring_weights": SCORING_CONFIG.weights,
             "content_words": content_analysis.get('word_count', 0),
-            "modernity_score": basic_analysis.get('modernity_score', 0)
+            "modernity_score": basic_analysis.get('modernity_score', 0),
+            "stage_timings": {**graph.timings(), **scores.timings}
         }
     }
 
@@ -7729,9 +7945,6 @@ async def _perform_comprehensive_analysis_internal(
     # Ensure integer scores
     result = ensure_integer_scores(result)
     
-    # Cache result
-    await set_cache(cache_key, result)
-    
     logger.info(
         f"Analysis complete: {url} - "
         f"Score: {basic_analysis['digital_maturity_score']}, "
@@ -7796,7 +8009,7 @@ async def get_user_blacklist(username: str) -> List[str]:
     try:
         if DATABASE_ENABLED:
             # Try to load user preferences from database
-            user_prefs = get_user_preferences_from_db(username)
+            user_prefs = await run_in_db_thread(get_user_preferences_from_db, username)
             if user_prefs and user_prefs.get("blacklist_domains"):
                 return user_prefs["blacklist_domains"]
     except Exception as e:
@@ -8336,56 +8549,80 @@ async def discover_competitors(
 
                 successful_count = 0
                 failed_count = 0
+                completed_count = 0
+
+                def _refund_credit(reason: str):
+                    if user.role not in ["admin", "super_user"]:
+                        user_search_counts[user.username] = max(
+                            0,
+                            user_search_counts.get(user.username, 0) - 1
+                        )
+                        logger.info(f"💰 Refunded 1 credit to {user.username} ({reason})")
 
-                for idx, competitor in enumerate(competitors_to_analyze, 1):
-                    # Check global timeout
+                async def _analyze_competitor(competitor: Dict[str, Any]):
+                    # Jobs still queued when the global timeout passes are skipped
                     if datetime.now() - start_time > max_duration:
-                        logger.warning(f"⏰ [{task_id}] Global timeout reached, stopping discovery")
-                        break
-                    
+                        return None
+
+                    clean_competitor_url = clean_url(competitor["url"])
+                    await _reject_ssrf(clean_competitor_url)
+
+                    logger.info(f"[Task {task_id}] Analyzing {competitor['url']}")
+
+                    # Competitors use "comprehensive" level (no AI visibility/creative boldness)
+                    result = await asyncio.wait_for(
+                        _perform_comprehensive_analysis_internal(
+                            url=clean_competitor_url,
+                            company_name=competitor["domain"],
+                            language=request.country_code,
+                            force_playwright=False,
+                            user=user,
+                            analysis_type="comprehensive"
+                        ),
+                        timeout=ANALYSIS_TIMEOUT_SECONDS
+                    )
+                    return clean_competitor_url, result
+
+                # Bounded fan-out: COMPETITOR_ANALYSIS_CONCURRENCY per run, the
+                # process-wide scrape budget, one analysis at a time per domain.
+                # Outcomes arrive in completion order; progress streams per competitor.
+                analyzed: List[tuple] = []
+
+                async for outcome in run_bounded(
+                    competitors_to_analyze,
+                    _analyze_competitor,
+                    domain_of=lambda c: c["domain"],
+                    concurrency=COMPETITOR_ANALYSIS_CONCURRENCY,
+                ):
+                    competitor = outcome.item
                     competitor_url = competitor["url"]
-                    progress = 50 + int((idx / required_analyses) * 40)  # 50-90%
-                    
-                    try:
-                        logger.info(
-                            f"[Task {task_id}] Analyzing {idx}/{required_analyses}: {competitor_url}"
-                        )
-                        
-                        await update_task_progress(
-                            task_id,
-                            "running",
-                            progress,
-                            f"Analyzing {idx}/{required_analyses}: {competitor['domain']}"
-                        )
-                        
-                        # Clean and validate URL
-                        clean_competitor_url = clean_url(competitor_url)
-                        _reject_ssrf(clean_competitor_url)
-                        
-                        # Perform analysis WITH TIMEOUT
-                        # Competitors use "comprehensive" level (no AI visibility/creative boldness)
-                        result = await asyncio.wait_for(
-                            _perform_comprehensive_analysis_internal(
-                                url=clean_competitor_url,
-                                company_name=competitor["domain"],
-                                language=request.country_code,
-                                force_playwright=False,
-                                user=user,
-                                analysis_type="comprehensive"
-                            ),
-                            timeout=ANALYSIS_TIMEOUT_SECONDS
-                        )
-                        
+                    completed_count += 1
+                    progress = 50 + int((completed_count / required_analyses) * 40)  # 50-90%
+
+                    if outcome.error is None and outcome.result is None:
+                        logger.warning(f"⏰ [{task_id}] Global timeout reached, skipping {competitor_url}")
+
+                        task_queue.add_result(task_id, {
+                            "url": competitor_url,
+                            "domain": competitor["domain"],
+                            "status": "failed",
+                            "error": "Discovery time limit reached before this competitor was analyzed",
+                            "error_type": "TimeoutError"
+                        })
+
+                        failed_count += 1
+                        _refund_credit("skipped")
+
+                    elif outcome.error is None:
+                        clean_competitor_url, result = outcome.result
+
                         # ✅ Save SUCCESS result (only essential data + cache_key)
                         task_queue.add_result(task_id, {
                             "url": competitor_url,
                             "domain": competitor["domain"],
                             "status": "success",
                             "score": result["basic_analysis"]["digital_maturity_score"],
-                            "cache_key": get_cache_key(
-                                clean_competitor_url,
-                                "ai_comprehensive_v6.1.1_complete"
-                            ),
+                            "cache_key": analysis_cache_key(clean_competitor_url, "comprehensive"),
                             "analyzed_at": datetime.now().isoformat(),
                             # Store only summary, not full analysis (save Redis memory)
                             "summary": {
@@ -8396,18 +8633,18 @@ async def discover_competitors(
                         })
 
                         # Keep full analysis in memory for post-loop battlecard generation
-                        full_competitor_analyses.append({
+                        analyzed.append((outcome.index, {
                             **result,
                             "url": competitor_url,
                             "domain": competitor["domain"],
-                        })
+                        }))
 
                         successful_count += 1
-                        logger.info(f"✅ [{task_id}] {idx}/{required_analyses} completed: {competitor_url}")
-                        
-                    except asyncio.TimeoutError:
+                        logger.info(f"✅ [{task_id}] {completed_count}/{required_analyses} completed: {competitor_url}")
+
+                    elif isinstance(outcome.error, asyncio.TimeoutError):
                         logger.error(f"⏰ [{task_id}] Timeout analyzing {competitor_url}")
-                        
+
                         task_queue.add_result(task_id, {
                             "url": competitor_url,
                             "domain": competitor["domain"],
@@ -8415,20 +8652,14 @@ async def discover_competitors(
                             "error": "Analysis timeout - site took too long to analyze",
                             "error_type": "TimeoutError"
                         })
-                        
+
                         failed_count += 1
-                        
-                        # Refund credit for timeout
-                        if user.role not in ["admin", "super_user"]:
-                            user_search_counts[user.username] = max(
-                                0,
-                                user_search_counts.get(user.username, 0) - 1
-                            )
-                            logger.info(f"💰 Refunded 1 credit to {user.username} (timeout)")
-                        
-                    except HTTPException as e:
+                        _refund_credit("timeout")
+
+                    elif isinstance(outcome.error, HTTPException):
+                        e = outcome.error
                         logger.error(f"❌ [{task_id}] HTTP error {competitor_url}: {e.detail}")
-                        
+
                         task_queue.add_result(task_id, {
                             "url": competitor_url,
                             "domain": competitor["domain"],
@@ -8436,20 +8667,14 @@ async def discover_competitors(
                             "error": str(e.detail),
                             "error_type": "HTTPException"
                         })
-                        
+
                         failed_count += 1
-                        
-                        # Refund credit for HTTP errors
-                        if user.role not in ["admin", "super_user"]:
-                            user_search_counts[user.username] = max(
-                                0,
-                                user_search_counts.get(user.username, 0) - 1
-                            )
-                            logger.info(f"💰 Refunded 1 credit to {user.username} (HTTP error)")
-                        
-                    except Exception as e:
-                        logger.error(f"❌ [{task_id}] Failed {competitor_url}: {e}", exc_info=True)
-                        
+                        _refund_credit("HTTP error")
+
+                    else:
+                        e = outcome.error
+                        logger.error(f"❌ [{task_id}] Failed {competitor_url}: {e}", exc_info=e)
+
                         task_queue.add_result(task_id, {
                             "url": competitor_url,
                             "domain": competitor["domain"],
@@ -8457,16 +8682,21 @@ async def discover_competitors(
                             "error": str(e)[:200],  # Limit error message length
                             "error_type": type(e).__name__
                         })
-                        
+
                         failed_count += 1
-                        
-                        # Refund credit for general errors
-                        if user.role not in ["admin", "super_user"]:
-                            user_search_counts[user.username] = max(
-                                0,
-                                user_search_counts.get(user.username, 0) - 1
-                            )
-                            logger.info(f"💰 Refunded 1 credit to {user.username} (error)")
+                        _refund_credit("error")
+
+                    await update_task_progress(
+                        task_id,
+                        "running",
+                        progress,
+                        f"Analyzed {completed_count}/{required_analyses}: {competitor['domain']}"
+                    )
+
+                # Battlecards expect discovery order, not completion order
+                full_competitor_analyses.extend(
+                    analysis for _, analysis in sorted(analyzed, key=lambda pair: pair[0])
+                )
                 
                 # === COMPETITIVE INTELLIGENCE (battlecards) ===
                 # Analyze target once + run engine. Graceful: failure doesn't fail discovery.
@@ -8599,8 +8829,9 @@ async def discover_competitors(
                     "failed_at": datetime.now().isoformat()
                 })
         
-        # ✅ Start background task
-        asyncio.create_task(process_discovery())
+        # ✅ Start background task (its LLM calls queue behind interactive traffic)
+        with llm_lane("background"):
+            asyncio.create_task(process_discovery())
         
         # === 8.5. INCREMENT USAGE COUNTER ===
         if STRIPE_AVAILABLE and stripe_manager:
@@ -8862,7 +9093,7 @@ async def ai_analyze_comprehensive(
         
         # === URL VALIDATION ===
         url = clean_url(request.url)
-        _reject_ssrf(url)
+        await _reject_ssrf(url)
         
         # === PERFORM ANALYSIS ===
         result = await _perform_comprehensive_analysis_internal(
@@ -8900,7 +9131,6 @@ async def ai_analyze_comprehensive(
                 f"Quota: {user.username} used {user_search_counts[user.username]}/{user_limit}"
             )
         
-        background_tasks.add_task(cleanup_cache)
         
         logger.info(
             f"✅ Analysis complete for {user.username}: {url} | "
@@ -9221,6 +9451,14 @@ async def health_check():
             "playwright_enabled": PLAYWRIGHT_ENABLED,
             "stripe_available": STRIPE_AVAILABLE,
             "cache_size": len(analysis_cache),
+            "cache": analysis_cache.stats(),
+            "cpu_pool": get_cpu_pool().stats(),
+            "rate_limit": get_rate_limiter().stats() if RATE_LIMIT_ENABLED else None,
+            "identity_cache": get_identity_cache().stats(),
+            "db_pool": get_db_pool().stats(),
+            "fanout": get_fanout_hub().stats(),
+            "llm_cache": get_llm_cache().stats(),
+            "llm_gateway": get_llm_gateway().stats(),
             "enhanced_features": 10,
             "complete_models": True,
             "agent_system": AGENT_SYSTEM_AVAILABLE
@@ -9533,7 +9771,7 @@ async def stripe_webhook(request: Request):
         # Sync to file if available
         if hasattr(sys.modules[__name__], 'sync_hardcoded_users_to_db'):
             try:
-                sync_hardcoded_users_to_db(USERS_DB)
+                await run_in_db_thread(sync_hardcoded_users_to_db, USERS_DB)
             except Exception as e:
                 logger.warning(f"Failed to sync users to file: {e}")
         
@@ -9603,7 +9841,7 @@ async def admin_update_quota(username: str, payload: QuotaUpdateRequest, user: U
             update_data['searches_used'] = 0
         
         if update_data:
-            update_user_in_db(username, **update_data)
+            await run_in_db_thread(update_user_in_db, username, **update_data)
     
     return UserQuotaView(
         username=username,
@@ -9630,7 +9868,7 @@ async def admin_create_user(payload: UserCreateRequest, user: UserInfo = Depends
     if payload.username in USERS_DB:
         raise HTTPException(400, f"User '{payload.username}' already exists")
     
-    if DATABASE_ENABLED and get_user_from_db(payload.username):
+    if DATABASE_ENABLED and await run_in_db_thread(get_user_from_db, payload.username):
         raise HTTPException(400, f"User '{payload.username}' already exists in database")
     
     # Hash password
@@ -9646,7 +9884,8 @@ async def admin_create_user(payload: UserCreateRequest, user: UserInfo = Depends
     
     # ✅ 2. Tallenna tietokantaan (jos saatavilla)
     if DATABASE_ENABLED:
-        success = create_user_in_db(
+        success = await run_in_db_thread(
+            create_user_in_db,
             username=payload.username,
             hashed_password=hashed_password,
             role=payload.role,
@@ -9697,7 +9936,7 @@ async def admin_update_user_role(
     # Check user exists in memory
     if username not in USERS_DB:
         # Check database
-        if DATABASE_ENABLED and not get_user_from_db(username):
+        if DATABASE_ENABLED and not await run_in_db_thread(get_user_from_db, username):
             raise HTTPException(404, f"User '{username}' not found")
     
     # Update in memory
@@ -9706,7 +9945,7 @@ async def admin_update_user_role(
     
     # Update in database
     if DATABASE_ENABLED:
-        success = update_user_in_db(username, role=payload.role)
+        success = await run_in_db_thread(update_user_in_db, username, role=payload.role)
         if not success:
             raise HTTPException(500, "Failed to update user in database")
     
@@ -9724,7 +9963,7 @@ async def admin_delete_user(username: str, user: UserInfo = Depends(require_admi
     """Delete a user (admin only)"""
     
     # ✅ Tarkista sekä muistista ETTÄ tietokannasta
-    if username not in USERS_DB and (not DATABASE_ENABLED or not get_user_from_db(username)):
+    if username not in USERS_DB and (not DATABASE_ENABLED or not await run_in_db_thread(get_user_from_db, username)):
         raise HTTPException(404, "User not found")
     
     if username == "admin":
@@ -9739,7 +9978,7 @@ async def admin_delete_user(username: str, user: UserInfo = Depends(require_admi
     
     # ✅ 2. Poista tietokannasta
     if DATABASE_ENABLED:
-        delete_user_from_db(username)
+        await run_in_db_thread(delete_user_from_db, username)
     
     # ✅ 3. Poista search counter
     user_search_counts.pop(username, None)
@@ -10012,54 +10251,86 @@ async def analyze_competitive_radar(
         
         logger.info(f"[Radar] Starting analysis for {user.username}: {request.your_url} vs {len(request.competitor_urls)} competitors")
         
-        # === 1. ANALYSOI OMA SIVU ===
+        # === 1. ANALYSOI OMA SIVU + KILPAILIJAT RINNAKKAIN ===
         your_url = clean_url(request.your_url)
-        _reject_ssrf(your_url)
+        await _reject_ssrf(your_url)
 
         logger.info(f"[Radar] Analyzing YOUR site: {your_url}")
 
-        # Your site uses ai_enhanced for full analysis (AI visibility + creative boldness)
-        your_analysis = await _perform_comprehensive_analysis_internal(
-            url=your_url,
-            language=request.language,
-            user=user,
-            analysis_type="ai_enhanced"
-        )
+        # Your site uses ai_enhanced for full analysis (AI visibility + creative boldness).
+        # It shares the scrape budget and domain lock with the competitor fan-out.
+        async def _analyze_your_site():
+            async with get_scrape_budget().slot(domain_key(your_url)):
+                return await _perform_comprehensive_analysis_internal(
+                    url=your_url,
+                    language=request.language,
+                    user=user,
+                    analysis_type="ai_enhanced"
+                )
+
+        your_task = asyncio.create_task(_analyze_your_site())
 
         # === 2. ANALYSOI KILPAILIJAT ===
         competitor_analyses = []
         failed_competitors = []
 
-        for idx, competitor_url in enumerate(request.competitor_urls, 1):
-            try:
-                clean_comp_url = clean_url(competitor_url)
-                _reject_ssrf(clean_comp_url)
+        async def _analyze_competitor(competitor_url: str):
+            clean_comp_url = clean_url(competitor_url)
+            await _reject_ssrf(clean_comp_url)
 
-                logger.info(f"[Radar] Analyzing competitor {idx}/{len(request.competitor_urls)}: {clean_comp_url}")
+            logger.info(f"[Radar] Analyzing competitor: {clean_comp_url}")
 
-                # Competitors use comprehensive level (no AI visibility/creative boldness)
-                comp_analysis = await _perform_comprehensive_analysis_internal(
-                    url=clean_comp_url,
-                    language=request.language,
-                    user=user,
-                    analysis_type="comprehensive"
-                )
-                
-                competitor_analyses.append(comp_analysis)
-                logger.info(f"[Radar] ✅ Competitor {idx} done: {comp_analysis['basic_analysis']['company']}")
-                
-            except HTTPException as e:
-                logger.error(f"[Radar] ❌ HTTPException for {competitor_url}: {e.detail}")
-                failed_competitors.append({
-                    'url': competitor_url,
-                    'error': str(e.detail)
-                })
-            except Exception as e:
-                logger.error(f"[Radar] ❌ Exception for {competitor_url}: {e}", exc_info=True)
-                failed_competitors.append({
-                    'url': competitor_url,
-                    'error': f"Analysis failed: {str(e)}"
-                })
+            # Competitors use comprehensive level (no AI visibility/creative boldness)
+            return await _perform_comprehensive_analysis_internal(
+                url=clean_comp_url,
+                language=request.language,
+                user=user,
+                analysis_type="comprehensive"
+            )
+
+        analyzed = []
+
+        async def _collect_competitors():
+            async for outcome in run_bounded(
+                request.competitor_urls,
+                _analyze_competitor,
+                domain_of=domain_key,
+                concurrency=COMPETITOR_ANALYSIS_CONCURRENCY,
+            ):
+                competitor_url = outcome.item
+                if outcome.error is None:
+                    analyzed.append((outcome.index, outcome.result))
+                    logger.info(f"[Radar] ✅ Competitor {outcome.index + 1} done: {outcome.result['basic_analysis']['company']}")
+                elif isinstance(outcome.error, HTTPException):
+                    logger.error(f"[Radar] ❌ HTTPException for {competitor_url}: {outcome.error.detail}")
+                    failed_competitors.append({
+                        'url': competitor_url,
+                        'error': str(outcome.error.detail)
+                    })
+                else:
+                    logger.error(f"[Radar] ❌ Exception for {competitor_url}: {outcome.error}", exc_info=outcome.error)
+                    failed_competitors.append({
+                        'url': competitor_url,
+                        'error': f"Analysis failed: {str(outcome.error)}"
+                    })
+
+        competitors_task = asyncio.create_task(_collect_competitors())
+        try:
+            # A failed own-site analysis stops the fan-out instead of waiting it out
+            await asyncio.wait({your_task, competitors_task}, return_when=asyncio.FIRST_EXCEPTION)
+            if your_task.done() and not your_task.cancelled() and your_task.exception() is not None:
+                competitors_task.cancel()
+            your_analysis = await your_task
+            await competitors_task
+        finally:
+            pending = [task for task in (your_task, competitors_task) if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        # Keep request order for the matrix/positioning stages
+        competitor_analyses = [analysis for _, analysis in sorted(analyzed, key=lambda pair: pair[0])]
         
         # === 3. TARKISTA ETTÄ AINAKIN 1 KILPAILIJA ONNISTUI ===
         if not competitor_analyses:
@@ -10073,7 +10344,8 @@ async def analyze_competitive_radar(
         # === 4. UPDATE QUOTA ===
         if user.role != "admin":
             successful_analyses = 1 + len(competitor_analyses)
-            user_search_counts[user.username] = current_count + successful_analyses
+            # Re-read the counter: other requests may have moved it during the fan-out
+            user_search_counts[user.username] = user_search_counts.get(user.username, 0) + successful_analyses
             logger.info(f"[Radar] Used {successful_analyses} credits for {user.username}")
         
         # === 5. EXTRACT SUMMARIES ===
@@ -10763,14 +11035,15 @@ Respond in JSON:
 }}}}
 """
     
-    async with _LLM_SEMAPHORE:
-        response = await openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1500,
-            temperature=0.4,  # Hieman korkeampi creativity mutta silti fokus
-            response_format={"type": "json_object"}
-        )
+    response = await get_llm_gateway().chat(
+        openai_client,
+        label='ai_differentiation',
+        model=OPENAI_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=1500,
+        temperature=0.4,  # Hieman korkeampi creativity mutta silti fokus
+        response_format={"type": "json_object"}
+    )
 
     return json.loads(response.choices[0].message.content)
 
@@ -7,6 +7,19 @@ Endpoint: /ws/growth-engine/{user_id}
 This is SEPARATE from the analysis WebSocket (/api/v1/agents/ws) which is
 used for temporary connections during analysis.
 
+Notifications go through the fan-out hub (core.fanout, "notifications"
+channel), so they reach the user's websockets on every worker. Each one
+carries a per-user "seq"; reconnecting with ?last_seq=N replays what was
+missed. The welcome frame reports the latest sequence as "head_seq".
+
+Each notification is encoded once, when it is published; the hub carries
+that text to every worker and it is written to all of the user's sockets
+concurrently. A send that overruns NOTIFICATION_SEND_TIMEOUT is not
+cancelled (that could leave half a frame on the socket): it finishes in the
+background and later frames queue behind it. A socket that times out
+NOTIFICATION_SLOW_STRIKES times in a row is closed (1013); the client
+reconnects with last_seq and catches up from the replay log.
+
 Add to main.py:
     from notification_ws import notification_router
     app.include_router(notification_router)
@@ -19,8 +32,23 @@ from enum import Enum
 import asyncio
 import logging
 import json
+import time
 import jwt
 from agents.config import SECRET_KEY as _SECRET_KEY
+from app.config import NOTIFICATION_SEND_TIMEOUT, NOTIFICATION_SLOW_STRIKES
+from core.fanout import FanoutHub, FanoutMessage, get_fanout_hub
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    from agents.observability.metrics import get_metrics
+except ImportError:
+    get_metrics = None
 
 logger = logging.getLogger(__name__)
 
@@ -56,24 +84,48 @@ class NotificationType(str, Enum):
 # CONNECTION MANAGER
 # ============================================================================
 
+NOTIFICATIONS_CHANNEL = "notifications"
+
+
 class NotificationConnectionManager:
     """
     Manages persistent WebSocket connections for notifications.
     
     Features:
     - Supports multiple tabs per user
-    - User-specific message routing
-    - Broadcast to all users
+    - User-specific message routing, across workers (fan-out hub)
+    - Per-user sequence numbers and replay on reconnect
+    - Broadcast to all users connected to this worker
     - Connection heartbeat
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        hub: Optional[FanoutHub] = None,
+        send_timeout: float = NOTIFICATION_SEND_TIMEOUT,
+        max_slow_strikes: int = NOTIFICATION_SLOW_STRIKES,
+    ):
         # user_id -> Set[WebSocket]
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # WebSocket -> user_id (reverse lookup)
         self.connection_users: Dict[WebSocket, str] = {}
         # Last heartbeat per connection
         self.last_heartbeat: Dict[WebSocket, datetime] = {}
+        # Highest seq sent per connection (after a replay), to drop duplicates
+        self.cursors: Dict[WebSocket, int] = {}
+        # Live messages held back while a connection's replay is being sent
+        self._replaying: Dict[WebSocket, List[FanoutMessage]] = {}
+        # One writer at a time per connection, so frames stay in order
+        self._send_locks: Dict[WebSocket, asyncio.Lock] = {}
+        # Consecutive timed-out sends per connection
+        self.slow_strikes: Dict[WebSocket, int] = {}
+        # Sends still running per connection (including ones past their timeout)
+        self._writes: Dict[WebSocket, Set[asyncio.Task]] = {}
+        self.send_timeout = send_timeout
+        self.max_slow_strikes = max(1, max_slow_strikes)
+        self.evicted = 0
+        self.hub = hub or get_fanout_hub()
+        self.hub.register(NOTIFICATIONS_CHANNEL, self._deliver)
         
     async def connect(self, websocket: WebSocket, user_id: str) -> bool:
         """Accept connection and register user"""
@@ -82,6 +134,8 @@ class NotificationConnectionManager:
             
             if user_id not in self.active_connections:
                 self.active_connections[user_id] = set()
+                # First connection of this user on this worker: route their messages here
+                await self.hub.track(NOTIFICATIONS_CHANNEL, user_id)
             
             self.active_connections[user_id].add(websocket)
             self.connection_users[websocket] = user_id
@@ -94,17 +148,46 @@ class NotificationConnectionManager:
             logger.error(f"[Notification WS] Connection failed: {e}")
             return False
         
-    def disconnect(self, websocket: WebSocket):
+    async def disconnect(self, websocket: WebSocket):
         """Remove connection"""
         user_id = self.connection_users.pop(websocket, None)
         self.last_heartbeat.pop(websocket, None)
+        self.cursors.pop(websocket, None)
+        self._replaying.pop(websocket, None)
+        self._send_locks.pop(websocket, None)
+        self.slow_strikes.pop(websocket, None)
+        for write in self._writes.pop(websocket, ()):
+            write.cancel()
         
         if user_id and user_id in self.active_connections:
             self.active_connections[user_id].discard(websocket)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
+                await self.hub.untrack(NOTIFICATIONS_CHANNEL, user_id)
             logger.info(f"[Notification WS] User {user_id} disconnected")
     
+    async def resume(self, websocket: WebSocket, user_id: str, last_seq: int) -> int:
+        """
+        Send a reconnecting connection the notifications after last_seq.
+        Live notifications arriving meanwhile are sent after the replay, in
+        order and without duplicates. Returns the number replayed.
+        """
+        held = self._replaying[websocket] = []
+        try:
+            replay = await self.hub.replay(NOTIFICATIONS_CHANNEL, user_id, last_seq)
+            if not replay.complete:
+                logger.info(f"[Notification WS] Replay for {user_id} after seq {last_seq} is partial")
+            self.cursors[websocket] = replay.cursor
+            for message in replay.messages:
+                await self._write(websocket, self._encode(message))
+            while held:
+                message = held.pop(0)
+                if self._admit(websocket, message, hold=False):
+                    await self._write(websocket, self._encode(message))
+        finally:
+            self._replaying.pop(websocket, None)
+        return len(replay.messages)
+    
     def get_user_connection_count(self, user_id: str) -> int:
         """Get number of active connections for a user"""
         return len(self.active_connections.get(user_id, set()))
@@ -115,51 +198,163 @@ class NotificationConnectionManager:
     
     async def send_to_user(self, user_id: str, message: dict) -> int:
         """
-        Send notification to all connections of a user.
-        Returns number of successful sends.
+        Send notification to all connections of a user, on any worker.
+        Returns the notification's sequence number (0 if the fan-out backend
+        was down and only this worker's connections got it).
         """
-        if user_id not in self.active_connections:
-            return 0
-        
         # Add timestamp if not present
         if "timestamp" not in message:
             message["timestamp"] = datetime.now().isoformat()
         
-        successful = 0
-        dead_connections = set()
-        
-        for websocket in self.active_connections[user_id]:
-            try:
-                await self._send_json(websocket, message)
-                successful += 1
-            except Exception as e:
-                logger.warning(f"[Notification WS] Send failed: {e}")
-                dead_connections.add(websocket)
-        
-        # Clean up dead connections
-        for ws in dead_connections:
-            self.disconnect(ws)
-        
-        return successful
+        # Encoded here only; the hub passes the text through to every worker
+        return await self.hub.publish(NOTIFICATIONS_CHANNEL, user_id, message, text=self._dumps(message))
     
-    async def broadcast(self, message: dict, exclude_user: Optional[str] = None):
-        """Send to all connected users"""
+    async def broadcast(self, message: dict, exclude_user: Optional[str] = None) -> int:
+        """Send to all users connected to this worker (not sequenced)"""
         if "timestamp" not in message:
             message["timestamp"] = datetime.now().isoformat()
         
-        for user_id in list(self.active_connections.keys()):
-            if user_id != exclude_user:
-                await self.send_to_user(user_id, message)
+        websockets = [
+            websocket
+            for user_id, connections in list(self.active_connections.items())
+            if user_id != exclude_user
+            for websocket in connections
+        ]
+        return await self._send_many(websockets, message, kind="broadcast")
+    
+    async def _deliver(self, message: FanoutMessage):
+        """Fan-out handler: send to this worker's connections of the user"""
+        await self._send_local(message.user_id, message)
+    
+    async def _send_local(self, user_id: str, message) -> int:
+        """
+        Send a FanoutMessage (or a plain dict) to this worker's connections of a user.
+        Returns number of successful sends.
+        """
+        websockets = list(self.active_connections.get(user_id, ()))
+        if isinstance(message, FanoutMessage):
+            websockets = [ws for ws in websockets if self._admit(ws, message)]
+            message = self._encode(message)
+        return await self._send_many(websockets, message)
+    
+    def _admit(self, websocket: WebSocket, message: FanoutMessage, hold: bool = True) -> bool:
+        """Whether a sequenced message goes to websocket now (held during its replay, duplicates dropped)"""
+        held = self._replaying.get(websocket)
+        if hold and held is not None:
+            held.append(message)
+            return False
+        if message.seq:
+            if message.seq <= self.cursors.get(websocket, 0):
+                return False  # already replayed
+            self.cursors[websocket] = message.seq
+        return True
+    
+    @classmethod
+    def _encode(cls, message: FanoutMessage) -> str:
+        """The message as sent to clients: its payload plus "seq", reusing the published text"""
+        if message.text is None:
+            return cls._dumps({**message.payload, "seq": message.seq})
+        body = message.text.strip()[1:-1].strip()
+        return f'{{{body}{"," if body else ""}"seq":{message.seq}}}'
+    
+    async def _send_many(self, websockets: List[WebSocket], data, kind: str = "user") -> int:
+        """
+        Encode once (data is a dict, or text already encoded), then write to
+        every connection concurrently, so a slow client only delays itself.
+        Returns number of successful sends.
+        """
+        if not websockets:
+            return 0
+        started = time.monotonic()
+        text = data if isinstance(data, str) else self._dumps(data)
+        results = await asyncio.gather(*(self._send_text(ws, text) for ws in websockets))
+        if get_metrics is not None:
+            get_metrics().record_notification_fanout(kind, time.monotonic() - started)
+        return sum(results)
+    
+    async def _send_text(self, websocket: WebSocket, text: str) -> bool:
+        """
+        One bounded send; failed connections are dropped, chronically slow ones
+        evicted. The wait is bounded, the write is not: cancelling send_text
+        mid-write could leave a partial frame, so an overdue write keeps going
+        (frames after it wait on the connection's lock) and counts as a strike.
+        """
+        started = time.monotonic()
+        write = asyncio.ensure_future(self._write(websocket, text))
+        self._writes.setdefault(websocket, set()).add(write)
+        write.add_done_callback(lambda task: self._write_done(websocket, task))
+        done, _ = await asyncio.wait({write}, timeout=self.send_timeout)
+        if not done:
+            self._record_delivery(started, "timeout")
+            strikes = self.slow_strikes[websocket] = self.slow_strikes.get(websocket, 0) + 1
+            logger.warning(f"[Notification WS] Send timed out ({strikes}/{self.max_slow_strikes})")
+            if strikes >= self.max_slow_strikes:
+                await self._evict(websocket, "slow")
+            return False
+        try:
+            write.result()
+        except Exception as e:
+            self._record_delivery(started, "error")
+            logger.warning(f"[Notification WS] Send failed: {e}")
+            await self.disconnect(websocket)
+            return False
+        self.slow_strikes.pop(websocket, None)
+        self._record_delivery(started, "ok")
+        return True
+    
+    def _write_done(self, websocket: WebSocket, write: asyncio.Task):
+        writes = self._writes.get(websocket)
+        if writes is not None:
+            writes.discard(write)
+            if not writes:
+                del self._writes[websocket]
+        if not write.cancelled() and write.exception() is not None:
+            # An overdue write that failed later; the next send drops the connection
+            logger.debug(f"[Notification WS] Background send failed: {write.exception()}")
+    
+    async def _write(self, websocket: WebSocket, text: str):
+        lock = self._send_locks.setdefault(websocket, asyncio.Lock())
+        async with lock:
+            await websocket.send_text(text)
+    
+    async def _evict(self, websocket: WebSocket, reason: str):
+        user_id = self.connection_users.get(websocket)
+        logger.warning(f"[Notification WS] Evicting {reason} connection of {user_id}")
+        # Overdue writes are only cancelled once the close frame had its chance
+        writes = self._writes.pop(websocket, set())
+        await self.disconnect(websocket)
+        self.evicted += 1
+        if get_metrics is not None:
+            get_metrics().record_notification_eviction(reason)
+        try:
+            # 1013 Try Again Later: the client reconnects with last_seq
+            await asyncio.wait_for(websocket.close(code=1013), 1.0)
+        except Exception:
+            pass
+        for write in writes:
+            write.cancel()
+    
+    @staticmethod
+    def _record_delivery(started: float, result: str):
+        if get_metrics is not None:
+            get_metrics().record_notification_delivery(time.monotonic() - started, result)
     
     async def _send_json(self, websocket: WebSocket, data: dict):
         """Send JSON with datetime serialization"""
-        def serialize(obj):
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
-        
-        json_str = json.dumps(data, default=serialize)
-        await websocket.send_text(json_str)
+        await self._write(websocket, self._dumps(data))
+    
+    @staticmethod
+    def _dumps(data: dict) -> str:
+        if ORJSON_AVAILABLE:
+            # Handles datetime natively (same ISO format as isoformat())
+            return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        return json.dumps(data, default=_json_default)
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
 
 # Global manager instance
@@ -197,16 +392,19 @@ def verify_notification_token(token: str) -> Optional[dict]:
 async def notification_websocket(
     websocket: WebSocket,
     user_id: str,
-    token: Optional[str] = Query(None)
+    token: Optional[str] = Query(None),
+    last_seq: Optional[int] = Query(None, ge=0)
 ):
     """
     Persistent WebSocket for dashboard notifications.
     
     Connect: wss://api.brandista.eu/ws/growth-engine/{user_id}?token=JWT
+    Reconnect: ...?token=JWT&last_seq=<seq of the last notification received>
     
     Protocol:
     
-    1. Client connects with user_id and JWT token
+    1. Client connects with user_id and JWT token (and last_seq when resuming;
+       notifications after it are replayed first)
     2. Server sends notifications as they occur:
        - {"type": "agent_insight", "data": {...}}
        - {"type": "threat_detected", "data": {...}}
@@ -226,7 +424,8 @@ async def notification_websocket(
             "priority": "critical",
             "insight_type": "threat"
         },
-        "timestamp": "2025-01-15T10:30:00Z"
+        "timestamp": "2025-01-15T10:30:00Z",
+        "seq": 42
     }
     """
     # Verify token
@@ -245,17 +444,24 @@ async def notification_websocket(
     if not connected:
         return
     
-    # Send welcome message
-    await notification_manager.send_to_user(user_id, {
-        "type": NotificationType.SYSTEM_MESSAGE.value,
-        "data": {
-            "message": "Connected to notification service",
-            "user_id": user_id,
-            "connections": notification_manager.get_user_connection_count(user_id)
-        }
-    })
-    
     try:
+        # Send welcome message (this connection only). "head_seq" is the latest
+        # notification's sequence; it is not "seq", so a client that tracks
+        # the last "seq" it received does not skip a replay cut short
+        await notification_manager._send_json(websocket, {
+            "type": NotificationType.SYSTEM_MESSAGE.value,
+            "data": {
+                "message": "Connected to notification service",
+                "user_id": user_id,
+                "connections": notification_manager.get_user_connection_count(user_id)
+            },
+            "head_seq": await notification_manager.hub.head(NOTIFICATIONS_CHANNEL, user_id),
+            "timestamp": datetime.now().isoformat()
+        })
+        
+        if last_seq is not None:
+            await notification_manager.resume(websocket, user_id, last_seq)
+        
         while True:
             # Wait for messages from client
             try:
@@ -297,7 +503,7 @@ async def notification_websocket(
     except Exception as e:
         logger.error(f"[Notification WS] Error: {e}")
     finally:
-        notification_manager.disconnect(websocket)
+        await notification_manager.disconnect(websocket)
 
 
 # ============================================================================
@@ -311,7 +517,9 @@ async def send_notification_to_user(
     priority: str = "medium"
 ) -> bool:
     """
-    Send a notification to a user from anywhere in the backend.
+    Send a notification to a user from anywhere in the backend. It reaches
+    the user's connections on every worker, and is kept for replay if they
+    are offline.
     
     Usage:
         from notification_ws import send_notification_to_user
@@ -327,10 +535,6 @@ async def send_notification_to_user(
             priority="critical"
         )
     """
-    if not notification_manager.is_user_connected(user_id):
-        logger.debug(f"[Notification] User {user_id} not connected, notification not sent")
-        return False
-    
     message = {
         "type": notification_type,
         "data": {
@@ -340,8 +544,8 @@ async def send_notification_to_user(
         "timestamp": datetime.now().isoformat()
     }
     
-    sent = await notification_manager.send_to_user(user_id, message)
-    return sent > 0
+    seq = await notification_manager.send_to_user(user_id, message)
+    return seq > 0 or notification_manager.is_user_connected(user_id)
 
 
 async def notify_analysis_complete(
@@ -29,6 +29,8 @@ except ImportError:
     SCHEDULER_AVAILABLE = False
     logging.warning("APScheduler not installed. Install with: pip install apscheduler")
 
+from core.llm_gateway import llm_lane
+
 # Email notifications
 from email_notifications import send_email, ADMIN_EMAIL
 
@@ -82,8 +84,9 @@ class ScheduledAnalysisManager:
 
             # Initialize database pool
             if self.database_url:
-                import asyncpg
-                self.pool = await asyncpg.create_pool(
+                from core.db_pool import open_pool
+                self.pool = await open_pool(
+                    "scheduled_analysis",
                     self.database_url,
                     min_size=1,
                     max_size=5,
@@ -328,8 +331,10 @@ class ScheduledAnalysisManager:
 
                 logger.info(f"Found {len(due_analyses)} due analyses to process")
 
-                for analysis in due_analyses:
-                    await self._run_single_analysis(dict(analysis))
+                # Scheduled work yields LLM capacity to interactive requests
+                with llm_lane("background"):
+                    for analysis in due_analyses:
+                        await self._run_single_analysis(dict(analysis))
 
         except Exception as e:
             logger.error(f"Error processing due analyses: {e}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for Blackboard.query().
+
+Fills a board with N keys spread over many agents, of which a fixed 50 live
+under "scout.*", then times the prefix query against a plain regex scan over
+every key (the pre-index implementation). With the key trie the query time
+should stay flat as N grows; the scan grows linearly.
+
+    python scripts/bench_blackboard.py
+    python scripts/bench_blackboard.py --sizes 1000 10000 100000 --repeat 200
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.blackboard import Blackboard, DataCategory  # noqa: E402
+
+MATCHES = 50
+
+
+async def fill(bb: Blackboard, size: int) -> None:
+    for i in range(MATCHES):
+        await bb.publish(f"scout.competitor.{i}", {"i": i}, "scout", category=DataCategory.COMPETITOR)
+    for i in range(size - MATCHES):
+        await bb.publish(f"agent{i % 500}.item.{i}", {"i": i}, f"agent{i % 500}",
+                         category=DataCategory.ANALYSIS, tags={f"t{i % 20}"})
+
+
+def naive_query(bb: Blackboard, pattern: str, limit: int = 100):
+    regex = re.compile("^" + pattern.replace(".", r"\.").replace("*", ".*") + "$")
+    return [e for k, e in bb._data.items() if regex.match(k) and not e.is_expired()][:limit]
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'keys':>8} {'indexed µs':>12} {'scan µs':>10} {'candidates':>11}")
+    for size in args.sizes:
+        bb = Blackboard()
+        await fill(bb, size)
+        assert len(bb.query("scout.*")) == len(naive_query(bb, "scout.*")) == MATCHES
+
+        before = bb._stats["query_candidates"]
+        indexed = timed(lambda: bb.query("scout.*"), args.repeat)
+        candidates = (bb._stats["query_candidates"] - before) // args.repeat
+        scan = timed(lambda: naive_query(bb, "scout.*"), max(1, args.repeat // 10))
+        print(f"{size:>8} {indexed:>12.1f} {scan:>10.1f} {candidates:>11}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Interactive latency under a background LLM backlog, through the gateway
+and through the old fixed semaphore.
+
+Queues --background completions at once in the background lane (a
+scheduled-analysis burst), then sends --interactive completions one every
+--gap seconds (users on chat), against scripts/fake_openai_server.py
+running in-process (or a server at --base-url). Reports latency
+percentiles per lane, failures, 429s the server returned and the gateway's
+final limit.
+
+    python scripts/bench_llm_gateway.py
+    python scripts/bench_llm_gateway.py --mode semaphore
+    python scripts/bench_llm_gateway.py --rpm 300 --concurrency 12 --background 400
+    python scripts/bench_llm_gateway.py --base-url http://127.0.0.1:8099/v1
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from openai import AsyncOpenAI  # noqa: E402
+
+from core.llm_gateway import LLMGateway, llm_lane  # noqa: E402
+from scripts.fake_openai_server import create_app  # noqa: E402
+
+PROMPT = "Summarise the competitive position of example.fi in three sentences. " * 8
+
+
+def _client(args) -> AsyncOpenAI:
+    if args.base_url:
+        return AsyncOpenAI(api_key="fake", base_url=args.base_url)
+    app = create_app(rpm=args.rpm, tpm=args.tpm, concurrency=args.concurrency, latency=args.latency,
+                     jitter=args.latency / 2, per_token_ms=1.0, window=args.window, seed=1)
+    transport = httpx.ASGITransport(app=app)
+    return AsyncOpenAI(api_key="fake", base_url="http://fake-openai/v1",
+                       http_client=httpx.AsyncClient(transport=transport, base_url="http://fake-openai"))
+
+
+async def _server_stats(client: AsyncOpenAI) -> dict:
+    response = await client._client.get(str(client.base_url).replace("/v1/", "/stats"))
+    return response.json() if response.status_code == 200 else {}
+
+
+async def run(args) -> None:
+    client = _client(args)
+    gateway = LLMGateway(initial_concurrency=args.initial, max_concurrency=args.max_concurrency,
+                         background_share=args.background_share, tokens_per_minute=args.tpm_budget)
+    # The pre-gateway setup: one fixed semaphore, SDK retries on 429
+    semaphore = asyncio.Semaphore(args.fixed)
+    latencies = {"interactive": [], "background": []}
+    failures = {"interactive": 0, "background": 0}
+
+    async def one(lane: str) -> None:
+        request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": PROMPT}],
+                   "max_tokens": 150, "temperature": 0.5}
+        started = time.monotonic()
+        try:
+            if args.mode == "gateway":
+                await gateway.chat(client, label=f"bench_{lane}", lane=lane, **request)
+            else:
+                async with semaphore:
+                    await client.chat.completions.create(**request)
+            latencies[lane].append(time.monotonic() - started)
+        except Exception:
+            failures[lane] += 1
+
+    started = time.monotonic()
+    with llm_lane("background"):
+        background = [asyncio.create_task(one("background")) for _ in range(args.background)]
+    interactive = []
+    for _ in range(args.interactive):
+        interactive.append(asyncio.create_task(one("interactive")))
+        await asyncio.sleep(args.gap)
+    await asyncio.gather(*interactive, *background)
+    elapsed = time.monotonic() - started
+
+    print(f"mode={args.mode}  wall={elapsed:.1f}s")
+    for lane, values in latencies.items():
+        if not values:
+            print(f"  {lane:<11} no successful calls, {failures[lane]} failed")
+            continue
+        values.sort()
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"  {lane:<11} ok={len(values):<4} failed={failures[lane]:<3} "
+              f"p50={statistics.median(values):6.2f}s  p95={p95:6.2f}s  max={values[-1]:6.2f}s")
+    server = await _server_stats(client)
+    if server:
+        limited = sum(v for k, v in server.items() if k.startswith("rate_limited"))
+        print(f"  server      requests={server['requests']} 429s={limited} peak_in_flight={server['peak_in_flight']}")
+    if args.mode == "gateway":
+        stats = gateway.stats()
+        print(f"  gateway     limit={stats['limit']} (+{stats['limit_increases']}/-{stats['limit_decreases']}) "
+              f"retries={stats['retries']} pauses={stats['pauses']} tpm_waits={stats['tpm_waits']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=("gateway", "semaphore"), default="gateway")
+    parser.add_argument("--base-url", help="use a running fake (or real) server instead of the in-process one")
+    parser.add_argument("--background", type=int, default=200)
+    parser.add_argument("--interactive", type=int, default=40)
+    parser.add_argument("--gap", type=float, default=0.1, help="seconds between interactive calls")
+    parser.add_argument("--rpm", type=int, default=400)
+    parser.add_argument("--tpm", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=16, help="server-side in-flight limit")
+    parser.add_argument("--window", type=float, default=10.0, help="server rate limit window (s)")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--initial", type=int, default=8)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--background-share", type=float, default=0.5)
+    parser.add_argument("--tpm-budget", type=int, default=0)
+    parser.add_argument("--fixed", type=int, default=5, help="semaphore size in --mode semaphore")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
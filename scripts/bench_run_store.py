@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Redis operations per Growth Engine run, before and after write batching.
+
+Replays the RunStore traffic of a run (create, running, trace entries,
+N progress/insight events, result, completed) against a real Redis, once
+through the pre-batching RedisRunStore write path and once through the
+current one, and reports client round trips and server-side commands
+(INFO commandstats) per run.
+
+    REDIS_URL=redis://localhost:6379/15 python scripts/bench_run_store.py
+    python scripts/bench_run_store.py --runs 5 --events 500 --batch 10
+
+Use a scratch database: the benchmark writes run:bench-* keys and deletes
+them afterwards.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.run_store import (  # noqa: E402
+    EVENT_STREAM_TTL,
+    RUN_DATA_TTL,
+    RedisRunStore,
+    RunEvent,
+    RunMeta,
+)
+
+
+class LegacyRedisRunStore(RedisRunStore):
+    """The write path before batching: per-call EXPIREs, read-then-write status."""
+
+    async def create_run(self, run_id, meta):
+        await self._ensure_connected()
+        pipe = self._redis.pipeline()
+        pipe.set(self._key(run_id, 'meta'), json.dumps(meta.to_dict()), ex=RUN_DATA_TTL)
+        pipe.set(self._key(run_id, 'status'), 'pending', ex=RUN_DATA_TTL)
+        pipe.zadd('runs:index', {run_id: datetime.now().timestamp()})
+        pipe.sadd('runs:status:pending', run_id)
+        await pipe.execute()
+        return True
+
+    async def set_status(self, run_id, status):
+        await self._ensure_connected()
+        old_status = await self.get_status(run_id)
+        pipe = self._redis.pipeline()
+        pipe.set(self._key(run_id, 'status'), status, ex=RUN_DATA_TTL)
+        if old_status:
+            pipe.srem(f'runs:status:{old_status}', run_id)
+        pipe.sadd(f'runs:status:{status}', run_id)
+        meta_key = self._key(run_id, 'meta')
+        meta_json = await self._redis.get(meta_key)
+        if meta_json:
+            meta = json.loads(meta_json)
+            if status == 'running' and not meta.get('started_at'):
+                meta['started_at'] = datetime.now().isoformat()
+            elif status in ('completed', 'failed', 'cancelled'):
+                meta['completed_at'] = datetime.now().isoformat()
+            pipe.set(meta_key, json.dumps(meta), ex=RUN_DATA_TTL)
+        await pipe.execute()
+        return True
+
+    async def append_trace(self, run_id, event):
+        await self._ensure_connected()
+        await self._redis.rpush(self._key(run_id, 'trace'), json.dumps(event.to_dict()))
+        await self._redis.expire(self._key(run_id, 'trace'), RUN_DATA_TTL)
+        return True
+
+    async def emit_event(self, run_id, event):
+        await self._ensure_connected()
+        stream_key = self._key(run_id, 'events')
+        event_id = await self._redis.xadd(stream_key, {
+            'type': event.event_type,
+            'agent_id': event.agent_id or '',
+            'timestamp': event.timestamp,
+            'data': json.dumps(event.data, default=str),
+        }, maxlen=1000)
+        await self._redis.expire(stream_key, EVENT_STREAM_TTL)
+        return event_id
+
+    async def emit_events(self, run_id, events):
+        return [await self.emit_event(run_id, event) for event in events]
+
+
+class RoundTrips:
+    """Counts packets written to Redis connections (one per command or pipeline)."""
+
+    def __init__(self):
+        from redis.asyncio.connection import Connection
+        self._cls = Connection
+        self._orig = Connection.send_packed_command
+        self.count = 0
+
+    def __enter__(self):
+        counter = self
+        orig = self._orig
+
+        async def send_packed_command(conn, command, check_health=True):
+            counter.count += 1
+            return await orig(conn, command, check_health)
+
+        self._cls.send_packed_command = send_packed_command
+        return self
+
+    def __exit__(self, *exc):
+        self._cls.send_packed_command = self._orig
+
+
+async def server_commands(client) -> int:
+    stats = await client.info('commandstats')
+    return sum(v['calls'] for k, v in stats.items() if k.startswith('cmdstat_'))
+
+
+async def simulate_run(store, events: int, batch: int) -> str:
+    run_id = f"bench-{uuid.uuid4().hex[:10]}"
+    await store.create_run(run_id, RunMeta(run_id=run_id, user_id="bench"))
+    await store.set_status(run_id, 'running')
+    await store.append_trace(run_id, RunEvent(event_type='run_started'))
+
+    pending = [
+        RunEvent(event_type='agent_insight' if i % 10 == 0 else 'agent_progress',
+                 agent_id=f"agent{i % 6}", data={'i': i, 'progress': i % 100})
+        for i in range(events)
+    ]
+    # RunEventStream persists whatever queued up while the last frame was sent
+    for start in range(0, events, batch):
+        await store.emit_events(run_id, pending[start:start + batch])
+
+    await store.set_result(run_id, {'score': 42})
+    await store.set_status(run_id, 'completed')
+    await store.append_trace(run_id, RunEvent(event_type='run_completed'))
+    return run_id
+
+
+async def measure(store, runs: int, events: int, batch: int):
+    await store._ensure_connected()
+    client = store._redis
+    before = await server_commands(client)
+    start = time.perf_counter()
+    with RoundTrips() as trips:
+        run_ids = await asyncio.gather(*(simulate_run(store, events, batch) for _ in range(runs)))
+    elapsed = time.perf_counter() - start
+    # INFO itself is one command
+    commands = await server_commands(client) - before - 1
+
+    for run_id in run_ids:
+        await client.delete(*(store._key(run_id, s) for s in ('meta', 'status', 'result', 'trace', 'events')))
+        await client.zrem('runs:index', run_id)
+        for status in ('pending', 'running', 'completed'):
+            await client.srem(f'runs:status:{status}', run_id)
+    return trips.count / runs, commands / runs, elapsed * 1000 / runs
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="concurrent runs")
+    parser.add_argument("--events", type=int, default=300, help="events per run")
+    parser.add_argument("--batch", type=int, default=10, help="events per RunEventStream flush")
+    args = parser.parse_args()
+
+    url = os.environ.get("REDIS_URL")
+    if not url:
+        sys.exit("Set REDIS_URL (a scratch database) to run this benchmark")
+
+    print(f"{args.runs} runs x {args.events} events (stream batches of {args.batch})")
+    print(f"{'store':>8} {'round trips/run':>16} {'commands/run':>13} {'ms/run':>8}")
+    for name, store in (("before", LegacyRedisRunStore(redis_url=url)), ("after", RedisRunStore(redis_url=url))):
+        trips, commands, ms = await measure(store, args.runs, args.events, args.batch)
+        print(f"{name:>8} {trips:>16.0f} {commands:>13.0f} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
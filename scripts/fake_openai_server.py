@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions API, for load-testing the
+LLM gateway (core/llm_gateway.py) without spending tokens.
+
+It enforces the limits a real account has, so AIMD, priority lanes, the
+token budget and Retry-After handling meet the same signals in a test:
+
+  - --rpm / --tpm: requests and tokens per window (sliding, 60 s); over
+    either → 429 with Retry-After, retry-after-ms and x-ratelimit-* headers
+  - --concurrency: in-flight requests beyond this → 429 without Retry-After
+    (the provider's "slow down", which the gateway must infer from)
+  - --latency / --jitter / --per-token-ms: time to answer
+  - --error-rate: fraction of 500s
+
+Responses are chat.completion objects with usage, so the openai SDK parses
+them like the real API; response_format json_object gets a JSON body.
+GET /stats reports what the server saw.
+
+    python scripts/fake_openai_server.py --port 8099 --rpm 600 --tpm 60000
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8099/v1 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def _prompt_tokens(messages) -> int:
+    return sum(len(str(m.get("content") or "")) for m in messages or []) // 4 + 4 * len(messages or [])
+
+
+def create_app(
+    rpm: int = 0,
+    tpm: int = 0,
+    concurrency: int = 0,
+    latency: float = 0.2,
+    jitter: float = 0.1,
+    per_token_ms: float = 0.0,
+    completion_tokens: int = 150,
+    error_rate: float = 0.0,
+    window: float = 60.0,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """A FastAPI app serving POST /v1/chat/completions under the given limits."""
+    app = FastAPI(title="Fake OpenAI")
+    rng = random.Random(seed)
+    # (timestamp, tokens) per accepted request inside the window
+    accepted: Deque[Tuple[float, int]] = deque()
+    state: Dict[str, Any] = {"in_flight": 0, "peak_in_flight": 0}
+    stats = {"requests": 0, "ok": 0, "rate_limited_rpm": 0, "rate_limited_tpm": 0,
+             "rate_limited_concurrency": 0, "errors": 0, "tokens": 0}
+
+    def _trim(now: float) -> None:
+        while accepted and accepted[0][0] <= now - window:
+            accepted.popleft()
+
+    def _too_many(status_key: str, message: str, retry_in: Optional[float]) -> JSONResponse:
+        stats[status_key] += 1
+        headers = {
+            "x-ratelimit-limit-requests": str(rpm),
+            "x-ratelimit-remaining-requests": str(max(0, rpm - len(accepted))) if rpm else "0",
+            "x-ratelimit-limit-tokens": str(tpm),
+        }
+        if retry_in is not None:
+            headers["retry-after"] = str(max(1, math.ceil(retry_in)))
+            headers["retry-after-ms"] = str(max(1, int(retry_in * 1000)))
+        body = {"error": {"message": message, "type": "requests", "param": None, "code": "rate_limit_exceeded"}}
+        return JSONResponse(body, status_code=429, headers=headers)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        stats["requests"] += 1
+        now = time.monotonic()
+        _trim(now)
+
+        prompt = _prompt_tokens(payload.get("messages"))
+        completion = min(int(payload.get("max_tokens") or completion_tokens), completion_tokens)
+        total = prompt + completion
+
+        if concurrency and state["in_flight"] >= concurrency:
+            return _too_many("rate_limited_concurrency", "Too many concurrent requests", None)
+        if rpm and len(accepted) >= rpm:
+            return _too_many("rate_limited_rpm", f"Rate limit reached for requests per {window:g}s",
+                             accepted[0][0] + window - now)
+        if tpm and sum(tokens for _, tokens in accepted) + total > tpm:
+            # Time until enough of the window has expired to fit this request
+            freed, retry_in = 0, window
+            used = sum(tokens for _, tokens in accepted)
+            for stamp, tokens in accepted:
+                freed += tokens
+                if used - freed + total <= tpm:
+                    retry_in = stamp + window - now
+                    break
+            return _too_many("rate_limited_tpm", f"Rate limit reached for tokens per {window:g}s", retry_in)
+
+        accepted.append((now, total))
+        state["in_flight"] += 1
+        state["peak_in_flight"] = max(state["peak_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(latency + rng.uniform(0, jitter) + completion * per_token_ms / 1000)
+        finally:
+            state["in_flight"] -= 1
+
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "The server had an error", "type": "server_error",
+                                           "param": None, "code": None}}, status_code=500)
+
+        stats["ok"] += 1
+        stats["tokens"] += total
+        wants_json = (payload.get("response_format") or {}).get("type") == "json_object"
+        content = json.dumps({"fake": True, "tokens": completion}) if wants_json else f"Fake answer ({completion} tokens)"
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model") or "gpt-4o-mini",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": total},
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, **state, "window_requests": len(accepted)}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--rpm", type=int, default=600, help="requests per window (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=60000, help="tokens per window (0 = unlimited)")
+    parser.add_argument("--concurrency", type=int, default=0, help="max in flight (0 = unlimited)")
+    parser.add_argument("--latency", type=float, default=0.5, help="base seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--per-token-ms", type=float, default=2.0)
+    parser.add_argument("--completion-tokens", type=int, default=150)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--window", type=float, default=60.0, help="rate limit window in seconds")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_app(rpm=args.rpm, tpm=args.tpm, concurrency=args.concurrency, latency=args.latency,
+                     jitter=args.jitter, per_token_ms=args.per_token_ms,
+                     completion_tokens=args.completion_tokens, error_rate=args.error_rate, window=args.window)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
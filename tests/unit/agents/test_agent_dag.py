@@ -0,0 +1,135 @@
+"""
+Tests for the agent dependency graph scheduler
+"""
+
+import asyncio
+
+import pytest
+
+from agents.agent_dag import AgentDAG, AgentGraphError
+from agents.agent_types import AgentResult, AgentStatus
+
+
+def _result(agent_id, status=AgentStatus.COMPLETE):
+    return AgentResult(agent_id=agent_id, agent_name=agent_id, status=status, execution_time_ms=0)
+
+
+def _runner(durations, failing=(), started=None):
+    async def run_one(agent_id):
+        if started is not None:
+            started.append(agent_id)
+        await asyncio.sleep(durations.get(agent_id, 0))
+        if agent_id in failing:
+            return _result(agent_id, AgentStatus.ERROR)
+        return _result(agent_id)
+    return run_one
+
+
+GROWTH_ENGINE = {
+    "scout": [],
+    "analyst": ["scout"],
+    "guardian": ["scout", "analyst"],
+    "prospector": ["scout", "analyst"],
+    "strategist": ["scout", "analyst", "guardian", "prospector"],
+    "planner": ["scout", "analyst", "guardian", "prospector", "strategist"],
+}
+
+
+def test_levels_match_former_execution_plan():
+    assert AgentDAG(GROWTH_ENGINE).levels() == [
+        ["scout"], ["analyst"], ["guardian", "prospector"], ["strategist"], ["planner"]
+    ]
+
+
+def test_cycles_are_rejected_and_unknown_deps_ignored():
+    with pytest.raises(AgentGraphError):
+        AgentDAG({"a": ["b"], "b": ["a"]})
+    assert AgentDAG({"a": ["missing"]}).dependencies == {"a": []}
+
+
+@pytest.mark.asyncio
+async def test_agent_starts_when_its_own_dependencies_finish():
+    # c needs only a; with levels it would also have waited for the slow b
+    dag = AgentDAG({"a": [], "b": [], "c": ["a"]})
+    report = await dag.run(_runner({"a": 0.01, "b": 0.2, "c": 0.01}))
+
+    timings = report.timings
+    assert timings["c"].start_ms < timings["b"].end_ms
+    assert report.critical_path == ["b"]
+    assert all(t.status == "complete" for t in timings.values())
+
+
+@pytest.mark.asyncio
+async def test_critical_path_follows_gating_dependency():
+    report = await AgentDAG(GROWTH_ENGINE).run(
+        _runner({"scout": 0.01, "analyst": 0.01, "guardian": 0.01, "prospector": 0.05,
+                 "strategist": 0.01, "planner": 0.01})
+    )
+    assert report.critical_path == ["scout", "analyst", "prospector", "strategist", "planner"]
+    assert report.timings["strategist"].queue_delay_ms >= 0
+    assert report.to_dict()["agents"]["planner"]["duration_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_optional_agent_skipped_when_input_failed():
+    dag = AgentDAG({"a": [], "b": ["a"], "c": ["a"], "d": ["b"]}, optional={"b", "d"})
+    started = []
+    report = await dag.run(_runner({}, failing={"a"}, started=started))
+
+    assert report.timings["a"].status == "failed"
+    assert report.timings["b"].status == "skipped"
+    assert report.timings["d"].status == "skipped"  # its input was skipped
+    # Required agents still run with partial inputs
+    assert report.timings["c"].status == "complete"
+    assert started == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_exceptions_mark_agent_failed():
+    async def run_one(agent_id):
+        raise RuntimeError("boom")
+
+    report = await AgentDAG({"a": []}).run(run_one)
+    assert report.timings["a"].status == "failed"
+    assert report.results["a"].status == AgentStatus.ERROR
+
+
+@pytest.mark.asyncio
+async def test_should_stop_prevents_remaining_agents():
+    stop = False
+
+    async def should_stop():
+        return stop
+
+    async def run_one(agent_id):
+        nonlocal stop
+        stop = True
+        return _result(agent_id)
+
+    report = await AgentDAG({"a": [], "b": ["a"]}).run(run_one, should_stop=should_stop)
+    assert report.cancelled
+    assert report.timings["a"].status == "complete"
+    assert report.timings["b"].status == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_reports_schedule(monkeypatch):
+    from agents.orchestrator import GrowthEngineOrchestrator
+
+    orchestrator = GrowthEngineOrchestrator()
+    order = []
+
+    async def fake_run_agent(agent_id, context, run_context=None, run_agents=None):
+        order.append(agent_id)
+        return _result(agent_id)
+
+    monkeypatch.setattr(orchestrator, "_run_agent", fake_run_agent)
+    result = await orchestrator.run_analysis("https://example.com")
+
+    assert order[0] == "scout" and order[-1] == "planner"
+    assert set(result.agent_results) == set(GROWTH_ENGINE)
+    schedule = result.swarm_summary["schedule"]
+    assert schedule["critical_path"][0] == "scout"
+    assert schedule["critical_path"][-1] == "planner"
+    assert set(schedule["agents"]) == set(GROWTH_ENGINE)
+    assert orchestrator.get_execution_plan() == AgentDAG(GROWTH_ENGINE).levels()
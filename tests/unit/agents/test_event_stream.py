@@ -0,0 +1,176 @@
+"""
+Tests for the agent websocket event stream
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from agents.event_stream import RunEventStream, replay_run_events
+from agents.run_store import InMemoryRunStore, RunMeta
+
+
+class Client:
+    """Collects frames; optionally slow or broken."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.frames = []
+        self.delay = delay
+        self.fail = fail
+
+    async def send(self, text):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        await asyncio.sleep(self.delay)
+        self.frames.append(json.loads(text))
+
+    @property
+    def events(self):
+        out = []
+        for frame in self.frames:
+            out.extend(frame["events"] if frame["type"] == "batch" else [frame])
+        return out
+
+
+def _progress(agent_id, pct):
+    return {"type": "agent_progress", "data": {"agent_id": agent_id, "progress": pct}}
+
+
+def _event(event_type, n):
+    return {"type": event_type, "data": {"n": n}}
+
+
+@pytest.mark.asyncio
+async def test_progress_coalesced_and_events_batched():
+    client = Client()
+    stream = RunEventStream(client.send, run_id="r1")
+
+    stream.put(_progress("scout", 10))
+    stream.put(_progress("analyst", 10))
+    stream.put(_progress("scout", 50))
+    stream.put(_event("agent_insight", 1))
+    stream.start()
+    await stream.aclose()
+
+    assert len(client.frames) == 1 and client.frames[0]["type"] == "batch"
+    assert [(e["type"], e["data"].get("agent_id"), e["data"].get("progress")) for e in client.events] == [
+        ("agent_progress", "analyst", 10),
+        ("agent_progress", "scout", 50),
+        ("agent_insight", None, None),
+    ]
+    assert stream.stats["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_single_event_is_sent_unwrapped():
+    client = Client()
+    stream = RunEventStream(client.send).start()
+    stream.put(_event("agent_status", 1))
+    await stream.aclose()
+
+    assert client.frames == [{"type": "agent_status", "data": {"n": 1}}]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_oldest_low_priority_only():
+    client = Client()
+    stream = RunEventStream(client.send, max_queue=3)
+
+    stream.put(_event("swarm_event", 1))
+    stream.put(_event("swarm_event", 2))
+    stream.put(_event("agent_insight", 3))
+    stream.put(_event("swarm_event", 4))     # evicts swarm 1
+    stream.put(_event("agent_insight", 5))   # evicts swarm 2
+    stream.put(_event("agent_insight", 6))   # evicts swarm 4
+    stream.put(_event("swarm_event", 7))     # nothing low-priority left: dropped itself
+    stream.put(_event("agent_insight", 8))   # high priority is never dropped
+    stream.start()
+    await stream.aclose()
+
+    assert [e["data"]["n"] for e in client.events] == [3, 5, 6, 8]
+    assert stream.stats["dropped"] == 4
+
+
+@pytest.mark.asyncio
+async def test_slow_client_gets_fewer_larger_frames():
+    client = Client(delay=0.005)
+    stream = RunEventStream(client.send, max_batch=50).start()
+
+    for i in range(300):
+        stream.put(_event("agent_insight", i))
+        if i % 20 == 0:
+            await asyncio.sleep(0)
+    await stream.aclose()
+
+    assert [e["data"]["n"] for e in client.events] == list(range(300))
+    assert len(client.frames) < 50
+
+
+@pytest.mark.asyncio
+async def test_events_persisted_with_ids_and_replayed():
+    store = InMemoryRunStore()
+    await store.create_run("r1", RunMeta(run_id="r1"))
+    client = Client()
+    stream = RunEventStream(client.send, run_id="r1", store=store).start()
+
+    stream.put(_event("agent_insight", 1))
+    stream.put(_event("agent_insight", 2))
+    await stream.join()
+    stream.put({"type": "analysis_complete", "data": {"score": 80}})
+    await stream.aclose()
+
+    assert [e["event_id"] for e in client.events] == ["1", "2", "3"]
+
+    # Reconnect after event 1
+    await store.set_status("r1", "completed")
+    resumed = Client()
+    replay = RunEventStream(resumed.send, run_id="r1").start()
+    last_id = await replay_run_events(replay, store, "r1", last_event_id="1", block_ms=1)
+    await replay.aclose()
+
+    assert last_id == "3"
+    assert [e["type"] for e in resumed.events] == ["agent_insight", "analysis_complete"]
+    assert resumed.events[-1]["data"] == {"score": 80}
+
+
+@pytest.mark.asyncio
+async def test_replay_stops_when_run_finished():
+    store = InMemoryRunStore()
+    await store.create_run("r1", RunMeta(run_id="r1"))
+    await store.set_status("r1", "failed")
+    client = Client()
+    stream = RunEventStream(client.send, run_id="r1").start()
+
+    assert await replay_run_events(stream, store, "r1", block_ms=1) == "0"
+    await stream.aclose()
+    assert client.frames == []
+
+
+@pytest.mark.asyncio
+async def test_replay_waits_between_reads_before_the_first_event():
+    store = InMemoryRunStore()
+    await store.create_run("r1", RunMeta(run_id="r1"))
+    await store.set_status("r1", "running")
+    stream = RunEventStream(Client().send, run_id="r1").start()
+
+    started = asyncio.get_running_loop().time()
+    assert await replay_run_events(stream, store, "r1", block_ms=20, max_idle_reads=3) == "0"
+    await stream.aclose()
+    # No events yet: each read blocks for block_ms instead of spinning
+    assert asyncio.get_running_loop().time() - started >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_disconnected_client_events_still_persisted():
+    store = InMemoryRunStore()
+    await store.create_run("r1", RunMeta(run_id="r1"))
+    stream = RunEventStream(Client(fail=True).send, run_id="r1", store=store).start()
+
+    for i in range(3):
+        stream.put(_event("agent_insight", i))
+        await stream.join()
+    await stream.aclose()
+
+    assert [e.data["n"] for e in await store.read_events("r1")] == [0, 1, 2]
+    assert stream.stats["sent"] == 0
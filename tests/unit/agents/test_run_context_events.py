@@ -0,0 +1,94 @@
+"""
+Tests for per-run event routing through RunContext
+"""
+
+import asyncio
+
+import pytest
+
+from agents.agent_types import AgentInsight, AgentProgress, AgentResult, AgentStatus, InsightType, AgentPriority
+from agents.orchestrator import GrowthEngineOrchestrator
+from agents.run_context import RunContext
+from agents.run_store import InMemoryRunStore
+
+
+def _context(run_id):
+    return RunContext(run_id=run_id, run_store=InMemoryRunStore(), trace_enabled=False)
+
+
+def _insight(agent_id, message):
+    return AgentInsight(
+        agent_id=agent_id, agent_name=agent_id, agent_avatar="",
+        message=message, priority=AgentPriority.MEDIUM, insight_type=InsightType.FINDING,
+    )
+
+
+def test_subscribers_receive_events_until_unsubscribed():
+    ctx = _context("run-a")
+    first, second = [], []
+    unsubscribe = ctx.subscribe(on_insight=first.append)
+    ctx.subscribe(on_insight=second.append, on_agent_start=lambda a, n: second.append((a, n)))
+
+    ctx.emit_insight(_insight("scout", "one"))
+    ctx.emit_agent_start("scout", "Scout")
+    unsubscribe()
+    ctx.emit_insight(_insight("scout", "two"))
+
+    assert [i.message for i in first] == ["one"]
+    assert [getattr(e, "message", e) for e in second] == ["one", ("scout", "Scout"), "two"]
+
+
+def test_failing_subscriber_does_not_block_others():
+    ctx = _context("run-a")
+    received = []
+
+    def broken(progress):
+        raise RuntimeError("socket gone")
+
+    ctx.subscribe(on_progress=broken)
+    ctx.subscribe(on_progress=received.append)
+    ctx.emit_progress(AgentProgress(agent_id="scout", status=AgentStatus.RUNNING, progress=50))
+
+    assert [p.progress for p in received] == [50]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_on_one_orchestrator_stay_isolated(monkeypatch):
+    orchestrator = GrowthEngineOrchestrator()
+
+    async def fake_run_agent(agent_id, context, run_context=None, run_agents=None):
+        agent = run_agents[agent_id]
+        run_context.emit_agent_start(agent_id, agent.name)
+        await asyncio.sleep(0)  # let the other run interleave
+        agent._on_insight(_insight(agent_id, context.url))
+        agent._on_progress(AgentProgress(agent_id=agent_id, status=AgentStatus.COMPLETE, progress=100))
+        return AgentResult(agent_id=agent_id, agent_name=agent.name,
+                           status=AgentStatus.COMPLETE, execution_time_ms=0)
+
+    monkeypatch.setattr(orchestrator, "_run_agent", fake_run_agent)
+
+    received = {}
+    contexts = {}
+    for name in ("a", "b"):
+        ctx = _context(f"run-{name}")
+        events = received[name] = []
+        ctx.subscribe(
+            on_insight=lambda i, events=events: events.append(("insight", i.message)),
+            on_progress=lambda p, events=events: events.append(("progress", p.agent_id)),
+            on_agent_start=lambda a, n, events=events: events.append(("start", a)),
+            on_agent_complete=lambda a, r, events=events: events.append(("complete", a)),
+        )
+        contexts[name] = ctx
+
+    await asyncio.gather(
+        orchestrator.run_analysis("https://a.example", run_context=contexts["a"]),
+        orchestrator.run_analysis("https://b.example", run_context=contexts["b"]),
+    )
+
+    for name, other in (("a", "b"), ("b", "a")):
+        insights = [m for kind, m in received[name] if kind == "insight"]
+        assert len(insights) == 6
+        assert all(m == f"https://{name}.example" for m in insights)
+        assert sum(1 for kind, _ in received[name] if kind == "complete") == 6
+        assert sum(1 for kind, _ in received[name] if kind == "start") == 6
+    assert orchestrator._on_insight is None
@@ -0,0 +1,469 @@
+"""
+Tests for RedisRunStore write batching (write-behind events, TTLs set at
+creation, atomic status transitions) and index retention / listing
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from agents.run_store import (
+    EVENT_STREAM_TTL,
+    PRUNE_INDEX_SCRIPT,
+    RUN_DATA_TTL,
+    STATUS_SCRIPT,
+    RedisRunStore,
+    RunEvent,
+    RunMeta,
+)
+
+
+class FakeRedis:
+    """In-process Redis subset that counts round trips and commands."""
+
+    def __init__(self):
+        self.strings = {}
+        self.lists = {}
+        self.hashes = {}
+        self.sets = {}
+        self.zsets = {}
+        self.streams = {}
+        self.ttls = {}
+        self.round_trips = 0
+        self.commands = []
+        self.fail_next = False
+
+    def __getattr__(self, name):
+        command = getattr(self, f"_cmd_{name}")
+
+        async def call(*args, **kwargs):
+            self.round_trips += 1
+            return self._apply(name, command, args, kwargs)
+
+        return call
+
+    def _apply(self, name, command, args, kwargs):
+        self.commands.append(name)
+        return command(*args, **kwargs)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        return {STATUS_SCRIPT: FakeStatusScript, PRUNE_INDEX_SCRIPT: FakePruneIndexScript}[script](self)
+
+    # Commands -----------------------------------------------------------
+
+    def _cmd_get(self, key):
+        return self.strings.get(key)
+
+    def _cmd_set(self, key, value, ex=None):
+        self.strings[key] = value
+        if ex:
+            self.ttls[key] = ex
+        return True
+
+    def _cmd_rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    def _cmd_lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def _exists(self, key):
+        return any(key in store for store in (self.strings, self.lists, self.hashes, self.zsets, self.streams))
+
+    def _cmd_expire(self, key, seconds):
+        if self._exists(key):
+            self.ttls[key] = seconds
+            return True
+        return False
+
+    def _cmd_ttl(self, key):
+        return self.ttls.get(key, -1) if self._exists(key) else -2
+
+    def _cmd_exists(self, key):
+        return int(self._exists(key))
+
+    def _cmd_delete(self, *keys):
+        for key in keys:
+            for store in (self.strings, self.lists, self.hashes, self.zsets, self.streams):
+                store.pop(key, None)
+
+    def _cmd_hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+
+    def _cmd_hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def _cmd_smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def _zsorted(self, key):
+        return sorted(self.zsets.get(key, {}).items(), key=lambda kv: (kv[1], kv[0]))
+
+    def _cmd_zrange(self, key, start, end, withscores=False):
+        items = self._zsorted(key)[start:end + 1]
+        return items if withscores else [k for k, _ in items]
+
+    def _cmd_zrevrange(self, key, start, end):
+        return [k for k, _ in reversed(self._zsorted(key))][start:end + 1]
+
+    def _cmd_zmscore(self, key, members):
+        return [self.zsets.get(key, {}).get(m) for m in members]
+
+    def _cmd_zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for member, score in list(zset.items()):
+            if score <= high:
+                del zset[member]
+
+    def _cmd_sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def _cmd_srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    def _cmd_zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def _cmd_xadd(self, key, fields, maxlen=None, approximate=True):
+        stream = self.streams.setdefault(key, [])
+        entry_id = f"{len(self.commands)}-0"
+        stream.append((entry_id, fields))
+        if maxlen is not None:
+            del stream[:max(0, len(stream) - maxlen)]
+        return entry_id
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._queued = []
+
+    def __getattr__(self, name):
+        command = getattr(self._redis, f"_cmd_{name}")
+
+        def queue(*args, **kwargs):
+            self._queued.append((name, command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        self._redis.round_trips += 1
+        if self._redis.fail_next:
+            self._redis.fail_next = False
+            raise ConnectionError("connection reset")
+        return [self._redis._apply(*queued) for queued in self._queued]
+
+
+class FakeScript:
+    """Registered script; queued when called with client=pipeline."""
+
+    def __init__(self, redis):
+        self._redis = redis
+
+    async def __call__(self, keys, args, client=None):
+        if isinstance(client, FakePipeline):
+            client._queued.append(("evalsha", self.run, (keys, args), {}))
+            return client
+        self._redis.round_trips += 1
+        return self._redis._apply("evalsha", self.run, (keys, args), {})
+
+
+class FakeStatusScript(FakeScript):
+    """Python mirror of STATUS_SCRIPT."""
+
+    def run(self, keys, args):
+        r = self._redis
+        run_id, status, now, ttl, timestamp, *statuses = [str(a) for a in args]
+        assert keys[3] == "runs:index"
+        assert len(statuses) == len(keys) - 4 and set(keys[4:]) == {f"runs:by_status:{s}" for s in statuses}
+        old = r.strings.get(keys[0])
+        r.strings[keys[0]] = status
+        if not old:
+            r.ttls[keys[0]] = int(ttl)
+        created = r.zsets.get(keys[3], {}).get(run_id, float(timestamp))
+        for key, name in zip(keys[4:], statuses):
+            if name == status:
+                r.zsets.setdefault(key, {})[run_id] = created
+            elif name == old:
+                r.zsets.get(key, {}).pop(run_id, None)
+
+        stamp = {"running": "started_at", "completed": "completed_at",
+                 "failed": "completed_at", "cancelled": "completed_at"}.get(status)
+        summary = r.hashes.get(keys[2])
+        if summary is not None:
+            summary["status"] = status
+            if stamp == "completed_at" or (stamp and not summary.get("started_at")):
+                summary[stamp] = now
+        if keys[1] in r.strings and stamp:
+            meta = json.loads(r.strings[keys[1]])
+            if stamp == "completed_at" or not meta.get("started_at"):
+                meta[stamp] = now
+            r.strings[keys[1]] = json.dumps(meta)
+        return old
+
+
+class FakePruneIndexScript(FakeScript):
+    """Python mirror of PRUNE_INDEX_SCRIPT."""
+
+    def run(self, keys, args):
+        r = self._redis
+        cutoff, batch = args
+        expired = [k for k, score in r._zsorted(keys[0]) if score <= float(cutoff)][:int(batch)]
+        for key in keys:
+            for run_id in expired:
+                r.zsets.get(key, {}).pop(run_id, None)
+        return len(expired)
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def store(redis):
+    store = RedisRunStore(redis_client=redis)
+    store.EVENT_FLUSH_INTERVAL = 0.005
+    store.PRUNE_INTERVAL = float("inf")  # tests call prune_indexes() directly
+    return store
+
+
+def _event(n):
+    return RunEvent(event_type="agent_progress", agent_id="scout", data={"n": n})
+
+
+@pytest.mark.asyncio
+async def test_create_run_sets_ttls_once(store, redis):
+    await store.create_run("r1", RunMeta(run_id="r1", user_id="u1"))
+
+    assert redis.round_trips == 1
+    assert redis.ttls["run:r1:trace"] == RUN_DATA_TTL
+    assert redis.ttls["run:r1:events"] == EVENT_STREAM_TTL
+    assert redis.streams["run:r1:events"] == []  # exists, but empty
+
+    redis.commands.clear()
+    await store.append_trace("r1", RunEvent(event_type="run_started"))
+    await store.emit_event("r1", _event(1))
+    assert "expire" not in redis.commands
+
+
+@pytest.mark.asyncio
+async def test_concurrent_events_share_one_pipeline(store, redis):
+    await store.create_run("r1", RunMeta(run_id="r1"))
+    redis.round_trips = 0
+
+    ids = await asyncio.gather(*(store.emit_event("r1", _event(n)) for n in range(20)))
+
+    assert redis.round_trips == 1
+    entries = redis.streams["run:r1:events"]
+    assert [e[0] for e in entries] == list(ids)
+    assert [json.loads(e[1]["data"])["n"] for e in entries] == list(range(20))
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_flushes_without_waiting(store, redis):
+    store.EVENT_FLUSH_INTERVAL = 60
+    store.EVENT_FLUSH_MAX = 10
+
+    ids = await asyncio.wait_for(store.emit_events("r1", [_event(n) for n in range(10)]), timeout=1)
+
+    assert len(ids) == 10
+    # Run created elsewhere: this worker sets the TTLs once, with the first flush
+    assert redis.ttls["run:r1:events"] == EVENT_STREAM_TTL
+    await store.emit_events("r1", [_event(n) for n in range(10)])
+    assert redis.commands.count("expire") == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_reaches_every_waiter(store, redis):
+    redis.fail_next = True
+    results = await asyncio.gather(
+        store.emit_event("r1", _event(1)),
+        store.emit_event("r2", _event(2)),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+    assert await store.emit_event("r1", _event(3))
+
+
+@pytest.mark.asyncio
+async def test_status_transition_is_one_atomic_call(store, redis):
+    await store.create_run("r1", RunMeta(run_id="r1"))
+    redis.round_trips = 0
+
+    await store.set_status("r1", "running")
+    await store.set_status("r1", "completed")
+
+    assert redis.round_trips == 2
+    assert redis.zsets["runs:by_status:completed"] == {"r1": redis.zsets["runs:index"]["r1"]}
+    assert not redis.zsets["runs:by_status:pending"] and not redis.zsets["runs:by_status:running"]
+    meta = json.loads(redis.strings["run:r1:meta"])
+    assert meta["started_at"] and meta["completed_at"]
+
+
+@pytest.mark.asyncio
+async def test_cancel_is_one_round_trip(store, redis):
+    await store.create_run("r1", RunMeta(run_id="r1"))
+    redis.round_trips = 0
+
+    await store.cancel("r1")
+
+    assert redis.round_trips == 1
+    assert await store.is_cancelled("r1")
+    assert await store.get_status("r1") == "cancelled"
+
+
+async def _create(store, redis, run_id, user_id=None, age=0.0):
+    await store.create_run(run_id, RunMeta(run_id=run_id, user_id=user_id, url=f"https://{run_id}.example"))
+    if age:
+        # Pretend the run was created `age` seconds ago and its keys have expired
+        redis.zsets["runs:index"][run_id] -= age
+        redis.zsets["runs:by_status:pending"][run_id] -= age
+        if user_id:
+            redis.zsets[f"runs:user:{user_id}"][run_id] -= age
+        if age > RUN_DATA_TTL:
+            redis._cmd_delete(*(f"run:{run_id}:{s}" for s in ("meta", "status", "summary", "trace", "events")))
+
+
+@pytest.mark.asyncio
+async def test_expired_runs_pruned_from_indexes_in_batches(store, redis):
+    for n in range(5):
+        await _create(store, redis, f"old{n}", age=RUN_DATA_TTL + 60)
+        if n % 2:
+            redis.zsets["runs:by_status:completed"] = {
+                **redis.zsets.get("runs:by_status:completed", {}),
+                f"old{n}": redis.zsets["runs:by_status:pending"].pop(f"old{n}")}
+    await _create(store, redis, "live")
+
+    store.PRUNE_BATCH = 2
+    assert [await store.prune_indexes() for _ in range(4)] == [2, 2, 1, 0]
+
+    assert set(redis.zsets["runs:index"]) == {"live"}
+    assert set(redis.zsets["runs:by_status:pending"]) == {"live"}
+    assert not redis.zsets["runs:by_status:completed"]
+
+
+@pytest.mark.asyncio
+async def test_list_by_user_reads_one_page_of_summaries(store, redis):
+    for n in range(30):
+        await _create(store, redis, f"a{n}", user_id="alice")
+    await _create(store, redis, "b0", user_id="bob")
+    await _create(store, redis, "a-old", user_id="alice", age=RUN_DATA_TTL + 60)
+    await store.set_status("a29", "running")
+    redis.strings["run:a29:result"] = "{}"
+
+    redis.commands.clear()
+    runs = await store.list_runs(limit=5, offset=0, user_id="alice")
+
+    assert [r["run_id"] for r in runs] == ["a29", "a28", "a27", "a26", "a25"]
+    assert runs[0]["status"] == "running" and runs[0]["has_result"]
+    assert runs[0]["meta"]["started_at"] and runs[0]["meta"]["url"] == "https://a29.example"
+    # Index page + summaries, no meta JSON reads
+    assert redis.commands.count("hgetall") == 5 and "get" not in redis.commands
+    assert "a-old" not in redis.zsets["runs:user:alice"]
+
+    page2 = await store.list_runs(limit=5, offset=5, user_id="alice")
+    assert [r["run_id"] for r in page2] == ["a24", "a23", "a22", "a21", "a20"]
+
+
+@pytest.mark.asyncio
+async def test_list_by_user_and_status(store, redis):
+    for n in range(6):
+        await _create(store, redis, f"a{n}", user_id="alice")
+    for n in (1, 3, 5):
+        await store.set_status(f"a{n}", "completed")
+    store.LIST_PAGE_SIZE = 2
+
+    runs = await store.list_runs(limit=2, offset=1, status="completed", user_id="alice")
+
+    assert [r["run_id"] for r in runs] == ["a3", "a1"]
+    assert all(r["meta"]["completed_at"] for r in runs)
+
+
+@pytest.mark.asyncio
+async def test_list_by_status_pages_the_status_index(store, redis):
+    for n in range(8):
+        await _create(store, redis, f"r{n}")
+    for n in (1, 2, 4, 6, 7):
+        await store.set_status(f"r{n}", "running")
+    await store.set_status("r7", "completed")
+
+    redis.commands.clear()
+    runs = await store.list_runs(limit=2, offset=1, status="running")
+
+    assert [r["run_id"] for r in runs] == ["r4", "r2"]
+    assert redis.commands.count("zrevrange") == 1 and redis.commands.count("hgetall") == 2
+    assert "smembers" not in redis.commands and "zmscore" not in redis.commands
+    assert [r["run_id"] for r in await store.list_runs(status="pending")] == ["r5", "r3", "r0"]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_indexes_backfills_legacy_runs(store, redis):
+    redis._cmd_set("run:legacy:meta", json.dumps(RunMeta(run_id="legacy", user_id="carol").to_dict()), ex=100)
+    redis._cmd_set("run:legacy:status", "completed")
+    redis._cmd_zadd("runs:index", {"legacy": time.time()})
+
+    # Listed from meta JSON until backfilled
+    assert (await store.list_runs())[0]["status"] == "completed"
+    assert await store.list_runs(user_id="carol") == []
+
+    assert await store.rebuild_indexes() == 1
+    runs = await store.list_runs(user_id="carol")
+    assert [r["run_id"] for r in runs] == ["legacy"] and runs[0]["status"] == "completed"
+    assert redis.ttls["run:legacy:summary"] == 100
+    assert [r["run_id"] for r in await store.list_runs(status="completed")] == ["legacy"]
+
+
+@pytest.fixture
+def lua_store():
+    """RedisRunStore on fakeredis, which runs the real Lua scripts"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa", reason="fakeredis needs lupa to run Lua scripts")
+    store = RedisRunStore(redis_client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+    store.PRUNE_INTERVAL = float("inf")
+    return store
+
+
+@pytest.mark.asyncio
+async def test_status_script_moves_indexes_and_stamps_meta(lua_store):
+    r = lua_store._redis
+    await lua_store.create_run("r1", RunMeta(run_id="r1", user_id="u1"))
+    created = await r.zscore("runs:index", "r1")
+
+    await lua_store.set_status("r1", "running")
+    await lua_store.set_status("r1", "completed")
+
+    assert await r.zrange("runs:by_status:completed", 0, -1, withscores=True) == [("r1", created)]
+    assert not await r.exists("runs:by_status:pending", "runs:by_status:running")
+    assert 0 < await r.ttl("run:r1:status") <= RUN_DATA_TTL
+    meta = json.loads(await r.get("run:r1:meta"))
+    summary = await r.hgetall("run:r1:summary")
+    assert meta["started_at"] and meta["completed_at"]
+    assert summary["status"] == "completed" and summary["started_at"] == meta["started_at"]
+
+    await lua_store.cancel("r1")
+    assert await lua_store.is_cancelled("r1")
+    assert await r.zrange("runs:by_status:cancelled", 0, -1) == ["r1"]
+
+
+@pytest.mark.asyncio
+async def test_prune_index_script_removes_expired_runs_in_batches(lua_store):
+    r = lua_store._redis
+    for n in range(3):
+        await lua_store.create_run(f"old{n}", RunMeta(run_id=f"old{n}"))
+        await r.zadd("runs:index", {f"old{n}": 1.0})
+        await r.zadd("runs:by_status:pending", {f"old{n}": 1.0})
+    await lua_store.create_run("live", RunMeta(run_id="live"))
+
+    lua_store.PRUNE_BATCH = 2
+    assert [await lua_store.prune_indexes() for _ in range(3)] == [2, 1, 0]
+    assert await r.zrange("runs:index", 0, -1) == ["live"]
+    assert await r.zrange("runs:by_status:pending", 0, -1) == ["live"]
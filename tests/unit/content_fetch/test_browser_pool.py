@@ -0,0 +1,241 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def _make_browser():
+    browser = MagicMock()
+    browser.is_connected = MagicMock(return_value=True)
+    browser.close = AsyncMock()
+
+    def _new_context(**kwargs):
+        page = AsyncMock()
+        page.route = AsyncMock()
+        page.on = MagicMock()
+        page.evaluate = AsyncMock(return_value=[])
+        page.content = AsyncMock(return_value="<html><body>Pooled</body></html>")
+        context = AsyncMock()
+        context.new_page = AsyncMock(return_value=page)
+        context.close = AsyncMock()
+        browser.contexts_created.append(context)
+        return context
+
+    browser.contexts_created = []
+    browser.new_context = AsyncMock(side_effect=_new_context)
+    return browser
+
+
+def _make_playwright():
+    launched = []
+
+    async def _launch(**kwargs):
+        browser = _make_browser()
+        launched.append(browser)
+        return browser
+
+    pw = MagicMock()
+    pw.chromium.launch = AsyncMock(side_effect=_launch)
+    pw.stop = AsyncMock()
+    starter = MagicMock()
+    starter.start = AsyncMock(return_value=pw)
+    return starter, pw, launched
+
+
+async def _started_pool(**kwargs):
+    from agents.content_fetch.browser_pool import BrowserPool
+
+    starter, pw, launched = _make_playwright()
+    pool = BrowserPool(**kwargs)
+    with patch("agents.content_fetch.browser_pool.PLAYWRIGHT_AVAILABLE", True), \
+         patch("agents.content_fetch.browser_pool.PLAYWRIGHT_ENABLED", True), \
+         patch("agents.content_fetch.browser_pool.BROWSER_POOL_ENABLED", True), \
+         patch("agents.content_fetch.browser_pool.async_playwright", return_value=starter):
+        assert await pool.start() is True
+    return pool, pw, launched
+
+
+@pytest.mark.asyncio
+async def test_renders_share_one_browser_with_fresh_contexts():
+    pool, pw, launched = await _started_pool(max_pages=2, recycle_after=0, min_free_mb=0)
+
+    for _ in range(3):
+        async with pool.page(user_agent="UA") as page:
+            assert page is not None
+
+    assert pw.chromium.launch.await_count == 1
+    browser = launched[0]
+    assert len(browser.contexts_created) == 3
+    assert all(ctx.close.await_count == 1 for ctx in browser.contexts_created)
+    assert pool.stats()["renders"] == 3
+
+    await pool.stop()
+    browser.close.assert_awaited()
+    pw.stop.assert_awaited()
+    assert pool.started is False
+
+
+@pytest.mark.asyncio
+async def test_browser_recycled_after_render_limit():
+    pool, pw, launched = await _started_pool(recycle_after=2, min_free_mb=0)
+
+    for _ in range(3):
+        async with pool.page():
+            pass
+
+    assert pw.chromium.launch.await_count == 2
+    launched[0].close.assert_awaited_once()
+    launched[1].close.assert_not_awaited()
+    assert pool.stats()["recycles"] == 1
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_retiring_browser_stays_open_until_inflight_render_finishes():
+    pool, pw, launched = await _started_pool(max_pages=2, recycle_after=1, min_free_mb=0)
+
+    async with pool.page():
+        # Second render trips the limit: a new browser launches, but the
+        # old one must survive until the first render's context closes.
+        async with pool.page():
+            assert pw.chromium.launch.await_count == 2
+            launched[0].close.assert_not_awaited()
+        launched[0].close.assert_not_awaited()
+    launched[0].close.assert_awaited_once()
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_browser_recycled_under_memory_pressure():
+    pool, pw, launched = await _started_pool(recycle_after=0, min_free_mb=512, memory_recycle_interval=0)
+
+    with patch("agents.content_fetch.browser_pool._available_memory_mb", return_value=100):
+        async with pool.page():
+            pass
+
+    assert pw.chromium.launch.await_count == 2
+    assert pool.stats()["recycles"] == 1
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_sustained_memory_pressure_recycles_once_per_interval():
+    pool, pw, launched = await _started_pool(recycle_after=0, min_free_mb=512, memory_recycle_interval=60)
+
+    with patch("agents.content_fetch.browser_pool._available_memory_mb", return_value=100):
+        for _ in range(3):
+            async with pool.page():
+                pass
+        assert pw.chromium.launch.await_count == 1  # launched just now
+
+        pool._launched_at -= 61
+        for _ in range(3):
+            async with pool.page():
+                pass
+
+    assert pw.chromium.launch.await_count == 2
+    assert pool.stats()["recycles"] == 1
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_disconnected_browser_is_relaunched():
+    pool, pw, launched = await _started_pool(recycle_after=0, min_free_mb=0)
+    launched[0].is_connected.return_value = False
+
+    async with pool.page():
+        pass
+
+    assert pw.chromium.launch.await_count == 2
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_max_pages_bounds_concurrent_renders():
+    pool, _, _ = await _started_pool(max_pages=2, recycle_after=0, min_free_mb=0)
+    active = 0
+    peak = 0
+
+    async def render():
+        nonlocal active, peak
+        async with pool.page():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(render() for _ in range(6)))
+    assert peak == 2
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_block_resources_registers_route():
+    pool, _, launched = await _started_pool(recycle_after=0, min_free_mb=0)
+
+    async with pool.page(block_resources=True) as page:
+        page.route.assert_awaited_once()
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_block_heavy_resources_aborts_images_only():
+    from agents.content_fetch.browser_pool import block_heavy_resources
+
+    image_route = AsyncMock()
+    image_route.request.resource_type = "image"
+    await block_heavy_resources(image_route)
+    image_route.abort.assert_awaited_once()
+    image_route.continue_.assert_not_awaited()
+
+    doc_route = AsyncMock()
+    doc_route.request.resource_type = "document"
+    await block_heavy_resources(doc_route)
+    doc_route.continue_.assert_awaited_once()
+    doc_route.abort.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_start_returns_false_when_disabled():
+    from agents.content_fetch.browser_pool import BrowserPool
+
+    pool = BrowserPool()
+    with patch("agents.content_fetch.browser_pool.PLAYWRIGHT_AVAILABLE", True), \
+         patch("agents.content_fetch.browser_pool.PLAYWRIGHT_ENABLED", True), \
+         patch("agents.content_fetch.browser_pool.BROWSER_POOL_ENABLED", False):
+        assert await pool.start() is False
+    # PLAYWRIGHT_ENABLED=false (the default) keeps the pool off too
+    with patch("agents.content_fetch.browser_pool.PLAYWRIGHT_AVAILABLE", True), \
+         patch("agents.content_fetch.browser_pool.PLAYWRIGHT_ENABLED", False), \
+         patch("agents.content_fetch.browser_pool.BROWSER_POOL_ENABLED", True), \
+         patch("agents.content_fetch.browser_pool.async_playwright") as starter:
+        assert await pool.start() is False
+    starter.assert_not_called()
+    assert pool.started is False
+
+
+@pytest.mark.asyncio
+async def test_page_raises_when_not_started():
+    from agents.content_fetch.browser_pool import BrowserPool
+
+    pool = BrowserPool()
+    with pytest.raises(RuntimeError):
+        async with pool.page():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_render_spa_uses_started_pool():
+    pool, pw, launched = await _started_pool(recycle_after=0, min_free_mb=0)
+
+    with patch("agents.content_fetch.playwright_provider.PLAYWRIGHT_AVAILABLE", True), \
+         patch("agents.content_fetch.playwright_provider.get_browser_pool", return_value=pool), \
+         patch("agents.content_fetch.playwright_provider.async_playwright") as per_call:
+        from agents.content_fetch.playwright_provider import render_spa
+        result = await render_spa("https://example.com")
+
+    per_call.assert_not_called()
+    assert pw.chromium.launch.await_count == 1
+    assert len(launched[0].contexts_created) == 1
+    assert "Pooled" in result
+    await pool.stop()
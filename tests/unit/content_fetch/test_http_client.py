@@ -0,0 +1,170 @@
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+
+async def _start_keepalive_server():
+    """Minimal HTTP/1.1 server on 127.0.0.1 that counts TCP connections."""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+                body = b"ok"
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n"
+                    b"Connection: keep-alive\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, port, connections
+
+
+def test_dns_cache_expires_entries():
+    from agents.content_fetch.http_client import DNSCache
+
+    cache = DNSCache(ttl=30)
+    with patch("agents.content_fetch.http_client.time.monotonic", return_value=100.0):
+        cache.put("Example.com", ["93.184.216.34", "93.184.216.34"])
+        assert cache.get("example.com") == ["93.184.216.34"]
+    with patch("agents.content_fetch.http_client.time.monotonic", return_value=131.0):
+        assert cache.get("example.com") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_dns_cache_bounded():
+    from agents.content_fetch.http_client import DNSCache
+
+    cache = DNSCache(ttl=30, max_entries=2)
+    for i in range(3):
+        cache.put(f"host{i}.fi", [f"10.0.0.{i}"])
+    assert cache.stats()["entries"] == 2
+    assert cache.get("host2.fi") == ["10.0.0.2"]
+
+
+@pytest.mark.asyncio
+async def test_pooled_client_reuses_connection_and_dns_cache():
+    from agents.content_fetch.http_client import DNSCache, create_http_client
+
+    server, port, connections = await _start_keepalive_server()
+    dns_cache = DNSCache(ttl=60)
+    dns_cache.put("shop.example.test", ["127.0.0.1"])
+    try:
+        with patch.object(DNSCache, "resolve", wraps=dns_cache.resolve) as resolve:
+            async with create_http_client(dns_cache=dns_cache, allow_private=True) as client:
+                for _ in range(3):
+                    res = await client.get(f"http://shop.example.test:{port}/")
+                    assert res.status_code == 200
+                    assert res.text == "ok"
+        assert len(connections) == 1
+        assert resolve.await_count == 1
+        assert dns_cache.stats()["hits"] >= 1
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_host_limited_transport_caps_concurrency_per_host():
+    from agents.content_fetch.http_client import HostLimitedTransport
+
+    active = {}
+    peak = {}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200, text="x")
+
+    transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host=2)
+    async with httpx.AsyncClient(transport=transport) as client:
+        await asyncio.gather(*(
+            client.get(f"https://{host}/") for host in ["a.fi"] * 5 + ["b.fi"] * 3
+        ))
+
+    assert peak == {"a.fi": 2, "b.fi": 2}
+    # Idle hosts are forgotten once their bodies are closed
+    assert transport._semaphores == {} and transport._users == {}
+
+
+@pytest.mark.asyncio
+async def test_host_slot_released_after_error():
+    from agents.content_fetch.http_client import HostLimitedTransport
+
+    def handler(request):
+        raise httpx.ConnectError("boom", request=request)
+
+    transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host=1)
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await client.get("https://a.fi/")
+    assert transport._semaphores == {}
+
+
+@pytest.mark.asyncio
+async def test_outbound_client_prefers_shared_client():
+    from agents.content_fetch import http_client
+
+    shared = await http_client.start_http_client()
+    try:
+        async with http_client.outbound_client() as client:
+            assert client is shared
+    finally:
+        await http_client.close_http_client()
+
+    assert http_client.get_http_client() is None
+    async with http_client.outbound_client() as client:
+        assert client is not shared
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_fetch_http_uses_outbound_client():
+    from contextlib import asynccontextmanager
+
+    client = AsyncMock()
+    client.get = AsyncMock(return_value=httpx.Response(200, text="<html></html>"))
+
+    @asynccontextmanager
+    async def fake_outbound():
+        yield client
+
+    with patch("agents.content_fetch.http_provider.outbound_client", fake_outbound):
+        from agents.content_fetch.http_provider import fetch_http
+        res = await fetch_http("https://example.com", timeout=5)
+
+    assert res.status_code == 200
+    assert client.get.await_args.kwargs["timeout"] == 5
+
+
+@pytest.mark.asyncio
+async def test_pooled_transport_maps_httpcore_errors_to_httpx():
+    from agents.content_fetch.http_client import DNSCache, create_http_client
+
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        async with create_http_client(dns_cache=DNSCache(), allow_private=True) as client:
+            with pytest.raises(httpx.RemoteProtocolError):
+                await client.get(f"http://127.0.0.1:{port}/")
+            with pytest.raises(httpx.UnsupportedProtocol):
+                await client.get(f"ftp://127.0.0.1:{port}/")
+    finally:
+        server.close()
+        await server.wait_closed()
@@ -0,0 +1,131 @@
+from unittest.mock import patch
+
+from bs4 import BeautifulSoup
+
+
+SAMPLE_HTML = """<!DOCTYPE html>
+<html lang="fi">
+<head>
+  <title>Example  Company</title>
+  <meta name="description" content="We build things">
+  <meta property="og:title" content="Example OG">
+  <meta name="Viewport" content="width=device-width, initial-scale=1">
+  <style>.hero { display: grid; }</style>
+  <script>window.addEventListener('load', () => fetch('/api'));</script>
+  <script type="application/ld+json">{"@type": "Organization"}</script>
+</head>
+<body>
+  <!-- a comment that is not content -->
+  <nav><a href="/blog">Blog</a> <a href="#main">Skip</a></nav>
+  <h1>Welcome</h1>
+  <p style="color: red">First   paragraph.
+     Second line.</p>
+  <noscript><p>Enable JavaScript</p></noscript>
+  <a name="anchor-without-href">x</a>
+</body>
+</html>
+"""
+
+
+def _legacy_clean_text(html: str) -> str:
+    """Reference: the decompose-based extract_clean_text from main.py."""
+    soup = BeautifulSoup(html, "html.parser")
+    for e in soup(["script", "style", "noscript"]):
+        e.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (p.strip() for line in lines for p in line.split("  "))
+    return " ".join(chunk for chunk in chunks if chunk)
+
+
+def test_text_matches_legacy_extraction():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage(SAMPLE_HTML)
+    assert page.text == _legacy_clean_text(SAMPLE_HTML)
+    assert "Enable JavaScript" not in page.text
+    assert "addEventListener" not in page.text
+
+
+def test_text_does_not_mutate_shared_soup():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage(SAMPLE_HTML)
+    _ = page.text
+    assert page.soup.find("noscript") is not None
+    assert len(page.soup.find_all("script")) == 2
+
+
+def test_soup_is_parsed_once_across_views():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage(SAMPLE_HTML)
+    with patch(
+        "agents.content_fetch.parsed_page.BeautifulSoup", wraps=BeautifulSoup
+    ) as spy:
+        _ = page.text, page.script_content, page.style_content
+        _ = page.links, page.meta, page.soup, page.words
+    assert spy.call_count == 1
+
+
+def test_script_and_style_content():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage(SAMPLE_HTML)
+    assert "addEventListener" in page.script_content
+    assert "Organization" in page.script_content
+    assert "display: grid" in page.style_content
+    assert "color: red" in page.style_content
+
+
+def test_links_and_meta():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage(SAMPLE_HTML)
+    assert [a["href"] for a in page.links] == ["/blog", "#main"]
+    assert page.meta["description"] == "We build things"
+    assert page.meta["og:title"] == "Example OG"
+    assert page.meta["viewport"].startswith("width=device-width")
+
+
+def test_html_lower():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage("<HTML><BODY>Hi</BODY></HTML>")
+    assert page.html_lower == "<html><body>hi</body></html>"
+
+
+def test_ensure_reuses_instance_and_wraps_strings():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage(SAMPLE_HTML, url="https://example.com")
+    assert ParsedPage.ensure(page) is page
+
+    wrapped = ParsedPage.ensure("<p>x</p>", url="https://example.com")
+    assert isinstance(wrapped, ParsedPage)
+    assert wrapped.url == "https://example.com"
+    assert ParsedPage.ensure(None).html == ""
+
+
+def test_memo_calls_factory_once():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage(SAMPLE_HTML)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return ["react"]
+
+    assert page.memo("frameworks", factory) == ["react"]
+    assert page.memo("frameworks", factory) == ["react"]
+    assert len(calls) == 1
+
+
+def test_warm_precomputes_shared_views():
+    from agents.content_fetch.parsed_page import ParsedPage
+
+    page = ParsedPage(SAMPLE_HTML)
+    assert page.warm() is page
+    for view in ("soup", "html_lower", "text", "words", "script_content", "style_content", "links", "meta"):
+        assert view in page.__dict__
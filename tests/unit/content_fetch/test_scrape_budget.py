@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+def test_domain_key_normalizes_hosts():
+    from agents.content_fetch.scrape_budget import domain_key
+
+    assert domain_key("https://www.Example.com/path") == "example.com"
+    assert domain_key("http://user@shop.example.com:8080/") == "shop.example.com"
+    assert domain_key("example.fi") == "example.fi"
+
+
+@pytest.mark.asyncio
+async def test_run_bounded_caps_concurrency_and_yields_every_item():
+    from agents.content_fetch.scrape_budget import ScrapeBudget, run_bounded
+
+    active = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return item * 2
+
+    outcomes = await _collect(run_bounded(
+        list(range(8)), worker,
+        domain_of=lambda i: f"site{i}.fi", concurrency=3, budget=ScrapeBudget(10),
+    ))
+
+    assert peak == 3
+    assert sorted(o.result for o in outcomes) == [i * 2 for i in range(8)]
+    assert all(o.error is None for o in outcomes)
+
+
+@pytest.mark.asyncio
+async def test_global_budget_is_shared_across_runs():
+    from agents.content_fetch.scrape_budget import ScrapeBudget, run_bounded
+
+    budget = ScrapeBudget(max_concurrent=2)
+    active = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    await asyncio.gather(*(
+        _collect(run_bounded(
+            [f"{run}-{i}" for i in range(3)], worker,
+            domain_of=lambda item: item, concurrency=3, budget=budget,
+        ))
+        for run in range(3)
+    ))
+
+    assert peak == 2
+    assert budget.stats()["acquired"] == 9
+    assert budget.stats()["domains"] == 0
+
+
+@pytest.mark.asyncio
+async def test_same_domain_never_runs_concurrently():
+    from agents.content_fetch.scrape_budget import ScrapeBudget, run_bounded
+
+    budget = ScrapeBudget(max_concurrent=5)
+    running = {}
+    overlaps = []
+
+    async def worker(url):
+        domain = url.split("/")[0]
+        if running.get(domain):
+            overlaps.append(domain)
+        running[domain] = True
+        await asyncio.sleep(0.01)
+        running[domain] = False
+
+    items = ["a.fi/1", "a.fi/2", "b.fi/1", "a.fi/3", "b.fi/2"]
+    await _collect(run_bounded(
+        items, worker, domain_of=lambda url: url.split("/")[0],
+        concurrency=5, budget=budget,
+    ))
+
+    assert overlaps == []
+    assert budget.stats()["domain_waits"] >= 3
+
+
+@pytest.mark.asyncio
+async def test_failures_are_captured_per_item_in_completion_order():
+    from agents.content_fetch.scrape_budget import ScrapeBudget, run_bounded
+
+    async def worker(item):
+        await asyncio.sleep(item["delay"])
+        if item["fail"]:
+            raise ValueError(item["name"])
+        return item["name"]
+
+    items = [
+        {"name": "slow", "delay": 0.03, "fail": False},
+        {"name": "broken", "delay": 0.0, "fail": True},
+        {"name": "fast", "delay": 0.01, "fail": False},
+    ]
+    outcomes = await _collect(run_bounded(
+        items, worker, domain_of=lambda item: item["name"],
+        concurrency=3, budget=ScrapeBudget(3),
+    ))
+
+    assert [o.item["name"] for o in outcomes] == ["broken", "fast", "slow"]
+    assert isinstance(outcomes[0].error, ValueError)
+    assert outcomes[0].index == 1
+    assert outcomes[2].result == "slow"
+
+
+@pytest.mark.asyncio
+async def test_stopping_early_cancels_pending_jobs():
+    from agents.content_fetch.scrape_budget import ScrapeBudget, run_bounded
+
+    finished = []
+
+    async def worker(item):
+        await asyncio.sleep(0 if item == 0 else 1)
+        finished.append(item)
+        return item
+
+    budget = ScrapeBudget(5)
+    agen = run_bounded([0, 1, 2], worker, domain_of=str, concurrency=3, budget=budget)
+    first = await agen.__anext__()
+    await agen.aclose()
+
+    assert first.result == 0
+    assert finished == [0]
+    assert budget.stats()["active"] == 0
@@ -0,0 +1,117 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+
+def _addrinfo(*ips):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (ip, 443)) for ip in ips]
+
+
+@pytest.mark.parametrize("ip,blocked", [
+    ("127.0.0.1", True),
+    ("10.1.2.3", True),
+    ("172.20.0.1", True),
+    ("192.168.1.1", True),
+    ("169.254.169.254", True),
+    ("0.0.0.0", True),
+    ("::1", True),
+    ("fe80::1%eth0", True),
+    ("::ffff:127.0.0.1", True),
+    ("93.184.216.34", False),
+    ("2606:2800:220:1:248:1893:25c8:1946", False),
+    ("not-an-ip", True),
+])
+def test_is_blocked_address(ip, blocked):
+    from agents.content_fetch.ssrf_guard import is_blocked_address
+
+    assert is_blocked_address(ip) is blocked
+
+
+@pytest.mark.asyncio
+async def test_check_url_rejects_local_names_without_dns():
+    from agents.content_fetch.http_client import DNSCache
+    from agents.content_fetch.ssrf_guard import SSRFError, check_url
+
+    cache = DNSCache()
+    for url in ("http://localhost:8000/", "https://printer.local/", "http:///nohost", "http://10.0.0.5/"):
+        with pytest.raises(SSRFError):
+            await check_url(url, cache)
+    assert cache.stats()["lookups"] == 0
+
+
+@pytest.mark.asyncio
+async def test_check_url_resolves_once_and_pins_addresses():
+    from agents.content_fetch.http_client import DNSCache
+    from agents.content_fetch.ssrf_guard import check_url
+
+    cache = DNSCache(ttl=60)
+    loop = asyncio.get_running_loop()
+    with patch.object(loop, "getaddrinfo", return_value=_addrinfo("93.184.216.34")) as gai:
+        assert await check_url("https://Example.com/page", cache) == ["93.184.216.34"]
+        assert await check_url("https://example.com/other", cache) == ["93.184.216.34"]
+    assert gai.call_count == 1
+    assert cache.get("example.com") == ["93.184.216.34"]
+
+
+@pytest.mark.asyncio
+async def test_check_url_rejects_host_resolving_to_private_address():
+    from agents.content_fetch.http_client import DNSCache
+    from agents.content_fetch.ssrf_guard import SSRFError, check_url
+
+    cache = DNSCache(ttl=60)
+    loop = asyncio.get_running_loop()
+    with patch.object(loop, "getaddrinfo", return_value=_addrinfo("93.184.216.34", "127.0.0.1")):
+        with pytest.raises(SSRFError):
+            await check_url("https://rebind.example/", cache)
+
+
+@pytest.mark.asyncio
+async def test_resolution_failures_are_negatively_cached():
+    from agents.content_fetch.http_client import DNSCache
+    from agents.content_fetch.ssrf_guard import check_url
+
+    cache = DNSCache(ttl=60, negative_ttl=30)
+    loop = asyncio.get_running_loop()
+    with patch.object(loop, "getaddrinfo", side_effect=socket.gaierror(-2, "Name or service not known")) as gai:
+        assert await check_url("https://nope.invalid/", cache) == []
+        assert await check_url("https://nope.invalid/", cache) == []
+    assert gai.call_count == 1
+    assert cache.stats()["negative_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_query():
+    from agents.content_fetch.http_client import DNSCache
+
+    cache = DNSCache(ttl=60)
+    loop = asyncio.get_running_loop()
+    calls = 0
+
+    async def slow_getaddrinfo(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return _addrinfo("93.184.216.34")
+
+    with patch.object(loop, "getaddrinfo", side_effect=slow_getaddrinfo):
+        results = await asyncio.gather(*(cache.resolve("example.com") for _ in range(5)))
+
+    assert calls == 1
+    assert all(r == ["93.184.216.34"] for r in results)
+
+
+@pytest.mark.asyncio
+async def test_pooled_client_refuses_internal_connect_targets():
+    from agents.content_fetch.http_client import DNSCache, create_http_client
+
+    cache = DNSCache(ttl=60)
+    # Passed the guard earlier, but now (rebinding / redirect) points inward
+    cache.put("rebind.example", ["127.0.0.1"])
+    async with create_http_client(dns_cache=cache) as client:
+        with pytest.raises(httpx.ConnectError, match="blocked"):
+            await client.get("http://rebind.example/")
+        with pytest.raises(httpx.ConnectError, match="blocked"):
+            await client.get("http://169.254.169.254/latest/meta-data/")
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for combined (single-call) AI insights generation
+"""
+
+import json
+
+import pytest
+
+SWOT = {
+    "strengths": ["Security 12/15 - HTTPS and headers in place"],
+    "weaknesses": ["Mobile score 5/15 - no viewport, losing mobile visitors"],
+    "opportunities": ["Content expansion from 450 to 2000+ words"],
+    "threats": ["Competitor average 61 vs your 42 - losing visibility"],
+}
+RECOMMENDATIONS = ["Rebuild the mobile experience to open a segment unreachable today (mobile 5/15)"]
+SUMMARY = "Digital maturity is 42/100. The mobile and content gaps are untapped growth, not just problems to fix."
+ACTIONS = [{"category": "mobile", "priority": "critical", "score_impact": 10, "description": "Add a viewport"}]
+VALID = {"swot": SWOT, "recommendations": RECOMMENDATIONS, "executive_summary": SUMMARY, "action_priority": ACTIONS}
+
+
+class FakeLLM:
+    """LLMClient.generate that replays scripted answers and records requests."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.requests = []
+
+    async def generate(self, prompt, max_tokens=1000, temperature=0.7, label="ai_content", response_format=None):
+        self.requests.append({"prompt": prompt, "max_tokens": max_tokens, "label": label,
+                              "response_format": response_format})
+        answer = self.answers.pop(0) if self.answers else None
+        return json.dumps(answer) if isinstance(answer, (dict, list)) else answer
+
+
+def _insights(monkeypatch, llm, **kwargs):
+    import ai_content_generator
+
+    monkeypatch.setattr(ai_content_generator, "LLMClient", lambda api_key=None: llm)
+    basic = {"digital_maturity_score": 42, "score_breakdown": {"security": 12, "mobile": 5, "content": 6},
+             "title": "Acme", "meta_description": "We sell things"}
+    return ai_content_generator.generate_full_ai_insights(
+        "https://acme.fi", basic, {}, {"word_count": 450}, {}, {"platforms": []}, "<html></html>",
+        return_debug_info=True, **kwargs
+    )
+
+
+def _prompt_context(request):
+    # The ```json block has to be real JSON, not a Python dict repr
+    block = request["prompt"].split("```json\n", 1)[1].split("\n```", 1)[0]
+    return json.loads(block)
+
+
+def _requested(request):
+    return list(request["response_format"]["json_schema"]["schema"]["properties"])
+
+
+@pytest.mark.asyncio
+async def test_all_sections_come_from_one_structured_call(monkeypatch):
+    llm = FakeLLM(VALID)
+
+    result = await _insights(monkeypatch, llm, generation_mode="combined")
+
+    assert len(llm.requests) == 1
+    request = llm.requests[0]
+    assert request["label"] == "ai_insights" and request["max_tokens"] == 2400
+    assert request["prompt"].count("https://acme.fi") == 1
+    assert _prompt_context(request)["numbers"]["overall_score"] == 42
+    schema = request["response_format"]["json_schema"]
+    assert schema["strict"] is True
+    assert _requested(request) == ["swot", "recommendations", "executive_summary", "action_priority"]
+    assert schema["schema"]["additionalProperties"] is False and set(schema["schema"]["$defs"]) == {
+        "SwotAnalysis", "ActionPriority"}
+
+    assert result["swot"] == SWOT and result["executive_summary"] == SUMMARY
+    assert result["recommendations"] == RECOMMENDATIONS and result["action_priority"] == ACTIONS
+    assert result["_debug"]["llm_calls"] == 1 and not any(result["_debug"]["fallbacks_used"].values())
+
+
+@pytest.mark.asyncio
+async def test_only_invalid_sections_are_regenerated(monkeypatch):
+    # Summary too short for AIGeneratedContent, action items missing fields
+    first = {**VALID, "executive_summary": "Score 42.", "action_priority": [{"category": "seo"}]}
+    llm = FakeLLM(first, {"executive_summary": SUMMARY, "action_priority": ACTIONS})
+
+    result = await _insights(monkeypatch, llm)
+
+    assert len(llm.requests) == 2
+    retry = llm.requests[1]
+    assert _requested(retry) == ["executive_summary", "action_priority"]
+    assert retry["max_tokens"] == 1000 and "SWOT ANALYSIS RULES" not in retry["prompt"]
+    assert set(retry["response_format"]["json_schema"]["schema"]["$defs"]) == {"ActionPriority"}
+    assert result["swot"] == SWOT and result["executive_summary"] == SUMMARY
+    assert result["action_priority"] == ACTIONS
+    assert result["_debug"]["llm_calls"] == 2 and not any(result["_debug"]["fallbacks_used"].values())
+
+
+@pytest.mark.asyncio
+async def test_sections_still_missing_after_the_retry_use_rule_fallbacks(monkeypatch):
+    import ai_content_generator
+
+    llm = FakeLLM({"swot": SWOT, "recommendations": RECOMMENDATIONS}, "not json")
+
+    result = await _insights(monkeypatch, llm)
+
+    assert len(llm.requests) == 2 and result["swot"] == SWOT
+    context = {"numbers": {"overall_score": 42}}
+    assert result["executive_summary"] == ai_content_generator.fallback_summary(context, "en")
+    assert result["_debug"]["fallbacks_used"] == {
+        "swot": False, "recommendations": False, "summary": True, "action_priority": True}
+
+
+@pytest.mark.asyncio
+async def test_separate_mode_and_a_failed_combined_call_use_one_call_per_section(monkeypatch):
+    llm = FakeLLM()
+    result = await _insights(monkeypatch, llm, generation_mode="separate")
+    assert [r["label"] for r in llm.requests] == ["swot", "recommendations", "executive_summary", "action_priority"]
+    assert all(r["response_format"] is None for r in llm.requests)
+    assert all(_prompt_context(r)["metadata"]["url"] == "https://acme.fi" for r in llm.requests)
+    assert all(result["_debug"]["fallbacks_used"].values())
+
+    # Nothing usable from the combined call: fall back to the per-section prompts
+    llm = FakeLLM(None, SWOT)
+    result = await _insights(monkeypatch, llm, generation_mode="combined")
+    assert [r["label"] for r in llm.requests][0] == "ai_insights" and len(llm.requests) == 5
+    assert result["swot"] == SWOT and result["_debug"]["llm_calls"] == 5
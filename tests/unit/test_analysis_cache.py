@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the two-tier analysis result cache
+"""
+
+import asyncio
+import json
+from typing import Dict
+
+import pytest
+from unittest.mock import patch
+
+
+class MockRedis:
+    """Async Redis stand-in with just get/setex"""
+
+    def __init__(self):
+        self._data: Dict[str, str] = {}
+        self.ttls: Dict[str, int] = {}
+        self.fail = False
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self._data.get(key)
+
+    async def setex(self, key, ttl, value):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self._data[key] = value
+        self.ttls[key] = ttl
+
+    async def aclose(self):
+        pass
+
+
+def _cache(**kwargs):
+    from core.analysis_cache import AnalysisCache
+
+    kwargs.setdefault("redis_url", None)
+    return AnalysisCache(**kwargs)
+
+
+def _with_redis(cache, redis=None):
+    cache._redis = redis or MockRedis()
+    return cache._redis
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_computation():
+    cache = _cache(ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"score": 42}
+
+    results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(20)))
+
+    assert calls == 1
+    assert all(r == {"score": 42} for r in results)
+    # Every caller gets its own object
+    assert len({id(r) for r in results}) == 20
+    stats = cache.stats()
+    assert stats["miss"] == 1
+    assert stats["coalesced"] == 19
+
+
+@pytest.mark.asyncio
+async def test_fresh_hit_returns_copy_and_skips_compute():
+    cache = _cache(ttl=60)
+
+    async def compute():
+        return {"score": 1, "items": [1]}
+
+    first = await cache.get_or_compute("k", compute)
+    first["items"].append(2)
+
+    async def fail():
+        raise AssertionError("should not recompute")
+
+    second = await cache.get_or_compute("k", fail)
+    assert second == {"score": 1, "items": [1]}
+    assert cache.stats()["hit_memory"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_propagate_and_are_not_cached():
+    cache = _cache(ttl=60)
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("fetch failed")
+
+    results = await asyncio.gather(
+        cache.get_or_compute("k", boom),
+        cache.get_or_compute("k", boom),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+
+    async def ok():
+        return {"ok": True}
+
+    assert await cache.get_or_compute("k", ok) == {"ok": True}
+
+
+@pytest.mark.asyncio
+async def test_non_json_results_are_stringified_or_returned_uncached():
+    from datetime import datetime
+    from decimal import Decimal
+
+    cache = _cache(ttl=60)
+    when = datetime(2026, 1, 1)
+
+    async def typed():
+        await asyncio.sleep(0.01)
+        return {"at": when, "revenue": Decimal("1.5"), "tags": {"a"}}
+
+    leader, follower = await asyncio.gather(
+        cache.get_or_compute("typed", typed),
+        cache.get_or_compute("typed", typed),
+    )
+    # The leader sees the same stringified types as followers and cache hits
+    expected = {"at": str(when), "revenue": "1.5", "tags": "{'a'}"}
+    assert leader == follower == expected
+    assert leader is not follower
+    assert await cache.get_or_compute("typed", typed) == expected
+
+    circular = {"n": 1}
+    circular["self"] = circular
+
+    async def unserializable():
+        await asyncio.sleep(0.01)
+        return circular
+
+    results = await asyncio.gather(
+        cache.get_or_compute("loop", unserializable),
+        cache.get_or_compute("loop", unserializable),
+    )
+    assert results[0] is circular and results[1]["n"] == 1
+    await cache.set("loop", circular)
+    assert await cache.get("loop") is None
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_refreshing_in_background():
+    cache = _cache(ttl=10, stale_ttl=60)
+
+    async def v1():
+        return {"v": 1}
+
+    with patch("core.analysis_cache.time.time", return_value=1000.0):
+        await cache.get_or_compute("k", v1)
+
+    refreshed = asyncio.Event()
+
+    async def v2():
+        refreshed.set()
+        return {"v": 2}
+
+    with patch("core.analysis_cache.time.time", return_value=1020.0):
+        assert await cache.get_or_compute("k", v2) == {"v": 1}
+        await asyncio.wait_for(refreshed.wait(), 1)
+        await asyncio.sleep(0)
+        assert await cache.get_or_compute("k", v2) == {"v": 2}
+
+    assert cache.stats()["stale"] == 1
+
+
+@pytest.mark.asyncio
+async def test_entry_past_stale_window_is_recomputed():
+    cache = _cache(ttl=10, stale_ttl=5)
+
+    async def v1():
+        return {"v": 1}
+
+    async def v2():
+        return {"v": 2}
+
+    with patch("core.analysis_cache.time.time", return_value=1000.0):
+        await cache.get_or_compute("k", v1)
+    with patch("core.analysis_cache.time.time", return_value=1020.0):
+        assert await cache.get_or_compute("k", v2) == {"v": 2}
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used():
+    cache = _cache(ttl=60, max_entries=2)
+    await cache.set("a", {"v": "a"})
+    await cache.set("b", {"v": "b"})
+    assert await cache.get("a") == {"v": "a"}  # a is now most recent
+    await cache.set("c", {"v": "c"})
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"v": "a"}
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_back_tier_shared_between_instances():
+    redis = MockRedis()
+    writer = _cache(ttl=60, stale_ttl=30)
+    _with_redis(writer, redis)
+    await writer.set("k", {"score": 7})
+
+    envelope = json.loads(redis._data["k"])
+    assert envelope["data"] == {"score": 7}
+    assert "timestamp" in envelope
+    assert redis.ttls["k"] == 90
+
+    reader = _cache(ttl=60)
+    _with_redis(reader, redis)
+
+    async def fail():
+        raise AssertionError("should come from redis")
+
+    assert await reader.get_or_compute("k", fail) == {"score": 7}
+    assert reader.stats()["hit_redis"] == 1
+    # Promoted into the front tier
+    assert await reader.get_or_compute("k", fail) == {"score": 7}
+    assert reader.stats()["hit_memory"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_degrade_to_memory_tier():
+    cache = _cache(ttl=60)
+    redis = _with_redis(cache)
+    redis.fail = True
+
+    async def compute():
+        return {"ok": 1}
+
+    assert await cache.get_or_compute("k", compute) == {"ok": 1}
+    assert await cache.get_or_compute("k", compute) == {"ok": 1}
+    assert cache.stats()["redis_errors"] >= 1
+    assert cache.stats()["hit_memory"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_sole_caller_cancels_computation():
+    cache = _cache(ttl=60)
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return {}
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(cache.get_or_compute("k", slow), timeout=0.05)
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert cache.stats()["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_lookups_recorded_in_metrics():
+    from agents.observability.metrics import get_metrics
+
+    counter = get_metrics()._metrics["cache_requests_total"]
+    before = dict(counter._values)
+    cache = _cache(ttl=60, name="test_cache")
+
+    async def compute():
+        return {}
+
+    await cache.get_or_compute("k", compute)
+    await cache.get_or_compute("k", compute)
+
+    after = counter._values
+    miss_key = next(k for k in after if ("cache", "test_cache") in k and ("result", "miss") in k)
+    hit_key = next(k for k in after if ("cache", "test_cache") in k and ("result", "hit_memory") in k)
+    assert after[miss_key] - before.get(miss_key, 0) == 1
+    assert after[hit_key] - before.get(hit_key, 0) == 1
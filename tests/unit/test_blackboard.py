@@ -710,3 +710,86 @@ class TestResetClear:
         assert len(bb._subscriptions) == 0
         assert len(bb._history) == 0
         assert bb._stats['total_writes'] == 0
+
+
+# =============================================================================
+# INDEX TESTS
+# =============================================================================
+
+class TestIndexes:
+    """Tests for the key trie, secondary indexes and TTL heap"""
+
+    @pytest.mark.asyncio
+    async def test_prefix_query_examines_only_matching_subtree(self):
+        """Query cost scales with matches, not board size"""
+        bb = Blackboard()
+        for i in range(5):
+            await bb.publish(key=f"scout.c{i}", value=i, agent_id="scout")
+        for i in range(2000):
+            await bb.publish(key=f"other.k{i}", value=i, agent_id="other")
+
+        results = bb.query("scout.*")
+
+        assert [e.key for e in results] == [f"scout.c{i}" for i in range(5)]
+        assert bb.get_stats()['query_candidates'] == 5
+
+    @pytest.mark.asyncio
+    async def test_suffix_and_middle_wildcards(self):
+        """Suffix patterns use the reversed trie; '*' still crosses dots"""
+        bb = Blackboard()
+        await bb.publish(key="scout.a.threats", value=1, agent_id="scout")
+        await bb.publish(key="guardian.threats", value=2, agent_id="guardian")
+        await bb.publish(key="guardian.scores", value=3, agent_id="guardian")
+
+        assert {e.key for e in bb.query("*.threats")} == {"scout.a.threats", "guardian.threats"}
+        assert [e.key for e in bb.query("scout*threats")] == ["scout.a.threats"]
+        assert [e.key for e in bb.query("guardian.scores")] == ["guardian.scores"]
+        assert bb.query("guardian.sc") == []
+
+    @pytest.mark.asyncio
+    async def test_republish_moves_secondary_indexes(self):
+        """Changing category or tags on republish leaves no stale index entries"""
+        bb = Blackboard()
+        await bb.publish(key="k", value=1, agent_id="a", category=DataCategory.THREAT, tags={"old"})
+        await bb.publish(key="k", value=2, agent_id="b", category=DataCategory.ANALYSIS, tags={"new"})
+
+        assert bb.query_by_category(DataCategory.THREAT) == []
+        assert bb.query_by_agent("a") == []
+        assert bb.query(pattern="*", tags={"old"}) == []
+        assert [e.value for e in bb.query(pattern="*", tags={"new"})] == [2]
+
+        bb.delete("k")
+        assert not bb._by_category and not bb._by_agent and not bb._by_tag
+        assert len(bb._key_index) == 0
+        assert not bb._key_index._forward.children
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_evicted_from_heap(self):
+        """Due TTL heap items are removed on the next read without a full scan"""
+        bb = Blackboard()
+        await bb.publish(key="short", value=1, agent_id="a", ttl=60)
+        await bb.publish(key="long", value=2, agent_id="a", ttl=3600)
+        await bb.publish(key="forever", value=3, agent_id="a")
+
+        # Backdate the short-lived entry instead of sleeping
+        entry = bb._data["short"]
+        entry.timestamp -= timedelta(seconds=120)
+        bb._expiry_heap[:] = [
+            (t - 120, s, k, e) if k == "short" else (t, s, k, e) for t, s, k, e in bb._expiry_heap
+        ]
+
+        assert [e.key for e in bb.query("*")] == ["long", "forever"]
+        assert "short" not in bb._data
+        assert len(bb._expiry_heap) == 1
+        assert bb.cleanup_expired() == 0
+
+    @pytest.mark.asyncio
+    async def test_republish_with_ttl_ignores_stale_heap_item(self):
+        """An older TTL for a republished key does not evict the new value"""
+        bb = Blackboard()
+        await bb.publish(key="k", value=1, agent_id="a", ttl=60)
+        await bb.publish(key="k", value=2, agent_id="a")
+        bb._expiry_heap[:] = [(0.0, s, k, e) for _, s, k, e in bb._expiry_heap]
+
+        assert bb.cleanup_expired() == 0
+        assert bb.get("k") == 2
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the HTML scoring process pool
+"""
+
+import asyncio
+import operator
+import os
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+
+class BrokenExecutor(Executor):
+    """Stands in for a pool whose worker was OOM-killed."""
+
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_in_worker_processes():
+    from core.cpu_pool import CPUPool
+
+    pool = CPUPool(workers=1, start_method="spawn", max_tasks_per_child=0)
+    await pool.start()
+    try:
+        assert pool.enabled
+        assert await pool.run(os.getpid) != os.getpid()
+        assert await pool.run(operator.add, 2, 3) == 5
+    finally:
+        pool.shutdown()
+
+    stats = pool.stats()
+    assert stats["completed"] == 2
+    assert stats["fallbacks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_not_started_runs_in_process():
+    from core.cpu_pool import CPUPool
+
+    pool = CPUPool(workers=2)
+    assert not pool.enabled
+    assert await pool.run(os.getpid) == os.getpid()
+    assert pool.stats()["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_zero_workers_disables_pool():
+    from core.cpu_pool import CPUPool
+
+    pool = CPUPool(workers=0)
+    await pool.start()
+    assert not pool.enabled
+    assert pool._pool is None
+    assert await pool.run(operator.mul, 3, 4) == 12
+
+
+@pytest.mark.asyncio
+async def test_unpicklable_function_falls_back():
+    from core.cpu_pool import CPUPool
+
+    pool = CPUPool(workers=1)
+    pool._started = True
+    pool._pool = BrokenExecutor()  # must never be reached
+    assert await pool.run(lambda: "local") == "local"
+    assert pool.stats()["crashes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_crashed_pool_is_replaced_then_given_up():
+    from core.cpu_pool import MAX_POOL_RESTARTS, CPUPool
+
+    pool = CPUPool(workers=1)
+    pool._started = True
+    for _ in range(MAX_POOL_RESTARTS):
+        pool._pool = BrokenExecutor()
+        assert await pool.run(operator.add, 1, 1) == 2
+        assert pool._pool is None
+
+    assert pool.stats()["crashes"] == MAX_POOL_RESTARTS
+    assert not pool.enabled
+
+
+@pytest.mark.asyncio
+async def test_process_stage_uses_fallback_executor():
+    import threading
+
+    from core.stage_graph import StageGraph
+
+    graph = StageGraph()
+    graph.add("cpu", threading.get_ident, mode="process")
+    results = await graph.run()
+
+    # Pool not started in tests → ran on the stage thread pool, not the loop
+    assert results["cpu"] != threading.get_ident()
+    assert graph.timings()["cpu"]["status"] == "done"
+
+
+def test_score_html_page_contract_is_picklable():
+    import pickle
+
+    import main
+
+    html = (
+        "<html><head><title>Shop</title><meta name='viewport' content='width=device-width'>"
+        "<script type='application/ld+json'>{\"@type\": \"Organization\"}</script></head>"
+        "<body><h1>Hello</h1>" + "<p>Plenty of words about our products here.</p>" * 40 +
+        "<a href='https://facebook.com/shop'>fb</a><form><input name='q'></form></body></html>"
+    )
+    job = main.HtmlScoringJob(
+        url="https://example.com", html=html,
+        rendering_info={"spa_detected": False, "rendering_method": "http"},
+        include_ai_factors=True,
+    )
+    job = pickle.loads(pickle.dumps(job))
+
+    scores = pickle.loads(pickle.dumps(main.score_html_page(job)))
+
+    assert scores.basic["digital_maturity_score"] >= 0
+    assert scores.content["word_count"] > 0
+    assert "interaction_patterns" in scores.interactive
+    assert set(scores.ai_factors) == {
+        "structured_data", "semantic_structure", "content_depth", "conversational_format",
+        "authority_page_signals",
+    }
+    # The worker's plain-data signals give the same factor as scanning the page on the loop
+    page = main.ParsedPage(html, url="https://example.com")
+    assert main._check_authority_markers(
+        scores.technical, scores.basic, page_signals=scores.ai_factors["authority_page_signals"]
+    ) == main._check_authority_markers(scores.technical, scores.basic, page.html, page.soup)
+    assert "html_scoring.parse" in scores.timings
+    assert scores.errors == {}
+
+
+def test_score_html_page_runs_analyzers_that_suspend(monkeypatch):
+    import main
+
+    analyze_ux_elements = main.analyze_ux_elements
+
+    async def suspending_ux(page):
+        await asyncio.sleep(0)
+        return await analyze_ux_elements(page)
+
+    monkeypatch.setattr(main, "analyze_ux_elements", suspending_ux)
+    job = main.HtmlScoringJob(
+        url="https://example.com",
+        html="<html><body><h1>Hello</h1>" + "<p>Words about products.</p>" * 20 + "</body></html>",
+        rendering_info={"spa_detected": False, "rendering_method": "http"},
+    )
+
+    scores = main.score_html_page(job)
+
+    assert isinstance(scores.ux, dict) and scores.errors == {}
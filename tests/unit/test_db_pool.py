@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the shared database pool (budgets, saturation stats, sync adapter)
+"""
+
+import asyncio
+import re
+import threading
+from collections import namedtuple
+from decimal import Decimal
+
+import pytest
+
+PgType = namedtuple("PgType", "name")
+PgAttribute = namedtuple("PgAttribute", "name type")
+
+
+class FakeStatement:
+    def __init__(self, conn, query):
+        self.conn = conn
+        self.query = query
+
+    def get_parameters(self):
+        count = len(set(re.findall(r"\$(\d+)", self.query)))
+        return [PgType(self.conn.param_types.get(i, "text")) for i in range(count)]
+
+    def get_attributes(self):
+        if self.query.lstrip().upper().startswith("SELECT"):
+            return [PgAttribute("id", PgType("int4")), PgAttribute("data", PgType("jsonb"))]
+        return []
+
+
+class FakeTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def start(self):
+        self.conn.log.append(("begin",))
+
+    async def commit(self):
+        self.conn.log.append(("commit",))
+
+    async def rollback(self):
+        self.conn.log.append(("rollback",))
+
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+        self.param_types = {}
+
+    async def prepare(self, query):
+        self.log.append(("prepare", query))
+        return FakeStatement(self, query)
+
+    async def fetch(self, query, *args):
+        self.log.append(("fetch", query, args))
+        return [(1, '{"a": 1}'), (2, None)]
+
+    async def execute(self, query, *args):
+        self.log.append(("execute", query, args))
+        return "UPDATE 3"
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+
+class FakePool:
+    """asyncpg.Pool stand-in: acquire(timeout) / release(conn), size-limited."""
+
+    def __init__(self, size=10):
+        self._free = asyncio.Semaphore(size)
+        self.log = []
+        self.active = 0
+        self.max_active = 0
+
+    async def acquire(self, timeout=None):
+        await asyncio.wait_for(self._free.acquire(), timeout)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        return FakeConnection(self.log)
+
+    async def release(self, conn):
+        self.active -= 1
+        self._free.release()
+
+    def get_size(self):
+        return 10
+
+    def get_idle_size(self):
+        return 10 - self.active
+
+
+def _manager(**budgets):
+    from core.db_pool import DatabasePool
+
+    manager = DatabasePool(dsn="postgres://app@db/brandista", budgets=budgets, acquire_timeout=1.0)
+    manager._pool = FakePool()
+    manager._loop = asyncio.get_running_loop()
+    manager._loop_thread = threading.get_ident()
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_budgets_cap_each_subsystem_and_report_saturation():
+    manager = _manager(alerts=2)
+    alerts = manager.budget("alerts")
+    held = 0
+    most_held = 0
+
+    async def job():
+        nonlocal held, most_held
+        async with alerts.acquire():
+            held += 1
+            most_held = max(most_held, held)
+            await asyncio.sleep(0.01)
+            held -= 1
+
+    tasks = [asyncio.create_task(job()) for _ in range(5)]
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert alerts.stats()["waiting"] == 3
+    # Another subsystem is not stuck behind the alerts queue
+    async with manager.budget("history").acquire():
+        pass
+    await asyncio.gather(*tasks)
+
+    assert most_held == 2
+    stats = manager.stats()
+    alerts_stats = stats["budgets"]["alerts"]
+    assert [alerts_stats[k] for k in ("limit", "in_use", "peak", "acquired")] == [2, 0, 2, 5]
+    assert stats["budgets"]["history"]["limit"] == manager.max_size
+    assert manager._pool.active == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_timeout_is_counted_and_frees_nothing_it_did_not_take():
+    manager = _manager(scheduler=1)
+    budget = manager.budget("scheduler")
+
+    conn = await budget.checkout()
+    with pytest.raises(asyncio.TimeoutError):
+        await budget.checkout(timeout=0.01)
+    await budget.checkin(conn)
+
+    async with budget.acquire():
+        pass
+    assert budget.stats()["timeouts"] == 1
+    assert budget.stats()["acquired"] == 2
+    await budget.close()  # no-op: the manager owns the pool
+    assert manager.started
+
+
+def test_psycopg2_queries_translate_to_asyncpg():
+    from core.db_pool import adapt_param, to_asyncpg_query
+
+    assert to_asyncpg_query("SELECT * FROM t WHERE a = %s AND b LIKE %s || '%%'", ("x", "y")) == (
+        "SELECT * FROM t WHERE a = $1 AND b LIKE $2 || '%'", ["x", "y"])
+    assert to_asyncpg_query("UPDATE t SET a = %(v)s WHERE b = %(v)s", {"v": 1}) == (
+        "UPDATE t SET a = $1 WHERE b = $1", [1])
+    assert to_asyncpg_query("SELECT '100%'") == ("SELECT '100%'", [])
+
+    assert adapt_param({"a": 1}, "jsonb") == '{"a": 1}'
+    assert adapt_param('{"a": 1}', "jsonb") == '{"a": 1}'
+    assert adapt_param(72.5, "int4") == 73
+    assert adapt_param(3, "varchar") == "3"
+    assert adapt_param(1.25, "numeric") == Decimal("1.25")
+    assert adapt_param("2026-01-02T03:04:05", "timestamp").year == 2026
+    assert adapt_param(None, "int4") is None
+
+
+@pytest.mark.asyncio
+async def test_sync_adapter_runs_legacy_code_on_the_shared_pool(monkeypatch):
+    import core.db_pool as db_pool
+    import database
+
+    manager = _manager(legacy=1)
+    monkeypatch.setattr(db_pool, "_db_pool", manager)
+
+    def legacy_helper():
+        # Written against psycopg2: connect_db / cursor / commit / release_connection
+        conn = database.connect_db()
+        conn._conn.param_types = {1: "int4"}
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, data FROM t WHERE user_id = %s AND score > %s", ("u1", 50.4))
+            rows = cursor.fetchall()
+            cursor.execute("UPDATE t SET seen = TRUE WHERE user_id = %s", ("u1",))
+            updated = cursor.rowcount
+            conn.commit()
+            return rows, updated
+        finally:
+            cursor.close()
+            database.release_connection(conn)
+
+    rows, updated = await asyncio.to_thread(legacy_helper)
+
+    assert rows == [(1, {"a": 1}), (2, None)]
+    assert updated == 3
+    log = manager._pool.log
+    assert log[0] == ("begin",)
+    assert [entry[2] for entry in log if entry[0] == "fetch"] == [("u1", 50)]
+    assert log[-1] == ("commit",)
+    assert manager._pool.active == 0
+    assert manager.budget("legacy").stats()["acquired"] == 1
+
+    # Types are described once per query; repeats go straight to fetch/execute
+    log.clear()
+    assert await asyncio.to_thread(legacy_helper) == (rows, updated)
+    assert [entry[0] for entry in log] == ["begin", "fetch", "execute", "commit"]
+
+    # On the event loop thread the adapter cannot wait on the loop
+    assert manager.sync_connection() is None
+    assert manager.stats()["sync_fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_checkin_after_close_does_not_fail():
+    manager = _manager(alerts=1)
+    budget = manager.budget("alerts")
+    conn = await budget.checkout()
+
+    manager._pool = None  # what close() leaves behind
+    await budget.checkin(conn)
+
+    assert budget.in_use == 0
+    assert await asyncio.wait_for(budget._slots.acquire(), 0.1)
+
+
+@pytest.mark.asyncio
+async def test_open_pool_shares_only_the_same_database(monkeypatch):
+    import core.db_pool as db_pool
+
+    manager = _manager()
+    monkeypatch.setattr(db_pool, "_db_pool", manager)
+    created = []
+
+    async def create_pool(dsn, **kwargs):
+        created.append((dsn, kwargs))
+        return FakePool()
+
+    monkeypatch.setattr(db_pool.asyncpg, "create_pool", create_pool)
+
+    shared = await db_pool.open_pool("alerts", "postgresql+asyncpg://app@db/brandista", max_size=5)
+    assert shared is manager.budget("alerts")
+    other = await db_pool.open_pool("history", "postgresql://app@other/history", max_size=5)
+    assert isinstance(other, FakePool)
+    assert created == [("postgresql://app@other/history", {"max_size": 5})]
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for cross-worker fan-out (alerts SSE queues, notification websockets)
+"""
+
+import asyncio
+import json
+
+import pytest
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def _workers(count=2, **bus_kwargs):
+    """Hubs sharing one in-memory bus behave like workers sharing Redis."""
+    from core.fanout import FanoutHub, MemoryFanoutBus
+
+    bus = MemoryFanoutBus(**bus_kwargs)
+    return bus, [FanoutHub(bus) for _ in range(count)]
+
+
+def _alert(alert_id="a1", title="Price drop"):
+    from core.alerts import Alert
+
+    return Alert(id=alert_id, type="competitor", severity="warning", title=title,
+                 message="m", module="radar", agent="scout", user_id="u1")
+
+
+@pytest.mark.asyncio
+async def test_alert_created_on_one_worker_reaches_sse_client_on_another():
+    from core.alerts import AlertService
+
+    _, (hub_a, hub_b) = _workers()
+    worker_a, worker_b = AlertService(hub=hub_a), AlertService(hub=hub_b)
+
+    queue = await worker_b.register_client("u1")
+    seq = await worker_a._broadcast("u1", _alert())
+
+    assert seq == 1
+    delivered_seq, alert = queue.get_nowait()
+    assert (delivered_seq, alert.title) == (1, "Price drop")
+    # Only the worker holding the connection got it
+    assert hub_a.stats()["delivered"] == 0 and hub_b.stats()["delivered"] == 1
+
+    await worker_b.unregister_client("u1", queue)
+    await worker_a._broadcast("u1", _alert("a2"))
+    assert queue.empty()
+    assert not hub_b.is_tracked("alerts", "u1")
+
+
+@pytest.mark.asyncio
+async def test_sequences_and_replay_per_user():
+    _, (hub,) = _workers(count=1, replay_size=3)
+
+    for i in range(5):
+        await hub.publish("alerts", "u1", {"n": i})
+    await hub.publish("alerts", "u2", {"n": 0})
+    await hub.publish("notifications", "u1", {"n": 0})
+
+    replay = await hub.replay("alerts", "u1", after_seq=3)
+    assert [m.seq for m in replay.messages] == [4, 5]
+    assert (replay.cursor, replay.complete) == (5, True)
+    assert (await hub.replay("alerts", "u1", after_seq=5)).messages == []
+
+    # Seq 2 was trimmed from the 3-message log: the caller must catch up elsewhere
+    gap = await hub.replay("alerts", "u1", after_seq=1)
+    assert [m.seq for m in gap.messages] == [3, 4, 5] and not gap.complete
+
+    # A client ahead of the log (e.g. a restarted bus) gets everything that is there
+    restarted = await hub.replay("alerts", "u2", after_seq=40)
+    assert [m.seq for m in restarted.messages] == [1] and restarted.cursor == 1
+    assert await hub.head("notifications", "u1") == 1
+
+
+@pytest.mark.asyncio
+async def test_notification_reaches_websocket_on_other_worker_and_resumes_in_order():
+    from notification_ws import NotificationConnectionManager
+
+    _, (hub_a, hub_b) = _workers()
+    manager_a, manager_b = NotificationConnectionManager(hub_a), NotificationConnectionManager(hub_b)
+
+    for i in range(3):
+        await manager_a.send_to_user("u1", {"type": "agent_insight", "data": {"n": i}})
+
+    socket = FakeWebSocket()
+    await manager_b.connect(socket, "u1")
+    # A live notification lands while the replay is being sent
+    original_write = manager_b._write
+
+    async def write_and_publish(ws, text):
+        await original_write(ws, text)
+        if json.loads(text)["seq"] == 2:
+            await manager_a.send_to_user("u1", {"type": "agent_insight", "data": {"n": 3}})
+
+    manager_b._write = write_and_publish
+    assert await manager_b.resume(socket, "u1", last_seq=1) == 2
+    manager_b._write = original_write
+
+    await manager_a.send_to_user("u1", {"type": "agent_insight", "data": {"n": 4}})
+    assert [m["seq"] for m in socket.sent] == [2, 3, 4, 5]
+    assert [m["data"]["n"] for m in socket.sent] == [1, 2, 3, 4]
+
+    await manager_b.disconnect(socket)
+    assert not hub_b.is_tracked("notifications", "u1")
+
+
+@pytest.mark.asyncio
+async def test_backend_failure_still_delivers_on_this_worker():
+    from core.fanout import FanoutHub, MemoryFanoutBus
+
+    class DownBus(MemoryFanoutBus):
+        async def publish(self, channel, user_id, payload, text=None):
+            raise ConnectionError("redis down")
+
+    hub = FanoutHub(DownBus())
+    received = []
+
+    async def deliver(message):
+        received.append(message)
+
+    hub.register("notifications", deliver)
+    await hub.track("notifications", "u1")
+
+    assert await hub.publish("notifications", "u1", {"x": 1}) == 0
+    assert await hub.publish("notifications", "u2", {"x": 2}) == 0
+    assert [(m.user_id, m.seq) for m in received] == [("u1", 0)]
+    assert hub.stats()["local_fallbacks"] == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_routes_pubsub_messages_to_subscribed_users():
+    from core.fanout import FanoutHub, RedisFanoutBackend
+
+    class FakePubSub:
+        def __init__(self):
+            self.channels = []
+            self.inbox = asyncio.Queue()
+
+        async def subscribe(self, name):
+            self.channels.append(name)
+
+        async def unsubscribe(self, name):
+            self.channels.remove(name)
+
+        async def get_message(self, ignore_subscribe_messages, timeout):
+            try:
+                return await asyncio.wait_for(self.inbox.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        async def aclose(self):
+            pass
+
+    pubsub = FakePubSub()
+    backend = RedisFanoutBackend(redis_url=None)
+    backend._client = lambda: type("Redis", (), {"pubsub": lambda self: pubsub})()
+    hub = FanoutHub(backend)
+    received = asyncio.Queue()
+    hub.register("alerts", received.put)
+
+    await hub.track("alerts", "u1@x.io")
+    assert pubsub.channels == ["fanout:control", "fanout:{alerts:u1@x.io}:live"]
+
+    await pubsub.inbox.put({"channel": "fanout:{alerts:other}:live", "data": '1 {"a": 0}'})
+    await pubsub.inbox.put({"channel": "fanout:{alerts:u1@x.io}:live", "data": '7 {"a": 1}'})
+    message = await asyncio.wait_for(received.get(), 1)
+    assert (message.user_id, message.seq, message.payload) == ("u1@x.io", 7, {"a": 1})
+    assert message.text == '{"a": 1}'  # passed on as received, not re-encoded
+
+    # A stuck handler for one user does not hold up deliveries to another
+    release = asyncio.Event()
+
+    async def deliver(message):
+        if message.user_id == "slow":
+            await release.wait()
+        await received.put(message)
+
+    hub.register("alerts", deliver)
+    await hub.track("alerts", "slow")
+    await pubsub.inbox.put({"channel": "fanout:{alerts:slow}:live", "data": '1 {"a": 2}'})
+    await pubsub.inbox.put({"channel": "fanout:{alerts:u1@x.io}:live", "data": '8 {"a": 3}'})
+    message = await asyncio.wait_for(received.get(), 1)
+    assert (message.user_id, message.seq) == ("u1@x.io", 8)
+    release.set()
+    message = await asyncio.wait_for(received.get(), 1)
+    assert (message.user_id, message.seq) == ("slow", 1)
+
+    await hub.untrack("alerts", "slow")
+    await hub.untrack("alerts", "u1@x.io")
+    assert pubsub.channels == ["fanout:control"]
+    await hub.close()
+
+
+def test_redis_topic_keys_share_one_hash_tag():
+    from core.fanout import RedisFanoutBackend
+
+    keys = RedisFanoutBackend(redis_url=None)._keys("alerts", "u1@x.io")
+    assert keys == (
+        "fanout:{alerts:u1@x.io}:seq", "fanout:{alerts:u1@x.io}:log", "fanout:{alerts:u1@x.io}:live",
+    )
+
+
+def test_sse_events_carry_sequence_ids():
+    from core.alerts import _parse_event_id, _sse_event
+
+    assert _sse_event("alert", {"a": 1}, event_id=3) == 'id: 3\nevent: alert\ndata: {"a": 1}\n\n'
+    assert _sse_event("heartbeat", {}).startswith("event: heartbeat")
+    assert [_parse_event_id(v) for v in ("12", "", None, "x")] == [12, None, None, None]
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the identity cache (indexed USERS_DB and verified-token reuse)
+"""
+
+import time
+
+import pytest
+
+
+def _token(sub, exp_in=3600, **claims):
+    import jwt
+
+    from app.config import ALGORITHM, SECRET_KEY
+
+    return jwt.encode({"sub": sub, "exp": int(time.time()) + exp_in, **claims}, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def _count_decodes(monkeypatch):
+    import jwt
+
+    import core.identity_cache as identity_cache
+
+    calls = []
+    real_decode = jwt.decode
+
+    def decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(identity_cache.jwt, "decode", decode)
+    return calls
+
+
+def test_user_index_follows_writes():
+    from core.identity_cache import UserIndex
+
+    users = UserIndex({"admin@x.io": {"email": "admin@x.io", "role": "admin"}})
+    users["bob"] = {"username": "bob", "email": "bob@x.io"}
+
+    assert users.find("admin@x.io")[0] == "admin@x.io"
+    assert users.find("bob@x.io") == ("bob", users["bob"])
+    assert users.find_by_email("bob@x.io")[0] == "bob"
+
+    # Overwriting a record moves its index entries
+    users["bob"] = {"username": "bobby", "email": "bobby@x.io"}
+    assert users.find("bob@x.io") == (None, None)
+    assert users.find("bobby")[0] == "bob"
+
+    # In-place edits need reindex()
+    users["bob"]["email"] = "robert@x.io"
+    users.reindex("bob")
+    assert users.find("robert@x.io")[0] == "bob"
+
+    del users["bob"]
+    assert users.find("bobby") == (None, None)
+    assert users.pop("missing", None) is None
+
+    users.reset({"carol": {"username": "carol", "email": "c@x.io"}})
+    assert list(users) == ["carol"]
+    assert users.find("admin@x.io") == (None, None)
+    assert users.find("c@x.io")[0] == "carol"
+
+
+def test_user_index_keeps_first_match_like_the_old_scan():
+    from core.identity_cache import UserIndex
+
+    users = UserIndex()
+    users["first"] = {"username": "dup"}
+    users["second"] = {"username": "dup"}
+    assert users.find("dup")[0] == "first"
+    users.pop("first")
+    assert users.find("dup")[0] == "second"
+
+
+def test_repeated_token_skips_verification_and_lookup(monkeypatch):
+    from core.identity_cache import IdentityCache, UserIndex
+
+    decodes = _count_decodes(monkeypatch)
+    users = UserIndex({"alice": {"username": "alice", "email": "alice@x.io"}})
+    cache = IdentityCache(users=users)
+    token = _token("alice@x.io")
+
+    for _ in range(5):
+        payload, key = cache.identify(token)
+    assert (payload["sub"], key) == ("alice@x.io", "alice")
+    assert len(decodes) == 1
+    assert cache.stats()["hits"] == 4
+
+    # A user table write re-resolves the key, still without re-verifying
+    del users["alice"]
+    assert cache.identify(token)[1] is None
+    users["alice2"] = {"username": "alice2", "email": "alice@x.io"}
+    assert cache.identify(token)[1] == "alice2"
+    assert len(decodes) == 1
+
+
+def test_cached_tokens_expire_with_ttl_and_token_exp(monkeypatch):
+    import jwt
+
+    from core.identity_cache import IdentityCache
+
+    decodes = _count_decodes(monkeypatch)
+    now = [time.time()]
+    cache = IdentityCache(token_ttl=60, clock=lambda: now[0])
+
+    long_lived = _token("a", exp_in=3600)
+    short_lived = _token("b", exp_in=10)
+    cache.decode(long_lived)
+    cache.decode(short_lived)
+
+    now[0] += 30
+    cache.decode(long_lived)
+    assert len(decodes) == 2
+    # Past its own exp the token is verified again
+    cache.decode(short_lived)
+    assert decodes[-1] == short_lived
+
+    now[0] += 31
+    cache.decode(long_lived)
+    assert len(decodes) == 4
+
+    with pytest.raises(jwt.InvalidTokenError):
+        cache.decode("not-a-token")
+    assert cache.stats()["tokens"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_resolves_username_subject():
+    import main
+
+    main.USERS_DB["legacy_user"] = {
+        "username": "legacy_user", "email": "legacy@x.io", "role": "user", "search_limit": 7,
+    }
+    try:
+        user = await main.get_current_user(f"Bearer {_token('legacy_user@x.io')}")
+        assert (user.email, user.search_limit) == ("legacy_user@x.io", 10)  # unknown sub: built from token
+        user = await main.get_current_user(f"Bearer {_token('legacy@x.io')}")
+        assert (user.username, user.search_limit) == ("legacy_user", 7)
+        assert await main.get_current_user("Bearer garbage") is None
+    finally:
+        main.USERS_DB.pop("legacy_user", None)
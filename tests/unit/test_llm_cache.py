@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the content-addressed LLM response cache
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+
+def _response(content, finish_reason="stop"):
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)])
+
+
+def _request(prompt="Analyse acme.fi", **overrides):
+    request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": prompt}],
+               "max_tokens": 500, "temperature": 0.5}
+    request.update(overrides)
+    return request
+
+
+class FakeOpenAI:
+    def __init__(self, *answers, delay=0.0):
+        self.answers = list(answers) or ["answer"]
+        self.delay = delay
+        self.calls = 0
+
+    async def create(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        answer = self.answers[min(self.calls, len(self.answers)) - 1]
+        return answer if not isinstance(answer, str) else _response(answer)
+
+
+def test_key_ignores_formatting_but_not_parameters():
+    from core.llm_cache import cache_key
+
+    base = cache_key(_request("Line one  \r\nLine two\n\n\n\nEnd\n"))
+    assert base == cache_key(_request("Line one\nLine two\n\nEnd", timeout=30))
+    assert base.startswith("llmcache:v1:")
+
+    for changed in (_request("Line one\nLine 2\n\nEnd"), _request(model="gpt-4o"),
+                    _request(temperature=0.2), _request(max_tokens=501),
+                    _request(response_format={"type": "json_object"})):
+        assert cache_key(changed) != base
+
+
+@pytest.mark.asyncio
+async def test_repeat_requests_are_served_from_memory_with_per_label_stats():
+    from core.llm_cache import LLMCache, completion_text
+
+    cache = LLMCache(ttls={"swot": 60, "books_receipt": 0}, redis_url=None, cache_dir=None)
+    llm = FakeOpenAI("first", "second")
+
+    fresh = await cache.completion("swot", _request(), llm.create)
+    cached = await cache.completion("swot", _request(), llm.create)
+    assert completion_text(fresh) == completion_text(cached) == "first"
+    assert cached.cached and cached.usage.total_tokens == 0 and llm.calls == 1
+
+    # TTL 0 and streaming requests always go to the model
+    await cache.completion("books_receipt", _request(), llm.create)
+    await cache.completion("swot", _request(stream=True), llm.create)
+    assert llm.calls == 3
+
+    stats = cache.stats()
+    assert stats["labels"]["swot"]["hit_memory"] == 1 and stats["labels"]["swot"]["hit_rate"] == 0.5
+    assert stats["labels"]["books_receipt"]["skip"] == 1
+    assert stats["tier"] == "memory" and stats["entries"] == 1
+
+
+def test_books_labels_are_not_cached_unless_configured(monkeypatch):
+    import core.llm_cache
+    from core.llm_cache import LLMCache
+
+    cache = LLMCache(redis_url=None, cache_dir=None)
+    assert [cache.ttl_for(label) for label in ("books", "books_receipt", "books_account")] == [0, 0, 0]
+
+    monkeypatch.setattr(core.llm_cache, "LLM_CACHE_TTLS", "books=120")
+    assert LLMCache(redis_url=None, cache_dir=None).ttl_for("books") == 120
+
+
+@pytest.mark.asyncio
+async def test_incomplete_answers_are_not_stored_and_concurrent_misses_share_one_call():
+    from core.llm_cache import LLMCache
+
+    cache = LLMCache(redis_url=None, cache_dir=None)
+    for bad in (None, _response(""), _response('{"swot": ', finish_reason="length")):
+        llm = FakeOpenAI(bad)
+        await cache.completion("swot", _request(), llm.create)
+        assert cache.stats()["entries"] == 0
+
+    llm = FakeOpenAI("shared", delay=0.05)
+    results = await asyncio.gather(*(cache.completion("swot", _request(), llm.create) for _ in range(5)))
+    assert llm.calls == 1
+    assert {r.choices[0].message.content for r in results} == {"shared"}
+    assert cache.stats()["labels"]["swot"]["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_bypass_headers_refresh_or_skip_the_cache(monkeypatch):
+    import core.llm_cache as llm_cache_module
+    from core.llm_cache import LLMCache, LLMCacheModeMiddleware, current_mode, llm_cache_mode, mode_from_headers
+
+    # Headers are ignored unless the deployment opts in
+    monkeypatch.setattr(llm_cache_module, "LLM_CACHE_ALLOW_BYPASS", False)
+    assert mode_from_headers({"x-llm-cache": "off", "cache-control": "no-cache"}) == "use"
+
+    monkeypatch.setattr(llm_cache_module, "LLM_CACHE_ALLOW_BYPASS", True)
+    assert mode_from_headers({"x-llm-cache": "refresh"}) == "refresh"
+    assert mode_from_headers({"x-llm-cache": "off"}) == "off"
+    assert mode_from_headers({"cache-control": "no-cache"}) == "refresh"
+    assert mode_from_headers({"cache-control": "max-age=0, no-store"}) == "off"
+    assert mode_from_headers({}) == "use"
+
+    cache = LLMCache(redis_url=None, cache_dir=None)
+    llm = FakeOpenAI("old", "new", "unstored")
+    await cache.completion("swot", _request(), llm.create)
+    with llm_cache_mode("refresh"):
+        assert (await cache.completion("swot", _request(), llm.create)).choices[0].message.content == "new"
+    with llm_cache_mode("off"):
+        await cache.completion("swot", _request(), llm.create)
+    assert (await cache.completion("swot", _request(), llm.create)).choices[0].message.content == "new"
+    assert llm.calls == 3
+
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(current_mode())
+
+    middleware = LLMCacheModeMiddleware(app)
+    await middleware({"type": "http", "headers": [(b"X-LLM-Cache", b"refresh")]}, None, None)
+    await middleware({"type": "http", "headers": []}, None, None)
+    assert seen == ["refresh", "use"] and current_mode() == "use"
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_is_shared_between_workers_and_expires(tmp_path):
+    from core.llm_cache import LLMCache
+
+    now = [1000.0]
+    worker_a = LLMCache(ttls={"swot": 60}, redis_url=None, cache_dir=str(tmp_path), clock=lambda: now[0])
+    worker_b = LLMCache(ttls={"swot": 60}, redis_url=None, cache_dir=str(tmp_path), clock=lambda: now[0])
+    llm = FakeOpenAI("from a", "from b")
+
+    await worker_a.completion("swot", _request(), llm.create)
+    hit = await worker_b.completion("swot", _request(), llm.create)
+    assert hit.choices[0].message.content == "from a" and llm.calls == 1
+    assert worker_b.stats()["labels"]["swot"]["hit_disk"] == 1
+
+    now[0] += 61
+    worker_b.clear()
+    await worker_b.completion("swot", _request(), llm.create)
+    assert llm.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_stores_with_the_label_ttl():
+    from core.llm_cache import LLMCache, cache_key
+
+    class FakeRedis:
+        def __init__(self):
+            self.data, self.ttls = {}, {}
+
+        async def get(self, key):
+            return self.data.get(key)
+
+        async def setex(self, key, ttl, value):
+            self.data[key], self.ttls[key] = value, ttl
+
+    redis = FakeRedis()
+    worker_a, worker_b = (LLMCache(ttls={"swot": 600}, redis_url="redis://cache") for _ in range(2))
+    worker_a._redis = worker_b._redis = redis
+    llm = FakeOpenAI("shared answer")
+
+    await worker_a.completion("swot", _request(), llm.create)
+    assert redis.ttls == {cache_key(_request()): 600}
+    hit = await worker_b.completion("swot", _request(), llm.create)
+    assert hit.choices[0].message.content == "shared answer" and llm.calls == 1
+    assert worker_b.stats()["hit_redis"] == 1
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the LLM gateway (AIMD limit, priority lanes, token budget, Retry-After)
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None, code=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.code = code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class FakeClient:
+    """client.chat.completions.create that replays scripted outcomes."""
+
+    def __init__(self, outcomes=(), delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **request):
+        self.calls.append(request)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+            if isinstance(outcome, Exception):
+                raise outcome
+            usage = SimpleNamespace(prompt_tokens=10, completion_tokens=20, total_tokens=30)
+            message = SimpleNamespace(content="ok")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+        finally:
+            self.active -= 1
+
+
+def _request(**overrides):
+    request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 50}
+    request.update(overrides)
+    return request
+
+
+def test_aimd_grows_per_window_and_halves_once_per_cooldown():
+    from core.llm_gateway import AIMDLimit
+
+    now = [0.0]
+    limit = AIMDLimit(4, minimum=1, maximum=6, latency_target=10, cooldown=2, clock=lambda: now[0])
+
+    for _ in range(4):
+        limit.on_success(1.0)
+    assert limit.limit == 5
+    for _ in range(20):
+        limit.on_success(1.0)
+    assert limit.limit == 6  # capped
+
+    limit.on_congestion()
+    limit.on_congestion()  # same burst of 429s
+    assert limit.limit == 3 and limit.decreases == 1
+
+    now[0] += 3
+    limit.on_success(12.0)  # slower than the target
+    assert limit.value == pytest.approx(2.7)
+    now[0] += 3
+    for _ in range(5):
+        limit.on_congestion()
+        now[0] += 3
+    assert limit.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_jump_the_background_queue():
+    from core.llm_gateway import LLMGateway, llm_lane
+
+    gateway = LLMGateway(initial_concurrency=2, max_concurrency=2, background_share=0.5,
+                         tokens_per_minute=0, latency_target=0)
+    client = FakeClient(delay=0.02)
+    order = []
+
+    async def call(lane, name):
+        await gateway.chat(client, label=name, **_request())
+        order.append(name)
+
+    with llm_lane("background"):
+        background = [asyncio.create_task(call("background", f"bg{i}")) for i in range(4)]
+    await asyncio.sleep(0)
+    # Background may only hold half the limit: one slot stays free for users
+    assert gateway.stats()["active"] == {"interactive": 0, "background": 1}
+    assert gateway.stats()["waiting"]["background"] == 3
+
+    interactive = [asyncio.create_task(call("interactive", f"ui{i}")) for i in range(3)]
+    await asyncio.gather(*background, *interactive)
+
+    assert order.index("ui2") < order.index("bg2")
+    assert client.peak <= 2
+    stats = gateway.stats()
+    assert stats["lanes"]["background"]["calls"] == 4 and stats["lanes"]["interactive"]["calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_every_call_and_halves_the_limit():
+    from core.llm_gateway import LLMGateway
+
+    gateway = LLMGateway(initial_concurrency=8, max_retries=2, tokens_per_minute=0, latency_target=0)
+    client = FakeClient([APIError(429, {"retry-after-ms": "150"})])
+
+    started = asyncio.get_running_loop().time()
+    first, second = await asyncio.gather(
+        gateway.chat(client, label="swot", **_request()),
+        gateway.chat(client, label="swot", **_request()),
+    )
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert first.usage.total_tokens == 30 and second.usage.total_tokens == 30
+    stats = gateway.stats()
+    assert (stats["rate_limited"], stats["retries"], stats["pauses"]) == (1, 1, 1)
+    assert gateway.limit == 4
+    assert elapsed >= 0.15
+
+    # A call started during the pause waits for it too
+    client.outcomes = [APIError(503, {"retry-after": "0.1"})]
+    await gateway.chat(client, label="swot", **_request())
+    started = asyncio.get_running_loop().time()
+    gateway._paused_until = gateway._clock() + 0.1
+    await gateway.chat(client, label="swot", **_request())
+    assert asyncio.get_running_loop().time() - started >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_fatal_errors_and_exhausted_retries_raise():
+    from core.llm_gateway import LLMGateway
+
+    gateway = LLMGateway(max_retries=2, backoff_base=0.001, tokens_per_minute=0)
+
+    client = FakeClient([APIError(400)])
+    with pytest.raises(APIError):
+        await gateway.chat(client, **_request())
+    assert len(client.calls) == 1
+
+    client = FakeClient([APIError(429, code="insufficient_quota")])
+    with pytest.raises(APIError):
+        await gateway.chat(client, **_request())
+    assert len(client.calls) == 1
+
+    client = FakeClient([APIError(500)] * 3)
+    with pytest.raises(APIError):
+        await gateway.chat(client, **_request())
+    assert len(client.calls) == 3
+    assert gateway.stats()["errors"] == 3 and gateway.stats()["active"]["interactive"] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_budget_waits_and_settles_from_usage():
+    from core.llm_gateway import LLMGateway, TokenBudget, estimate_tokens
+
+    now = [0.0]
+    budget = TokenBudget(600, clock=lambda: now[0])  # 10 tokens/s
+    assert await budget.reserve(500) == 500
+    budget.settle(500, 30)
+    assert budget.tokens == 570
+
+    drained = TokenBudget(6000)  # 100 tokens/s
+    await drained.reserve(6000)
+    started = asyncio.get_running_loop().time()
+    await drained.reserve(10)
+    assert asyncio.get_running_loop().time() - started >= 0.09 and drained.waits >= 1
+
+    gateway = LLMGateway(tokens_per_minute=6000)
+    request = _request(max_tokens=5950)
+    assert estimate_tokens(request) == 5950 + 8
+    client = FakeClient()
+    await gateway.chat(client, **request)
+    started = asyncio.get_running_loop().time()
+    await gateway.chat(client, **_request(max_tokens=100))
+    # 30 tokens used of ~5958 reserved: the refund means no wait
+    assert asyncio.get_running_loop().time() - started < 0.05
+    assert gateway.stats()["tokens"] == 60
+
+
+@pytest.mark.asyncio
+async def test_timeouts_keep_the_reservation_and_errors_refund_it():
+    from core.llm_gateway import LLMGateway, estimate_tokens
+
+    # A frozen clock means the bucket never refills during the test
+    gateway = LLMGateway(tokens_per_minute=6000, max_retries=0, timeout=0.01, clock=lambda: 0.0)
+    reserved = estimate_tokens(_request())
+
+    with pytest.raises(asyncio.TimeoutError):
+        await gateway.chat(FakeClient(delay=0.1), **_request())
+    assert gateway.budget.tokens == 6000 - reserved
+
+    with pytest.raises(APIError):
+        await gateway.chat(FakeClient([APIError(400)]), **_request())
+    assert gateway.budget.tokens == 6000 - reserved
+    assert gateway.stats()["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gateway_against_the_fake_openai_server():
+    import httpx
+    from openai import AsyncOpenAI
+
+    from core.llm_gateway import LLMGateway
+    from scripts.fake_openai_server import create_app
+
+    app = create_app(rpm=3, window=0.3, latency=0.0, jitter=0.0, completion_tokens=20)
+    transport = httpx.ASGITransport(app=app)
+    client = AsyncOpenAI(api_key="fake", base_url="http://fake/v1",
+                         http_client=httpx.AsyncClient(transport=transport, base_url="http://fake"))
+    gateway = LLMGateway(initial_concurrency=4, max_retries=3, tokens_per_minute=0, latency_target=0)
+
+    responses = await asyncio.gather(*(gateway.chat(client, label="bench", **_request()) for _ in range(5)))
+
+    assert all(r.choices[0].message.content.startswith("Fake answer") for r in responses)
+    assert all(r.usage.completion_tokens == 20 for r in responses)
+    stats = gateway.stats()
+    assert stats["rate_limited"] >= 1 and stats["pauses"] >= 1 and stats["errors"] == 0
+    server = (await client._client.get("http://fake/stats")).json()
+    assert server["ok"] == 5 and server["rate_limited_rpm"] == stats["rate_limited"]
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for notification websocket delivery (encode once, concurrent bounded sends)
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _manager(sockets, **kwargs):
+    from core.fanout import FanoutHub, MemoryFanoutBus
+    from notification_ws import NotificationConnectionManager
+
+    manager = NotificationConnectionManager(FanoutHub(MemoryFanoutBus()), **kwargs)
+    for user_id, websocket in sockets:
+        await manager.connect(websocket, user_id)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once_for_every_connection():
+    sockets = [(f"u{i % 3}", FakeWebSocket()) for i in range(6)]
+    manager = await _manager(sockets)
+    encodes = []
+    original = manager._dumps
+    manager._dumps = lambda data: encodes.append(data) or original(data)
+
+    sent = await manager.broadcast({"type": "system", "data": {"at": datetime(2026, 1, 2, 3, 4, 5)}},
+                                   exclude_user="u2")
+
+    assert sent == 4 and len(encodes) == 1
+    received = [ws.sent for user, ws in sockets if user != "u2"]
+    assert all(r == [received[0][0]] for r in received)
+    assert received[0][0]["data"]["at"] == "2026-01-02T03:04:05"
+    assert all(ws.sent == [] for user, ws in sockets if user == "u2")
+
+    # Per-user notifications are encoded once too, seq included
+    await manager.send_to_user("u0", {"type": "agent_insight", "data": {}})
+    assert len(encodes) == 2  # encoded when published; delivery reuses that text
+    assert [m["seq"] for m in sockets[0][1].sent[1:]] == [1]
+    assert sockets[0][1].sent[1]["type"] == "agent_insight"
+
+
+@pytest.mark.asyncio
+async def test_slow_socket_does_not_stall_others_and_is_evicted():
+    from agents.observability.metrics import get_metrics, reset_metrics
+
+    reset_metrics()
+    slow, fast = FakeWebSocket(delay=10), FakeWebSocket()
+    manager = await _manager([("u1", slow), ("u1", fast)], send_timeout=0.05, max_slow_strikes=2)
+
+    started = time.monotonic()
+    assert await manager.send_to_user("u1", {"type": "agent_insight", "data": {"n": 1}}) == 1
+    assert time.monotonic() - started < 1
+    assert [m["data"]["n"] for m in fast.sent] == [1]
+    assert manager.slow_strikes[slow] == 1
+
+    await manager.send_to_user("u1", {"type": "agent_insight", "data": {"n": 2}})
+    assert slow.closed_with == 1013
+    assert manager.get_user_connection_count("u1") == 1 and manager.evicted == 1
+    assert manager.hub.is_tracked("notifications", "u1")
+
+    metrics = get_metrics().export_dict()
+    assert metrics["notification_evictions_total"] == {(("reason", "slow"),): 1}
+    delivery = metrics["notification_delivery_seconds"]
+    assert delivery[(("result", "timeout"),)]["count"] == 2
+    assert delivery[(("result", "ok"),)]["count"] == 2
+    assert metrics["notification_fanout_seconds"][(("kind", "user"),)]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_overdue_send_is_not_cancelled_and_frames_stay_in_order():
+    slow = FakeWebSocket(delay=0.2)
+    manager = await _manager([("u1", slow)], send_timeout=0.05, max_slow_strikes=3)
+
+    await manager.send_to_user("u1", {"type": "agent_insight", "data": {"n": 1}})
+    await manager.send_to_user("u1", {"type": "agent_insight", "data": {"n": 2}})
+    assert manager.slow_strikes[slow] == 2 and slow.sent == []
+
+    await asyncio.sleep(0.6)
+    # Both writes finished whole, in publish order, on a socket that is still registered
+    assert [(m["data"]["n"], m["seq"]) for m in slow.sent] == [(1, 1), (2, 2)]
+    assert manager.get_user_connection_count("u1") == 1 and not manager._writes
+
+
+@pytest.mark.asyncio
+async def test_failed_socket_is_dropped_and_strikes_reset_after_a_good_send():
+    broken, flaky = FakeWebSocket(fail=True), FakeWebSocket()
+    manager = await _manager([("u1", broken), ("u1", flaky)], send_timeout=0.05, max_slow_strikes=2)
+
+    await manager.send_to_user("u1", {"type": "system", "data": {}})
+    assert manager.get_user_connection_count("u1") == 1
+
+    flaky.delay = 0.1
+    await manager.send_to_user("u1", {"type": "system", "data": {}})
+    await asyncio.sleep(0.15)  # the overdue write finishes in the background
+    flaky.delay = 0
+    await manager.send_to_user("u1", {"type": "system", "data": {}})
+    flaky.delay = 10
+    await manager.send_to_user("u1", {"type": "system", "data": {}})
+    # Strikes count consecutive timeouts only
+    assert manager.slow_strikes[flaky] == 1 and flaky.closed_with is None
+
+
+def test_fast_encoder_matches_json():
+    from notification_ws import NotificationConnectionManager
+
+    data = {"type": "x", "data": {"at": datetime(2026, 1, 2, 3, 4, 5, 123456), "n": [1, 2.5, None], "s": "ä"}}
+    assert json.loads(NotificationConnectionManager._dumps(data)) == json.loads(
+        json.dumps(data, default=lambda o: o.isoformat()))
+    with pytest.raises(TypeError):
+        NotificationConnectionManager._dumps({"x": object()})
+
+
+@pytest.mark.asyncio
+async def test_welcome_frame_does_not_carry_a_resumable_seq(monkeypatch):
+    import notification_ws
+    from fastapi import WebSocketDisconnect
+
+    class ClosingWebSocket(FakeWebSocket):
+        async def receive_json(self):
+            raise WebSocketDisconnect()
+
+    manager = await _manager([])
+    monkeypatch.setattr(notification_ws, "notification_manager", manager)
+    for n in range(3):
+        await manager.send_to_user("u1", {"type": "agent_insight", "data": {"n": n}})
+
+    websocket = ClosingWebSocket()
+    await notification_ws.notification_websocket(websocket, "u1", token=None, last_seq=1)
+
+    welcome, *replayed = websocket.sent
+    assert welcome["head_seq"] == 3 and "seq" not in welcome
+    assert [m["seq"] for m in replayed] == [2, 3]
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the GCRA rate limiter
+"""
+
+import pytest
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class MockGcraScript:
+    """Runs the GCRA step the Lua script runs, on a dict shared by 'workers'."""
+
+    def __init__(self, store, clock):
+        self.store = store
+        self.clock = clock
+        self.fail = False
+
+    async def __call__(self, keys, args):
+        from core.rate_limit import RateLimit, gcra
+
+        if self.fail:
+            raise ConnectionError("redis down")
+        interval_ms, capacity, cost = args
+        limit = RateLimit(requests=1, period=interval_ms / 1000, burst=capacity)
+        result, new_tat = gcra(self.store.get(keys[0]), self.clock(), limit, cost)
+        if new_tat is not None:
+            self.store[keys[0]] = new_tat
+        return [int(result.allowed), result.remaining,
+                int(result.retry_after * 1000), int(result.reset_after * 1000)]
+
+
+def _memory(clock, **kwargs):
+    from core.rate_limit import MemoryRateLimitBackend
+
+    return MemoryRateLimitBackend(clock=clock, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_burst_then_steady_rate():
+    from core.rate_limit import RateLimit
+
+    clock = Clock()
+    backend = _memory(clock)
+    limit = RateLimit(requests=10, period=60)  # one every 6 s, burst of 10
+
+    results = [await backend.hit("ip:a", limit) for _ in range(11)]
+    assert [r.allowed for r in results] == [True] * 10 + [False]
+    assert [r.remaining for r in results[:3]] == [9, 8, 7]
+    assert results[-1].retry_after == pytest.approx(6.0)
+    assert results[-1].headers()["Retry-After"] == "6"
+
+    clock.now += 6
+    assert (await backend.hit("ip:a", limit)).allowed
+    assert not (await backend.hit("ip:a", limit)).allowed
+    # Other clients are unaffected
+    assert (await backend.hit("ip:b", limit)).allowed
+
+
+@pytest.mark.asyncio
+async def test_idle_keys_are_evicted_and_total_is_capped():
+    from core.rate_limit import RateLimit
+
+    clock = Clock()
+    backend = _memory(clock, max_keys=50)
+    limit = RateLimit(requests=10, period=60)
+
+    for i in range(40):
+        await backend.hit(f"ip:{i}", limit)
+    assert len(backend) == 40
+
+    # A single request costs 6 s of capacity; after that every key is idle
+    clock.now += 7
+    for i in range(5):
+        await backend.hit(f"ip:new{i}", limit)
+    assert len(backend) == 40 + 5 - 5 * backend.SWEEP_PER_HIT
+
+    for i in range(100):
+        await backend.hit(f"ip:burst{i}", limit)
+    assert len(backend) == 50
+
+
+@pytest.mark.asyncio
+async def test_user_and_route_limits_use_separate_buckets():
+    from core.rate_limit import RateLimit, RateLimiter
+
+    limiter = RateLimiter(
+        default=RateLimit(2),
+        user_limit=RateLimit(5),
+        routes={"/api/v1/analyze": RateLimit(1), "/api/v1/analyze/bulk": RateLimit(3)},
+        backend=_memory(Clock()),
+    )
+
+    async def allowed(identity, path, n):
+        return [(await limiter.hit(identity, path)).allowed for _ in range(n)]
+
+    assert await allowed("ip:1.2.3.4", "/health", 3) == [True, True, False]
+    assert await allowed("user:alice", "/health", 6) == [True] * 5 + [False]
+    # Route buckets are independent of the default bucket
+    assert await allowed("user:alice", "/api/v1/analyze", 2) == [True, False]
+    assert await allowed("user:alice", "/api/v1/analyze/bulk/x", 4) == [True] * 3 + [False]
+    assert limiter.rule_for("/api/v1/analyze/bulk")[0] == "/api/v1/analyze/bulk"
+    assert limiter.stats()["limited"] == 4
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_shares_limit_across_workers_and_falls_back():
+    from core.rate_limit import RateLimit, RateLimiter, RedisRateLimitBackend
+
+    clock = Clock()
+    store = {}
+    script = MockGcraScript(store, clock)
+    workers = []
+    for _ in range(2):
+        backend = RedisRateLimitBackend(redis_url=None, fallback=_memory(clock))
+        backend._script = script
+        workers.append(RateLimiter(default=RateLimit(4), backend=backend))
+
+    decisions = [(await workers[i % 2].hit("ip:a", "/")).allowed for i in range(6)]
+    assert decisions == [True] * 4 + [False] * 2
+    assert list(store) == ["ratelimit:ip:a|*"]
+
+    script.fail = True
+    assert (await workers[0].hit("ip:a", "/")).allowed  # fresh in-process bucket
+    assert workers[0].stats()["redis_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_skips_redis_for_a_cooldown_after_a_failure():
+    from core.rate_limit import RateLimit, RedisRateLimitBackend
+
+    clock = Clock()
+    script = MockGcraScript({}, clock)
+    calls = []
+    original = script.__call__
+
+    async def counted(keys, args):
+        calls.append(keys[0])
+        return await original(keys, args)
+
+    backend = RedisRateLimitBackend(redis_url=None, fallback=_memory(clock), cooldown=30, clock=clock)
+    backend._script = counted
+    limit = RateLimit(100)
+
+    script.fail = True
+    for _ in range(5):
+        assert (await backend.hit("ip:a", limit)).allowed
+    assert len(calls) == 1 and backend.errors == 1 and backend.skipped == 4
+
+    script.fail = False
+    clock.now += 30
+    await backend.hit("ip:a", limit)
+    assert len(calls) == 2 and backend.errors == 1
+
+
+def test_redis_client_uses_short_socket_timeouts(monkeypatch):
+    from core import rate_limit
+
+    created = {}
+
+    class FakeRedis:
+        def register_script(self, script):
+            return script
+
+    def from_url(url, **kwargs):
+        created.update(kwargs)
+        return FakeRedis()
+
+    monkeypatch.setattr(rate_limit, "REDIS_ASYNC_AVAILABLE", True)
+    monkeypatch.setattr(rate_limit, "aioredis", type("aioredis", (), {"from_url": staticmethod(from_url)}))
+    rate_limit.RedisRateLimitBackend("redis://x", timeout=0.2)._get_script()
+    assert created["socket_connect_timeout"] == 0.2 and created["socket_timeout"] == 0.2
+
+
+def test_parse_limits_and_routes():
+    from core.rate_limit import RateLimit, parse_routes
+
+    assert RateLimit.parse("30") == RateLimit(30, 60.0)
+    assert RateLimit.parse("5/10s").interval == 2.0
+    assert parse_routes("/a=5/60, /b=20,bad=x") == {"/a": RateLimit(5, 60.0), "/b": RateLimit(20, 60.0)}
+
+
+def test_request_identity_uses_token_subject():
+    import jwt
+
+    from app.config import ALGORITHM, SECRET_KEY
+    from core.rate_limit import request_identity
+
+    token = jwt.encode({"sub": "alice@example.com"}, SECRET_KEY, algorithm=ALGORITHM)
+    assert request_identity("1.2.3.4", f"Bearer {token}") == "user:alice@example.com"
+    assert request_identity("1.2.3.4", "Bearer not-a-token") == "ip:1.2.3.4"
+    assert request_identity(None) == "ip:unknown"
@@ -44,6 +44,7 @@ class MockRedis:
         self._data: Dict[str, Dict[str, str]] = {}
         self._sets: Dict[str, set] = {}
         self._lists: Dict[str, list] = {}
+        self._zsets: Dict[str, Dict[str, float]] = {}
         self._expires: Dict[str, int] = {}
         self._pubsub_messages = []
 
@@ -66,6 +67,49 @@ class MockRedis:
     async def hget(self, key: str, field: str):
         return self._data.get(key, {}).get(field)
 
+    async def hmget(self, key: str, fields):
+        data = self._data.get(key, {})
+        return [data.get(f) for f in fields]
+
+    async def zadd(self, key: str, mapping: Dict[str, float]):
+        self._zsets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    async def zrem(self, key: str, *members):
+        zset = self._zsets.get(key, {})
+        removed = sum(1 for m in members if zset.pop(m, None) is not None)
+        if key in self._zsets and not zset:
+            del self._zsets[key]
+        return removed
+
+    def _zsorted(self, key: str):
+        return [m for m, _ in sorted(self._zsets.get(key, {}).items(), key=lambda i: (i[1], i[0]))]
+
+    async def zrange(self, key: str, start: int, end: int):
+        members = self._zsorted(key)
+        return members[start:] if end == -1 else members[start:end + 1]
+
+    async def zrangebyscore(self, key: str, min, max, start=None, num=None):
+        low, high = float(min), float(max)
+        members = [m for m in self._zsorted(key) if low <= self._zsets[key][m] <= high]
+        return members[start:start + num] if num is not None else members
+
+    async def zcard(self, key: str):
+        return len(self._zsets.get(key, {}))
+
+    async def zinterstore(self, dest: str, keys):
+        weights = dict(keys)
+        first, *others = weights
+        members = {
+            m: sum(self._zsets[k][m] * w for k, w in weights.items())
+            for m in self._zsets.get(first, {})
+            if all(m in self._zsets.get(k, {}) for k in others)
+        }
+        self._zsets.pop(dest, None)
+        if members:
+            self._zsets[dest] = members
+        return len(members)
+
     async def hincrby(self, key: str, field: str, amount: int = 1):
         if key not in self._data:
             self._data[key] = {}
@@ -80,9 +124,10 @@ class MockRedis:
     async def delete(self, *keys):
         deleted = 0
         for key in keys:
-            if key in self._data:
-                del self._data[key]
-                deleted += 1
+            for store in (self._data, self._sets, self._lists, self._zsets):
+                if key in store:
+                    del store[key]
+                    deleted += 1
         return deleted
 
     async def sadd(self, key: str, *values):
@@ -123,9 +168,10 @@ class MockRedis:
         # Simple scan implementation
         matching = []
         pattern = match.replace("*", "")
-        for key in self._data.keys():
-            if pattern in key:
-                matching.append(key)
+        for store in (self._data, self._sets, self._lists, self._zsets):
+            for key in store.keys():
+                if pattern in key:
+                    matching.append(key)
         return (0, matching[:count])
 
     async def publish(self, channel: str, message: str):
@@ -135,10 +181,120 @@ class MockRedis:
     def pubsub(self):
         return MockPubSub()
 
+    def register_script(self, script: str):
+        from agents.persistence import redis_blackboard as rb
+        scripts = {
+            rb.PUBLISH_SCRIPT: MockPublishScript,
+            rb.DELETE_SCRIPT: MockDeleteScript,
+        }
+        return scripts[script](self)
+
     def pipeline(self):
         return MockPipeline(self)
 
 
+class MockScript:
+    """Python mirror of the blackboard Lua scripts (no Lua interpreter in tests)"""
+
+    def __init__(self, redis: "MockRedis"):
+        self._redis = redis
+        self.calls = 0
+
+    async def __call__(self, keys, args, client=None):
+        self.calls += 1
+        # Redis Cluster: scripts only get keys of one blackboard hash tag
+        assert all(k.startswith("{test:blackboard}:") for k in keys), keys
+        if isinstance(client, MockPipeline):
+            client._commands.append(('script', self, keys, args))
+            return client
+        return await self.run(keys, [str(a) for a in args])
+
+    @staticmethod
+    def groups(keys, first, *sizes):
+        groups = []
+        for size in sizes:
+            groups.append(keys[first:first + int(size)])
+            first += int(size)
+        return groups
+
+    @staticmethod
+    def same_index(current, agent, category, tags):
+        return (current.get('agent_id') == agent and (current.get('category') or '') == category
+                and (current.get('tags') or '[]') == tags)
+
+    async def unindex(self, key, namespaces, sets, expiry):
+        r = self._redis
+        for z in namespaces + sets:
+            await r.zrem(z, key)
+        await r.zrem(expiry, key)
+
+    async def index(self, key, score, namespaces, sets):
+        r = self._redis
+        for z in namespaces + sets:
+            await r.zadd(z, {key: score})
+
+
+class MockPublishScript(MockScript):
+    async def run(self, keys, args):
+        r = self._redis
+        entry_key, history_key, stats_key, expiry_key = keys[:4]
+        (key, value_hash, agent_id, timestamp, ttl, value, tags, metadata, category,
+         history_record, history_max, channel, score, expire_at, _backstop,
+         n_ns, n_leave, n_join, *expected) = args
+
+        current = r._data.get(entry_key, {})
+        old_value = current.get('value')
+        if old_value is not None and (
+            current.get('hash') == value_hash or ('hash' not in current and old_value == value)
+        ):
+            return [0, [x for pair in current.items() for x in pair]]
+        if current.get('agent_id') and not self.same_index(current, *expected):
+            return [-1, current['agent_id'], current.get('category') or '', current.get('tags') or '[]']
+
+        namespaces, leave, join = self.groups(keys, 4, n_ns, n_leave, n_join)
+        version = int(current.get('version') or 0) + 1
+        await self.unindex(key, namespaces, leave, expiry_key)
+
+        fields = {'key': key, 'hash': value_hash, 'agent_id': agent_id, 'timestamp': timestamp,
+                  'value': value, 'tags': tags, 'metadata': metadata, 'version': version}
+        if ttl:
+            fields['ttl'] = ttl
+            await r.zadd(expiry_key, {key: float(expire_at)})
+        if category:
+            fields['category'] = category
+            await r.hincrby(stats_key, f'category:{category}', 1)
+        if old_value is not None:
+            fields['previous_value'] = old_value
+        r._data.pop(entry_key, None)
+        await r.hset(entry_key, mapping=fields)
+        await self.index(key, float(score), namespaces, join)
+
+        await r.lpush(history_key, history_record)
+        await r.ltrim(history_key, 0, int(history_max) - 1)
+        await r.hincrby(stats_key, 'total_writes', 1)
+        await r.hincrby(stats_key, f'agent:{agent_id}:writes', 1)
+
+        await r.publish(channel, json.dumps({'key': key, 'version': version, 'hash': value_hash}))
+        return [1, version, old_value]
+
+
+class MockDeleteScript(MockScript):
+    async def run(self, keys, args):
+        r = self._redis
+        entry_key, expiry_key = keys[:2]
+        key, n_ns, n_leave, agent, category, tags, due_before = args
+        if due_before:
+            due = r._zsets.get(expiry_key, {}).get(key)
+            if due is None or due > float(due_before):
+                return 0
+        current = r._data.get(entry_key, {})
+        if current.get('agent_id') and not self.same_index(current, agent, category, tags):
+            return -1
+        namespaces, leave = self.groups(keys, 2, n_ns, n_leave)
+        await self.unindex(key, namespaces, leave, expiry_key)
+        return await r.delete(entry_key)
+
+
 class MockPubSub:
     """Mock PubSub"""
 
@@ -178,10 +334,22 @@ class MockPipeline:
         self._commands.append(('hgetall', key))
         return self
 
+    async def hmget(self, key, fields):
+        self._commands.append(('hmget', key, fields))
+        return self
+
+    async def zadd(self, key, mapping):
+        self._commands.append(('zadd', key, mapping))
+        return self
+
     async def expire(self, key, ttl):
         self._commands.append(('expire', key, ttl))
         return self
 
+    async def zinterstore(self, dest, keys):
+        self._commands.append(('zinterstore', dest, keys))
+        return self
+
     async def sadd(self, key, *values):
         self._commands.append(('sadd', key, values))
         return self
@@ -218,8 +386,14 @@ class MockPipeline:
                 results.append(True)
             elif cmd[0] == 'hgetall':
                 results.append(await self._redis.hgetall(cmd[1]))
+            elif cmd[0] == 'hmget':
+                results.append(await self._redis.hmget(cmd[1], cmd[2]))
+            elif cmd[0] == 'zadd':
+                results.append(await self._redis.zadd(cmd[1], cmd[2]))
             elif cmd[0] == 'expire':
                 results.append(await self._redis.expire(cmd[1], cmd[2]))
+            elif cmd[0] == 'zinterstore':
+                results.append(await self._redis.zinterstore(cmd[1], cmd[2]))
             elif cmd[0] == 'sadd':
                 results.append(await self._redis.sadd(cmd[1], *cmd[2]))
             elif cmd[0] == 'srem':
@@ -234,6 +408,8 @@ class MockPipeline:
                 results.append(await self._redis.publish(cmd[1], cmd[2]))
             elif cmd[0] == 'delete':
                 results.append(await self._redis.delete(*cmd[1]))
+            elif cmd[0] == 'script':
+                results.append(await cmd[1].run(cmd[2], [str(a) for a in cmd[3]]))
             else:
                 results.append(None)
         self._commands = []
@@ -279,12 +455,12 @@ class TestRedisBlackboardKeyGeneration:
     def test_key_generation(self, redis_blackboard):
         """Key generation includes prefix"""
         key = redis_blackboard._key('entries', 'test.key')
-        assert key == "test:blackboard:entries:test.key"
+        assert key == "{test:blackboard}:entries:test.key"
 
     def test_key_with_multiple_parts(self, redis_blackboard):
         """Key generation handles multiple parts"""
         key = redis_blackboard._key('index', 'category', 'competitor')
-        assert key == "test:blackboard:index:category:competitor"
+        assert key == "{test:blackboard}:index:category:competitor"
 
 
 @requires_redis
@@ -392,6 +568,188 @@ class TestRedisBlackboardPublish:
         assert entry.metadata["priority"] == 1
 
 
+@requires_redis
+class TestRedisBlackboardAtomicPublish:
+    """Tests for the single round-trip publish script"""
+
+    @pytest.mark.asyncio
+    async def test_publish_is_one_script_call(self, redis_blackboard, mock_redis):
+        """No read-before-write: the script does compare-and-bump itself"""
+        mock_redis.hgetall = AsyncMock(side_effect=AssertionError("extra round trip"))
+
+        await redis_blackboard.publish("scout.data", {"a": 1}, "scout", category=DataCategory.COMPETITOR)
+        await redis_blackboard.publish("scout.data", {"a": 2}, "scout", category=DataCategory.COMPETITOR)
+
+        assert redis_blackboard._publish_script.calls == 2
+        assert list(mock_redis._zsets["{test:blackboard}:index:category:competitor"]) == ["scout.data"]
+
+    @pytest.mark.asyncio
+    async def test_reindexing_declares_the_old_index_keys(self, redis_blackboard, mock_redis):
+        """A new agent/category/tags costs one retry with the stored fields as KEYS"""
+        await redis_blackboard.publish("scout.data", 1, "scout", tags={"a"}, category=DataCategory.THREAT)
+        await redis_blackboard.publish("scout.data", 2, "scout", tags={"a"}, category=DataCategory.THREAT)
+        assert redis_blackboard._publish_script.calls == 2
+
+        await redis_blackboard.publish("scout.data", 3, "analyst", tags={"b"})
+
+        assert redis_blackboard._publish_script.calls == 4
+        assert not mock_redis._zsets.get("{test:blackboard}:index:agent:scout")
+        assert not mock_redis._zsets.get("{test:blackboard}:index:category:threat")
+        assert not mock_redis._zsets.get("{test:blackboard}:index:tag:a")
+        assert list(mock_redis._zsets["{test:blackboard}:index:agent:analyst"]) == ["scout.data"]
+
+    @pytest.mark.asyncio
+    async def test_change_detection_uses_content_hash(self, redis_blackboard, mock_redis):
+        """Dict key order does not count as a change"""
+        from agents.persistence.redis_blackboard import content_hash
+
+        await redis_blackboard.publish("k", {"a": 1, "b": 2}, "scout")
+        entry = await redis_blackboard.publish("k", {"b": 2, "a": 1}, "scout")
+
+        assert entry.version == 1
+        assert len(mock_redis._pubsub_messages) == 1
+        assert mock_redis._data["{test:blackboard}:entries:k"]["hash"] == content_hash({"a": 1, "b": 2})
+
+    @pytest.mark.asyncio
+    async def test_notification_carries_key_version_hash_only(self, redis_blackboard, mock_redis):
+        """Pub/sub payload no longer includes the value"""
+        from agents.persistence.redis_blackboard import content_hash
+
+        await redis_blackboard.publish("scout.big", {"blob": "x" * 10000}, "scout")
+
+        message = mock_redis._pubsub_messages[0]
+        assert message['channel'] == "{test:blackboard}:updates:scout"
+        assert json.loads(message['message']) == {
+            "key": "scout.big", "version": 1, "hash": content_hash({"blob": "x" * 10000})
+        }
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writers_get_distinct_versions(self, mock_redis):
+        """Two workers sharing Redis never both write the same version"""
+        workers = []
+        for _ in range(2):
+            bb = RedisBlackboard(key_prefix="test")
+            bb._redis = mock_redis
+            bb._connected = True
+            workers.append(bb)
+
+        entries = await asyncio.gather(*(
+            workers[i % 2].publish("shared", i, f"agent{i % 2}") for i in range(10)
+        ))
+
+        assert sorted(e.version for e in entries) == list(range(1, 11))
+
+    @pytest.mark.asyncio
+    async def test_listener_fetches_entry_for_matching_subscriber(self, redis_blackboard, mock_redis):
+        """Slim notifications are resolved to entries only when someone listens"""
+        received = []
+        redis_blackboard.subscribe("scout.*", "analyst", received.append)
+        await redis_blackboard.publish("scout.data", {"v": 1}, "scout")
+        await redis_blackboard.publish("guardian.data", {"v": 2}, "guardian")
+
+        class Replay:
+            async def listen(self):
+                for m in mock_redis._pubsub_messages:
+                    yield {'type': 'pmessage', 'data': m['message']}
+
+        redis_blackboard._pubsub = Replay()
+        await redis_blackboard._pubsub_listener()
+
+        assert [e.key for e in received] == ["scout.data"]
+        assert received[0].value == {"v": 1}
+
+
+@pytest.fixture
+def lua_blackboard():
+    """RedisBlackboard on fakeredis, which runs the real Lua scripts"""
+    if not REDIS_AVAILABLE:
+        pytest.skip("Redis package not installed")
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa", reason="fakeredis needs lupa to run Lua scripts")
+
+    bb = RedisBlackboard(key_prefix="test")
+    bb._redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    bb._connected = True
+    return bb
+
+
+@requires_redis
+class TestRedisBlackboardLuaScripts:
+    """PUBLISH_SCRIPT and DELETE_SCRIPT themselves, not their Python mocks"""
+
+    @pytest.mark.asyncio
+    async def test_publish_versions_indexes_and_skips_unchanged(self, lua_blackboard):
+        bb = lua_blackboard
+        r = bb._redis
+
+        first = await bb.publish("scout.data", {"a": 1, "b": 2}, "scout", tags={"x"},
+                                 category=DataCategory.THREAT, ttl=60)
+        same = await bb.publish("scout.data", {"b": 2, "a": 1}, "scout", tags={"x"},
+                                category=DataCategory.THREAT, ttl=60)
+        second = await bb.publish("scout.data", {"a": 3}, "scout", tags={"x"},
+                                  category=DataCategory.THREAT, ttl=60)
+
+        assert (first.version, same.version, second.version) == (1, 1, 2)
+        assert second.previous_value == {"a": 1, "b": 2}
+        assert await r.zrange("{test:blackboard}:ns:scout", 0, -1) == ["scout.data"]
+        assert await r.zrange("{test:blackboard}:index:tag:x", 0, -1) == ["scout.data"]
+        assert await r.zscore("{test:blackboard}:expiry", "scout.data") is not None
+        assert await r.llen("{test:blackboard}:history") == 2
+        assert await r.hget("{test:blackboard}:stats", "total_writes") == "2"
+        assert (await bb.get_entry("scout.data")).value == {"a": 3}
+
+    @pytest.mark.asyncio
+    async def test_reindex_retry_and_delete_clear_every_index(self, lua_blackboard):
+        bb = lua_blackboard
+        r = bb._redis
+
+        await bb.publish("scout.data", 1, "scout", tags={"a"}, category=DataCategory.THREAT)
+        moved = await bb.publish("scout.data", 2, "analyst", tags={"b"})
+
+        assert moved.version == 2
+        assert not await r.exists("{test:blackboard}:index:agent:scout")
+        assert not await r.exists("{test:blackboard}:index:category:threat")
+        assert not await r.exists("{test:blackboard}:index:tag:a")
+        assert [e.value for e in await bb.query("scout.*", tags={"b"})] == [2]
+
+        await bb.delete("scout.data")
+
+        assert not await r.exists("{test:blackboard}:entries:scout.data")
+        assert not await r.exists("{test:blackboard}:ns", "{test:blackboard}:ns:scout")
+        assert not await r.exists("{test:blackboard}:index:agent:analyst", "{test:blackboard}:index:tag:b")
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_pruned_by_the_delete_script(self, lua_blackboard):
+        bb = lua_blackboard
+
+        await bb.publish("scout.old", 1, "scout", ttl=1)
+        await bb._redis.zadd(bb._key("expiry"), {"scout.old": 0})
+        bb._last_prune = 0.0
+
+        assert await bb.get_all_keys() == []
+        assert not await bb._redis.exists(bb._key("entries", "scout.old"))
+
+    @pytest.mark.asyncio
+    async def test_legacy_keys_are_migrated_to_the_hash_tagged_schema(self, lua_blackboard):
+        bb = lua_blackboard
+        r = bb._redis
+        await r.hset("test:blackboard:entries:scout.data", mapping={
+            "key": "scout.data", "value": json.dumps({"v": 1}), "agent_id": "scout",
+            "timestamp": datetime.now().isoformat(), "ttl": "600", "tags": '["x"]',
+            "metadata": "{}", "category": "threat", "version": "4",
+        })
+        await r.expire("test:blackboard:entries:scout.data", 300)
+        await r.sadd("test:blackboard:index:tag:x", "scout.data")
+
+        assert await bb.migrate_legacy_keys() == 1
+        assert await bb.migrate_legacy_keys() == 0
+
+        entry = await bb.get_entry("scout.data")
+        assert entry.value == {"v": 1} and entry.tags == {"x"} and entry.category == DataCategory.THREAT
+        assert 0 < entry.ttl <= 300
+        assert await r.keys("test:blackboard:*") == []
+
+
 @requires_redis
 class TestRedisBlackboardGet:
     """Tests for getting from Redis blackboard"""
@@ -491,6 +849,115 @@ class TestRedisBlackboardQuery:
             assert entry.agent_id == "scout"
 
 
+@requires_redis
+class TestRedisBlackboardIndexedQuery:
+    """Tests for namespace/tag index queries (no keyspace SCAN)"""
+
+    @pytest.fixture(autouse=True)
+    def no_scan(self, mock_redis):
+        mock_redis.scan = AsyncMock(side_effect=AssertionError("query must not SCAN"))
+
+    def test_namespace_key_uses_literal_prefix_segments(self, redis_blackboard):
+        ns = redis_blackboard._namespace_key
+        assert ns("scout.*") == "{test:blackboard}:ns:scout"
+        assert ns("scout.competitors.*") == "{test:blackboard}:ns:scout.competitors"
+        assert ns("scout.comp*") == "{test:blackboard}:ns:scout"
+        assert ns("*.threats") == "{test:blackboard}:ns"
+        assert ns("scout*") == "{test:blackboard}:ns"
+
+    @pytest.mark.asyncio
+    async def test_query_pages_namespace_in_publish_order(self, redis_blackboard, mock_redis):
+        redis_blackboard.QUERY_PAGE_SIZE = 2
+        for i in range(5):
+            await redis_blackboard.publish(f"scout.c{i}", i, "scout")
+            await redis_blackboard.publish(f"analyst.c{i}", i, "analyst")
+
+        assert [e.value for e in await redis_blackboard.query("scout.*", limit=3)] == [0, 1, 2]
+        assert [e.value for e in await redis_blackboard.query("scout.*")] == [0, 1, 2, 3, 4]
+        assert len(await redis_blackboard.query("*.c1")) == 2
+        assert len(await redis_blackboard.get_all_keys()) == 10
+
+    @pytest.mark.asyncio
+    async def test_tag_and_category_filters_intersect_sets(self, redis_blackboard, mock_redis):
+        await redis_blackboard.publish("scout.a", 1, "scout", tags={"x", "y"}, category=DataCategory.THREAT)
+        await redis_blackboard.publish("scout.b", 2, "scout", tags={"x"}, category=DataCategory.THREAT)
+        await redis_blackboard.publish("guardian.c", 3, "guardian", tags={"x", "y"})
+
+        assert [e.key for e in await redis_blackboard.query("*", tags={"x", "y"})] == ["scout.a", "guardian.c"]
+        assert [e.key for e in await redis_blackboard.query("scout.*", tags={"x"})] == ["scout.a", "scout.b"]
+        assert [e.key for e in await redis_blackboard.query(
+            "*", tags={"x"}, category=DataCategory.THREAT, limit=1
+        )] == ["scout.a"]
+        # The ZINTERSTORE result is dropped once paged
+        assert not [k for k in mock_redis._zsets if ":tmp:" in k]
+
+    @pytest.mark.asyncio
+    async def test_category_agent_lookups_and_clear_page_the_indexes(self, redis_blackboard, mock_redis):
+        mock_redis.smembers = AsyncMock(side_effect=AssertionError("whole-set read"))
+        redis_blackboard.QUERY_PAGE_SIZE = 2
+        for i in range(5):
+            await redis_blackboard.publish(f"scout.t{i}", i, "scout", category=DataCategory.THREAT)
+        await redis_blackboard.publish("analyst.t", 9, "analyst", category=DataCategory.THREAT)
+
+        threats = await redis_blackboard.query_by_category(DataCategory.THREAT, limit=2)
+        assert [e.key for e in threats] == ["scout.t0", "scout.t1"]
+        assert [e.key for e in await redis_blackboard.query_by_agent("analyst", limit=5)] == ["analyst.t"]
+
+        calls = redis_blackboard._delete_script.calls
+        await redis_blackboard.clear("scout.*")
+
+        assert redis_blackboard._delete_script.calls == calls + 5
+        assert await redis_blackboard.get_all_keys() == ["analyst.t"]
+        assert list(mock_redis._zsets["{test:blackboard}:index:category:threat"]) == ["analyst.t"]
+
+    @pytest.mark.asyncio
+    async def test_query_fetches_only_query_fields(self, redis_blackboard, mock_redis):
+        await redis_blackboard.publish("scout.a", {"v": 1}, "scout")
+        await redis_blackboard.publish("scout.a", {"v": 2}, "scout")
+
+        (entry,) = await redis_blackboard.query("scout.*")
+        assert entry.value == {"v": 2} and entry.version == 2
+        assert entry.previous_value is None  # not fetched; get_entry has it
+        assert (await redis_blackboard.get_entry("scout.a")).previous_value == {"v": 1}
+
+    @pytest.mark.asyncio
+    async def test_republish_and_delete_keep_indexes_clean(self, redis_blackboard, mock_redis):
+        await redis_blackboard.publish("scout.a", 1, "scout", tags={"old"})
+        await redis_blackboard.publish("scout.a", 2, "scout", tags={"new"})
+
+        assert await redis_blackboard.query("*", tags={"old"}) == []
+        assert [e.value for e in await redis_blackboard.query("*", tags={"new"})] == [2]
+
+        await redis_blackboard.delete("scout.a")
+
+        assert mock_redis._zsets == {}
+        assert not any(mock_redis._sets.values())  # indexes are all zsets
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_pruned_from_indexes(self, redis_blackboard, mock_redis):
+        await redis_blackboard.publish("scout.temp", 1, "scout", ttl=60, tags={"t"})
+        await redis_blackboard.publish("scout.kept", 2, "scout")
+        mock_redis._zsets["{test:blackboard}:expiry"]["scout.temp"] = 0.0  # due
+
+        assert [e.key for e in await redis_blackboard.query("scout.*")] == ["scout.kept"]
+        assert "{test:blackboard}:entries:scout.temp" not in mock_redis._data
+        assert await redis_blackboard.get_all_keys() == ["scout.kept"]
+        assert not mock_redis._zsets.get("{test:blackboard}:index:tag:t")
+
+    @pytest.mark.asyncio
+    async def test_rebuild_indexes_for_legacy_entries(self, redis_blackboard, mock_redis):
+        mock_redis.scan = MockRedis.scan.__get__(mock_redis)
+        await mock_redis.hset("{test:blackboard}:entries:scout.old", mapping={
+            "key": "scout.old", "value": json.dumps("v"), "agent_id": "scout",
+            "timestamp": datetime.now().isoformat(), "tags": json.dumps(["legacy"]),
+            "metadata": "{}", "version": 1,
+        })
+
+        assert await redis_blackboard.query("scout.*") == []
+        assert await redis_blackboard.rebuild_indexes() == 1
+        assert [e.key for e in await redis_blackboard.query("scout.*", tags={"legacy"})] == ["scout.old"]
+
+
 @requires_redis
 class TestRedisBlackboardSubscriptions:
     """Tests for subscription functionality"""
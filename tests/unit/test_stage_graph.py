@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the analysis stage dependency graph
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_overlap():
+    from core.stage_graph import StageGraph
+
+    async def network():
+        await asyncio.sleep(0.1)
+        return "net"
+
+    def cpu():
+        time.sleep(0.1)
+        return "cpu"
+
+    graph = StageGraph()
+    graph.add("a", network)
+    graph.add("b", network)
+    graph.add("c", cpu, mode="thread")
+
+    start = time.perf_counter()
+    results = await graph.run()
+    elapsed = time.perf_counter() - start
+
+    assert results == {"a": "net", "b": "net", "c": "cpu"}
+    assert elapsed < 0.25
+
+
+@pytest.mark.asyncio
+async def test_dependencies_receive_results_in_order():
+    from core.stage_graph import StageGraph
+
+    order = []
+
+    async def first():
+        await asyncio.sleep(0.01)
+        order.append("first")
+        return 2
+
+    def second(value):
+        order.append("second")
+        return value * 10
+
+    async def third(a, b):
+        order.append("third")
+        return a + b
+
+    graph = StageGraph()
+    graph.add("first", first)
+    graph.add("second", second, deps=("first",), mode="thread")
+    graph.add("third", third, deps=("first", "second"))
+    results = await graph.run()
+
+    assert results["third"] == 22
+    assert order == ["first", "second", "third"]
+
+
+@pytest.mark.asyncio
+async def test_thread_stages_run_off_the_event_loop():
+    from core.stage_graph import StageGraph
+
+    loop_thread = threading.get_ident()
+
+    async def async_cpu():
+        # async def without awaits, like the HTML analyzers in main.py
+        return threading.get_ident()
+
+    graph = StageGraph()
+    graph.add("sync", threading.get_ident, mode="thread")
+    graph.add("async", async_cpu, mode="thread")
+    results = await graph.run()
+
+    assert results["sync"] != loop_thread
+    assert results["async"] != loop_thread
+
+
+@pytest.mark.asyncio
+async def test_optional_stage_failure_yields_none():
+    from core.stage_graph import StageGraph
+
+    async def flaky():
+        raise ConnectionError("sitemap timeout")
+
+    graph = StageGraph()
+    graph.add("sitemap", flaky, optional=True)
+    graph.add("after", lambda found: found is None, deps=("sitemap",))
+    results = await graph.run()
+
+    assert results == {"sitemap": None, "after": True}
+    timings = graph.timings()
+    assert timings["sitemap"]["status"] == "skipped_error"
+    assert "ConnectionError" in timings["sitemap"]["error"]
+    assert timings["after"]["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_required_failure_cancels_remaining_stages():
+    from core.stage_graph import StageGraph
+
+    cancelled = asyncio.Event()
+
+    async def boom():
+        raise ValueError("parse failed")
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    graph = StageGraph()
+    graph.add("boom", boom)
+    graph.add("slow", slow)
+
+    with pytest.raises(ValueError):
+        await graph.run()
+    assert cancelled.is_set()
+    assert graph.timings()["boom"]["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_timings_report_wait_and_run():
+    from core.stage_graph import StageGraph
+
+    async def nap():
+        await asyncio.sleep(0.02)
+
+    graph = StageGraph()
+    graph.add("a", nap)
+    graph.add("b", lambda _: nap(), deps=("a",))
+    await graph.run()
+
+    timings = graph.timings()
+    assert set(timings) == {"a", "b"}
+    assert timings["a"]["run_ms"] >= 15
+    assert timings["b"]["start_ms"] >= timings["a"]["end_ms"]
+    assert timings["b"]["wait_ms"] >= 0
+
+
+def test_invalid_graphs_are_rejected():
+    from core.stage_graph import StageGraph, StageGraphError
+
+    graph = StageGraph()
+    graph.add("a", lambda: 1)
+    with pytest.raises(StageGraphError):
+        graph.add("a", lambda: 2)
+    with pytest.raises(StageGraphError):
+        graph.add("b", lambda x: x, deps=("missing",))
+    with pytest.raises(StageGraphError):
+        graph.add("c", lambda: 3, mode="gpu")
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for unified context loading and the per-user context cache
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch(self, query, *args):
+        self.pool.queries.append((query, args))
+        self.pool.active += 1
+        self.pool.max_active = max(self.pool.max_active, self.pool.active)
+        await asyncio.sleep(0.01)
+        self.pool.active -= 1
+        if "FROM agent_insights" in query and self.pool.fail_insights:
+            raise ConnectionError("insights down")
+        return self.pool.rows_for(query)
+
+
+class FakeBudget:
+    """PoolBudget stand-in: acquire() yields a connection that logs queries."""
+
+    def __init__(self):
+        self.queries = []
+        self.active = 0
+        self.max_active = 0
+        self.fail_insights = False
+        self.analyses = [(1, "https://acme.fi", 70, "done", "full", 12.5, datetime(2026, 1, 1))]
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+    def rows_for(self, query):
+        created = datetime(2026, 1, 1)
+        if "FROM user_profiles" in query:
+            return [("https://acme.fi", "retail", "FI", ["rival.fi"], None, "small", [], '{"lang": "fi"}',
+                     created, created)]
+        if "FROM analyses" in query:
+            return list(self.analyses)
+        if "FROM tracked_competitors" in query:
+            return [(3, "https://rival.fi", "rival.fi", "Rival", None, None, 65, None, '{"x": 1}',
+                     created, None, None)]
+        return []
+
+
+@pytest.fixture
+def context_pool(monkeypatch):
+    import unified_context
+
+    budget = FakeBudget()
+
+    async def pool():
+        return budget
+
+    monkeypatch.setattr(unified_context, "_context_cache", unified_context.ContextCache(ttl=300))
+    monkeypatch.setattr(unified_context, "_context_pool", pool)
+    return budget
+
+
+@pytest.mark.asyncio
+async def test_sections_load_concurrently_and_repeat_reads_skip_the_database(context_pool):
+    from unified_context import get_unified_context
+
+    context = await get_unified_context("u1")
+
+    assert len(context_pool.queries) == 5
+    assert context_pool.max_active == 5
+    assert all("%s" not in query for query, _ in context_pool.queries)
+    assert context.profile["preferences"] == {"lang": "fi"}
+    assert context.recent_analyses[0]["created_at"] == "2026-01-01T00:00:00"
+    assert context.tracked_competitors[0]["company_intel"] == {"x": 1}
+    assert "make_interval" in context_pool.queries[-1][0]
+
+    again = await get_unified_context("u1")
+    assert again is context
+    assert len(context_pool.queries) == 5
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_and_failed_sections_are_not_cached(context_pool):
+    import unified_context
+    from unified_context import get_context_cache, get_unified_context
+
+    await get_unified_context("u1")
+    await get_unified_context("u2")
+    unified_context.invalidate_context("u1")
+
+    await get_unified_context("u1")
+    await get_unified_context("u2")
+    assert len(context_pool.queries) == 15
+
+    context_pool.fail_insights = True
+    unified_context.invalidate_context("u1")
+    context = await get_unified_context("u1")
+    assert context.historical_insights == [] and context.profile is not None
+    await get_unified_context("u1")
+    assert len(context_pool.queries) == 25
+    assert get_context_cache().stats()["invalidations"] == 2
+
+
+def test_context_cache_drops_loads_that_raced_with_a_write():
+    from unified_context import ContextCache, UnifiedContext
+
+    now = [0.0]
+    cache = ContextCache(ttl=10, max_users=2, clock=lambda: now[0])
+
+    generation = cache.generation("u1")
+    cache.invalidate("u1")  # a write lands while the load runs
+    assert not cache.put("u1", UnifiedContext(user_id="u1"), generation)
+    assert cache.get("u1") is None
+
+    assert cache.put("u1", UnifiedContext(user_id="u1"), cache.generation("u1"))
+    assert cache.get("u1").user_id == "u1"
+    now[0] += 11
+    assert cache.get("u1") is None
+
+    for user in ("a", "b", "c"):
+        cache.put(user, UnifiedContext(user_id=user), cache.generation(user))
+    assert cache.get("a") is None and cache.stats()["users"] == 2
+
+
+def test_context_cache_write_generations_stay_bounded():
+    from unified_context import ContextCache, UnifiedContext
+
+    cache = ContextCache(ttl=10, max_users=2)
+    loading = cache.generation("a")
+    for user in ("a", "b", "c", "d"):
+        cache.invalidate(user)
+    assert len(cache._generations) == 2
+
+    # "a" was written after its load started, even though its generation was dropped
+    assert not cache.put("a", UnifiedContext(user_id="a"), loading)
+    assert cache.put("a", UnifiedContext(user_id="a"), cache.generation("a"))
+
+
+def test_save_analysis_invalidates_after_commit(monkeypatch):
+    import unified_context
+
+    class Cursor:
+        def execute(self, *args):
+            pass
+
+        def fetchone(self):
+            return (42,)
+
+        def close(self):
+            pass
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+    invalidated = []
+    monkeypatch.setattr(unified_context, "connect_db", lambda: Conn())
+    monkeypatch.setattr(unified_context, "release_connection", lambda conn: None)
+    monkeypatch.setattr(unified_context, "invalidate_context", invalidated.append)
+
+    assert unified_context.save_analysis("u1", "https://acme.fi", 70) == 42
+    assert invalidated == ["u1"]
+
+
+@pytest.mark.asyncio
+async def test_invalidations_reach_the_other_workers_through_the_fanout_hub(context_pool, monkeypatch):
+    import unified_context
+    from core.fanout import FanoutHub, MemoryFanoutBus
+    from unified_context import get_context_cache, get_unified_context
+
+    monkeypatch.setattr(unified_context, "_invalidation_hub", None)
+    monkeypatch.setattr(unified_context, "_invalidation_loop", None)
+    bus = MemoryFanoutBus()
+    this_worker, other_worker = FanoutHub(bus), FanoutHub(bus)
+    published = []
+
+    async def collect(message):
+        published.append(message.payload)
+
+    other_worker.register("context", collect)
+    await other_worker.track("context", "invalidations")
+    await unified_context.subscribe_context_invalidations(this_worker)
+
+    # A write on this worker (from a db thread) is published for the others
+    await asyncio.get_running_loop().run_in_executor(None, unified_context.invalidate_context, "u1")
+    for _ in range(50):
+        if published:
+            break
+        await asyncio.sleep(0.01)
+    assert [p["user_id"] for p in published] == ["u1"]
+    assert get_context_cache().stats()["invalidations"] == 1  # not applied twice here
+
+    # A write on another worker drops this worker's cached context
+    await get_unified_context("u2")
+    await other_worker.publish("context", "invalidations", {"user_id": "u2", "origin": "other"})
+    await get_unified_context("u2")
+    assert len(context_pool.queries) == 10
+
+    await unified_context.unsubscribe_context_invalidations()
+    assert not this_worker.is_tracked("context", "invalidations")
+
+
+@pytest.mark.asyncio
+async def test_saved_analysis_is_visible_in_the_next_context_load(context_pool, monkeypatch):
+    from analysis_history_db import AnalysisHistoryDB
+    from unified_context import get_unified_context
+
+    class HistoryConnection:
+        async def fetchval(self, query, *args):
+            analysis_id = len(context_pool.analyses) + 1
+            context_pool.analyses.insert(
+                0, (analysis_id, args[1], None, "completed", "single", None, datetime(2026, 2, 1))
+            )
+            return analysis_id
+
+        async def execute(self, query, *args):
+            pass
+
+        @asynccontextmanager
+        async def transaction(self):
+            yield
+
+    class HistoryPool:
+        @asynccontextmanager
+        async def acquire(self):
+            yield HistoryConnection()
+
+    history = AnalysisHistoryDB("postgresql://unused")
+    history.pool = HistoryPool()
+
+    before = await get_unified_context("u1")
+    assert [a["url"] for a in before.recent_analyses] == ["https://acme.fi"]
+
+    await history.save_single_analysis("u1", "https://new.fi", "New", "fi", {})
+
+    after = await get_unified_context("u1")
+    assert [a["url"] for a in after.recent_analyses] == ["https://new.fi", "https://acme.fi"]
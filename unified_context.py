@@ -16,15 +16,27 @@ This module enables agents to:
 import psycopg2
 import os
 import json
+import time
+import asyncio
 import logging
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Set, Tuple
 from dataclasses import dataclass, asdict
-from database import connect_db, release_connection
+from app.config import CONTEXT_CACHE_MAX_USERS, CONTEXT_CACHE_TTL
+from core.fanout import FanoutHub, FanoutMessage, get_fanout_hub
+from database import connect_db, release_connection, run_in_db_thread
 
 logger = logging.getLogger(__name__)
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Cache invalidations travel between workers on this fan-out channel; every
+# worker tracks the one topic, so each invalidation reaches all of them
+CONTEXT_CHANNEL = "context"
+CONTEXT_TOPIC = "invalidations"
+
 
 # ============================================================================
 # DATA CLASSES
@@ -248,6 +260,163 @@ def init_unified_context_tables():
 
 # connect_db and release_connection are imported from database module (pool-based)
 
+def _json_value(value, default):
+    """JSONB column value: parsed by psycopg2, text from asyncpg"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return default
+    return value or default
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class ContextCache:
+    """
+    Per-user UnifiedContext cache.
+
+    Every write that changes a user's context calls invalidate(user_id). A
+    load that was running while a write happened is not stored, so a cached
+    context is never older than the last write on this worker. Writes made
+    on other workers arrive through the fan-out hub (see
+    subscribe_context_invalidations); CONTEXT_CACHE_TTL bounds staleness if
+    one is lost. Cached contexts are shared: treat them as read-only.
+    """
+
+    def __init__(self, ttl: float = CONTEXT_CACHE_TTL, max_users: int = CONTEXT_CACHE_MAX_USERS,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.max_users = max(1, max_users)
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, UnifiedContext]]" = OrderedDict()
+        # Counter value at each user's last write, capped at max_users; users
+        # dropped from it read as _floor, which is above any generation they
+        # could have taken before that write
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+        self._lock = threading.Lock()  # writers invalidate from db threads
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: str) -> Optional["UnifiedContext"]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self._stats["misses"] += 1
+            return None
+
+    def generation(self, user_id: str) -> int:
+        """Take before loading; pass to put()."""
+        with self._lock:
+            return self._generations.get(user_id, self._floor)
+
+    def put(self, user_id: str, context: "UnifiedContext", generation: int) -> bool:
+        if self.ttl <= 0:
+            return False
+        with self._lock:
+            if self._generations.get(user_id, self._floor) != generation:
+                return False  # written to while loading
+            self._entries[user_id] = (self._clock() + self.ttl, context)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._counter += 1
+            self._generations[user_id] = self._counter
+            self._generations.move_to_end(user_id)
+            while len(self._generations) > self.max_users:
+                _, dropped = self._generations.popitem(last=False)
+                self._floor = max(self._floor, dropped)
+            self._entries.pop(user_id, None)
+            self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "users": len(self._entries)}
+
+
+_context_cache: Optional[ContextCache] = None
+
+
+def get_context_cache() -> ContextCache:
+    global _context_cache
+    if _context_cache is None:
+        _context_cache = ContextCache()
+    return _context_cache
+
+
+# This worker's invalidation subscription (see subscribe_context_invalidations)
+_WORKER_ID = uuid.uuid4().hex
+_invalidation_hub: Optional[FanoutHub] = None
+_invalidation_loop: Optional[asyncio.AbstractEventLoop] = None
+_invalidation_tasks: Set[asyncio.Future] = set()
+
+
+def invalidate_context(user_id: str) -> None:
+    """Drop a user's cached context after a write that changes it, on every worker"""
+    get_context_cache().invalidate(user_id)
+    _publish_invalidation(user_id)
+
+
+async def subscribe_context_invalidations(hub: Optional[FanoutHub] = None) -> None:
+    """
+    Exchange context invalidations with the other workers through the fan-out
+    hub. Call once per worker at startup, on its event loop; writers on db
+    threads publish through that loop.
+    """
+    global _invalidation_hub, _invalidation_loop
+    hub = hub or get_fanout_hub()
+    hub.register(CONTEXT_CHANNEL, _apply_invalidation)
+    await hub.track(CONTEXT_CHANNEL, CONTEXT_TOPIC)
+    _invalidation_hub = hub
+    _invalidation_loop = asyncio.get_running_loop()
+
+
+async def unsubscribe_context_invalidations() -> None:
+    global _invalidation_hub, _invalidation_loop
+    hub, _invalidation_hub, _invalidation_loop = _invalidation_hub, None, None
+    if hub is not None:
+        await hub.untrack(CONTEXT_CHANNEL, CONTEXT_TOPIC)
+
+
+async def _apply_invalidation(message: FanoutMessage) -> None:
+    """Fan-out handler: another worker wrote to this user's context"""
+    if message.payload.get("origin") != _WORKER_ID:
+        get_context_cache().invalidate(message.payload["user_id"])
+
+
+def _publish_invalidation(user_id: str) -> None:
+    """Send the invalidation to the other workers (fire and forget, from any thread)"""
+    hub, loop = _invalidation_hub, _invalidation_loop
+    if hub is None or loop is None or loop.is_closed():
+        return  # not subscribed (scripts, tests): this worker only
+    payload = {"user_id": user_id, "origin": _WORKER_ID}
+    try:
+        on_loop = asyncio.get_running_loop() is loop
+    except RuntimeError:
+        on_loop = False
+    if on_loop:
+        future = loop.create_task(hub.publish(CONTEXT_CHANNEL, CONTEXT_TOPIC, payload))
+    else:
+        future = asyncio.run_coroutine_threadsafe(hub.publish(CONTEXT_CHANNEL, CONTEXT_TOPIC, payload), loop)
+    _invalidation_tasks.add(future)
+    future.add_done_callback(_invalidation_tasks.discard)
+
 
 # ============================================================================
 # PROFILE MANAGEMENT
@@ -287,6 +456,7 @@ def save_user_profile(
             json.dumps(kwargs.get('preferences', {}))
         ))
         conn.commit()
+        invalidate_context(user_id)
         logger.info(f"✅ Saved profile for {user_id}")
         return True
     except Exception as e:
@@ -298,6 +468,32 @@ def save_user_profile(
         release_connection(conn)
 
 
+_PROFILE_SQL = """
+    SELECT url, industry, market, known_competitors, revenue_estimate, 
+           company_size, goals, preferences, created_at, updated_at
+    FROM user_profiles
+    WHERE user_id = %s
+"""
+
+
+def _profile_from_row(user_id: str, row) -> Optional[Dict[str, Any]]:
+    if not row:
+        return None
+    return {
+        'user_id': user_id,
+        'url': row[0],
+        'industry': row[1],
+        'market': row[2],
+        'known_competitors': row[3] or [],
+        'revenue_estimate': float(row[4]) if row[4] else None,
+        'company_size': row[5],
+        'goals': row[6] or [],
+        'preferences': _json_value(row[7], {}),
+        'created_at': _isoformat(row[8]),
+        'updated_at': _isoformat(row[9])
+    }
+
+
 def get_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
     """Get user profile"""
     conn = connect_db()
@@ -306,29 +502,8 @@ def get_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
     
     try:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT url, industry, market, known_competitors, revenue_estimate, 
-                   company_size, goals, preferences, created_at, updated_at
-            FROM user_profiles
-            WHERE user_id = %s
-        """, (user_id,))
-        
-        row = cursor.fetchone()
-        if row:
-            return {
-                'user_id': user_id,
-                'url': row[0],
-                'industry': row[1],
-                'market': row[2],
-                'known_competitors': row[3] or [],
-                'revenue_estimate': float(row[4]) if row[4] else None,
-                'company_size': row[5],
-                'goals': row[6] or [],
-                'preferences': row[7] or {},
-                'created_at': row[8].isoformat() if row[8] else None,
-                'updated_at': row[9].isoformat() if row[9] else None
-            }
-        return None
+        cursor.execute(_PROFILE_SQL, (user_id,))
+        return _profile_from_row(user_id, cursor.fetchone())
     except Exception as e:
         logger.error(f"Failed to get profile: {e}")
         return None
@@ -402,6 +577,7 @@ def save_analysis(
         
         analysis_id = cursor.fetchone()[0]
         conn.commit()
+        invalidate_context(user_id)
         logger.info(f"✅ Saved analysis {analysis_id} for {user_id}")
         return analysis_id
     except Exception as e:
@@ -413,6 +589,36 @@ def save_analysis(
         release_connection(conn)
 
 
+# Query compatible with analysis_history_schema.sql structure
+_ANALYSES_SQL = """
+    SELECT a.id, a.url, ar.digital_maturity_score as score, 
+           a.status, a.analysis_type, a.duration_seconds, a.created_at
+    FROM analyses a
+    LEFT JOIN analysis_results ar ON ar.analysis_id = a.id
+    WHERE a.user_id = %s
+    ORDER BY a.created_at DESC
+    LIMIT %s
+"""
+
+
+def _analysis_from_row(row) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'url': row[1],
+        'score': row[2] or 0,
+        'ranking': None,  # Not in current schema
+        'total_competitors': None,  # Not in current schema
+        'revenue_at_risk': 0,
+        'rasm_score': None,
+        'benchmark': {},
+        'threats': [],
+        'opportunities': [],
+        'action_plan': {},
+        'duration_seconds': float(row[5]) if row[5] else 0,
+        'created_at': _isoformat(row[6])
+    }
+
+
 def get_recent_analyses(user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
     """Get recent analyses for user"""
     conn = connect_db()
@@ -421,35 +627,8 @@ def get_recent_analyses(user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
     
     try:
         cursor = conn.cursor()
-        # Query compatible with analysis_history_schema.sql structure
-        cursor.execute("""
-            SELECT a.id, a.url, ar.digital_maturity_score as score, 
-                   a.status, a.analysis_type, a.duration_seconds, a.created_at
-            FROM analyses a
-            LEFT JOIN analysis_results ar ON ar.analysis_id = a.id
-            WHERE a.user_id = %s
-            ORDER BY a.created_at DESC
-            LIMIT %s
-        """, (user_id, limit))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'id': row[0],
-                'url': row[1],
-                'score': row[2] or 0,
-                'ranking': None,  # Not in current schema
-                'total_competitors': None,  # Not in current schema
-                'revenue_at_risk': 0,
-                'rasm_score': None,
-                'benchmark': {},
-                'threats': [],
-                'opportunities': [],
-                'action_plan': {},
-                'duration_seconds': float(row[5]) if row[5] else 0,
-                'created_at': row[6].isoformat() if row[6] else None
-            })
-        return results
+        cursor.execute(_ANALYSES_SQL, (user_id, limit))
+        return [_analysis_from_row(row) for row in cursor.fetchall()]
     except Exception as e:
         logger.error(f"Failed to get analyses: {e}")
         return []
@@ -498,6 +677,7 @@ def add_tracked_competitor(
             json.dumps(kwargs.get('company_intel', {}))
         ))
         conn.commit()
+        invalidate_context(user_id)
         logger.info(f"✅ Tracked competitor: {url}")
         return True
     except Exception as e:
@@ -509,6 +689,37 @@ def add_tracked_competitor(
         release_connection(conn)
 
 
+def _tracked_query(user_id: str, active_only: bool = True) -> Tuple[str, list]:
+    query = """
+        SELECT id, url, domain, name, business_id, industry,
+               last_score, last_analysis, company_intel, 
+               tracking_since, last_checked, notes
+        FROM tracked_competitors
+        WHERE user_id = %s
+    """
+    if active_only:
+        query += " AND is_active = TRUE"
+    query += " ORDER BY last_checked DESC NULLS LAST"
+    return query, [user_id]
+
+
+def _tracked_from_row(row) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'url': row[1],
+        'domain': row[2],
+        'name': row[3],
+        'business_id': row[4],
+        'industry': row[5],
+        'last_score': row[6],
+        'last_analysis': _json_value(row[7], {}),
+        'company_intel': _json_value(row[8], {}),
+        'tracking_since': _isoformat(row[9]),
+        'last_checked': _isoformat(row[10]),
+        'notes': row[11]
+    }
+
+
 def get_tracked_competitors(user_id: str, active_only: bool = True) -> List[Dict[str, Any]]:
     """Get tracked competitors for user"""
     conn = connect_db()
@@ -517,36 +728,8 @@ def get_tracked_competitors(user_id: str, active_only: bool = True) -> List[Dict
     
     try:
         cursor = conn.cursor()
-        query = """
-            SELECT id, url, domain, name, business_id, industry,
-                   last_score, last_analysis, company_intel, 
-                   tracking_since, last_checked, notes
-            FROM tracked_competitors
-            WHERE user_id = %s
-        """
-        if active_only:
-            query += " AND is_active = TRUE"
-        query += " ORDER BY last_checked DESC NULLS LAST"
-        
-        cursor.execute(query, (user_id,))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'id': row[0],
-                'url': row[1],
-                'domain': row[2],
-                'name': row[3],
-                'business_id': row[4],
-                'industry': row[5],
-                'last_score': row[6],
-                'last_analysis': row[7] or {},
-                'company_intel': row[8] or {},
-                'tracking_since': row[9].isoformat() if row[9] else None,
-                'last_checked': row[10].isoformat() if row[10] else None,
-                'notes': row[11]
-            })
-        return results
+        cursor.execute(*_tracked_query(user_id, active_only))
+        return [_tracked_from_row(row) for row in cursor.fetchall()]
     except Exception as e:
         logger.error(f"Failed to get tracked competitors: {e}")
         return []
@@ -589,6 +772,7 @@ def save_discovered_competitor(
             relevance_score, json.dumps(company_intel or {})
         ))
         conn.commit()
+        invalidate_context(user_id)
         return True
     except Exception as e:
         logger.error(f"Failed to save discovered competitor: {e}")
@@ -599,6 +783,39 @@ def save_discovered_competitor(
         release_connection(conn)
 
 
+def _discovered_query(user_id: str, status: str = None, limit: int = 50) -> Tuple[str, list]:
+    query = """
+        SELECT id, url, domain, name, discovery_source, relevance_score,
+               status, company_intel, discovered_at, reviewed_at
+        FROM discovered_competitors
+        WHERE user_id = %s
+    """
+    params = [user_id]
+    
+    if status:
+        query += " AND status = %s"
+        params.append(status)
+    
+    query += " ORDER BY relevance_score DESC, discovered_at DESC LIMIT %s"
+    params.append(limit)
+    return query, params
+
+
+def _discovered_from_row(row) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'url': row[1],
+        'domain': row[2],
+        'name': row[3],
+        'discovery_source': row[4],
+        'relevance_score': float(row[5]) if row[5] else 0,
+        'status': row[6],
+        'company_intel': _json_value(row[7], {}),
+        'discovered_at': _isoformat(row[8]),
+        'reviewed_at': _isoformat(row[9])
+    }
+
+
 def get_discovered_competitors(
     user_id: str, 
     status: str = None,
@@ -611,38 +828,8 @@ def get_discovered_competitors(
     
     try:
         cursor = conn.cursor()
-        query = """
-            SELECT id, url, domain, name, discovery_source, relevance_score,
-                   status, company_intel, discovered_at, reviewed_at
-            FROM discovered_competitors
-            WHERE user_id = %s
-        """
-        params = [user_id]
-        
-        if status:
-            query += " AND status = %s"
-            params.append(status)
-        
-        query += " ORDER BY relevance_score DESC, discovered_at DESC LIMIT %s"
-        params.append(limit)
-        
-        cursor.execute(query, params)
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'id': row[0],
-                'url': row[1],
-                'domain': row[2],
-                'name': row[3],
-                'discovery_source': row[4],
-                'relevance_score': float(row[5]) if row[5] else 0,
-                'status': row[6],
-                'company_intel': row[7] or {},
-                'discovered_at': row[8].isoformat() if row[8] else None,
-                'reviewed_at': row[9].isoformat() if row[9] else None
-            })
-        return results
+        cursor.execute(*_discovered_query(user_id, status, limit))
+        return [_discovered_from_row(row) for row in cursor.fetchall()]
     except Exception as e:
         logger.error(f"Failed to get discovered competitors: {e}")
         return []
@@ -665,6 +852,7 @@ def update_discovered_status(user_id: str, url: str, status: str) -> bool:
             WHERE user_id = %s AND url = %s
         """, (status, user_id, url))
         conn.commit()
+        invalidate_context(user_id)
         return cursor.rowcount > 0
     except Exception as e:
         logger.error(f"Failed to update status: {e}")
@@ -707,6 +895,7 @@ def save_agent_insight(
             insight_type, priority, message, json.dumps(data or {})
         ))
         conn.commit()
+        invalidate_context(user_id)
         return True
     except Exception as e:
         logger.error(f"Failed to save insight: {e}")
@@ -717,6 +906,40 @@ def save_agent_insight(
         release_connection(conn)
 
 
+def _insights_query(user_id: str, agent_id: str = None, limit: int = 50, days: int = 30) -> Tuple[str, list]:
+    # make_interval rather than INTERVAL '%s days': a placeholder inside a
+    # string literal only works with psycopg2's client-side interpolation
+    query = """
+        SELECT id, analysis_id, agent_id, agent_name, insight_type,
+               priority, message, data, created_at
+        FROM agent_insights
+        WHERE user_id = %s AND created_at > NOW() - make_interval(days => %s)
+    """
+    params = [user_id, days]
+    
+    if agent_id:
+        query += " AND agent_id = %s"
+        params.append(agent_id)
+    
+    query += " ORDER BY created_at DESC LIMIT %s"
+    params.append(limit)
+    return query, params
+
+
+def _insight_from_row(row) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'analysis_id': row[1],
+        'agent_id': row[2],
+        'agent_name': row[3],
+        'insight_type': row[4],
+        'priority': row[5],
+        'message': row[6],
+        'data': _json_value(row[7], {}),
+        'created_at': _isoformat(row[8])
+    }
+
+
 def get_agent_insights(
     user_id: str,
     agent_id: str = None,
@@ -730,37 +953,8 @@ def get_agent_insights(
     
     try:
         cursor = conn.cursor()
-        query = """
-            SELECT id, analysis_id, agent_id, agent_name, insight_type,
-                   priority, message, data, created_at
-            FROM agent_insights
-            WHERE user_id = %s AND created_at > NOW() - INTERVAL '%s days'
-        """
-        params = [user_id, days]
-        
-        if agent_id:
-            query += " AND agent_id = %s"
-            params.append(agent_id)
-        
-        query += " ORDER BY created_at DESC LIMIT %s"
-        params.append(limit)
-        
-        cursor.execute(query, params)
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'id': row[0],
-                'analysis_id': row[1],
-                'agent_id': row[2],
-                'agent_name': row[3],
-                'insight_type': row[4],
-                'priority': row[5],
-                'message': row[6],
-                'data': row[7] or {},
-                'created_at': row[8].isoformat() if row[8] else None
-            })
-        return results
+        cursor.execute(*_insights_query(user_id, agent_id, limit, days))
+        return [_insight_from_row(row) for row in cursor.fetchall()]
     except Exception as e:
         logger.error(f"Failed to get insights: {e}")
         return []
@@ -773,11 +967,39 @@ def get_agent_insights(
 # UNIFIED CONTEXT - THE MAIN FUNCTION
 # ============================================================================
 
-def get_unified_context(user_id: str) -> UnifiedContext:
+async def get_unified_context(user_id: str) -> UnifiedContext:
     """
     Get complete unified context for AI agents.
     This is the main function that aggregates all data sources.
+
+    Served from the per-user ContextCache until a write invalidates it;
+    on a miss the five queries run concurrently on the shared pool.
     """
+    cache = get_context_cache()
+    context = cache.get(user_id)
+    if context is not None:
+        return context
+    
+    generation = cache.generation(user_id)
+    pool = await _context_pool()
+    if pool is not None:
+        context, complete = await _load_unified_context_async(pool, user_id)
+    else:
+        # No shared pool (no DATABASE_URL / asyncpg): sequential sync queries
+        context, complete = await run_in_db_thread(_load_unified_context, user_id)
+    
+    # A failed section is not cached as "empty"
+    if complete:
+        cache.put(user_id, context, generation)
+    return context
+
+
+def load_unified_context(user_id: str) -> UnifiedContext:
+    """Uncached, synchronous get_unified_context (scripts, worker threads)"""
+    return _load_unified_context(user_id)[0]
+
+
+def _load_unified_context(user_id: str) -> Tuple[UnifiedContext, bool]:
     context = UnifiedContext(user_id=user_id)
     
     # 1. User Profile
@@ -798,12 +1020,67 @@ def get_unified_context(user_id: str) -> UnifiedContext:
     # 6. Calculate Trends
     context.trends = calculate_trends(context)
     
-    logger.info(f"📊 Unified context for {user_id}: "
+    _log_context(context)
+    # The sync getters swallow their errors, so completeness is unknown
+    return context, False
+
+
+async def _context_pool():
+    """The shared pool's context budget, or None if there is no shared pool"""
+    from core.db_pool import get_db_pool
+    
+    shared = get_db_pool()
+    if not shared.enabled:
+        return None
+    try:
+        await shared.start()
+    except Exception as e:
+        logger.warning(f"Shared pool unavailable for unified context: {e}")
+        return None
+    return shared.budget("context")
+
+
+async def _load_unified_context_async(pool, user_id: str) -> Tuple[UnifiedContext, bool]:
+    from core.db_pool import to_asyncpg_query
+    
+    async def fetch(sql: str, params) -> list:
+        query, args = to_asyncpg_query(sql, params)
+        async with pool.acquire() as conn:
+            return await conn.fetch(query, *args)
+    
+    sections = [
+        ("profile", fetch(_PROFILE_SQL, (user_id,)), lambda rows: _profile_from_row(user_id, rows[0] if rows else None), None),
+        ("analyses", fetch(_ANALYSES_SQL, (user_id, 10)), lambda rows: [_analysis_from_row(r) for r in rows], []),
+        ("tracked competitors", fetch(*_tracked_query(user_id)), lambda rows: [_tracked_from_row(r) for r in rows], []),
+        ("discovered competitors", fetch(*_discovered_query(user_id, limit=20)), lambda rows: [_discovered_from_row(r) for r in rows], []),
+        ("insights", fetch(*_insights_query(user_id, days=30, limit=100)), lambda rows: [_insight_from_row(r) for r in rows], []),
+    ]
+    results = await asyncio.gather(*(coro for _, coro, _, _ in sections), return_exceptions=True)
+    
+    values = []
+    complete = True
+    for (name, _, convert, default), rows in zip(sections, results):
+        if isinstance(rows, BaseException):
+            logger.error(f"Failed to get {name}: {rows}")
+            values.append(default)
+            complete = False
+        else:
+            values.append(convert(rows))
+    
+    context = UnifiedContext(user_id=user_id)
+    (context.profile, context.recent_analyses, context.tracked_competitors,
+     context.discovered_competitors, context.historical_insights) = values
+    context.trends = calculate_trends(context)
+    
+    _log_context(context)
+    return context, complete
+
+
+def _log_context(context: UnifiedContext) -> None:
+    logger.info(f"📊 Unified context for {context.user_id}: "
                 f"{len(context.recent_analyses)} analyses, "
                 f"{len(context.tracked_competitors)} tracked, "
                 f"{len(context.discovered_competitors)} discovered")
-    
-    return context
 
 
 def calculate_trends(context: UnifiedContext) -> Dict[str, Any]: